@@ -0,0 +1,33 @@
+"""Add cancelled schedule status
+
+Revision ID: 002_schedule_cancelled_status
+Revises: 001_initial_schema
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '002_schedule_cancelled_status'
+down_revision = '001_initial_schema'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Cancelled schedules are kept rather than deleted; the enum type only
+    # exists where tables were created from the models
+    op.execute("""
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM pg_type WHERE typname = 'content_status') THEN
+                ALTER TYPE content_status ADD VALUE IF NOT EXISTS 'cancelled';
+            END IF;
+        END
+        $$;
+    """)
+
+
+def downgrade() -> None:
+    # PostgreSQL cannot drop an enum value; cancelled rows are left as they are
+    pass
@@ -0,0 +1,48 @@
+"""Track row updates on schedules and post_metrics for incremental exports
+
+Revision ID: 003_export_updated_at
+Revises: 002_schedule_cancelled_status
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '003_export_updated_at'
+down_revision = '002_schedule_cancelled_status'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Scheduled exports watermark on updated_at so changed rows are exported
+    # again. post_metrics only exists where tables were created from the
+    # models; existing rows start from created_at so stored watermarks hold.
+    for table in ('schedules', 'post_metrics'):
+        op.execute(f"""
+            DO $$
+            BEGIN
+                IF to_regclass('{table}') IS NOT NULL THEN
+                    ALTER TABLE {table} ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP;
+                    UPDATE {table} SET updated_at = created_at WHERE updated_at IS NULL;
+                    ALTER TABLE {table} ALTER COLUMN updated_at SET DEFAULT now();
+                    CREATE INDEX IF NOT EXISTS ix_{table}_updated_at ON {table} (updated_at);
+                END IF;
+            END
+            $$;
+        """)
+
+
+def downgrade() -> None:
+    # schedules had updated_at from the initial schema; only the index is new there
+    op.execute("DROP INDEX IF EXISTS ix_schedules_updated_at")
+    op.execute("""
+        DO $$
+        BEGIN
+            IF to_regclass('post_metrics') IS NOT NULL THEN
+                DROP INDEX IF EXISTS ix_post_metrics_updated_at;
+                ALTER TABLE post_metrics DROP COLUMN IF EXISTS updated_at;
+            END IF;
+        END
+        $$;
+    """)
@@ -0,0 +1,43 @@
+"""Store when each post's insights are next due
+
+Revision ID: 004_insights_next_poll_at
+Revises: 003_export_updated_at
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '004_insights_next_poll_at'
+down_revision = '003_export_updated_at'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The insights poller selects only due posts by next_poll_at; the table
+    # only exists where tables were created from the models. NULL means
+    # never polled, so existing posts are picked up on the first cycle.
+    op.execute("""
+        DO $$
+        BEGIN
+            IF to_regclass('schedule_external') IS NOT NULL THEN
+                ALTER TABLE schedule_external ADD COLUMN IF NOT EXISTS next_poll_at TIMESTAMP;
+                CREATE INDEX IF NOT EXISTS ix_schedule_external_next_poll_at ON schedule_external (next_poll_at);
+            END IF;
+        END
+        $$;
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_schedule_external_next_poll_at")
+    op.execute("""
+        DO $$
+        BEGIN
+            IF to_regclass('schedule_external') IS NOT NULL THEN
+                ALTER TABLE schedule_external DROP COLUMN IF EXISTS next_poll_at;
+            END IF;
+        END
+        $$;
+    """)
@@ -0,0 +1,40 @@
+"""Add per-table progress checkpoints to deletion requests
+
+Revision ID: 005_deletion_request_progress
+Revises: 004_insights_next_poll_at
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '005_deletion_request_progress'
+down_revision = '004_insights_next_poll_at'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Resumable organization deletion records its checkpoints here; NULL
+    # means the request has not started, so existing rows need no backfill
+    op.execute("""
+        DO $$
+        BEGIN
+            IF to_regclass('deletion_requests') IS NOT NULL THEN
+                ALTER TABLE deletion_requests ADD COLUMN IF NOT EXISTS progress JSON;
+            END IF;
+        END
+        $$;
+    """)
+
+
+def downgrade() -> None:
+    op.execute("""
+        DO $$
+        BEGIN
+            IF to_regclass('deletion_requests') IS NOT NULL THEN
+                ALTER TABLE deletion_requests DROP COLUMN IF EXISTS progress;
+            END IF;
+        END
+        $$;
+    """)
@@ -11,7 +11,7 @@ class BudgetGuard:
         self.db = db
         self.settings = get_settings()
 
-    async def get_or_create_budget(self, org_id: str) -> AIBudget:
+    def get_or_create_budget(self, org_id: str) -> AIBudget:
         """Get or create AI budget for organization."""
         budget = self.db.query(AIBudget).filter(
             AIBudget.org_id == org_id,
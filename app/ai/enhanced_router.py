@@ -1,9 +1,11 @@
 from __future__ import annotations
 
+import asyncio
+import dataclasses
 import json
 import hashlib
 import time
-from typing import Optional, Any, List, Dict, Tuple
+from typing import Optional, Any, AsyncIterator, List, Dict, Tuple
 from dataclasses import dataclass
 from app.observability.tracer import tracer
 
@@ -20,9 +22,11 @@ except ImportError:
     class StatusCode:
         ERROR = "ERROR"
 
-from app.cache.redis import cache
+from app.cache.semantic import get_semantic_cache
+from app.cache.tiered import get_ai_cache
 from app.ai.budget_guard import BudgetGuard
 from app.services.model_router import ModelRouter, AIRouter
+from app.services.ai_router import ProviderSlots
 from app.core.config import get_settings
 
 
@@ -45,6 +49,7 @@ class GenerationResult:
     cost_gbp: float
     from_cache: bool = False
     duration_ms: int = 0
+    error: Optional[str] = None
 
 
 class EnhancedAIRouter:
@@ -54,6 +59,9 @@ class EnhancedAIRouter:
         self.settings = get_settings()
         self.budget_guard = BudgetGuard(db_session) if db_session else None
         self.tracer = tracer
+        self.slots = ProviderSlots.from_settings()
+        self.cache = get_ai_cache()
+        self.semantic_cache = get_semantic_cache()
 
     def _estimate_tokens(self, text: str) -> int:
         """Rough token estimation (4 chars per token average)."""
@@ -83,76 +91,81 @@ class EnhancedAIRouter:
         key_data = f"{request.task}:{request.prompt}:{request.system or ''}"
         return f"ai:{request.task}:{hashlib.sha256(key_data.encode()).hexdigest()[:16]}"
 
-    async def _get_from_cache(self, cache_key: str) -> Optional[GenerationResult]:
-        """Get result from cache if available."""
+    def _semantic_scope(self, request: GenerationRequest) -> Tuple[str, ...]:
+        """Near-duplicate matches never cross organizations or system prompts."""
+        system_hash = hashlib.sha256((request.system or "").encode()).hexdigest()[:16]
+        return (request.org_id or "", system_hash)
+
+    async def _get_from_cache(self, cache_key: str, task: str = "default") -> Optional[GenerationResult]:
+        """Get result from the local LRU or Redis if available."""
         if not cache_key:
             return None
         
-        cached_data = await cache.get("ai_generation", cache_key)
+        cached_data = await self.cache.get("ai_generation", cache_key, task=task)
         if cached_data:
             return GenerationResult(**cached_data)
         return None
 
-    async def _save_to_cache(self, cache_key: str, result: GenerationResult) -> None:
-        """Save result to cache."""
+    async def _save_to_cache(self, cache_key: str, result: GenerationResult, task: str = "default") -> None:
+        """Save result to both cache tiers."""
         if not cache_key:
             return
         
         cache_data = {
             "text": result.text,
             "provider": result.provider,
-            "tokens_in": result.tokens_out,
+            "tokens_in": result.tokens_in,
             "tokens_out": result.tokens_out,
             "cost_gbp": result.cost_gbp,
             "from_cache": True,
             "duration_ms": result.duration_ms
         }
-        await cache.set("ai_generation", cache_key, cache_data)
+        await self.cache.set("ai_generation", cache_key, cache_data, task=task)
 
-    async def _generate_single(self, request: GenerationRequest) -> GenerationResult:
-        """Generate single result using appropriate model."""
-        start_time = time.time()
-        
-        # Check budget constraints
+    async def _generate_and_cache(self, request: GenerationRequest, cache_key: Optional[str]) -> GenerationResult:
+        result = await self._generate_single(request)
+        if cache_key:
+            await self._save_to_cache(cache_key, result, task=request.task)
+        return result
+
+    def _choose_provider(self, request: GenerationRequest) -> str:
+        """Hosted model by default; the open model for non-critical tasks over budget."""
         if self.budget_guard and request.org_id:
             can_use_hosted, reason = self.budget_guard.can_use_hosted_model(
                 request.org_id, request.task
             )
-            
             if not can_use_hosted and not request.is_critical:
-                # Use open model for non-critical tasks when over budget
-                provider = "open"
-                text = await self.ai_router._open_complete(request.system, request.prompt)
-            else:
-                # Use hosted model
-                provider = self.settings.model_router_primary or "openai:gpt-4o-mini"
-                text = await self.model_router.complete(request.prompt, request.system)
-        else:
-            # No budget guard - use default routing
-            provider = self.settings.model_router_primary or "openai:gpt-4o-mini"
-            text = await self.model_router.complete(request.prompt, request.system)
+                return "open"
+        return self.settings.model_router_primary or "openai:gpt-4o-mini"
 
-        duration_ms = int((time.time() - start_time) * 1000)
-        
-        # Estimate tokens and cost
+    def _finish(self, request: GenerationRequest, provider: str, text: str, start_time: float) -> GenerationResult:
+        """Estimate tokens and cost, and record usage for budget tracking."""
         tokens_in = self._estimate_tokens(f"{request.system or ''}\n{request.prompt}")
         tokens_out = self._estimate_tokens(text)
         cost_gbp = self._estimate_cost(provider, tokens_in, tokens_out)
         
-        result = GenerationResult(
+        if self.budget_guard and request.org_id:
+            self.budget_guard.record_usage(request.org_id, tokens_in + tokens_out, cost_gbp)
+        
+        return GenerationResult(
             text=text,
             provider=provider,
             tokens_in=tokens_in,
             tokens_out=tokens_out,
             cost_gbp=cost_gbp,
-            duration_ms=duration_ms
+            duration_ms=int((time.time() - start_time) * 1000)
         )
-        
-        # Record usage for budget tracking
-        if self.budget_guard and request.org_id:
-            self.budget_guard.record_usage(request.org_id, tokens_in + tokens_out, cost_gbp)
-        
-        return result
+
+    async def _generate_single(self, request: GenerationRequest) -> GenerationResult:
+        """Generate single result using appropriate model."""
+        start_time = time.time()
+        provider = self._choose_provider(request)
+        async with self.slots.slot(provider.split(":", 1)[0]):
+            if provider == "open":
+                text = await self.ai_router._open_complete(request.system, request.prompt)
+            else:
+                text = await self.model_router.complete(request.prompt, request.system)
+        return self._finish(request, provider, text, start_time)
 
     async def generate(self, request: GenerationRequest) -> GenerationResult:
         """Generate content with caching and budget awareness."""
@@ -167,20 +180,45 @@ class EnhancedAIRouter:
             # Try cache first
             cache_key = self._make_cache_key(request)
             if cache_key:
-                cached_result = await self._get_from_cache(cache_key)
+                cached_result = await self._get_from_cache(cache_key, request.task)
                 if cached_result:
                     span.set_attributes({
                         "ai.cache_hit": True,
                         "ai.duration_ms": cached_result.duration_ms
                     })
                     return cached_result
-            
-            # Generate new content
-            result = await self._generate_single(request)
-            
-            # Save to cache
-            if cache_key:
-                await self._save_to_cache(cache_key, result)
+                
+                # Reworded prompts: reuse the cached result of a close enough earlier prompt
+                embedding = None
+                if self.semantic_cache:
+                    similar_key, embedding = await self.semantic_cache.lookup(
+                        request.task, self._semantic_scope(request), request.prompt
+                    )
+                    cached_result = await self._get_from_cache(similar_key, request.task) if similar_key else None
+                    if cached_result:
+                        span.set_attributes({
+                            "ai.cache_hit": True,
+                            "ai.semantic_cache_hit": True,
+                            "ai.duration_ms": cached_result.duration_ms
+                        })
+                        return cached_result
+                
+                # Concurrent identical requests share one provider call
+                result, shared = await self.cache.single_flight(
+                    ("ai_generation", cache_key),
+                    lambda: self._generate_and_cache(request, cache_key),
+                    task=request.task
+                )
+                if embedding is not None and not shared:
+                    self.semantic_cache.remember(request.task, self._semantic_scope(request), embedding, cache_key)
+                if shared:
+                    span.set_attributes({
+                        "ai.cache_hit": True,
+                        "ai.duration_ms": result.duration_ms
+                    })
+                    return dataclasses.replace(result, from_cache=True)
+            else:
+                result = await self._generate_single(request)
             
             span.set_attributes({
                 "ai.cache_hit": False,
@@ -201,27 +239,80 @@ class EnhancedAIRouter:
             
             return result
 
+    async def stream_generate(self, request: GenerationRequest) -> AsyncIterator[str]:
+        """Yield generated text as it arrives.
+        
+        Cache hits come back as a single chunk. Usage is recorded when the
+        stream ends, including when the consumer stops early, and only
+        complete generations are cached.
+        """
+        cache_key = self._make_cache_key(request)
+        if cache_key:
+            cached_result = await self._get_from_cache(cache_key, request.task)
+            if cached_result:
+                yield cached_result.text
+                return
+        
+        start_time = time.time()
+        provider = self._choose_provider(request)
+        parts: List[str] = []
+        completed = False
+        try:
+            async with self.slots.slot(provider.split(":", 1)[0]):
+                if provider == "open":
+                    # The open endpoint has no streaming API
+                    text = await self.ai_router._open_complete(request.system, request.prompt)
+                    parts.append(text)
+                    yield text
+                else:
+                    async for delta in self.model_router.stream(request.prompt, request.system):
+                        parts.append(delta)
+                        yield delta
+            completed = True
+        finally:
+            result = self._finish(request, provider, "".join(parts), start_time)
+            if completed and cache_key:
+                await self._save_to_cache(cache_key, result, task=request.task)
+
     async def batch_generate(self, requests: List[GenerationRequest]) -> List[GenerationResult]:
-        """Generate multiple requests in batch when possible."""
-        if len(requests) > 8:
-            # Split large batches
-            results = []
-            for i in range(0, len(requests), 8):
-                batch = requests[i:i+8]
-                batch_results = await self._process_batch(batch)
-                results.extend(batch_results)
-            return results
+        """Generate a batch concurrently, in request order.
         
-        return await self._process_batch(requests)
-
-    async def _process_batch(self, requests: List[GenerationRequest]) -> List[GenerationResult]:
-        """Process a batch of requests."""
-        # For now, process sequentially (can be optimized with provider-specific batching)
-        results = []
-        for request in requests:
-            result = await self.generate(request)
-            results.append(result)
-        return results
+        Identical requests are generated once. Concurrency is bounded per
+        provider by ``ai_provider_concurrency``; a failed item comes back with
+        ``error`` set instead of failing the batch.
+        """
+        keys = [self._batch_key(request) for request in requests]
+        unique: Dict[Tuple, GenerationRequest] = {}
+        for key, request in zip(keys, requests):
+            unique.setdefault(key, request)
+        
+        results = await asyncio.gather(*(self._generate_item(request) for request in unique.values()))
+        by_key = dict(zip(unique, results))
+        return [by_key[key] for key in keys]
+
+    @staticmethod
+    def _batch_key(request: GenerationRequest) -> Tuple:
+        return (
+            request.task,
+            request.prompt,
+            request.system,
+            request.org_id,
+            request.is_critical,
+            request.model_preference,
+        )
+
+    async def _generate_item(self, request: GenerationRequest) -> GenerationResult:
+        try:
+            return await self.generate(request)
+        except Exception as e:
+            return GenerationResult(
+                text="",
+                provider="error",
+                tokens_in=0,
+                tokens_out=0,
+                cost_gbp=0.0,
+                error=str(e)
+            )
 
     async def get_usage_stats(self, org_id: str) -> Dict[str, Any]:
         """Get AI usage statistics for organization."""
@@ -0,0 +1,274 @@
+"""
+Local Performance Model
+Per-org, per-platform ridge regression over content features, trained on post
+metrics history, versioned on disk as JSON and scored in vectorized batches
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import re
+import threading
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import get_settings
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
+
+logger = logging.getLogger(__name__)
+
+TOPICS = ("promotional", "announcement", "educational", "gratitude")
+
+FEATURE_NAMES = (
+    "content_length", "hashtag_count", "mention_count", "has_media", "sentiment_score",
+    "hour_sin", "hour_cos", "weekday_sin", "weekday_cos",
+) + tuple(f"topic_{topic}" for topic in TOPICS)
+
+TARGETS = ("impressions", "reach", "engagements", "ctr", "engagement_rate")
+
+# Counts are fit in log space so a single viral post does not dominate the model
+LOG_TARGETS = frozenset({"impressions", "reach", "engagements"})
+
+
+def feature_vector(features: Any) -> List[float]:
+    """Numeric features of a ``ContentFeatures``; hour and weekday are encoded cyclically."""
+    hour = 2 * math.pi * features.time_of_day / 24
+    weekday = 2 * math.pi * features.day_of_week / 7
+    topics = set(features.topic_categories)
+    return [
+        features.content_length / 100.0,
+        float(features.hashtag_count),
+        float(features.mention_count),
+        1.0 if features.has_media else 0.0,
+        float(features.sentiment_score),
+        math.sin(hour), math.cos(hour),
+        math.sin(weekday), math.cos(weekday),
+    ] + [1.0 if topic in topics else 0.0 for topic in TOPICS]
+
+
+def target_vector(row: Dict[str, Any]) -> List[float]:
+    """Training targets of one history row, log-transformed where applicable."""
+    return [
+        math.log1p(max(0.0, float(row.get(target) or 0))) if target in LOG_TARGETS else float(row.get(target) or 0)
+        for target in TARGETS
+    ]
+
+
+def _solve(a: List[List[float]], b: List[List[float]]) -> List[List[float]]:
+    """Solve ``a @ x = b`` by Gauss-Jordan elimination with partial pivoting."""
+    n = len(a)
+    rows = [a[i][:] + b[i][:] for i in range(n)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(rows[r][col]))
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        scale = rows[col][col] or 1e-12
+        rows[col] = [value / scale for value in rows[col]]
+        for r in range(n):
+            if r != col and rows[r][col]:
+                factor = rows[r][col]
+                rows[r] = [value - factor * pivot_value for value, pivot_value in zip(rows[r], rows[col])]
+    return [row[n:] for row in rows]
+
+
+def _matmul(x: List[List[float]], w: List[List[float]]) -> List[List[float]]:
+    columns = list(zip(*w))
+    return [[sum(a * b for a, b in zip(row, column)) for column in columns] for row in x]
+
+
+@dataclass
+class PerformanceModel:
+    """A fitted multi-output ridge regression.
+
+    Features are standardized with the training means and scales; ``weights``
+    has the intercept in its first row and one column per target.
+    """
+
+    org_id: int
+    platform: str
+    means: List[float]
+    scales: List[float]
+    weights: List[List[float]]
+    residual_std: List[float]
+    n_samples: int
+    l2: float
+    trained_at: str
+    feature_names: Tuple[str, ...] = FEATURE_NAMES
+    targets: Tuple[str, ...] = TARGETS
+    version: int = 0
+
+    @classmethod
+    def fit(
+        cls,
+        org_id: int,
+        platform: str,
+        features: Sequence[Sequence[float]],
+        targets: Sequence[Sequence[float]],
+        l2: float = 1.0
+    ) -> "PerformanceModel":
+        """Fit on feature rows and ``target_vector`` rows."""
+        n = len(features)
+        means = [sum(column) / n for column in zip(*features)]
+        scales = [
+            math.sqrt(sum((value - mean) ** 2 for value in column) / n) or 1.0
+            for column, mean in zip(zip(*features), means)
+        ]
+        design = [[1.0] + [(value - m) / s for value, m, s in zip(row, means, scales)] for row in features]
+        dims = len(design[0])
+
+        # Ridge normal equations; the intercept is not penalized
+        if NUMPY_AVAILABLE:
+            x = np.asarray(design, dtype=np.float64)
+            y = np.asarray(targets, dtype=np.float64)
+            penalty = l2 * np.eye(dims)
+            penalty[0, 0] = 0.0
+            weights = np.linalg.solve(x.T @ x + penalty, x.T @ y)
+            residuals = y - x @ weights
+            residual_std = np.sqrt((residuals ** 2).mean(axis=0)).tolist()
+            weights = weights.tolist()
+        else:
+            xt = list(zip(*design))
+            gram = [[sum(a * b for a, b in zip(xt[i], xt[j])) + (l2 if i == j and i else 0.0) for j in range(dims)] for i in range(dims)]
+            moments = [[sum(a * b for a, b in zip(xt[i], column)) for column in zip(*targets)] for i in range(dims)]
+            weights = _solve(gram, moments)
+            fitted = _matmul(design, weights)
+            residual_std = [
+                math.sqrt(sum((row[k] - pred[k]) ** 2 for row, pred in zip(targets, fitted)) / n)
+                for k in range(len(TARGETS))
+            ]
+
+        return cls(
+            org_id=org_id,
+            platform=platform,
+            means=means,
+            scales=scales,
+            weights=weights,
+            residual_std=residual_std,
+            n_samples=n,
+            l2=l2,
+            trained_at=datetime.utcnow().isoformat()
+        )
+
+    def predict_batch(self, features: Sequence[Sequence[float]]) -> List[Dict[str, float]]:
+        """Predicted metrics for many feature rows in one matrix product."""
+        if not features:
+            return []
+        if NUMPY_AVAILABLE:
+            x = (np.asarray(features, dtype=np.float64) - np.asarray(self.means)) / np.asarray(self.scales)
+            raw = (np.hstack([np.ones((len(x), 1)), x]) @ np.asarray(self.weights)).tolist()
+        else:
+            design = [[1.0] + [(value - m) / s for value, m, s in zip(row, self.means, self.scales)] for row in features]
+            raw = _matmul(design, self.weights)
+        return [
+            {
+                target: max(0.0, math.expm1(value) if target in LOG_TARGETS else value)
+                for target, value in zip(self.targets, row)
+            }
+            for row in raw
+        ]
+
+    def contributions(self, features: Sequence[float], target: str = "engagement_rate") -> Dict[str, float]:
+        """Per-feature contribution to one target's prediction, in model units."""
+        k = self.targets.index(target)
+        return {
+            name: (value - mean) / scale * self.weights[i + 1][k]
+            for i, (name, value, mean, scale) in enumerate(zip(self.feature_names, features, self.means, self.scales))
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["feature_names"] = list(self.feature_names)
+        data["targets"] = list(self.targets)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PerformanceModel":
+        data = dict(data)
+        data["feature_names"] = tuple(data["feature_names"])
+        data["targets"] = tuple(data["targets"])
+        return cls(**data)
+
+
+class PerformanceModelStore:
+    """Versioned models on disk: ``<root>/<org>/<platform>/v<N>.json`` plus a ``LATEST`` pointer.
+
+    Loaded models are cached in-process per version, so scoring only reads
+    the small pointer file once a version is warm.
+    """
+
+    _cache: Dict[Tuple[str, int, str, int], PerformanceModel] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, root: str):
+        self.root = root
+
+    @classmethod
+    def from_settings(cls) -> Optional["PerformanceModelStore"]:
+        """Store at ``performance_model_path``, or None when it is not configured.
+
+        There is deliberately no local default: a worker-local directory is
+        lost on restart and not seen by other workers, so serving would load
+        a stale model or none at all.
+        """
+        root = get_settings().performance_model_path
+        if not root:
+            logger.warning("PERFORMANCE_MODEL_PATH not configured, local performance models are disabled")
+            return None
+        return cls(root)
+
+    def _dir(self, org_id: int, platform: str) -> str:
+        return os.path.join(self.root, str(org_id), re.sub(r"[^A-Za-z0-9_-]", "_", platform))
+
+    def latest_version(self, org_id: int, platform: str) -> int:
+        try:
+            with open(os.path.join(self._dir(org_id, platform), "LATEST")) as f:
+                return int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def save(self, model: PerformanceModel) -> int:
+        """Write the model as the next version and point ``LATEST`` at it."""
+        directory = self._dir(model.org_id, model.platform)
+        os.makedirs(directory, exist_ok=True)
+        model.version = self.latest_version(model.org_id, model.platform) + 1
+
+        path = os.path.join(directory, f"v{model.version}.json")
+        with open(path + ".part", "w") as f:
+            json.dump(model.to_dict(), f)
+        os.replace(path + ".part", path)
+
+        pointer = os.path.join(directory, "LATEST")
+        with open(pointer + ".part", "w") as f:
+            f.write(str(model.version))
+        os.replace(pointer + ".part", pointer)
+
+        logger.info(f"Saved performance model v{model.version} for org {model.org_id} on {model.platform}")
+        return model.version
+
+    def load(self, org_id: int, platform: str, version: Optional[int] = None) -> Optional[PerformanceModel]:
+        """A specific version, or the latest; None when no model has been trained."""
+        version = version or self.latest_version(org_id, platform)
+        if not version:
+            return None
+        key = (self.root, org_id, platform, version)
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+        try:
+            with open(os.path.join(self._dir(org_id, platform), f"v{version}.json")) as f:
+                model = PerformanceModel.from_dict(json.load(f))
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Could not load performance model v{version} for org {org_id} on {platform}: {e}")
+            return None
+        with self._lock:
+            self._cache[key] = model
+        return model
@@ -7,19 +7,40 @@ from __future__ import annotations
 
 import json
 import statistics
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, desc
+from sqlalchemy import String, cast, func, and_, desc, select
 
 from app.ai.enhanced_router import EnhancedAIRouter, GenerationRequest
+from app.ai.performance_model import PerformanceModel, PerformanceModelStore, feature_vector, target_vector
+from app.core.config import get_settings
 from app.models.analytics import PostMetrics, AnalyticsSummary
 from app.models.cms import ContentItem
+from app.models.content import Schedule
 from app.models.publishing import ExternalReference
 from app.observability.tracer import tracer
 
 
+# Local model feature -> advice when the draft sits (above, below) the org's average for it
+# and that holds its predicted engagement rate down
+DRIVER_ADVICE = {
+    'content_length': ("Try a shorter post", "Try a longer, more detailed post"),
+    'hashtag_count': ("Use fewer hashtags", "Add a few relevant hashtags"),
+    'mention_count': ("Use fewer mentions", "Mention relevant accounts or partners"),
+    'has_media': ("Try a text-only post", "Add an image or video"),
+    'sentiment_score': ("Use a more neutral tone", "Use a more positive tone"),
+    'hour_sin': ("Try a different time of day",) * 2,
+    'hour_cos': ("Try a different time of day",) * 2,
+    'weekday_sin': ("Try a different day of the week",) * 2,
+    'weekday_cos': ("Try a different day of the week",) * 2,
+}
+
+
 @dataclass
 class PerformancePrediction:
     """Predicted performance metrics for content"""
@@ -49,6 +70,130 @@ class ContentFeatures:
     brand_voice_match: float  # 0.0 to 1.0
 
 
+@dataclass
+class HistoricalPerformance:
+    """An org's recent performance history on one platform and its baseline"""
+    data: List[Dict[str, Any]]
+    baseline: Dict[str, float]
+
+
+class HistoricalFeatureLoader:
+    """
+    Loads recent post metrics together with their schedule and content in
+    one joined query, and caches the history and baseline per org, platform
+    and window.
+
+    A cached entry is reused while a cheap count/max(updated) probe over the
+    same rows is unchanged, so new or updated metrics invalidate it on the
+    next load in any process; ``ttl_seconds`` bounds how long the sliding
+    window can drift.
+    """
+    
+    HISTORY_LIMIT = 100
+    MAX_ENTRIES = 1024
+    
+    _cache: "OrderedDict[Tuple[int, str, int], Tuple[Any, float, HistoricalPerformance]]" = OrderedDict()
+    _lock = threading.Lock()
+    
+    def __init__(self, db: Session, ttl_seconds: float = 300.0):
+        self.db = db
+        self.ttl_seconds = ttl_seconds
+    
+    def load(self, org_id: int, platform: str, days_back: int = 90) -> HistoricalPerformance:
+        """History and baseline for an org and platform, from cache when still current"""
+        key = (org_id, platform, days_back)
+        cutoff_date = datetime.now() - timedelta(days=days_back)
+        fingerprint = self._fingerprint(org_id, platform, cutoff_date)
+        
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and cached[0] == fingerprint and time.monotonic() - cached[1] < self.ttl_seconds:
+                self._cache.move_to_end(key)
+                return cached[2]
+        
+        data = self._query_history(org_id, platform, cutoff_date)
+        history = HistoricalPerformance(data=data, baseline=PerformancePredictor._calculate_baseline_metrics(data))
+        
+        with self._lock:
+            self._cache[key] = (fingerprint, time.monotonic(), history)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.MAX_ENTRIES:
+                self._cache.popitem(last=False)
+        return history
+    
+    @classmethod
+    def invalidate(cls, org_id: Optional[int] = None) -> None:
+        """Drop cached history for one org, or everything"""
+        with cls._lock:
+            for key in [k for k in cls._cache if org_id is None or k[0] == org_id]:
+                del cls._cache[key]
+    
+    def _filters(self, org_id: int, platform: str, cutoff_date: datetime):
+        metrics = PostMetrics.__table__.c
+        return and_(
+            metrics.organization_id == org_id,
+            metrics.platform == platform,
+            metrics.metric_date >= cutoff_date,
+            metrics.impressions > 0  # Only posts with some performance data
+        )
+    
+    def _fingerprint(self, org_id: int, platform: str, cutoff_date: datetime) -> Tuple[Any, ...]:
+        metrics = PostMetrics.__table__.c
+        row = self.db.execute(
+            select(
+                func.count(metrics.id),
+                func.max(func.coalesce(metrics.updated_at, metrics.collected_at))
+            ).where(self._filters(org_id, platform, cutoff_date))
+        ).one()
+        return tuple(row)
+    
+    def training_rows(self, org_id: int, platform: str, days_back: int = 365,
+                      limit: int = 5000) -> List[Dict[str, Any]]:
+        """Uncached history with content text and schedule time, for fitting local models"""
+        cutoff_date = datetime.now() - timedelta(days=days_back)
+        return self._query_history(org_id, platform, cutoff_date, limit=limit, include_content=True)
+    
+    def _query_history(self, org_id: int, platform: str, cutoff_date: datetime,
+                       limit: Optional[int] = None, include_content: bool = False) -> List[Dict[str, Any]]:
+        metrics = PostMetrics.__table__
+        refs = ExternalReference.__table__
+        schedules = Schedule.__table__
+        content = ContentItem.__table__
+        
+        # Schedule ids are strings while external references and CMS content use integers
+        stmt = select(
+            metrics.c.impressions, metrics.c.reach, metrics.c.engagements, metrics.c.ctr,
+            metrics.c.engagement_rate, metrics.c.metric_date, metrics.c.platform,
+            content.c.content, content.c.hashtags, schedules.c.scheduled_at
+        ).select_from(
+            metrics
+            .join(refs, metrics.c.external_reference_id == refs.c.id)
+            .outerjoin(schedules, schedules.c.id == cast(refs.c.schedule_id, String))
+            .outerjoin(content, cast(content.c.id, String) == schedules.c.content_item_id)
+        ).where(
+            self._filters(org_id, platform, cutoff_date)
+        ).order_by(desc(metrics.c.metric_date)).limit(limit or self.HISTORY_LIMIT)
+        
+        rows = []
+        for row in self.db.execute(stmt):
+            data = {
+                'impressions': row.impressions,
+                'reach': row.reach,
+                'engagements': row.engagements,
+                'ctr': row.ctr,
+                'engagement_rate': row.engagement_rate,
+                'content_length': len(row.content) if row.content else 0,
+                'hashtag_count': len(row.hashtags) if row.hashtags else 0,
+                'metric_date': row.metric_date,
+                'platform': row.platform
+            }
+            if include_content:
+                data['content'] = row.content
+                data['scheduled_at'] = row.scheduled_at
+            rows.append(data)
+        return rows
+
+
 class PerformancePredictor:
     """AI-powered performance prediction service"""
     
@@ -56,8 +201,11 @@ class PerformancePredictor:
         self.db = db_session
         self.ai_router = EnhancedAIRouter(db_session)
         self.tracer = tracer
+        self.history_loader = HistoricalFeatureLoader(db_session)
+        self.model_store = PerformanceModelStore.from_settings()
     
-    def _extract_content_features(self, content: str, platform: str, 
+    @staticmethod
+    def _extract_content_features(content: str, platform: str, 
                                 scheduled_at: Optional[datetime] = None,
                                 brand_guide_id: Optional[int] = None) -> ContentFeatures:
         """Extract features from content for prediction"""
@@ -115,51 +263,10 @@ class PerformancePredictor:
     def _get_historical_performance(self, org_id: int, platform: str, 
                                   days_back: int = 90) -> List[Dict[str, Any]]:
         """Get historical performance data for similar content"""
-        
-        cutoff_date = datetime.now() - timedelta(days=days_back)
-        
-        # Get post metrics with external references to link to content
-        metrics_query = self.db.query(PostMetrics, ExternalReference).join(
-            ExternalReference, PostMetrics.external_reference_id == ExternalReference.id
-        ).filter(
-            and_(
-                PostMetrics.organization_id == org_id,
-                PostMetrics.platform == platform,
-                PostMetrics.metric_date >= cutoff_date,
-                PostMetrics.impressions > 0  # Only posts with some performance data
-            )
-        ).order_by(desc(PostMetrics.metric_date)).limit(100)
-        
-        historical_data = []
-        for metrics, ext_ref in metrics_query:
-            # Get content details if available
-            content_item = None
-            if ext_ref and ext_ref.schedule_id:
-                # Try to get content from schedule
-                from app.models.schedules import Schedule
-                schedule = self.db.query(Schedule).filter(
-                    Schedule.id == ext_ref.schedule_id
-                ).first()
-                if schedule and schedule.content_item_id:
-                    content_item = self.db.query(ContentItem).filter(
-                        ContentItem.id == schedule.content_item_id
-                    ).first()
-            
-            historical_data.append({
-                'impressions': metrics.impressions,
-                'reach': metrics.reach,
-                'engagements': metrics.engagements,
-                'ctr': metrics.ctr,
-                'engagement_rate': metrics.engagement_rate,
-                'content_length': len(content_item.content) if content_item else 0,
-                'hashtag_count': len(content_item.hashtags) if content_item and content_item.hashtags else 0,
-                'metric_date': metrics.metric_date,
-                'platform': metrics.platform
-            })
-        
-        return historical_data
+        return self.history_loader.load(org_id, platform, days_back).data
     
-    def _calculate_baseline_metrics(self, historical_data: List[Dict[str, Any]]) -> Dict[str, float]:
+    @staticmethod
+    def _calculate_baseline_metrics(historical_data: List[Dict[str, Any]]) -> Dict[str, float]:
         """Calculate baseline metrics from historical data"""
         if not historical_data:
             return {
@@ -272,11 +379,115 @@ class PerformancePredictor:
                 "recommendations": ["Gather more performance data", "Test different content formats"]
             }
     
+    def train_local_model(self, org_id: int, platform: str, days_back: int = 365) -> Optional[PerformanceModel]:
+        """
+        Fit and save a new local model version for an org and platform
+        
+        Returns None when no model store is configured or there are fewer than
+        ``performance_model_min_samples`` posts with content to learn from.
+        """
+        if self.model_store is None:
+            return None
+        settings = get_settings()
+        rows = [
+            row for row in self.history_loader.training_rows(org_id, platform, days_back)
+            if row['content']
+        ]
+        if len(rows) < settings.performance_model_min_samples:
+            return None
+        
+        features = [
+            feature_vector(self._extract_content_features(
+                row['content'], platform, row['scheduled_at'] or row['metric_date']
+            ))
+            for row in rows
+        ]
+        model = PerformanceModel.fit(
+            org_id, platform, features, [target_vector(row) for row in rows], l2=settings.performance_model_l2
+        )
+        self.model_store.save(model)
+        return model
+    
+    def score_drafts(self, org_id: int, platform: str,
+                     drafts: List[Tuple[str, Optional[datetime]]]) -> Optional[List[PerformancePrediction]]:
+        """
+        Score many drafts with the org's local model in one vectorized pass
+        
+        Args:
+            drafts: (content, scheduled_at) pairs
+            
+        Returns:
+            One prediction per draft, or None when no local model is trained
+        """
+        if self.model_store is None:
+            return None
+        model = self.model_store.load(org_id, platform)
+        if model is None:
+            return None
+        
+        features = [self._extract_content_features(content, platform, scheduled_at) for content, scheduled_at in drafts]
+        vectors = [feature_vector(f) for f in features]
+        scores = model.predict_batch(vectors)
+        
+        # More training posts and a tighter fit give more confidence
+        sample_confidence = model.n_samples / (model.n_samples + 50)
+        fit_confidence = 1.0 / (1.0 + model.residual_std[model.targets.index('engagement_rate')])
+        confidence = round(min(0.95, sample_confidence * fit_confidence), 3)
+        
+        predictions = []
+        for content_features, vector, score in zip(features, vectors, scores):
+            contributions = model.contributions(vector)
+            drivers = sorted(contributions.items(), key=lambda item: abs(item[1]), reverse=True)[:3]
+            predictions.append(PerformancePrediction(
+                predicted_impressions=int(score['impressions']),
+                predicted_reach=int(score['reach']),
+                predicted_engagements=int(score['engagements']),
+                predicted_ctr=score['ctr'],
+                predicted_engagement_rate=score['engagement_rate'],
+                confidence_score=confidence,
+                factors={
+                    'content_length': content_features.content_length,
+                    'hashtag_count': content_features.hashtag_count,
+                    'time_of_day': content_features.time_of_day,
+                    'day_of_week': content_features.day_of_week,
+                    'sentiment_score': content_features.sentiment_score,
+                    'topic_categories': content_features.topic_categories,
+                    'historical_posts_count': model.n_samples,
+                    'model_version': model.version,
+                    'top_drivers': [name for name, _ in drivers]
+                },
+                recommendations=self._driver_recommendations(model, vector, contributions)
+            ))
+        return predictions
+    
+    @staticmethod
+    def _driver_recommendations(model: PerformanceModel, vector: List[float],
+                                contributions: Dict[str, float], limit: int = 3) -> List[str]:
+        """Rule-based advice from the features pulling a draft's predicted engagement rate down most"""
+        recommendations: List[str] = []
+        for name, contribution in sorted(contributions.items(), key=lambda item: item[1]):
+            if contribution >= 0 or len(recommendations) == limit:
+                break
+            i = model.feature_names.index(name)
+            above_average = vector[i] > model.means[i]
+            if name.startswith('topic_'):
+                topic = name[len('topic_'):]
+                advice = f"Lean less on {topic} content" if above_average else f"Try {topic} content, which performs well for this account"
+            elif name in DRIVER_ADVICE:
+                advice = DRIVER_ADVICE[name][0 if above_average else 1]
+            else:
+                continue
+            if advice not in recommendations:
+                recommendations.append(advice)
+        return recommendations
+    
     async def predict_performance(self, content: str, platform: str, org_id: int,
                                 scheduled_at: Optional[datetime] = None,
-                                brand_guide_id: Optional[int] = None) -> PerformancePrediction:
+                                brand_guide_id: Optional[int] = None,
+                                history: Optional[HistoricalPerformance] = None,
+                                explain: bool = False) -> PerformancePrediction:
         """
-        Predict content performance using AI and historical data
+        Predict content performance using the local model, or AI when none is trained
         
         Args:
             content: The content text to predict performance for
@@ -284,6 +495,9 @@ class PerformancePredictor:
             org_id: Organization ID for historical data
             scheduled_at: When the content will be posted (for timing analysis)
             brand_guide_id: Brand guide ID for voice matching
+            history: Preloaded history for the org and platform (shared across a batch)
+            explain: Ask the LLM for recommendations instead of the rule-based ones
+                of a local prediction
             
         Returns:
             PerformancePrediction with predicted metrics and recommendations
@@ -298,9 +512,20 @@ class PerformancePredictor:
             # Extract content features
             features = self._extract_content_features(content, platform, scheduled_at, brand_guide_id)
             
+            local = self.score_drafts(org_id, platform, [(content, scheduled_at)])
+            if local:
+                prediction = local[0]
+                span.set_attributes({"ai.local_model_version": prediction.factors['model_version']})
+                if explain:
+                    prediction.recommendations = await self._explain_prediction(
+                        content, features, org_id, platform, history
+                    )
+                return prediction
+            
             # Get historical performance data
-            historical_data = self._get_historical_performance(org_id, platform)
-            baseline_metrics = self._calculate_baseline_metrics(historical_data)
+            history = history or self.history_loader.load(org_id, platform)
+            historical_data = history.data
+            baseline_metrics = history.baseline
             
             # Generate AI prediction
             ai_prediction = await self._generate_ai_prediction(
@@ -336,11 +561,21 @@ class PerformancePredictor:
             
             return prediction
     
+    async def _explain_prediction(self, content: str, features: ContentFeatures, org_id: int,
+                                  platform: str, history: Optional[HistoricalPerformance]) -> List[str]:
+        """LLM recommendations for a locally scored draft"""
+        history = history or self.history_loader.load(org_id, platform)
+        ai_prediction = await self._generate_ai_prediction(content, features, history.data, history.baseline)
+        return ai_prediction['recommendations']
+    
     async def batch_predict_performance(self, content_items: List[Tuple[str, str, int]],
                                       scheduled_times: Optional[List[datetime]] = None) -> List[PerformancePrediction]:
         """
         Predict performance for multiple content items
         
+        Items whose org and platform have a local model are scored together in
+        one vectorized call; the rest fall back to per-item AI prediction.
+        
         Args:
             content_items: List of (content, platform, org_id) tuples
             scheduled_times: Optional list of scheduled times for each item
@@ -348,12 +583,29 @@ class PerformancePredictor:
         Returns:
             List of PerformancePrediction objects
         """
-        predictions = []
-        
-        for i, (content, platform, org_id) in enumerate(content_items):
-            scheduled_at = scheduled_times[i] if scheduled_times and i < len(scheduled_times) else None
-            prediction = await self.predict_performance(content, platform, org_id, scheduled_at)
-            predictions.append(prediction)
+        predictions: List[Optional[PerformancePrediction]] = [None] * len(content_items)
+        
+        groups: Dict[Tuple[int, str], List[int]] = {}
+        for i, (_, platform, org_id) in enumerate(content_items):
+            groups.setdefault((org_id, platform), []).append(i)
+        
+        for (org_id, platform), indexes in groups.items():
+            drafts = [
+                (content_items[i][0], scheduled_times[i] if scheduled_times and i < len(scheduled_times) else None)
+                for i in indexes
+            ]
+            local = self.score_drafts(org_id, platform, drafts)
+            if local:
+                for i, prediction in zip(indexes, local):
+                    predictions[i] = prediction
+                continue
+            
+            # No local model: load the history once for the whole group
+            history = self.history_loader.load(org_id, platform)
+            for i, (content, scheduled_at) in zip(indexes, drafts):
+                predictions[i] = await self.predict_performance(
+                    content, platform, org_id, scheduled_at, history=history
+                )
         
         return predictions
     
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import math
-from typing import Optional
+from typing import Any, Optional
 from sqlalchemy.orm import Session
 
 from app.models.optimiser import ScheduleMetrics
@@ -18,6 +18,11 @@ def compute_reward(schedule_id: str, db: Session) -> Optional[float]:
 	row = db.get(ScheduleMetrics, schedule_id)
 	if not row:
 		return None
+	return reward_from_metrics(row)
+
+
+def reward_from_metrics(row: Any) -> Optional[float]:
+	"""``compute_reward`` for an already loaded row with ``ScheduleMetrics``' metric attributes."""
 	if row.ctr is None or row.engagement_rate is None or row.reach_norm is None or row.conv_rate is None:
 		return None
 	
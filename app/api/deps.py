@@ -222,4 +222,15 @@ def get_admin_user(
     For now, any authenticated user is considered an admin.
     """
     # TODO: Implement proper admin role checking
-    return current_user
\ No newline at end of file
+    return current_user
+
+
+def flush_org_metrics(
+    current_user: UserAccount = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> None:
+    """
+    Apply the requesting org's buffered webhook metric updates so analytics reads see them.
+    """
+    from app.services.metrics_buffer import flush_org_metrics as flush_pending
+    flush_pending(db, current_user.organization_id)
@@ -71,7 +71,7 @@ async def create_campaign(
     try:
         if campaign_data.platform == "tiktok":
             provider = TikTokAdsProvider()
-            result = provider.create_campaign({
+            result = await provider.create_campaign({
                 "name": campaign_data.name,
                 "objective": campaign_data.objective,
                 "budget": campaign_data.budget,
@@ -80,7 +80,7 @@ async def create_campaign(
             })
         elif campaign_data.platform == "google_ads":
             provider = GoogleAdsProvider()
-            result = provider.create_campaign({
+            result = await provider.create_campaign({
                 "name": campaign_data.name,
                 "objective": campaign_data.objective,
                 "budget": campaign_data.budget,
@@ -122,7 +122,7 @@ async def create_ad_group(
     try:
         if ad_group_data.platform == "tiktok":
             provider = TikTokAdsProvider()
-            result = provider.create_ad_group({
+            result = await provider.create_ad_group({
                 "name": ad_group_data.name,
                 "campaign_id": ad_group_data.campaign_id,
                 "budget": ad_group_data.budget,
@@ -131,7 +131,7 @@ async def create_ad_group(
             })
         elif ad_group_data.platform == "google_ads":
             provider = GoogleAdsProvider()
-            result = provider.create_ad_group({
+            result = await provider.create_ad_group({
                 "name": ad_group_data.name,
                 "campaign_id": ad_group_data.campaign_id,
                 "budget": ad_group_data.budget,
@@ -173,7 +173,7 @@ async def create_ad(
     try:
         if ad_data.platform == "tiktok":
             provider = TikTokAdsProvider()
-            result = provider.create_ad({
+            result = await provider.create_ad({
                 "name": ad_data.name,
                 "ad_group_id": ad_data.ad_group_id,
                 "ad_text": ad_data.ad_text,
@@ -183,7 +183,7 @@ async def create_ad(
             })
         elif ad_data.platform == "google_ads":
             provider = GoogleAdsProvider()
-            result = provider.create_text_ad({
+            result = await provider.create_text_ad({
                 "name": ad_data.name,
                 "ad_group_id": ad_data.ad_group_id,
                 "headline_1": ad_data.ad_text[:30],  # Truncate for headline
@@ -231,11 +231,11 @@ async def get_metrics(
         if platform == "tiktok":
             provider = TikTokAdsProvider()
             if entity_type == "campaign":
-                result = provider.get_campaign_metrics(entity_id, start_date, end_date)
+                result = await provider.get_campaign_metrics(entity_id, start_date, end_date)
             elif entity_type == "ad_group":
-                result = provider.get_ad_group_metrics(entity_id, start_date, end_date)
+                result = await provider.get_ad_group_metrics(entity_id, start_date, end_date)
             elif entity_type == "ad":
-                result = provider.get_ad_metrics(entity_id, start_date, end_date)
+                result = await provider.get_ad_metrics(entity_id, start_date, end_date)
             else:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -244,11 +244,11 @@ async def get_metrics(
         elif platform == "google_ads":
             provider = GoogleAdsProvider()
             if entity_type == "campaign":
-                result = provider.get_campaign_metrics(entity_id, start_date, end_date)
+                result = await provider.get_campaign_metrics(entity_id, start_date, end_date)
             elif entity_type == "ad_group":
-                result = provider.get_ad_group_metrics(entity_id, start_date, end_date)
+                result = await provider.get_ad_group_metrics(entity_id, start_date, end_date)
             elif entity_type == "ad":
-                result = provider.get_ad_metrics(entity_id, start_date, end_date)
+                result = await provider.get_ad_metrics(entity_id, start_date, end_date)
             else:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -292,10 +292,10 @@ async def update_campaign_budget(
     try:
         if budget_data.platform == "tiktok":
             provider = TikTokAdsProvider()
-            result = provider.update_campaign_budget(budget_data.campaign_id, budget_data.budget)
+            result = await provider.update_campaign_budget(budget_data.campaign_id, budget_data.budget)
         elif budget_data.platform == "google_ads":
             provider = GoogleAdsProvider()
-            result = provider.update_campaign_budget(budget_data.campaign_id, budget_data.budget)
+            result = await provider.update_campaign_budget(budget_data.campaign_id, budget_data.budget)
         else:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -332,9 +332,9 @@ async def update_campaign_status(
         if status_data.platform == "tiktok":
             provider = TikTokAdsProvider()
             if status_data.action == "pause":
-                result = provider.pause_campaign(status_data.campaign_id)
+                result = await provider.pause_campaign(status_data.campaign_id)
             elif status_data.action == "resume":
-                result = provider.resume_campaign(status_data.campaign_id)
+                result = await provider.resume_campaign(status_data.campaign_id)
             else:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -343,9 +343,9 @@ async def update_campaign_status(
         elif status_data.platform == "google_ads":
             provider = GoogleAdsProvider()
             if status_data.action == "pause":
-                result = provider.pause_campaign(status_data.campaign_id)
+                result = await provider.pause_campaign(status_data.campaign_id)
             elif status_data.action == "resume":
-                result = provider.resume_campaign(status_data.campaign_id)
+                result = await provider.resume_campaign(status_data.campaign_id)
             else:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -4,12 +4,14 @@ Handles AI content generation, optimization, and batch processing
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List
 import uuid
 import asyncio
 
 from app.api.deps import get_db, get_current_user
+from app.core.config import get_settings
 from app.schemas.ai_content import (
     AICompleteRequest, AICompleteResponse,
     AIBatchRequest, AIBatchResponse,
@@ -26,10 +28,95 @@ from app.workers.tasks.ai_content_tasks import (
 from app.services.ai_router import ai_router
 from app.services.budget_guard import BudgetGuard
 from app.services.safety import safety_service
+from app.utils.sse import SSE_HEADERS, sse_event
 
 router = APIRouter()
 
 
+def _check_budget(budget_guard: BudgetGuard, request: AICompleteRequest, current_user: UserAccount) -> None:
+    """Reject a completion up front with 402 when it would exceed the org's or user's budget."""
+    # Estimate tokens and cost for budget check
+    estimated_tokens = len(request.prompt) // 4  # Rough estimation
+    estimated_cost_usd = estimated_tokens * 0.0001  # Rough cost estimation
+    
+    can_make_request, budget_violation = budget_guard.can_make_request(
+        org_id=current_user.organization_id,
+        user_id=current_user.id,
+        estimated_tokens=estimated_tokens,
+        estimated_cost_usd=estimated_cost_usd
+    )
+    
+    if not can_make_request:
+        raise HTTPException(
+            status_code=status.HTTP_402_PAYMENT_REQUIRED,
+            detail={
+                "message": budget_violation.friendly_message,
+                "upgrade_suggestion": budget_violation.upgrade_suggestion,
+                "limit_type": budget_violation.limit_type.value if budget_violation.limit_type else None,
+                "current_usage": budget_violation.current_usage,
+                "limit": budget_violation.limit,
+                "percentage": budget_violation.percentage
+            }
+        )
+
+
+def _model_name(provider: str) -> str:
+    return provider.split(":")[1] if ":" in provider else provider
+
+
+def _safety_failure_detail(safety_result) -> dict:
+    return {
+        "message": "Generated content failed safety checks",
+        "violations": [
+            {
+                "type": v.type.value,
+                "level": v.level.value,
+                "message": v.message,
+                "suggestion": v.suggestion
+            } for v in safety_result.violations
+        ],
+        "warnings": safety_result.warnings,
+        "suggestions": safety_result.suggestions
+    }
+
+
+def _record_usage(budget_guard: BudgetGuard, current_user: UserAccount, usage) -> None:
+    """Bill a completion's tokens and cost against the budget."""
+    budget_guard.record_usage(
+        org_id=current_user.organization_id,
+        user_id=current_user.id,
+        tokens_used=usage.tokens_in + usage.tokens_out,
+        cost_gbp=usage.cost_usd_estimate / 1.25,  # Convert USD to GBP
+        model_name=usage.provider,
+        operation_type="content_generation"
+    )
+
+
+def _save_ai_request(db: Session, request: AICompleteRequest, current_user: UserAccount,
+                     ai_response, request_status: str) -> AIRequest:
+    """Store a finished completion in the AI request history."""
+    ai_request = AIRequest(
+        organization_id=current_user.organization_id,
+        user_id=current_user.id,
+        prompt=request.prompt,
+        brand_guide_id=request.brand_guide_id,
+        locale=request.locale,
+        generated_text=ai_response.text,
+        provider=ai_response.provider,
+        model=_model_name(ai_response.provider),
+        prompt_tokens=ai_response.tokens_in,
+        completion_tokens=ai_response.tokens_out,
+        total_tokens=ai_response.tokens_in + ai_response.tokens_out,
+        cost_usd=ai_response.cost_usd_estimate,
+        status=request_status
+    )
+    
+    db.add(ai_request)
+    db.commit()
+    db.refresh(ai_request)
+    return ai_request
+
+
 @router.post("/ai/complete", response_model=AICompleteResponse, status_code=status.HTTP_200_OK)
 async def complete_ai_content(
     request: AICompleteRequest,
@@ -40,33 +127,8 @@ async def complete_ai_content(
     Generate AI content from a prompt using the model router with budget and safety checks.
     """
     try:
-        # Initialize budget guard
         budget_guard = BudgetGuard(db)
-        
-        # Estimate tokens and cost for budget check
-        estimated_tokens = len(request.prompt) // 4  # Rough estimation
-        estimated_cost_usd = estimated_tokens * 0.0001  # Rough cost estimation
-        
-        # Check budget constraints
-        can_make_request, budget_violation = budget_guard.can_make_request(
-            org_id=current_user.organization_id,
-            user_id=current_user.id,
-            estimated_tokens=estimated_tokens,
-            estimated_cost_usd=estimated_cost_usd
-        )
-        
-        if not can_make_request:
-            raise HTTPException(
-                status_code=status.HTTP_402_PAYMENT_REQUIRED,
-                detail={
-                    "message": budget_violation.friendly_message,
-                    "upgrade_suggestion": budget_violation.upgrade_suggestion,
-                    "limit_type": budget_violation.limit_type.value if budget_violation.limit_type else None,
-                    "current_usage": budget_violation.current_usage,
-                    "limit": budget_violation.limit,
-                    "percentage": budget_violation.percentage
-                }
-            )
+        _check_budget(budget_guard, request, current_user)
         
         # Generate AI content using the router
         ai_response = await ai_router.complete(
@@ -74,7 +136,8 @@ async def complete_ai_content(
             system=None,  # Could be enhanced to use brand guide as system prompt
             temperature=0.7,
             max_tokens=1000,
-            json_mode=False
+            json_mode=False,
+            hedge=True  # Interactive request: bound tail latency
         )
         
         # Safety check on generated content
@@ -89,51 +152,11 @@ async def complete_ai_content(
             # Block unsafe content
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail={
-                    "message": "Generated content failed safety checks",
-                    "violations": [
-                        {
-                            "type": v.type.value,
-                            "level": v.level.value,
-                            "message": v.message,
-                            "suggestion": v.suggestion
-                        } for v in safety_result.violations
-                    ],
-                    "warnings": safety_result.warnings,
-                    "suggestions": safety_result.suggestions
-                }
+                detail=_safety_failure_detail(safety_result)
             )
         
-        # Record usage in budget guard
-        budget_guard.record_usage(
-            org_id=current_user.organization_id,
-            user_id=current_user.id,
-            tokens_used=ai_response.tokens_in + ai_response.tokens_out,
-            cost_gbp=ai_response.cost_usd_estimate / 1.25,  # Convert USD to GBP
-            model_name=ai_response.provider,
-            operation_type="content_generation"
-        )
-        
-        # Save request to database
-        ai_request = AIRequest(
-            organization_id=current_user.organization_id,
-            user_id=current_user.id,
-            prompt=request.prompt,
-            brand_guide_id=request.brand_guide_id,
-            locale=request.locale,
-            generated_text=ai_response.text,
-            provider=ai_response.provider,
-            model=ai_response.provider.split(":")[1] if ":" in ai_response.provider else ai_response.provider,
-            prompt_tokens=ai_response.tokens_in,
-            completion_tokens=ai_response.tokens_out,
-            total_tokens=ai_response.tokens_in + ai_response.tokens_out,
-            cost_usd=ai_response.cost_usd_estimate,
-            status="completed"
-        )
-        
-        db.add(ai_request)
-        db.commit()
-        db.refresh(ai_request)
+        _record_usage(budget_guard, current_user, ai_response)
+        _save_ai_request(db, request, current_user, ai_response, "completed")
         
         # Prepare response
         response_data = {
@@ -144,7 +167,7 @@ async def complete_ai_content(
                 "total_tokens": ai_response.tokens_in + ai_response.tokens_out
             },
             "provider": ai_response.provider,
-            "model": ai_response.provider.split(":")[1] if ":" in ai_response.provider else ai_response.provider,
+            "model": _model_name(ai_response.provider),
             "cost_usd": ai_response.cost_usd_estimate
         }
         
@@ -163,6 +186,94 @@ async def complete_ai_content(
         )
 
 
+@router.post("/ai/complete/stream", status_code=status.HTTP_200_OK)
+async def stream_ai_content(
+    request: AICompleteRequest,
+    db: Session = Depends(get_db),
+    current_user: UserAccount = Depends(get_current_user)
+) -> StreamingResponse:
+    """
+    Stream AI content as Server-Sent Events.
+    
+    Emits ``token`` events as text arrives, then one ``done`` event with
+    usage, cost and safety results. Text is held back until it passes the
+    same safety check as ``/ai/complete``: every ``ai_stream_safety_check_chars``
+    the text generated so far is checked and the new segment released. If a
+    check fails, generation stops with an ``error`` event carrying the
+    violations and the blocked segment is never sent. Usage is recorded
+    when the stream ends, including streams the client abandons part way.
+    """
+    budget_guard = BudgetGuard(db)
+    _check_budget(budget_guard, request, current_user)
+    segment_chars = get_settings().ai_stream_safety_check_chars
+    
+    async def check(text: str):
+        return await safety_service.check_content(
+            content=text,
+            platform="general",
+            brand_guide_id=str(request.brand_guide_id) if request.brand_guide_id else None,
+            user_id=current_user.id
+        )
+    
+    async def events():
+        stream = ai_router.stream(prompt=request.prompt, temperature=0.7, max_tokens=1000)
+        try:
+            generated, pending = "", ""
+            safety_result = None
+            async for text in stream:
+                generated += text
+                pending += text
+                if len(pending) < segment_chars:
+                    continue
+                # Check everything so far, so violations spanning segments are caught
+                safety_result = await check(generated)
+                if not safety_result.is_safe:
+                    break
+                yield sse_event({"text": pending}, event="token")
+                pending = ""
+            else:
+                # Check the tail (and completions shorter than one segment) before releasing it
+                if pending or safety_result is None:
+                    safety_result = await check(generated)
+                if safety_result.is_safe and pending:
+                    yield sse_event({"text": pending}, event="token")
+            
+            if not safety_result.is_safe:
+                # Stop generating; bill and record only what was produced
+                await stream.aclose()
+                ai_response = stream.usage()
+                if ai_response is not None:
+                    _save_ai_request(db, request, current_user, ai_response, "blocked")
+                yield sse_event({"detail": _safety_failure_detail(safety_result)}, event="error")
+                return
+            
+            ai_response = stream.response
+            _save_ai_request(db, request, current_user, ai_response, "completed")
+            yield sse_event({
+                "token_usage": {
+                    "prompt_tokens": ai_response.tokens_in,
+                    "completion_tokens": ai_response.tokens_out,
+                    "total_tokens": ai_response.tokens_in + ai_response.tokens_out
+                },
+                "provider": ai_response.provider,
+                "model": _model_name(ai_response.provider),
+                "cost_usd": ai_response.cost_usd_estimate,
+                "is_safe": True,
+                "safety_violations": [],
+                "safety_warnings": safety_result.warnings
+            }, event="done")
+        except Exception as e:
+            yield sse_event({"detail": f"AI content generation failed: {str(e)}"}, event="error")
+        finally:
+            # Bill what was generated, even if the client disconnected mid-stream
+            await stream.aclose()
+            usage = stream.usage()
+            if usage:
+                _record_usage(budget_guard, current_user, usage)
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 @router.post("/ai/batch", response_model=AIBatchResponse, status_code=status.HTTP_202_ACCEPTED)
 async def batch_ai_content(
     request: AIBatchRequest,
@@ -24,6 +24,7 @@ class PerformancePredictionRequest(BaseModel):
     platform: str = Field(..., description="Target platform (facebook, instagram, twitter, linkedin)")
     scheduled_at: Optional[datetime] = Field(None, description="When the content will be posted")
     brand_guide_id: Optional[int] = Field(None, description="Brand guide ID for voice matching")
+    explain: bool = Field(False, description="Ask the AI for recommendations instead of rule-based ones when a local model scores the content")
 
 
 class ContentVariationsRequest(BaseModel):
@@ -83,7 +84,8 @@ async def predict_performance(
             platform=request.platform,
             org_id=current_user.organization_id,
             scheduled_at=request.scheduled_at,
-            brand_guide_id=request.brand_guide_id
+            brand_guide_id=request.brand_guide_id,
+            explain=request.explain
         )
         
         if not result["success"]:
@@ -12,7 +12,7 @@ from datetime import datetime, timedelta
 import csv
 import io
 
-from app.api.deps import get_db, get_current_user
+from app.api.deps import get_db, get_current_user, flush_org_metrics
 from app.schemas.analytics import (
     AnalyticsSummaryResponse, TimeseriesResponse, 
     PostMetricsResponse, AnalyticsExportResponse,
@@ -23,7 +23,7 @@ from app.models.cms import UserAccount
 from app.services.analytics_service import AnalyticsService
 from app.workers.tasks.analytics_tasks import collect_platform_metrics_task, generate_analytics_export_task
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(flush_org_metrics)])
 
 
 @router.get("/analytics/summary", response_model=AnalyticsSummaryResponse)
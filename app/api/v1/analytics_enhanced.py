@@ -10,12 +10,12 @@ from datetime import datetime, timedelta
 from pydantic import BaseModel
 
 from app.db.session import get_db
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, flush_org_metrics
 from app.services.analytics_service import AnalyticsService
 from app.models.publishing import PlatformType
 from app.models.entities import Organization
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(flush_org_metrics)])
 
 
 class AnalyticsSummaryResponse(BaseModel):
@@ -226,6 +226,42 @@ async def export_analytics_csv(
         )
 
 
+@router.get("/analytics/export")
+async def export_analytics(
+    days: int = Query(30, ge=1, le=365, description="Number of days to analyze"),
+    platform: Optional[PlatformType] = Query(None, description="Filter by platform"),
+    campaign_id: Optional[str] = Query(None, description="Filter by campaign ID"),
+    include_metrics: bool = Query(True, description="Include detailed metrics"),
+    format: str = Query("csv", regex="^(csv|ndjson|parquet)$", description="Export format"),
+    gzip: bool = Query(False, description="Gzip-compress the download"),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Export analytics data as a streaming CSV, NDJSON or Parquet download"""
+    try:
+        analytics_service = AnalyticsService(db)
+        return analytics_service.export_analytics(
+            org_id=current_user["org_id"],
+            days=days,
+            platform=platform,
+            campaign_id=campaign_id,
+            include_metrics=include_metrics,
+            format_type=format,
+            compress=gzip
+        )
+        
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to export analytics data: {str(e)}"
+        )
+
+
 @router.get("/analytics/platforms")
 async def get_available_platforms(
     db: Session = Depends(get_db),
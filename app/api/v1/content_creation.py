@@ -8,6 +8,7 @@ from __future__ import annotations
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
 
@@ -17,6 +18,8 @@ from app.models.entities import UserAccount, Organization
 from app.models.content import ContentItem, Schedule
 from app.services.limits import LimitsService, LimitType
 from app.services.feature_gating import FeatureGatingService, FeatureType
+from app.ai.enhanced_router import EnhancedAIRouter, GenerationRequest
+from app.utils.sse import SSE_HEADERS, sse_event
 # from app.workers.tasks.content_tasks import generate_ai_content_task
 
 router = APIRouter()
@@ -236,15 +239,8 @@ async def list_content(
     )
 
 
-@router.post("/ai/generate", response_model=AIContentResponse)
-async def generate_ai_content(
-    request: AIContentRequest,
-    db: Session = Depends(get_db),
-    current_user: UserAccount = Depends(get_current_user)
-):
-    """Generate content using AI"""
-    
-    # Check feature access
+def _check_ai_generation_access(db: Session, current_user: UserAccount) -> None:
+    """Raise if the organization's plan or usage limits block AI generation."""
     limits_service = LimitsService(db)
     feature_gate = FeatureGatingService(limits_service)
     
@@ -270,6 +266,16 @@ async def generate_ai_content(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail=f"AI generation limit reached ({ai_limit.current}/{ai_limit.limit}). Upgrade to generate more content."
         )
+
+
+@router.post("/ai/generate", response_model=AIContentResponse)
+async def generate_ai_content(
+    request: AIContentRequest,
+    db: Session = Depends(get_db),
+    current_user: UserAccount = Depends(get_current_user)
+):
+    """Generate content using AI"""
+    _check_ai_generation_access(db, current_user)
     
     try:
         # Generate AI content (this would call the actual AI service)
@@ -302,6 +308,38 @@ async def generate_ai_content(
         )
 
 
+@router.post("/ai/generate/stream")
+async def stream_ai_content(
+    request: AIContentRequest,
+    db: Session = Depends(get_db),
+    current_user: UserAccount = Depends(get_current_user)
+):
+    """Stream AI generated content as Server-Sent Events (``token`` events, then ``done``)."""
+    _check_ai_generation_access(db, current_user)
+    
+    ai_router = EnhancedAIRouter(db)
+    generation = GenerationRequest(
+        task=request.content_type,
+        prompt=request.prompt,
+        system=request.brand_voice,
+        org_id=str(current_user.organization_id)
+    )
+    
+    async def events():
+        try:
+            async for text in ai_router.stream_generate(generation):
+                yield sse_event({"text": text}, event="token")
+            yield sse_event({
+                "content_type": request.content_type,
+                "platform": request.platform,
+                "generated_at": datetime.utcnow()
+            }, event="done")
+        except Exception as e:
+            yield sse_event({"detail": f"Failed to generate AI content: {str(e)}"}, event="error")
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 @router.put("/{content_id}", response_model=ContentResponse)
 async def update_content(
     content_id: int,
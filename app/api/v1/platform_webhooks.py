@@ -12,10 +12,12 @@ import hmac
 import hashlib
 import secrets
 
+from app.core.config import get_settings
 from app.db.session import get_db
 from app.models.publishing import PlatformIntegration, ExternalReference, PublishingStatus
 from app.models.entities import Organization
 from app.workers.tasks import process_platform_webhook
+from app.services.webhook_ingest import get_webhook_stream, verify_hub_signature
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -116,62 +118,34 @@ def verify_stripe_signature(payload: str, signature: str, secret: str) -> bool:
 
 
 @router.post("/webhooks/meta", response_model=WebhookResponse)
-async def meta_webhook(
-    request: Request,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
-):
-    """Handle Meta (Facebook/Instagram) webhooks"""
-    try:
-        # Get raw body
-        body = await request.body()
-        payload = body.decode('utf-8')
-        
-        # Get signature
-        signature = request.headers.get('X-Hub-Signature-256', '')
-        
-        # Get webhook secret from environment or database
-        # TODO: Implement proper secret retrieval from database
-        webhook_secret = "your_meta_webhook_secret"  # This should come from config
-        
-        # Verify signature
-        if not verify_meta_signature(payload, signature, webhook_secret):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid signature"
-            )
-        
-        # Parse payload
-        data = json.loads(payload)
-        
-        # Store webhook payload
-        webhook_id = secrets.token_urlsafe(16)
-        
-        # Enqueue background task to process webhook
-        background_tasks.add_task(
-            process_platform_webhook,
-            webhook_id=webhook_id,
-            platform="meta",
-            payload=data,
-            signature=signature
-        )
-        
-        return WebhookResponse(
-            success=True,
-            message="Meta webhook processed successfully",
-            processed_at=datetime.utcnow().isoformat()
-        )
-        
-    except json.JSONDecodeError:
+async def meta_webhook(request: Request):
+    """Handle Meta (Facebook/Instagram) webhooks
+    
+    Verified bodies go onto the inbound webhook stream unparsed and are
+    applied in batches by the webhook ingest worker, so the ack is immediate.
+    """
+    body = await request.body()
+    signature = request.headers.get('X-Hub-Signature-256', '')
+    
+    if not verify_hub_signature(body, signature, get_settings().meta_app_secret):
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid JSON payload"
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid signature"
         )
+    
+    try:
+        await get_webhook_stream().append("meta", body)
     except Exception as e:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Webhook processing failed: {str(e)}"
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Webhook queue unavailable: {str(e)}"
         )
+    
+    return WebhookResponse(
+        success=True,
+        message="Meta webhook accepted",
+        processed_at=datetime.utcnow().isoformat()
+    )
 
 
 @router.post("/webhooks/linkedin", response_model=WebhookResponse)
@@ -1,23 +1,32 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 import redis.asyncio as redis
 from app.core.config import get_settings
 
+from app.api.deps import get_current_user
 from app.db.session import get_db
+from app.models.cms import UserAccount
 from app.models.content import Schedule, ContentStatus
 from app.scheduler.engine import fetch_due_schedules, run_tick
+from app.scheduler.queue import notify_schedule_change
+
+# One pooled client per process, shared by every request
+_redis_client: Optional[redis.Redis] = None
 
 
 async def get_redis_client() -> redis.Redis:
     """Get Redis client for distributed operations."""
-    settings = get_settings()
-    return redis.from_url(settings.redis_url)
+    global _redis_client
+    if _redis_client is None:
+        settings = get_settings()
+        _redis_client = redis.from_url(settings.redis_url)
+    return _redis_client
 
 
 router = APIRouter(prefix="/schedule", tags=["schedule"])
@@ -29,8 +38,22 @@ class ScheduleIn(BaseModel):
     scheduled_for: datetime
 
 
+class RescheduleIn(BaseModel):
+    scheduled_for: datetime
+
+
+async def _notify_workers(changes: List[tuple]) -> None:
+    """Push (schedule_id, org_id, scheduled_at, op) changes to scheduler workers' due queues."""
+    try:
+        redis_client = await get_redis_client()
+    except Exception:
+        return  # Workers fall back to their periodic recovery scan
+    for schedule_id, org_id, scheduled_at, op in changes:
+        await notify_schedule_change(redis_client, schedule_id, scheduled_at, op=op, org_id=org_id)
+
+
 @router.post("/bulk")
-def bulk_create(payload: List[ScheduleIn], db: Session = Depends(get_db)):
+async def bulk_create(payload: List[ScheduleIn], db: Session = Depends(get_db)):
     from uuid import uuid4
     rows: list[Schedule] = []
     for item in payload:
@@ -45,9 +68,49 @@ def bulk_create(payload: List[ScheduleIn], db: Session = Depends(get_db)):
         rows.append(sch)
         db.add(sch)
     db.commit()
+    await _notify_workers([(r.id, r.org_id, r.scheduled_at, "upsert") for r in rows])
     return {"created": len(rows)}
 
 
+def _get_scheduled(db: Session, schedule_id: str, current_user: UserAccount) -> Schedule:
+    """A still-scheduled post of the caller's org; other orgs' posts are reported as not found."""
+    sch = db.query(Schedule).filter(
+        Schedule.id == schedule_id,
+        Schedule.org_id == str(current_user.organization_id)
+    ).first()
+    if not sch or sch.status != ContentStatus.scheduled:
+        raise HTTPException(status_code=404, detail="Scheduled post not found")
+    return sch
+
+
+@router.patch("/{schedule_id}")
+async def reschedule(
+    schedule_id: str,
+    payload: RescheduleIn,
+    db: Session = Depends(get_db),
+    current_user: UserAccount = Depends(get_current_user)
+):
+    sch = _get_scheduled(db, schedule_id, current_user)
+    sch.scheduled_at = payload.scheduled_for
+    db.commit()
+    await _notify_workers([(sch.id, sch.org_id, sch.scheduled_at, "upsert")])
+    return {"id": sch.id, "scheduled_at": sch.scheduled_at.isoformat()}
+
+
+@router.delete("/{schedule_id}")
+async def cancel(
+    schedule_id: str,
+    db: Session = Depends(get_db),
+    current_user: UserAccount = Depends(get_current_user)
+):
+    sch = _get_scheduled(db, schedule_id, current_user)
+    org_id = sch.org_id
+    sch.status = ContentStatus.cancelled  # Kept for the audit trail
+    db.commit()
+    await _notify_workers([(schedule_id, org_id, None, "cancel")])
+    return {"id": schedule_id, "cancelled": True}
+
+
 @router.get("/due")
 def list_due(db: Session = Depends(get_db)):
     rows = list(fetch_due_schedules(db, limit=100))
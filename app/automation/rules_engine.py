@@ -3,14 +3,14 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, Any, List, Optional, Callable, Awaitable
 from enum import Enum
 
 from sqlalchemy.orm import Session
-from sqlalchemy import select, and_
 
-from app.models.rules import Rule, RuleRun, RuleStatus
+from app.automation.rules_runtime import CompiledRule, CooldownTracker, RuleIndexCache, compile_condition
+from app.models.rules import RuleRun, RuleStatus
 from app.core.config import get_settings
 
 logger = logging.getLogger(__name__)
@@ -42,6 +42,8 @@ class RulesEngine:
         self.settings = get_settings()
         self._triggers: Dict[TriggerType, List[Callable]] = {}
         self._actions: Dict[ActionType, Callable] = {}
+        self.rule_indexes = RuleIndexCache(self.settings.rules_cache_ttl_seconds)
+        self.cooldowns = CooldownTracker(self.settings.rules_cooldown_minutes * 60)
         
         # Register default actions
         self._register_default_actions()
@@ -64,39 +66,32 @@ class RulesEngine:
             logger.debug("Automations disabled, skipping trigger processing")
             return 0
         
-        logger.info(f"Processing trigger {trigger_type} with payload: {payload}")
+        logger.debug(f"Processing trigger {trigger_type} with payload: {payload}")
         
-        # Get enabled rules for this trigger
-        rules = db.execute(
-            select(Rule).where(
-                and_(
-                    Rule.trigger == trigger_type.value,
-                    Rule.enabled == True
-                )
-            )
-        ).scalars().all()
+        # Only rules indexed under this event's org and guard values are evaluated
+        index = self.rule_indexes.get(db, trigger_type.value, self.cooldowns)
         
         executed_count = 0
         
-        for rule in rules:
+        for rule in index.candidates(payload):
             try:
-                # Check cooldown period
-                if self._is_in_cooldown(rule, db):
+                if not rule.matches(payload):
+                    logger.debug(f"Rule {rule.id} condition not met")
+                    continue
+                
+                # Claiming the run starts the rule's cooldown, whatever the outcome
+                if not await self.cooldowns.acquire(rule.id, db):
                     logger.debug(f"Rule {rule.id} is in cooldown, skipping")
                     continue
                 
-                # Evaluate condition
-                if await self._evaluate_condition(rule.condition_json, payload):
-                    logger.info(f"Rule {rule.id} condition met, executing action")
-                    
-                    # Execute action
-                    result = await self._execute_action(rule.action_json, payload, db)
-                    
-                    # Record rule run
-                    await self._record_rule_run(rule, RuleStatus.SUCCESS, result, db)
-                    executed_count += 1
-                else:
-                    logger.debug(f"Rule {rule.id} condition not met")
+                logger.info(f"Rule {rule.id} condition met, executing action")
+                
+                # Execute action
+                result = await self._execute_action(rule.action_json, payload, db)
+                
+                # Record rule run
+                await self._record_rule_run(rule, RuleStatus.SUCCESS, result, db)
+                executed_count += 1
                     
             except Exception as e:
                 logger.error(f"Error executing rule {rule.id}: {e}")
@@ -104,64 +99,18 @@ class RulesEngine:
         
         return executed_count
     
+    def invalidate_rules(self, trigger: Optional[str] = None) -> None:
+        """Drop cached rule indexes after rules are created, edited or deleted."""
+        self.rule_indexes.invalidate(trigger)
+    
     async def _evaluate_condition(self, condition: Dict[str, Any], payload: Dict[str, Any]) -> bool:
         """Evaluate a JSON logic condition against the payload."""
         try:
-            return self._evaluate_json_logic(condition, payload)
+            return compile_condition(condition)(payload)
         except Exception as e:
             logger.error(f"Error evaluating condition: {e}")
             return False
     
-    def _evaluate_json_logic(self, condition: Dict[str, Any], payload: Dict[str, Any]) -> bool:
-        """Evaluate JSON logic expression."""
-        if not isinstance(condition, dict):
-            return False
-        
-        operator = condition.get("operator")
-        if not operator:
-            return False
-        
-        if operator == "eq":
-            field = condition.get("field")
-            value = condition.get("value")
-            return self._get_nested_value(payload, field) == value
-        
-        elif operator == "gt":
-            field = condition.get("field")
-            value = condition.get("value")
-            return self._get_nested_value(payload, field) > value
-        
-        elif operator == "lt":
-            field = condition.get("field")
-            value = condition.get("value")
-            return self._get_nested_value(payload, field) < value
-        
-        elif operator == "in":
-            field = condition.get("field")
-            values = condition.get("value", [])
-            return self._get_nested_value(payload, field) in values
-        
-        elif operator == "and":
-            conditions = condition.get("conditions", [])
-            return all(self._evaluate_json_logic(c, payload) for c in conditions)
-        
-        elif operator == "or":
-            conditions = condition.get("conditions", [])
-            return any(self._evaluate_json_logic(c, payload) for c in conditions)
-        
-        return False
-    
-    def _get_nested_value(self, data: Dict[str, Any], field: str) -> Any:
-        """Get nested value from dictionary using dot notation."""
-        keys = field.split(".")
-        value = data
-        for key in keys:
-            if isinstance(value, dict) and key in value:
-                value = value[key]
-            else:
-                return None
-        return value
-    
     async def _execute_action(self, action: Dict[str, Any], payload: Dict[str, Any], db: Session) -> Dict[str, Any]:
         """Execute an action."""
         action_type = action.get("type")
@@ -174,24 +123,7 @@ class RulesEngine:
         
         return await action_handler(action, payload, db)
     
-    def _is_in_cooldown(self, rule: Rule, db: Session) -> bool:
-        """Check if rule is in cooldown period."""
-        cooldown_minutes = self.settings.rules_cooldown_minutes
-        cutoff_time = datetime.utcnow() - timedelta(minutes=cooldown_minutes)
-        
-        recent_run = db.execute(
-            select(RuleRun).where(
-                and_(
-                    RuleRun.rule_id == rule.id,
-                    RuleRun.last_run_at >= cutoff_time,
-                    RuleRun.status.in_([RuleStatus.SUCCESS, RuleStatus.FAILED])
-                )
-            ).order_by(RuleRun.last_run_at.desc())
-        ).scalar_one_or_none()
-        
-        return recent_run is not None
-    
-    async def _record_rule_run(self, rule: Rule, status: RuleStatus, meta: Dict[str, Any], db: Session):
+    async def _record_rule_run(self, rule: CompiledRule, status: RuleStatus, meta: Dict[str, Any], db: Session):
         """Record a rule run."""
         rule_run = RuleRun(
             id=f"rule_run_{rule.id}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}",
@@ -0,0 +1,332 @@
+"""
+Rules Runtime
+Rule conditions compiled once per rule version, rules indexed by trigger, org
+and their most selective equality test, and cooldowns kept off the database
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.rules import Rule, RuleRun, RuleStatus
+
+logger = logging.getLogger(__name__)
+
+Predicate = Callable[[Dict[str, Any]], bool]
+
+# Evaluation order inside and/or: cheap, selective equality tests before ranges and nested groups
+OPERATOR_COST = {"eq": 0, "in": 1, "gt": 2, "lt": 2, "and": 3, "or": 3}
+
+
+def _never(payload: Dict[str, Any]) -> bool:
+    return False
+
+
+def _hashable(value: Any) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+def field_getter(path: Any) -> Callable[[Dict[str, Any]], Any]:
+    """Accessor for a dotted payload path, split once; missing keys read as None."""
+    if not isinstance(path, str) or not path:
+        return lambda payload: None
+    keys = tuple(path.split("."))
+    if len(keys) == 1:
+        key = keys[0]
+        return lambda payload: payload.get(key) if isinstance(payload, dict) else None
+
+    def get(payload: Dict[str, Any]) -> Any:
+        value = payload
+        for key in keys:
+            if isinstance(value, dict) and key in value:
+                value = value[key]
+            else:
+                return None
+        return value
+    return get
+
+
+def compile_condition(condition: Any) -> Predicate:
+    """
+    Compile a rule's JSON condition into a predicate over event payloads.
+
+    Supports the same operators as the rule editor (``eq``, ``gt``, ``lt``,
+    ``in``, ``and``, ``or``). Children of ``and``/``or`` are reordered by
+    ``OPERATOR_COST``; comparisons that cannot be made (e.g. ``gt`` on a
+    missing field) are false rather than failing the whole condition.
+    """
+    if not isinstance(condition, dict):
+        return _never
+    operator = condition.get("operator")
+
+    if operator in ("eq", "gt", "lt"):
+        get = field_getter(condition.get("field"))
+        value = condition.get("value")
+        if operator == "eq":
+            return lambda payload: get(payload) == value
+
+        def compare(payload: Dict[str, Any]) -> bool:
+            try:
+                actual = get(payload)
+                return actual > value if operator == "gt" else actual < value
+            except TypeError:
+                return False
+        return compare
+
+    if operator == "in":
+        get = field_getter(condition.get("field"))
+        values = condition.get("value", [])
+        if isinstance(values, (list, tuple, set)) and all(_hashable(v) for v in values):
+            values = frozenset(values)
+
+        def contains(payload: Dict[str, Any]) -> bool:
+            try:
+                return get(payload) in values
+            except TypeError:
+                return False
+        return contains
+
+    if operator in ("and", "or"):
+        children = sorted(condition.get("conditions", []), key=lambda c: OPERATOR_COST.get(c.get("operator"), 9) if isinstance(c, dict) else 9)
+        predicates = tuple(compile_condition(child) for child in children)
+        if operator == "and":
+            return lambda payload: all(predicate(payload) for predicate in predicates)
+        return lambda payload: any(predicate(payload) for predicate in predicates)
+
+    return _never
+
+
+def index_guard(condition: Any) -> Optional[Tuple[str, Tuple[Any, ...]]]:
+    """
+    An equality test the condition cannot be true without: ``(field, allowed values)``.
+
+    Within an ``and`` the test allowing the fewest values is chosen, so rules
+    are indexed on their most discriminating field.
+    """
+    if not isinstance(condition, dict) or not isinstance(condition.get("field", ""), str):
+        return None
+    operator = condition.get("operator")
+    if operator == "eq" and condition.get("field") and _hashable(condition.get("value")):
+        return condition["field"], (condition.get("value"),)
+    if operator == "in" and condition.get("field"):
+        values = condition.get("value")
+        if isinstance(values, (list, tuple)) and all(_hashable(v) for v in values):
+            return condition["field"], tuple(values)
+    if operator == "and":
+        guards = [guard for guard in map(index_guard, condition.get("conditions", [])) if guard]
+        if guards:
+            return min(guards, key=lambda guard: len(guard[1]))
+    return None
+
+
+@dataclass
+class CompiledRule:
+    id: str
+    org_id: str
+    trigger: str
+    version: Any
+    matches: Predicate
+    action_json: Dict[str, Any]
+    guard: Optional[Tuple[str, Tuple[Any, ...]]] = None
+
+
+class RuleCompiler:
+    """Compiles rules once per version (``updated_at``) and reuses them across index rebuilds."""
+
+    def __init__(self):
+        self._cache: Dict[str, CompiledRule] = {}
+        self._lock = threading.Lock()
+
+    def compile(self, row: Any) -> CompiledRule:
+        with self._lock:
+            cached = self._cache.get(row.id)
+        if cached is not None and cached.version == row.updated_at:
+            return cached
+        compiled = CompiledRule(
+            id=row.id,
+            org_id=str(row.org_id),
+            trigger=row.trigger,
+            version=row.updated_at,
+            matches=compile_condition(row.condition_json),
+            action_json=row.action_json or {},
+            guard=index_guard(row.condition_json),
+        )
+        with self._lock:
+            self._cache[row.id] = compiled
+        return compiled
+
+
+@dataclass
+class _OrgRules:
+    unguarded: List[CompiledRule] = field(default_factory=list)
+    guarded: Dict[str, Dict[Any, List[CompiledRule]]] = field(default_factory=dict)
+    getters: Dict[str, Callable[[Dict[str, Any]], Any]] = field(default_factory=dict)
+
+
+class RuleIndex:
+    """Compiled rules of one trigger, by org and by the value of their guard field.
+
+    ``candidates`` does one dict lookup per distinct guard field, so its
+    cost follows the rules that can match an event rather than the total.
+    Events carrying ``org_id`` (or ``organization_id``) only see that org's
+    rules; events without one see every org's, as before.
+    """
+
+    def __init__(self, rules: Iterable[CompiledRule]):
+        self.by_org: Dict[str, _OrgRules] = {}
+        self.size = 0
+        for rule in rules:
+            self.size += 1
+            group = self.by_org.setdefault(rule.org_id, _OrgRules())
+            if rule.guard is None:
+                group.unguarded.append(rule)
+                continue
+            path, values = rule.guard
+            by_value = group.guarded.setdefault(path, {})
+            group.getters.setdefault(path, field_getter(path))
+            for value in dict.fromkeys(values):
+                by_value.setdefault(value, []).append(rule)
+
+    def candidates(self, payload: Dict[str, Any]) -> List[CompiledRule]:
+        org_id = payload.get("org_id", payload.get("organization_id"))
+        if org_id is None:
+            groups = list(self.by_org.values())
+        else:
+            group = self.by_org.get(str(org_id))
+            groups = [group] if group else []
+
+        found: List[CompiledRule] = []
+        for group in groups:
+            found.extend(group.unguarded)
+            for path, by_value in group.guarded.items():
+                value = group.getters[path](payload)
+                if _hashable(value):
+                    found.extend(by_value.get(value, ()))
+        return found
+
+
+class CooldownTracker:
+    """When each rule last ran; a rule is skipped for ``cooldown_seconds`` after a run.
+
+    Last runs are seeded from ``rule_runs`` when a trigger's rules are
+    (re)loaded and recorded in memory as rules run. With a Redis client
+    attached, runs are also claimed with ``SET NX EX`` so several workers
+    share one cooldown per rule; without one (or when Redis fails) a claim
+    checks ``rule_runs`` for runs by other processes, as before the cache.
+    """
+
+    def __init__(self, cooldown_seconds: float, redis_client: Any = None):
+        self.cooldown_seconds = cooldown_seconds
+        self.redis = redis_client
+        self._last_run: Dict[str, float] = {}
+
+    def seed(self, last_runs: Dict[str, datetime]) -> None:
+        for rule_id, last_run in last_runs.items():
+            if last_run.tzinfo is None:
+                last_run = last_run.replace(tzinfo=timezone.utc)
+            self._last_run[rule_id] = max(self._last_run.get(rule_id, 0.0), last_run.timestamp())
+
+    def in_cooldown(self, rule_id: str, now: Optional[float] = None) -> bool:
+        last = self._last_run.get(rule_id)
+        return last is not None and (now or time.time()) - last < self.cooldown_seconds
+
+    async def acquire(self, rule_id: str, db: Optional[Session] = None) -> bool:
+        """Claim a run of the rule; False while it is cooling down."""
+        now = time.time()
+        if self.in_cooldown(rule_id, now):
+            return False
+        shared = False
+        if self.redis is not None:
+            try:
+                claimed = await self.redis.set(f"rules:cooldown:{rule_id}", 1, nx=True, ex=max(1, int(self.cooldown_seconds)))
+                if not claimed:
+                    return False
+                shared = True
+            except Exception as e:
+                logger.warning(f"Cooldown claim in Redis failed for rule {rule_id}, checking rule_runs: {e}")
+        if not shared and db is not None:
+            last_runs = recent_runs(db, [rule_id], self.cooldown_seconds)
+            if last_runs:
+                self.seed(last_runs)
+                return False
+        self._last_run[rule_id] = now
+        return True
+
+
+def recent_runs(db: Session, rule_ids: List[str], cooldown_seconds: float) -> Dict[str, datetime]:
+    """Last finished run of each rule that ran within the cooldown, from ``rule_runs``."""
+    runs = RuleRun.__table__.c
+    cutoff = datetime.utcnow() - timedelta(seconds=cooldown_seconds)
+    return dict(db.execute(
+        select(runs.rule_id, func.max(runs.last_run_at))
+        .where(
+            runs.rule_id.in_(rule_ids),
+            runs.last_run_at >= cutoff,
+            runs.status.in_([RuleStatus.SUCCESS.value, RuleStatus.FAILED.value])
+        )
+        .group_by(runs.rule_id)
+    ).all())
+
+
+@dataclass
+class _LoadedIndex:
+    index: RuleIndex
+    fingerprint: Tuple[Any, ...]
+    checked_at: float
+
+
+class RuleIndexCache:
+    """Per-trigger rule indexes, reloaded only when the trigger's enabled rules change.
+
+    For ``ttl_seconds`` after a check an index is used without touching the
+    database; after that a count/max(updated_at) probe decides whether the
+    rules are reloaded. Reloads recompile only rules whose version changed
+    and seed cooldowns from ``rule_runs`` in one grouped query.
+    """
+
+    def __init__(self, ttl_seconds: float = 30.0, compiler: Optional[RuleCompiler] = None):
+        self.ttl_seconds = ttl_seconds
+        self.compiler = compiler or RuleCompiler()
+        self._indexes: Dict[str, _LoadedIndex] = {}
+
+    def get(self, db: Session, trigger: str, cooldowns: CooldownTracker) -> RuleIndex:
+        now = time.monotonic()
+        loaded = self._indexes.get(trigger)
+        if loaded and now - loaded.checked_at < self.ttl_seconds:
+            return loaded.index
+
+        rules = Rule.__table__.c
+        enabled = (rules.trigger == trigger, rules.enabled == True)  # noqa: E712
+        fingerprint = tuple(db.execute(select(func.count(rules.id), func.max(rules.updated_at)).where(*enabled)).one())
+        if loaded and loaded.fingerprint == fingerprint:
+            loaded.checked_at = now
+            return loaded.index
+
+        rows = db.execute(
+            select(rules.id, rules.org_id, rules.trigger, rules.condition_json, rules.action_json, rules.updated_at)
+            .where(*enabled)
+        ).all()
+        index = RuleIndex(self.compiler.compile(row) for row in rows)
+        if rows:
+            cooldowns.seed(recent_runs(db, [row.id for row in rows], cooldowns.cooldown_seconds))
+        self._indexes[trigger] = _LoadedIndex(index, fingerprint, now)
+        logger.info(f"Loaded {index.size} rules for trigger {trigger}")
+        return index
+
+    def invalidate(self, trigger: Optional[str] = None) -> None:
+        if trigger is None:
+            self._indexes.clear()
+        else:
+            self._indexes.pop(trigger, None)
@@ -24,29 +24,36 @@ class RedisCache:
         key_hash = hashlib.sha256(key_data.encode()).hexdigest()[:16]
         return f"{namespace}:{key_hash}"
 
-    async def get(self, namespace: str, key_data: str) -> Optional[Any]:
-        """Get JSON data from cache."""
+    async def get_raw(self, namespace: str, key_data: str) -> Optional[str]:
+        """Get the stored JSON string without decoding it."""
         try:
             client = await self._get_client()
-            key = self._make_key(namespace, key_data)
-            data = await client.get(key)
-            return json.loads(data) if data else None
+            return await client.get(self._make_key(namespace, key_data))
         except Exception:
             # Fail silently for cache misses
             return None
 
-    async def set(self, namespace: str, key_data: str, value: Any, ttl: Optional[int] = None) -> bool:
-        """Set JSON data in cache with TTL."""
+    async def set_raw(self, namespace: str, key_data: str, data: str, ttl: Optional[int] = None) -> bool:
+        """Store an already-encoded JSON string with TTL."""
         try:
             client = await self._get_client()
-            key = self._make_key(namespace, key_data)
-            data = json.dumps(value, default=str)
-            ttl = ttl or self.ttl
-            await client.setex(key, ttl, data)
+            await client.setex(self._make_key(namespace, key_data), ttl or self.ttl, data)
             return True
         except Exception:
             return False
 
+    async def get(self, namespace: str, key_data: str) -> Optional[Any]:
+        """Get JSON data from cache."""
+        data = await self.get_raw(namespace, key_data)
+        try:
+            return json.loads(data) if data else None
+        except ValueError:
+            return None
+
+    async def set(self, namespace: str, key_data: str, value: Any, ttl: Optional[int] = None) -> bool:
+        """Set JSON data in cache with TTL."""
+        return await self.set_raw(namespace, key_data, json.dumps(value, default=str), ttl)
+
     async def delete(self, namespace: str, key_data: str) -> bool:
         """Delete a cache key."""
         try:
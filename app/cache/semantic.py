@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import logging
+import math
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import get_settings
+from app.observability.telemetry import record_ai_cache_lookup
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
+
+logger = logging.getLogger(__name__)
+
+Embedder = Callable[[str], Awaitable[Sequence[float]]]
+Scope = Tuple[str, ...]
+
+
+def _normalize(vector: Sequence[float]) -> List[float]:
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+class VectorIndex:
+    """Brute-force cosine-similarity index over normalized embeddings.
+
+    Uses a NumPy matrix when NumPy is installed and plain Python otherwise.
+    Bounded: once ``max_entries`` is reached the oldest entry is dropped.
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._vectors: Deque[List[float]] = deque()
+        self._keys: Deque[str] = deque()
+        self._matrix = None  # NumPy copy of _vectors, rebuilt lazily after changes
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, vector: Sequence[float], key: str) -> None:
+        self._vectors.append(_normalize(vector))
+        self._keys.append(key)
+        if len(self._keys) > self.max_entries:
+            self._vectors.popleft()
+            self._keys.popleft()
+        self._matrix = None
+
+    def search(self, vector: Sequence[float]) -> Tuple[Optional[str], float]:
+        """Best matching key and its cosine similarity."""
+        if not self._keys:
+            return None, 0.0
+        query = _normalize(vector)
+        if NUMPY_AVAILABLE:
+            if self._matrix is None:
+                self._matrix = np.asarray(self._vectors, dtype=np.float32)
+            scores = self._matrix @ np.asarray(query, dtype=np.float32)
+            best = int(scores.argmax())
+            return self._keys[best], float(scores[best])
+        best, best_score = 0, -1.0
+        for i, candidate in enumerate(self._vectors):
+            score = sum(a * b for a, b in zip(candidate, query))
+            if score > best_score:
+                best, best_score = i, score
+        return self._keys[best], best_score
+
+
+class SemanticCache:
+    """Maps near-duplicate prompts onto existing exact-cache keys.
+
+    Each (task, scope) pair has its own index, where scope separates
+    organizations and system prompts so one brand's output is never served
+    to another. A lookup returns the exact cache key of the most similar
+    earlier prompt when the similarity clears the task's threshold; the
+    result itself still lives in the exact cache. At most ``max_scopes``
+    indexes are kept; the least recently used one is dropped beyond that.
+    """
+
+    def __init__(
+        self,
+        embed: Embedder,
+        thresholds: Optional[Dict[str, float]] = None,
+        default_threshold: float = 0.95,
+        max_entries: int = 1000,
+        max_scopes: int = 200,
+    ):
+        self.embed = embed
+        self.thresholds = thresholds or {}
+        self.default_threshold = default_threshold
+        self.max_entries = max_entries
+        self.max_scopes = max_scopes
+        self._indexes: "OrderedDict[Tuple[str, Scope], VectorIndex]" = OrderedDict()
+
+    def threshold_for(self, task: str) -> float:
+        return self.thresholds.get(task, self.default_threshold)
+
+    async def lookup(
+        self, task: str, scope: Scope, text: str
+    ) -> Tuple[Optional[str], Optional[Sequence[float]]]:
+        """Return ``(cache_key, embedding)``; the key is None below the threshold.
+
+        The embedding is returned so a miss can be remembered without
+        embedding the prompt twice.
+        """
+        try:
+            vector = await self.embed(text)
+        except Exception as e:
+            logger.warning(f"Semantic cache embedding failed for task {task}: {e}")
+            return None, None
+        index = self._indexes.get((task, scope))
+        if index is None:
+            return None, vector
+        self._indexes.move_to_end((task, scope))
+        key, score = index.search(vector)
+        if key is None or score < self.threshold_for(task):
+            return None, vector
+        record_ai_cache_lookup(task, "semantic_hit")
+        return key, vector
+
+    def remember(self, task: str, scope: Scope, vector: Sequence[float], cache_key: str) -> None:
+        index = self._indexes.get((task, scope))
+        if index is None:
+            index = self._indexes[(task, scope)] = VectorIndex(self.max_entries)
+            while len(self._indexes) > self.max_scopes:
+                self._indexes.popitem(last=False)
+        self._indexes.move_to_end((task, scope))
+        index.add(vector, cache_key)
+
+
+def openai_embedder(api_key: str, model: str) -> Embedder:
+    """Embedding function backed by the OpenAI embeddings endpoint."""
+    from openai import AsyncOpenAI
+
+    client = AsyncOpenAI(api_key=api_key)
+
+    async def embed(text: str) -> Sequence[float]:
+        response = await client.embeddings.create(model=model, input=text)
+        return response.data[0].embedding
+
+    return embed
+
+
+_semantic_cache: Optional[SemanticCache] = None
+
+
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """Process-wide semantic cache, or None when disabled or no embedder is configured."""
+    global _semantic_cache
+    settings = get_settings()
+    if not settings.ai_semantic_cache_enabled or not settings.openai_api_key:
+        return None
+    if _semantic_cache is None:
+        thresholds: Dict[str, float] = {}
+        for item in (settings.ai_semantic_cache_thresholds or "").split(","):
+            task, _, value = item.strip().partition("=")
+            try:
+                thresholds[task] = float(value)
+            except ValueError:
+                continue
+        _semantic_cache = SemanticCache(
+            openai_embedder(settings.openai_api_key, settings.ai_embedding_model),
+            thresholds=thresholds,
+            default_threshold=settings.ai_semantic_cache_default_threshold,
+            max_entries=settings.ai_semantic_cache_max_entries,
+            max_scopes=settings.ai_semantic_cache_max_scopes,
+        )
+    return _semantic_cache
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from app.cache.redis import RedisCache, cache as redis_cache
+from app.core.config import get_settings
+from app.observability.telemetry import record_ai_cache_bytes, record_ai_cache_lookup
+
+
+class LRUCache:
+    """Bounded in-process LRU with a per-entry TTL."""
+
+    def __init__(self, max_entries: int = 2048, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        self._entries[key] = (time.monotonic() + (ttl or self.ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+
+@dataclass
+class TaskCacheStats:
+    local_hits: int = 0
+    redis_hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    bytes_read: int = 0
+    bytes_written: int = 0
+
+
+class TieredCache:
+    """In-process LRU in front of the shared Redis cache, with single-flight.
+
+    Local hits skip the Redis round trip and JSON decode entirely; Redis hits
+    are copied into the LRU. ``single_flight`` makes concurrent callers for
+    the same key share one computation, so a burst of identical prompts
+    costs one provider call.
+    """
+
+    def __init__(self, shared: RedisCache, max_entries: int = 2048, local_ttl: float = 300.0):
+        self.shared = shared
+        self.local = LRUCache(max_entries=max_entries, ttl=local_ttl)
+        self.stats: Dict[str, TaskCacheStats] = {}
+        # Futures belong to the loop that created them, so in-flight calls are tracked per loop
+        self._inflight: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Hashable, asyncio.Future]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    @classmethod
+    def from_settings(cls, shared: Optional[RedisCache] = None) -> "TieredCache":
+        settings = get_settings()
+        return cls(
+            shared or redis_cache,
+            max_entries=settings.ai_cache_local_max_entries,
+            local_ttl=settings.ai_cache_local_ttl_secs,
+        )
+
+    def _stats(self, task: str) -> TaskCacheStats:
+        if task not in self.stats:
+            self.stats[task] = TaskCacheStats()
+        return self.stats[task]
+
+    async def get(self, namespace: str, key: str, task: str = "default") -> Optional[Any]:
+        stats = self._stats(task)
+        value = self.local.get((namespace, key))
+        if value is not None:
+            stats.local_hits += 1
+            record_ai_cache_lookup(task, "local_hit")
+            return value
+
+        raw = await self.shared.get_raw(namespace, key)
+        if raw:
+            try:
+                value = json.loads(raw)
+            except ValueError:
+                value = None
+        if value is None:
+            stats.misses += 1
+            record_ai_cache_lookup(task, "miss")
+            return None
+
+        stats.redis_hits += 1
+        stats.bytes_read += len(raw)
+        record_ai_cache_lookup(task, "redis_hit")
+        record_ai_cache_bytes(task, "read", len(raw))
+        self.local.set((namespace, key), value)
+        return value
+
+    async def set(
+        self, namespace: str, key: str, value: Any, task: str = "default", ttl: Optional[int] = None
+    ) -> bool:
+        self.local.set((namespace, key), value, ttl and min(ttl, self.local.ttl))
+        raw = json.dumps(value, default=str)
+        stored = await self.shared.set_raw(namespace, key, raw, ttl)
+        if stored:
+            self._stats(task).bytes_written += len(raw)
+            record_ai_cache_bytes(task, "write", len(raw))
+        return stored
+
+    async def delete(self, namespace: str, key: str) -> bool:
+        self.local.delete((namespace, key))
+        return await self.shared.delete(namespace, key)
+
+    async def single_flight(
+        self, key: Hashable, compute: Callable[[], Awaitable[Any]], task: str = "default"
+    ) -> Tuple[Any, bool]:
+        """Run ``compute`` once for concurrent callers with the same key.
+
+        Returns ``(value, shared)`` where ``shared`` is True for callers that
+        waited on another caller's computation. Errors propagate to every
+        waiter.
+        """
+        inflight = self._inflight.setdefault(asyncio.get_running_loop(), {})
+        future = inflight.get(key)
+        if future is not None:
+            self._stats(task).coalesced += 1
+            record_ai_cache_lookup(task, "coalesced")
+            return await asyncio.shield(future), True
+
+        future = asyncio.get_running_loop().create_future()
+        inflight[key] = future
+        try:
+            value = await compute()
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure does not log "exception never retrieved"
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value, False
+        finally:
+            inflight.pop(key, None)
+
+
+_ai_cache: Optional[TieredCache] = None
+
+
+def get_ai_cache() -> TieredCache:
+    """Process-wide two-tier cache for AI generations."""
+    global _ai_cache
+    if _ai_cache is None:
+        _ai_cache = TieredCache.from_settings()
+    return _ai_cache
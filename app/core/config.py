@@ -72,18 +72,57 @@ class Settings(BaseSettings):
 	# Debug mode
 	debug: bool = False
 
+	# Outbound HTTP connection pooling
+	http_pool_max_connections: int = 20  # Default max connections per upstream host
+	http_pool_max_keepalive_connections: int = 10
+	http_pool_keepalive_expiry_seconds: float = 30.0
+	http_pool_host_limits: str = ""  # Per-host overrides, e.g. "graph.facebook.com=50,api.linkedin.com=20"
+	http_pool_http2: bool = True  # Use HTTP/2 for platforms that support it (needs the h2 package)
+	http_pool_shared_max_connections: int = 50  # One bounded client shared by all non-platform hosts (customer webhooks)
+
+	# Outbound rate governor (requests/second per platform app; burst is 2x)
+	rate_governor_limits: str = "meta=20,linkedin=5,google=10,google_ads=10,tiktok=10"
+	rate_governor_max_wait_seconds: float = 30.0  # Fail fast instead of waiting longer than this for quota
+
 	# Insights & Metrics
 	feature_fake_insights: bool = False  # Set to False to use real platform APIs
-	insights_poll_interval_hours: int = 6  # How often to poll for new metrics
+	insights_poll_interval_hours: int = 6  # Longest gap between polls of a quiet post
+	insights_poll_min_interval_minutes: int = 15  # Poll interval for new posts and posts with renewed activity
+	insights_poll_backoff_factor: float = 0.5  # Poll interval as a fraction of the time since a post's metrics last moved
+	insights_poll_activity_threshold: float = 0.05  # Engagement growth between polls that resets the back-off
+	insights_poll_budget_per_cycle: int = 500  # Max posts fetched per cycle (each counts against platform API quota)
+	insights_poll_tick_seconds: int = 120  # How often the poller checks for due posts
+	insights_poll_max_age_days: int = 30  # Posts older than this are no longer polled
+	insights_poll_batch_size: int = 50  # Posts per platform batch request
+	insights_poll_concurrency: int = 4  # Platform batches fetched in parallel
 	e2e_mocks: bool = False  # Enable E2E mock mode for testing
 	meta_insights_fields_fb: str = "impressions,post_impressions_unique,likes,comments,shares,clicks"
 	ig_insights_metrics: str = "impressions,reach,likes,comments,saves,video_views"
 	linkedin_stats_fields: str = "impressionCount,likeCount,commentCount,shareCount"
 
+	# Scheduler
+	scheduler_batch_size: int = 500  # Max due schedules claimed per tick
+	scheduler_provider_concurrency: int = 10  # Concurrent publishes per provider within a tick
+	scheduler_queue_horizon_seconds: int = 900  # How far ahead the worker's in-memory due queue is loaded
+	scheduler_recovery_interval_seconds: int = 300  # DB scan + queue reload to catch missed change events
+	scheduler_partitions: int = 64  # Org-hash partitions leased across scheduler workers
+	scheduler_partition_lease_seconds: int = 30  # Partition lease TTL; heartbeats renew at a third of this
+
+	# Timeslot optimiser
+	optimiser_arms_ttl_seconds: int = 300  # How long an org's bandit arms are cached in memory between reloads
+
 	# Automation & Rules
 	automations_enabled: bool = True  # Feature flag for rules automation
 	rules_worker_interval_minutes: int = 5  # How often to check for rule triggers
 	rules_cooldown_minutes: int = 60  # Minimum time between rule executions
+	rules_cache_ttl_seconds: int = 30  # How long compiled rules are used before checking the database for edits
+	rules_stream_key: str = "rules:stream"  # Redis Stream of trigger events
+	rules_stream_maxlen: int = 100000  # Approximate cap on entries kept in the stream
+	rules_consumer_group: str = "rules-workers"
+	rules_batch_size: int = 100  # Trigger events read per batch (one DB session each)
+	rules_batch_block_ms: int = 5000  # How long an idle worker waits for new events
+	rules_claim_idle_ms: int = 60000  # Unacked events idle this long are reclaimed from dead workers
+	rules_max_deliveries: int = 5  # Events delivered this many times are moved to the dead-letter stream
 	max_budget_pct_change: int = 15  # Maximum budget change percentage per rule run
 
 	# AI Cost Optimization
@@ -93,6 +132,14 @@ class Settings(BaseSettings):
 	redis_db: int = 0
 	redis_password: Optional[str] = None
 	ai_cache_ttl_secs: int = 86400  # 24 hours
+	ai_cache_local_max_entries: int = 2048  # In-process LRU in front of Redis
+	ai_cache_local_ttl_secs: int = 300  # Local copies expire sooner than Redis
+	ai_semantic_cache_enabled: bool = False  # Serve near-duplicate prompts from cache
+	ai_semantic_cache_thresholds: str = "hashtags=0.92,cta=0.92"  # Per-task cosine similarity (task=threshold)
+	ai_semantic_cache_default_threshold: float = 0.95
+	ai_semantic_cache_max_entries: int = 1000  # Per task and org/system-prompt scope
+	ai_semantic_cache_max_scopes: int = 200  # Task/scope indexes kept in memory, least recently used dropped first
+	ai_embedding_model: str = "text-embedding-3-small"
 	dev_tools_enabled: bool = False  # Feature flag for dev tools panel
 	ai_budget_soft_limit_multiplier: float = 2.0  # Block when 2x over limit
 	
@@ -102,6 +149,16 @@ class Settings(BaseSettings):
 	anthropic_api_key: Optional[str] = None
 	cohere_api_key: Optional[str] = None
 	ollama_base_url: str = "http://localhost:11434"
+	ai_provider_concurrency: str = "openai=16,anthropic=8,cohere=8,ollama=2"  # Max in-flight calls per provider (provider=n)
+	ai_default_concurrency: int = 8  # Providers not listed above
+	ai_native_batch_min_size: int = 100  # Offline batches this large use the provider batch API
+	ai_native_batch_timeout_seconds: int = 86400  # Give up on a provider batch job after this long
+	ai_circuit_failure_rate: float = 0.5  # Open a provider's circuit at this rolling error rate
+	ai_circuit_min_samples: int = 5  # Calls needed before the error rate counts
+	ai_circuit_cooldown_seconds: int = 30  # Open circuits let a probe through after this long
+	ai_hedge_delay_ms: int = 2000  # Hedge delay until a provider has latency history
+	ai_hedge_min_delay_ms: int = 200  # Floor for the p95-based hedge delay
+	ai_stream_safety_check_chars: int = 400  # Streamed text is safety-checked and released in segments of about this size
 	
 	# AI Budget Limits (per organization)
 	ai_org_daily_token_limit: int = 100000
@@ -153,6 +210,37 @@ class Settings(BaseSettings):
 	rate_limit_window_seconds: int = 60  # Time window for rate limiting
 	rate_limit_storage_url: Optional[str] = None  # Redis URL for distributed rate limiting
 
+	# Privacy exports & deletion
+	data_export_path: Optional[str] = None  # Directory for export files (defaults to /tmp/exports)
+	privacy_export_batch_size: int = 1000  # Rows fetched per server-side cursor batch when exporting
+	privacy_deletion_batch_size: int = 1000  # Rows deleted per committed batch
+	privacy_deletion_max_replication_lag_seconds: float = 10.0  # Pause deletion while replicas lag more than this (0 disables)
+
+	# Warehouse exports
+	export_chunk_rows: int = 50000  # Rows per Parquet chunk loaded into the warehouse
+	export_watermark_lag_seconds: int = 300  # Leave the newest rows for the next run so late commits are not skipped
+
+	# Analytics rollups
+	analytics_rollup_refresh_hours: int = 48  # Window of post counts rebuilt on each scheduled rollup refresh
+	analytics_rollup_backfill_chunk_days: int = 30  # Days of history rebuilt and committed per step of the one-off rollup backfill
+
+	# Inbound webhook ingestion
+	webhook_stream_key: str = "webhooks:inbound"  # Redis Stream of verified, unparsed webhook bodies
+	webhook_stream_maxlen: int = 1000000  # Approximate cap on entries kept in the stream
+	webhook_consumer_group: str = "webhook-ingest"
+	webhook_batch_size: int = 500  # Stream entries applied per consumer transaction
+	webhook_batch_block_ms: int = 1000  # How long an idle consumer waits for new entries
+	webhook_claim_idle_ms: int = 60000  # Unacked entries idle this long are reclaimed from dead consumers
+	webhook_dedupe_ttl_seconds: int = 86400  # How long applied event ids are remembered to skip redeliveries
+
+	metrics_buffer_ttl_seconds: int = 86400  # Buffered webhook updates not flushed within this long are dropped
+	metrics_buffer_flush_lease_seconds: int = 300  # In-flight flushes older than this are assumed crashed and requeued
+
+	# Local performance models
+	performance_model_path: Optional[str] = None  # Shared directory (volume or object-store mount) for versioned per-org models; required for local models
+	performance_model_min_samples: int = 30  # Posts with content needed before a local model is trained
+	performance_model_l2: float = 1.0  # Ridge penalty on standardized features
+
 	# Security
 	secret_key_version: int = 1
 	
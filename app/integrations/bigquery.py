@@ -136,6 +136,51 @@ class BigQueryExporter:
             logger.error(f"Failed to export data to BigQuery table {table_id}: {e}")
             return False
     
+    def load_parquet_chunk(self,
+                           dataset_id: str,
+                           table_id: str,
+                           file_path: str,
+                           schema: Dict[str, str],
+                           truncate: bool = False) -> None:
+        """Load one Parquet file into a table with a load job (no DataFrame in memory)."""
+        job_config = bigquery.LoadJobConfig(
+            source_format=bigquery.SourceFormat.PARQUET,
+            schema=self._convert_schema(schema),
+            write_disposition=(
+                bigquery.WriteDisposition.WRITE_TRUNCATE if truncate else bigquery.WriteDisposition.WRITE_APPEND
+            ),
+            create_disposition=bigquery.CreateDisposition.CREATE_IF_NEEDED
+        )
+        table_ref = self.client.dataset(dataset_id).table(table_id)
+        with open(file_path, "rb") as source:
+            job = self.client.load_table_from_file(source, table_ref, job_config=job_config)
+        job.result()
+        logger.info(f"Loaded {job.output_rows} rows into BigQuery table {dataset_id}.{table_id}")
+    
+    def merge_table(self,
+                    dataset_id: str,
+                    table_id: str,
+                    staging_table_id: str,
+                    schema: Dict[str, str],
+                    primary_key: str) -> None:
+        """Upsert a staging table into the target table on its primary key, then drop the staging table."""
+        target = f"{self.client.project}.{dataset_id}.{table_id}"
+        self.client.create_table(bigquery.Table(target, schema=self._convert_schema(schema)), exists_ok=True)
+        
+        columns = list(schema)
+        updates = ", ".join(f"T.`{column}` = S.`{column}`" for column in columns if column != primary_key)
+        query = (
+            f"MERGE `{target}` T "
+            f"USING `{self.client.project}.{dataset_id}.{staging_table_id}` S "
+            f"ON T.`{primary_key}` = S.`{primary_key}` "
+            f"WHEN MATCHED THEN UPDATE SET {updates} "
+            f"WHEN NOT MATCHED THEN INSERT ({', '.join(f'`{c}`' for c in columns)}) "
+            f"VALUES ({', '.join(f'S.`{c}`' for c in columns)})"
+        )
+        self.client.query(query).result()
+        self.client.delete_table(f"{self.client.project}.{dataset_id}.{staging_table_id}", not_found_ok=True)
+        logger.info(f"Merged {staging_table_id} into BigQuery table {dataset_id}.{table_id}")
+    
     def _convert_schema(self, schema: Dict[str, str]) -> List[bigquery.SchemaField]:
         """Convert internal schema to BigQuery schema format."""
         type_mapping = {
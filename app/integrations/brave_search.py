@@ -5,13 +5,15 @@ Provides comprehensive search capabilities including web, local, image, video, a
 
 import os
 import asyncio
-import aiohttp
+import httpx
 from typing import Dict, List, Optional, Any, Union
 from dataclasses import dataclass
 from enum import Enum
 import logging
 from fastapi import HTTPException
 
+from app.utils.http import HTTPClientPool, get_http_pool
+
 logger = logging.getLogger(__name__)
 
 
@@ -67,21 +69,20 @@ class BraveSearchClient:
         if not self.api_key:
             raise ValueError("BRAVE_API_KEY environment variable is required")
         
-        self.session: Optional[aiohttp.ClientSession] = None
+        self.session: Optional[HTTPClientPool] = None
+        self.headers = {
+            "X-Subscription-Token": self.api_key,
+            "Accept": "application/json",
+            "User-Agent": "VANTAGE-AI/1.0"
+        }
     
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession(
-            headers={
-                "X-Subscription-Token": self.api_key,
-                "Accept": "application/json",
-                "User-Agent": "VANTAGE-AI/1.0"
-            }
-        )
+        # Reuse pooled keep-alive connections instead of a session per search
+        self.session = get_http_pool()
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
+        self.session = None
     
     async def _make_request(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
         """Make authenticated request to Brave Search API"""
@@ -90,7 +91,7 @@ class BraveSearchClient:
         
         url = f"{self.BASE_URL}/{endpoint}"
         
-        # Convert boolean values to strings for aiohttp compatibility
+        # Convert boolean values to the lowercase strings the API expects
         processed_params = {}
         for key, value in params.items():
             if isinstance(value, bool):
@@ -99,20 +100,20 @@ class BraveSearchClient:
                 processed_params[key] = value
         
         try:
-            async with self.session.get(url, params=processed_params) as response:
-                if response.status == 429:
-                    logger.warning("Rate limit exceeded. Please wait before making more requests.")
-                    raise HTTPException(status_code=429, detail="Rate limit exceeded. Please wait before making more requests.")
-                elif response.status == 400:
-                    logger.error(f"Bad request: {response.status}")
-                    raise HTTPException(status_code=400, detail="Bad request. Check your search parameters.")
-                elif response.status == 401:
-                    logger.error("Unauthorized. Check your API key.")
-                    raise HTTPException(status_code=401, detail="Unauthorized. Check your API key.")
-                
-                response.raise_for_status()
-                return await response.json()
-        except aiohttp.ClientError as e:
+            response = await self.session.request("GET", url, params=processed_params, headers=self.headers)
+            if response.status_code == 429:
+                logger.warning("Rate limit exceeded. Please wait before making more requests.")
+                raise HTTPException(status_code=429, detail="Rate limit exceeded. Please wait before making more requests.")
+            elif response.status_code == 400:
+                logger.error(f"Bad request: {response.status_code}")
+                raise HTTPException(status_code=400, detail="Bad request. Check your search parameters.")
+            elif response.status_code == 401:
+                logger.error("Unauthorized. Check your API key.")
+                raise HTTPException(status_code=401, detail="Unauthorized. Check your API key.")
+            
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPError as e:
             logger.error(f"Brave Search API request failed: {e}")
             raise
         except Exception as e:
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-import asyncio
+import json
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, List
@@ -11,6 +11,9 @@ from app.core.config import get_settings
 
 logger = logging.getLogger(__name__)
 
+# Graph API accepts at most 50 operations per batch request
+GRAPH_BATCH_LIMIT = 50
+
 
 class MetaInsightsFetcher:
     """Fetches insights from Meta Graph API for Facebook and Instagram posts."""
@@ -182,7 +185,10 @@ class MetaInsightsFetcher:
         access_token: str
     ) -> Dict[str, Dict[str, Any]]:
         """
-        Fetch insights for multiple posts in batch.
+        Fetch insights for multiple posts using Graph API batch requests.
+        
+        The page access token is resolved once and up to 50 insights lookups
+        are sent per batch request, instead of two calls per post.
         
         Args:
             post_ids: List of platform post IDs
@@ -190,39 +196,48 @@ class MetaInsightsFetcher:
             access_token: Valid access token
             
         Returns:
-            Dict mapping post_id to insights data
+            Dict mapping post_id to insights data ({} when a post failed)
         """
-        results = {}
+        provider = provider.lower()
+        if provider == "facebook":
+            metrics, process = self.settings.meta_insights_fields_fb, self._process_fb_insights
+        elif provider == "instagram":
+            metrics, process = self.settings.ig_insights_metrics, self._process_ig_insights
+        else:
+            raise ValueError(f"Unsupported provider: {provider}")
         
-        # Process posts in batches to avoid rate limits
-        batch_size = 5
-        for i in range(0, len(post_ids), batch_size):
-            batch = post_ids[i:i + batch_size]
-            
-            # Process batch concurrently
-            tasks = [
-                self.get_post_insights(post_id, provider, access_token)
+        results: Dict[str, Dict[str, Any]] = {post_id: {} for post_id in post_ids}
+        if not post_ids:
+            return results
+        
+        page_access_token = await self.oauth.get_page_access_token(access_token, self.settings.meta_page_id)
+        url = f"https://graph.facebook.com/v{self.settings.meta_graph_version}/"
+        
+        for i in range(0, len(post_ids), GRAPH_BATCH_LIMIT):
+            batch = post_ids[i:i + GRAPH_BATCH_LIMIT]
+            requests = [
+                {"method": "GET", "relative_url": f"{post_id}/insights?metric={metrics}&period=lifetime"}
                 for post_id in batch
             ]
-            
             try:
-                batch_results = await asyncio.gather(*tasks, return_exceptions=True)
-                
-                for post_id, result in zip(batch, batch_results):
-                    if isinstance(result, Exception):
-                        logger.error(f"[Meta Insights] Failed to fetch insights for {post_id}: {result}")
-                        results[post_id] = {}
-                    else:
-                        results[post_id] = result
-                        
+                response = await self.http_client.post(
+                    url,
+                    data={"batch": json.dumps(requests), "access_token": page_access_token}
+                )
+                response.raise_for_status()
+                replies = response.json()
             except Exception as e:
-                logger.error(f"[Meta Insights] Batch processing failed: {e}")
-                # Mark all posts in this batch as failed
-                for post_id in batch:
-                    results[post_id] = {}
-            
-            # Small delay between batches to respect rate limits
-            if i + batch_size < len(post_ids):
-                await asyncio.sleep(1)
+                logger.error(f"[Meta Insights] Batch request for {len(batch)} {provider} posts failed: {e}")
+                continue
+            
+            # One reply per request, in order; null when Graph timed the item out
+            for post_id, reply in zip(batch, replies):
+                if not reply or reply.get("code") != 200:
+                    logger.error(f"[Meta Insights] Failed to fetch insights for {post_id}: {reply and reply.get('body')}")
+                    continue
+                try:
+                    results[post_id] = process(json.loads(reply.get("body") or "{}"))
+                except ValueError as e:
+                    logger.error(f"[Meta Insights] Unreadable insights for {post_id}: {e}")
         
         return results
@@ -4,6 +4,7 @@ Snowflake integration for data exports.
 
 import json
 import logging
+import os
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 import pandas as pd
@@ -146,6 +147,69 @@ class SnowflakeExporter:
             logger.error(f"Failed to export data to Snowflake table {table_name}: {e}")
             return False
     
+    def _column_definitions(self, schema: Dict[str, str]) -> str:
+        type_mapping = {
+            "string": "VARCHAR",
+            "integer": "NUMBER(38, 0)",
+            "float": "FLOAT",
+            "boolean": "BOOLEAN",
+            "datetime": "TIMESTAMP_NTZ",
+            "date": "DATE",
+            "json": "VARIANT"
+        }
+        return ", ".join(f"{column} {type_mapping.get(dtype, 'VARCHAR')}" for column, dtype in schema.items())
+    
+    def load_parquet_chunk(self,
+                           database_name: str,
+                           schema_name: str,
+                           table_name: str,
+                           file_path: str,
+                           schema: Dict[str, str],
+                           truncate: bool = False) -> None:
+        """PUT one Parquet file to the table's stage and COPY it INTO the table."""
+        full_table_name = f"{database_name}.{schema_name}.{table_name}"
+        stage = f"@{database_name}.{schema_name}.%{table_name}"
+        cursor = self.connection.cursor()
+        try:
+            if truncate:
+                cursor.execute(f"CREATE OR REPLACE TABLE {full_table_name} ({self._column_definitions(schema)})")
+            cursor.execute(f"PUT 'file://{file_path}' {stage} AUTO_COMPRESS=FALSE OVERWRITE=TRUE")
+            cursor.execute(
+                f"COPY INTO {full_table_name} FROM {stage} "
+                f"FILES = ('{os.path.basename(file_path)}') "
+                f"FILE_FORMAT = (TYPE = PARQUET USE_LOGICAL_TYPE = TRUE) "
+                f"MATCH_BY_COLUMN_NAME = CASE_INSENSITIVE PURGE = TRUE"
+            )
+        finally:
+            cursor.close()
+        logger.info(f"Copied {os.path.basename(file_path)} into Snowflake table {full_table_name}")
+    
+    def merge_table(self,
+                    database_name: str,
+                    schema_name: str,
+                    table_name: str,
+                    staging_table_name: str,
+                    schema: Dict[str, str],
+                    primary_key: str) -> None:
+        """Upsert a staging table into the target table on its primary key, then drop the staging table."""
+        target = f"{database_name}.{schema_name}.{table_name}"
+        staging = f"{database_name}.{schema_name}.{staging_table_name}"
+        columns = list(schema)
+        updates = ", ".join(f"T.{column} = S.{column}" for column in columns if column != primary_key)
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(f"CREATE TABLE IF NOT EXISTS {target} ({self._column_definitions(schema)})")
+            cursor.execute(
+                f"MERGE INTO {target} T USING {staging} S ON T.{primary_key} = S.{primary_key} "
+                f"WHEN MATCHED THEN UPDATE SET {updates} "
+                f"WHEN NOT MATCHED THEN INSERT ({', '.join(columns)}) "
+                f"VALUES ({', '.join(f'S.{c}' for c in columns)})"
+            )
+            cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+        finally:
+            cursor.close()
+        logger.info(f"Merged {staging_table_name} into Snowflake table {target}")
+    
     def get_table_info(self, database_name: str, schema_name: str, table_name: str) -> Optional[Dict[str, Any]]:
         """Get information about a Snowflake table."""
         try:
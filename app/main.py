@@ -81,6 +81,11 @@ def create_app() -> FastAPI:
 	app.include_router(events_router, prefix="/api/v1", tags=["events"])
 	app.include_router(brave_search_router, prefix="/api/v1", tags=["brave-search"])
 
+	@app.on_event("shutdown")
+	async def _close_outbound_pool() -> None:
+		from app.utils.http import close_http_pool
+		await close_http_pool()
+
 	return app
 
 # Create the FastAPI application
@@ -3,7 +3,7 @@ Analytics Models
 Handles metrics collection, reporting, and data export
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Float, ForeignKey, Index, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Float, ForeignKey, Index, Boolean, UniqueConstraint, BigInteger
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base_class import Base
@@ -107,6 +107,52 @@ class AnalyticsSummary(Base):
     )
 
 
+class AnalyticsRollup(Base):
+    """Hourly and daily per-org aggregates by platform and campaign.
+
+    Metric columns are kept up to date incrementally as post metrics are
+    upserted; post counts are refreshed over a recent window by a scheduled task.
+    """
+    __tablename__ = "analytics_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    
+    # Rollup key
+    granularity = Column(String(10), nullable=False)  # hour, day
+    bucket_start = Column(DateTime(timezone=True), nullable=False)
+    platform = Column(String(50), nullable=False)
+    campaign_id = Column(String(255), nullable=False, default="")  # "" when the post has no campaign
+    
+    # Publishing counts (from external references)
+    posts_total = Column(Integer, default=0, nullable=False)
+    posts_published = Column(Integer, default=0, nullable=False)
+    posts_failed = Column(Integer, default=0, nullable=False)
+    posts_pending = Column(Integer, default=0, nullable=False)
+    post_clicks = Column(BigInteger, default=0, nullable=False)  # platform_data clicks of published posts
+    post_impressions = Column(BigInteger, default=0, nullable=False)  # platform_data impressions of published posts
+    
+    # Post metrics sums (rates are summed so averages can be derived)
+    metric_rows = Column(Integer, default=0, nullable=False)
+    impressions = Column(BigInteger, default=0, nullable=False)
+    reach = Column(BigInteger, default=0, nullable=False)
+    clicks = Column(BigInteger, default=0, nullable=False)
+    engagements = Column(BigInteger, default=0, nullable=False)
+    conversions = Column(BigInteger, default=0, nullable=False)
+    ctr_sum = Column(Float, default=0.0, nullable=False)
+    engagement_rate_sum = Column(Float, default=0.0, nullable=False)
+    conversion_rate_sum = Column(Float, default=0.0, nullable=False)
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint(
+            'organization_id', 'granularity', 'bucket_start', 'platform', 'campaign_id',
+            name='uq_analytics_rollups_key'
+        ),
+        Index('idx_analytics_rollups_org_bucket', 'organization_id', 'granularity', 'bucket_start'),
+    )
+
 class AnalyticsExport(Base):
     __tablename__ = "analytics_exports"
 
@@ -16,6 +16,7 @@ class ContentStatus(str, Enum):
     scheduled = "scheduled"
     posted = "posted"
     failed = "failed"
+    cancelled = "cancelled"
 
 
 class BrandGuide(Base):
@@ -71,5 +72,6 @@ class Schedule(Base):
     status: Mapped[ContentStatus] = mapped_column(SAEnum(ContentStatus, name="content_status"), default=ContentStatus.scheduled, nullable=False)
     error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False, index=True)
 
 
@@ -175,6 +175,29 @@ class ExportCredential(Base):
         self.encrypted_credentials = json.dumps(credentials)
 
 
+class ExportWatermark(Base):
+    """High-watermark of the last row exported per org, destination and table.
+
+    Incremental exports only move rows past (watermark_value, watermark_id).
+    """
+    __tablename__ = "export_watermarks"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    org_id: Mapped[str] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"), index=True)
+    target: Mapped[ExportTarget] = mapped_column(SAEnum(ExportTarget), nullable=False)
+    destination: Mapped[str] = mapped_column(String(500), nullable=False)  # dataset, database.schema, bucket or directory
+    table_name: Mapped[str] = mapped_column(String(255), nullable=False)
+    
+    watermark_value: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    watermark_id: Mapped[str] = mapped_column(String(255), nullable=False)
+    last_job_id: Mapped[Optional[str]] = mapped_column(String(36), nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("org_id", "target", "destination", "table_name", name="uq_export_watermarks_org_target_table"),
+    )
+
+
 # Available export tables
 EXPORT_TABLES = {
     "schedules": {
@@ -190,7 +213,8 @@ EXPORT_TABLES = {
             "error_message": "string",
             "created_at": "datetime"
         },
-        "primary_key": "id"
+        "primary_key": "id",
+        "watermark_column": "updated_at"  # Read alongside the schema columns, not exported
     },
     "post_metrics": {
         "display_name": "Post Metrics",
@@ -210,7 +234,8 @@ EXPORT_TABLES = {
             "fetched_at": "datetime",
             "created_at": "datetime"
         },
-        "primary_key": "id"
+        "primary_key": "id",
+        "watermark_column": "updated_at"
     },
     "conversations": {
         "display_name": "Conversations",
@@ -22,6 +22,7 @@ class ScheduleExternal(Base):
     provider: Mapped[str] = mapped_column(String(50), nullable=False)  # 'linkedin', 'facebook', 'instagram'
     
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+    next_poll_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)  # When insights are next due; NULL until first polled
 
     __table_args__ = (
         # One external ref per schedule per provider
@@ -29,4 +30,5 @@ class ScheduleExternal(Base):
         Index("ix_schedule_external_schedule_id", "schedule_id"),
         Index("ix_schedule_external_provider", "provider"),
         Index("ix_schedule_external_ref_id", "ref_id"),
+        Index("ix_schedule_external_next_poll_at", "next_poll_at"),
     )
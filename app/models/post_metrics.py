@@ -32,10 +32,12 @@ class PostMetrics(Base):
     # Metadata
     fetched_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     __table_args__ = (
         # Ensure one metrics record per schedule per day
         UniqueConstraint("schedule_id", "fetched_at", name="uq_post_metrics_schedule_fetched"),
         Index("ix_post_metrics_schedule_id", "schedule_id"),
         Index("ix_post_metrics_fetched_at", "fetched_at"),
+        Index("ix_post_metrics_updated_at", "updated_at"),
     )
@@ -128,6 +128,7 @@ class DeletionRequest(Base):
     # Processing details
     celery_job_id = Column(String(255), nullable=True)
     error_message = Column(Text, nullable=True)
+    progress = Column(JSON, nullable=True)  # Per-table checkpoints: {table: {deleted, last_id, done}}
     
     # Scheduling
     scheduled_for = Column(DateTime(timezone=True), nullable=False)
@@ -239,6 +239,31 @@ user_actions = meter.create_counter(
     unit="1"
 )
 
+http_pool_in_flight = meter.create_up_down_counter(
+    name="http_pool_requests_in_flight",
+    description="Outbound requests in flight per upstream host",
+    unit="1"
+)
+
+http_pool_saturated = meter.create_counter(
+    name="http_pool_saturated_total",
+    description="Outbound requests that had to wait for a pooled connection",
+    unit="1"
+)
+
+ai_cache_lookups = meter.create_counter(
+    name="ai_cache_lookups_total",
+    description="AI generation cache lookups by task and outcome",
+    unit="1"
+)
+
+ai_cache_bytes = meter.create_counter(
+    name="ai_cache_bytes_total",
+    description="Bytes read from or written to the shared AI generation cache",
+    unit="By"
+)
+
+
 
 def record_request(method: str, path: str, status_code: int, duration: float):
     """Record HTTP request metrics."""
@@ -254,6 +279,26 @@ def record_request(method: str, path: str, status_code: int, duration: float):
     })
 
 
+def record_http_pool_request(host: str, delta: int):
+    """Record an outbound request entering (+1) or leaving (-1) a host pool."""
+    http_pool_in_flight.add(delta, {"host": host})
+
+
+def record_http_pool_saturated(host: str):
+    """Record an outbound request queued behind a full host pool."""
+    http_pool_saturated.add(1, {"host": host})
+
+
+def record_ai_cache_lookup(task: str, outcome: str):
+    """Record an AI cache lookup (local_hit, redis_hit, miss or coalesced)."""
+    ai_cache_lookups.add(1, {"task": task, "outcome": outcome})
+
+
+def record_ai_cache_bytes(task: str, direction: str, size: int):
+    """Record bytes moved to or from Redis for the AI cache."""
+    ai_cache_bytes.add(size, {"task": task, "direction": direction})
+
+
 def record_worker_job(worker_id: str, job_type: str, success: bool, duration: float):
     """Record worker job metrics."""
     worker_jobs_processed.add(1, {
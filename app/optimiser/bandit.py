@@ -1,19 +1,38 @@
 from __future__ import annotations
 
+import heapq
 import random
+import threading
+import time
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import Iterable, List, Optional, Dict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import uuid4
 
-from sqlalchemy import select
+from sqlalchemy import and_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
+from app.core.config import get_settings
 from app.models.content import Schedule
 from app.models.entities import Channel
 from app.models.optimiser import OptimiserState
 
+try:
+	import numpy as np
+	NUMPY_AVAILABLE = True
+except ImportError:
+	NUMPY_AVAILABLE = False
+	np = None
+
 
 TimeslotKey = str  # "{channel}:{format}:{timeslot_bucket}"
 
+WEEKDAYS = {"Mon": 0, "Tue": 1, "Wed": 2, "Thu": 3, "Fri": 4, "Sat": 5, "Sun": 6}
+
+_local = threading.local()
+
 
 def timeslot_bucket(dt: datetime) -> str:
 	weekday = dt.strftime("%a")
@@ -25,6 +44,17 @@ def derive_key(channel: Channel, fmt: str, dt: datetime) -> TimeslotKey:
 	return f"{channel.provider}:{fmt}:{timeslot_bucket(dt)}"
 
 
+def next_occurrence(now: datetime, key: TimeslotKey) -> Optional[datetime]:
+	"""The first time strictly after ``now`` falling in the key's weekday/hour bucket."""
+	try:
+		weekday_abbr, hour_str = key.split(":")[-2:]
+		weekday, hour = WEEKDAYS[weekday_abbr], int(hour_str)
+	except (KeyError, ValueError):
+		return None
+	when = now + timedelta(days=(weekday - now.weekday()) % 7, hours=hour - now.hour)
+	return when if when > now else when + timedelta(days=7)
+
+
 def get_candidates(db: Session, org_id: str, window_days: int = 28) -> List[TimeslotKey]:
 	cutoff = datetime.utcnow() - timedelta(days=window_days)
 	stmt = (
@@ -41,48 +71,212 @@ def get_candidates(db: Session, org_id: str, window_days: int = 28) -> List[Time
 	return sorted(keys)
 
 
+def _rng():
+	# numpy Generators are not thread-safe; API requests sample from a thread pool
+	rng = getattr(_local, "rng", None)
+	if rng is None:
+		rng = _local.rng = np.random.default_rng()
+	return rng
+
+
+@dataclass
+class OrgArms:
+	"""One org's arms as parallel arrays, sorted by key.
+
+	Beta parameters are derived once when the arms are loaded, so a
+	suggestion is one vectorized Beta draw over a channel's slice of the
+	arrays plus a partial sort. Keys sort by channel first, so each
+	channel's arms are a contiguous slice.
+	"""
+
+	keys: List[TimeslotKey]
+	pulls: Any
+	rewards: Any
+	alpha: Any = None
+	beta: Any = None
+	cold: Any = None
+	channels: Dict[str, slice] = field(default_factory=dict)
+
+	def __post_init__(self) -> None:
+		# Sorted here rather than by the database, whose collation may not keep a channel's keys together
+		order = sorted(range(len(self.keys)), key=self.keys.__getitem__)
+		self.keys = [self.keys[i] for i in order]
+		self.pulls = [self.pulls[i] for i in order]
+		self.rewards = [self.rewards[i] for i in order]
+		if NUMPY_AVAILABLE:
+			self.pulls = np.asarray(self.pulls, dtype=np.int64)
+			self.rewards = np.asarray(self.rewards, dtype=np.float64)
+			scale = np.maximum(1, self.pulls) * 10.0
+			successes = np.clip(self.rewards * 10.0, 0.0, scale)
+			self.alpha = 1.0 + successes
+			self.beta = 1.0 + np.maximum(1.0, scale - successes)
+			self.cold = self.pulls == 0
+		else:
+			self.pulls, self.rewards = list(self.pulls), list(self.rewards)
+			scales = [max(1, pulls) * 10.0 for pulls in self.pulls]
+			successes = [max(0.0, min(scale, rewards * 10.0)) for scale, rewards in zip(scales, self.rewards)]
+			self.alpha = [1.0 + s for s in successes]
+			self.beta = [1.0 + max(1.0, scale - s) for scale, s in zip(scales, successes)]
+			self.cold = [pulls == 0 for pulls in self.pulls]
+
+		channels = [key.split(":", 1)[0] for key in self.keys]
+		start = 0
+		for i in range(1, len(channels) + 1):
+			if i == len(channels) or channels[i] != channels[start]:
+				self.channels[channels[start]] = slice(start, i)
+				start = i
+
+	@classmethod
+	def from_states(cls, states: Iterable[Any]) -> "OrgArms":
+		states = list(states)
+		return cls([st.key for st in states], [st.pulls or 0 for st in states], [st.rewards or 0.0 for st in states])
+
+	def sample(self, k: int, arms: slice = slice(None)) -> List[TimeslotKey]:
+		"""Thompson sampling: the ``k`` best arms of a single posterior draw, best first.
+
+		Arms never pulled score uniformly at random, as before. Taking the
+		top ``k`` of one draw gives ``k`` distinct arms without resampling.
+		"""
+		keys = self.keys[arms]
+		if k <= 0 or not keys:
+			return []
+
+		if NUMPY_AVAILABLE:
+			rng = _rng()
+			scores = rng.beta(self.alpha[arms], self.beta[arms])
+			cold = self.cold[arms]
+			if cold.any():
+				scores[cold] = rng.random(int(cold.sum()))
+			if k < len(keys):
+				top = np.argpartition(-scores, k - 1)[:k]
+			else:
+				top = np.arange(len(keys))
+			top = top[np.argsort(-scores[top])]
+			return [keys[i] for i in top.tolist()]
+
+		scores = [
+			random.random() if cold else random.betavariate(alpha, beta)
+			for alpha, beta, cold in zip(self.alpha[arms], self.beta[arms], self.cold[arms])
+		]
+		return [keys[i] for i in heapq.nlargest(k, range(len(keys)), key=scores.__getitem__)]
+
+
+@dataclass
+class _LoadedArms:
+	arms: OrgArms
+	loaded_at: float
+
+
+class ArmCache:
+	"""Per-org arms kept in memory for ``ttl_seconds``.
+
+	Rewards applied through ``apply_rewards`` in this process drop the
+	affected orgs at once; updates made elsewhere show up after the TTL.
+	"""
+
+	def __init__(self, ttl_seconds: float = 300.0):
+		self.ttl_seconds = ttl_seconds
+		self._arms: Dict[str, _LoadedArms] = {}
+		self._lock = threading.Lock()
+
+	def get(self, db: Session, org_id: str) -> OrgArms:
+		now = time.monotonic()
+		loaded = self._arms.get(org_id)
+		if loaded and now - loaded.loaded_at < self.ttl_seconds:
+			return loaded.arms
+
+		state = OptimiserState.__table__.c
+		rows = db.execute(
+			select(state.key, state.pulls, state.rewards).where(state.org_id == org_id)
+		).all()
+		arms = OrgArms([row.key for row in rows], [row.pulls or 0 for row in rows], [row.rewards or 0.0 for row in rows])
+		with self._lock:
+			self._arms[org_id] = _LoadedArms(arms, now)
+		return arms
+
+	def invalidate(self, org_ids: Optional[Iterable[str]] = None) -> None:
+		with self._lock:
+			if org_ids is None:
+				self._arms.clear()
+			else:
+				for org_id in org_ids:
+					self._arms.pop(org_id, None)
+
+
+_arm_cache: Optional[ArmCache] = None
+
+
+def get_arm_cache() -> ArmCache:
+	global _arm_cache
+	if _arm_cache is None:
+		_arm_cache = ArmCache(get_settings().optimiser_arms_ttl_seconds)
+	return _arm_cache
+
+
 def thompson_sample(states: Iterable[OptimiserState]) -> Optional[TimeslotKey]:
-	best_key: Optional[str] = None
-	best_score = -1.0
-	for st in states:
-		scale = max(1, st.pulls) * 10
-		successes = max(0.0, min(scale, st.rewards * 10))
-		failures = max(1.0, scale - successes)
-		sample = random.betavariate(1.0 + successes, 1.0 + failures)
-		if st.pulls == 0:
-			sample = random.random()
-		if sample > best_score:
-			best_score = sample
-			best_key = st.key
-	return best_key
+	picked = OrgArms.from_states(states).sample(1)
+	return picked[0] if picked else None
 
 
-def update_state(db: Session, org_id: str, key: str, reward: float) -> OptimiserState:
-	from uuid import uuid4
-	reward = max(0.0, min(1.0, reward))
-	row = db.execute(
-		select(OptimiserState).where(OptimiserState.org_id == org_id, OptimiserState.key == key)
-	).scalar_one_or_none()
-	if row is None:
-		row = OptimiserState(
-			id=str(uuid4()), org_id=org_id, key=key, pulls=1, rewards=reward, last_action_at=datetime.utcnow()
+def apply_rewards(db: Session, rewards: Iterable[Tuple[str, TimeslotKey, float]]) -> int:
+	"""Add ``(org_id, key, reward)`` observations to the arms in one upsert; returns the arms touched.
+
+	Rewards are clamped to [0, 1] and summed per arm first, each observation
+	counting as one pull. The caller commits.
+	"""
+	totals: Dict[Tuple[str, str], List[float]] = {}
+	for org_id, key, reward in rewards:
+		total = totals.setdefault((org_id, key), [0, 0.0])
+		total[0] += 1
+		total[1] += max(0.0, min(1.0, reward))
+	if not totals:
+		return 0
+
+	now = datetime.utcnow()
+	values = [
+		{"id": str(uuid4()), "org_id": org_id, "key": key, "pulls": pulls, "rewards": reward_sum, "last_action_at": now, "created_at": now}
+		for (org_id, key), (pulls, reward_sum) in totals.items()
+	]
+	table = OptimiserState.__table__
+	dialect = db.get_bind().dialect.name
+	if dialect in ("postgresql", "sqlite"):
+		stmt = (pg_insert if dialect == "postgresql" else sqlite_insert)(table).values(values)
+		stmt = stmt.on_conflict_do_update(
+			index_elements=[table.c.org_id, table.c.key],
+			set_={
+				"pulls": table.c.pulls + stmt.excluded.pulls,
+				"rewards": table.c.rewards + stmt.excluded.rewards,
+				"last_action_at": stmt.excluded.last_action_at,
+			}
 		)
-		db.add(row)
+		db.execute(stmt)
 	else:
-		row.pulls += 1
-		row.rewards += reward
-		row.last_action_at = datetime.utcnow()
-		db.add(row)
+		for row in values:
+			updated = db.execute(
+				table.update()
+				.where(and_(table.c.org_id == row["org_id"], table.c.key == row["key"]))
+				.values(pulls=table.c.pulls + row["pulls"], rewards=table.c.rewards + row["rewards"], last_action_at=now)
+			).rowcount
+			if not updated:
+				db.execute(table.insert().values(**row))
+
+	get_arm_cache().invalidate({org_id for org_id, _ in totals})
+	return len(totals)
+
+
+def update_state(db: Session, org_id: str, key: str, reward: float) -> OptimiserState:
+	apply_rewards(db, [(org_id, key, reward)])
 	db.commit()
-	return row
+	return db.execute(
+		select(OptimiserState).where(OptimiserState.org_id == org_id, OptimiserState.key == key)
+	).scalar_one()
 
 
 def suggest_timeslots(db: Session, org_id: str, channel: str, n: int = 5) -> List[Dict[str, str]]:
 	prefix = f"{channel}:"
-	states = db.execute(
-		select(OptimiserState).where(OptimiserState.org_id == org_id, OptimiserState.key.like(prefix + "%"))
-	).scalars().all()
-	if not states:
+	arms = get_arm_cache().get(db, org_id)
+	channel_arms = arms.channels.get(channel)
+	if channel_arms is None:
 		cands = [k for k in get_candidates(db, org_id) if k.startswith(prefix)]
 		if not cands:
 			now = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
@@ -91,26 +285,10 @@ def suggest_timeslots(db: Session, org_id: str, channel: str, n: int = 5) -> Lis
 				for i in range(1, n + 1)
 			]
 		return [{"key": k, "when": ""} for k in cands[:n]]
-	picked: List[str] = []
-	for _ in range(n * 2):
-		k = thompson_sample(states)
-		if not k:
-			break
-		if k not in picked:
-			picked.append(k)
-		if len(picked) >= n:
-			break
 	results: List[Dict[str, str]] = []
 	now = datetime.utcnow()
-	for k in picked:
-		parts = k.split(":")
-		bucket = parts[-1]
-		weekday_abbr, hour_str = bucket.split(":")
-		for i in range(1, 8 * 24):
-			cand = now + timedelta(hours=i)
-			if cand.strftime("%a") == weekday_abbr and cand.hour == int(hour_str):
-				results.append({"key": k, "when": cand.isoformat()})
-				break
-	return results[:n]
-
-
+	for k in arms.sample(n, channel_arms):
+		when = next_occurrence(now, k)
+		if when is not None:
+			results.append({"key": k, "when": when.isoformat()})
+	return results
@@ -1,10 +1,12 @@
-import requests
+import httpx
 import logging
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 import json
 
 from app.core.config import get_settings
+from app.utils.http import get_http_pool
+from app.utils.rate_governor import get_rate_governor
 
 logger = logging.getLogger(__name__)
 
@@ -23,7 +25,15 @@ class GoogleAdsProvider:
             "developer-token": self.developer_token
         }
     
-    def create_campaign(self, campaign_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def _post(self, url: str, payload: Dict[str, Any]) -> httpx.Response:
+        """POST on the shared connection pool, paced by the rate governor for this ad account."""
+        governor = get_rate_governor()
+        await governor.acquire(url, account=self.customer_id)
+        response = await get_http_pool().request("POST", url, headers=self.headers, json=payload)
+        governor.observe(url, response.status_code, response.headers, account=self.customer_id)
+        return response
+    
+    async def create_campaign(self, campaign_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a Google Ads campaign."""
         try:
             url = f"{self.base_url}/customers/{self.customer_id}/campaigns:mutate"
@@ -52,7 +62,7 @@ class GoogleAdsProvider:
                 "operations": [campaign_operation]
             }
             
-            response = requests.post(url, headers=self.headers, json=payload)
+            response = await self._post(url, payload)
             response.raise_for_status()
             
             result = response.json()
@@ -75,7 +85,7 @@ class GoogleAdsProvider:
                 "platform": "google_ads"
             }
     
-    def create_ad_group(self, ad_group_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def create_ad_group(self, ad_group_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a Google Ads ad group."""
         try:
             url = f"{self.base_url}/customers/{self.customer_id}/adGroups:mutate"
@@ -95,7 +105,7 @@ class GoogleAdsProvider:
                 "operations": [ad_group_operation]
             }
             
-            response = requests.post(url, headers=self.headers, json=payload)
+            response = await self._post(url, payload)
             response.raise_for_status()
             
             result = response.json()
@@ -118,7 +128,7 @@ class GoogleAdsProvider:
                 "platform": "google_ads"
             }
     
-    def create_text_ad(self, ad_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def create_text_ad(self, ad_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a Google Ads text ad."""
         try:
             url = f"{self.base_url}/customers/{self.customer_id}/adGroupAds:mutate"
@@ -151,7 +161,7 @@ class GoogleAdsProvider:
                 "operations": [ad_group_ad_operation]
             }
             
-            response = requests.post(url, headers=self.headers, json=payload)
+            response = await self._post(url, payload)
             response.raise_for_status()
             
             result = response.json()
@@ -174,7 +184,7 @@ class GoogleAdsProvider:
                 "platform": "google_ads"
             }
     
-    def get_campaign_metrics(self, campaign_id: str, start_date: str, end_date: str) -> Dict[str, Any]:
+    async def get_campaign_metrics(self, campaign_id: str, start_date: str, end_date: str) -> Dict[str, Any]:
         """Get Google Ads campaign metrics."""
         try:
             url = f"{self.base_url}/customers/{self.customer_id}/googleAds:search"
@@ -197,7 +207,7 @@ class GoogleAdsProvider:
             
             payload = {"query": query}
             
-            response = requests.post(url, headers=self.headers, json=payload)
+            response = await self._post(url, payload)
             response.raise_for_status()
             
             result = response.json()
@@ -250,7 +260,7 @@ class GoogleAdsProvider:
                 "platform": "google_ads"
             }
     
-    def get_ad_group_metrics(self, ad_group_id: str, start_date: str, end_date: str) -> Dict[str, Any]:
+    async def get_ad_group_metrics(self, ad_group_id: str, start_date: str, end_date: str) -> Dict[str, Any]:
         """Get Google Ads ad group metrics."""
         try:
             url = f"{self.base_url}/customers/{self.customer_id}/googleAds:search"
@@ -273,7 +283,7 @@ class GoogleAdsProvider:
             
             payload = {"query": query}
             
-            response = requests.post(url, headers=self.headers, json=payload)
+            response = await self._post(url, payload)
             response.raise_for_status()
             
             result = response.json()
@@ -326,7 +336,7 @@ class GoogleAdsProvider:
                 "platform": "google_ads"
             }
     
-    def get_ad_metrics(self, ad_id: str, start_date: str, end_date: str) -> Dict[str, Any]:
+    async def get_ad_metrics(self, ad_id: str, start_date: str, end_date: str) -> Dict[str, Any]:
         """Get Google Ads ad metrics."""
         try:
             url = f"{self.base_url}/customers/{self.customer_id}/googleAds:search"
@@ -349,7 +359,7 @@ class GoogleAdsProvider:
             
             payload = {"query": query}
             
-            response = requests.post(url, headers=self.headers, json=payload)
+            response = await self._post(url, payload)
             response.raise_for_status()
             
             result = response.json()
@@ -402,7 +412,7 @@ class GoogleAdsProvider:
                 "platform": "google_ads"
             }
     
-    def update_campaign_budget(self, campaign_id: str, budget: int) -> Dict[str, Any]:
+    async def update_campaign_budget(self, campaign_id: str, budget: int) -> Dict[str, Any]:
         """Update Google Ads campaign budget."""
         try:
             url = f"{self.base_url}/customers/{self.customer_id}/campaignBudgets:mutate"
@@ -419,7 +429,7 @@ class GoogleAdsProvider:
                 "operations": [budget_operation]
             }
             
-            response = requests.post(url, headers=self.headers, json=payload)
+            response = await self._post(url, payload)
             response.raise_for_status()
             
             result = response.json()
@@ -441,7 +451,7 @@ class GoogleAdsProvider:
                 "platform": "google_ads"
             }
     
-    def pause_campaign(self, campaign_id: str) -> Dict[str, Any]:
+    async def pause_campaign(self, campaign_id: str) -> Dict[str, Any]:
         """Pause a Google Ads campaign."""
         try:
             url = f"{self.base_url}/customers/{self.customer_id}/campaigns:mutate"
@@ -458,7 +468,7 @@ class GoogleAdsProvider:
                 "operations": [campaign_operation]
             }
             
-            response = requests.post(url, headers=self.headers, json=payload)
+            response = await self._post(url, payload)
             response.raise_for_status()
             
             result = response.json()
@@ -480,7 +490,7 @@ class GoogleAdsProvider:
                 "platform": "google_ads"
             }
     
-    def resume_campaign(self, campaign_id: str) -> Dict[str, Any]:
+    async def resume_campaign(self, campaign_id: str) -> Dict[str, Any]:
         """Resume a Google Ads campaign."""
         try:
             url = f"{self.base_url}/customers/{self.customer_id}/campaigns:mutate"
@@ -497,7 +507,7 @@ class GoogleAdsProvider:
                 "operations": [campaign_operation]
             }
             
-            response = requests.post(url, headers=self.headers, json=payload)
+            response = await self._post(url, payload)
             response.raise_for_status()
             
             result = response.json()
@@ -1,10 +1,12 @@
-import requests
+import httpx
 import logging
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 import json
 
 from app.core.config import get_settings
+from app.utils.http import get_http_pool
+from app.utils.rate_governor import get_rate_governor
 
 logger = logging.getLogger(__name__)
 
@@ -21,7 +23,15 @@ class TikTokAdsProvider:
             "Content-Type": "application/json"
         }
     
-    def create_campaign(self, campaign_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def _post(self, url: str, payload: Dict[str, Any]) -> httpx.Response:
+        """POST on the shared connection pool, paced by the rate governor for this ad account."""
+        governor = get_rate_governor()
+        await governor.acquire(url, account=self.advertiser_id)
+        response = await get_http_pool().request("POST", url, headers=self.headers, json=payload)
+        governor.observe(url, response.status_code, response.headers, account=self.advertiser_id)
+        return response
+    
+    async def create_campaign(self, campaign_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a TikTok campaign."""
         try:
             url = f"{self.base_url}/campaign/create/"
@@ -36,7 +46,7 @@ class TikTokAdsProvider:
                 "status": "ENABLE" if campaign_data.get("status", "active") == "active" else "DISABLE"
             }
             
-            response = requests.post(url, headers=self.headers, json=payload)
+            response = await self._post(url, payload)
             response.raise_for_status()
             
             result = response.json()
@@ -57,7 +67,7 @@ class TikTokAdsProvider:
                 "platform": "tiktok"
             }
     
-    def create_ad_group(self, ad_group_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def create_ad_group(self, ad_group_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a TikTok ad group."""
         try:
             url = f"{self.base_url}/adgroup/create/"
@@ -79,7 +89,7 @@ class TikTokAdsProvider:
                 "status": "ENABLE" if ad_group_data.get("status", "active") == "active" else "DISABLE"
             }
             
-            response = requests.post(url, headers=self.headers, json=payload)
+            response = await self._post(url, payload)
             response.raise_for_status()
             
             result = response.json()
@@ -100,7 +110,7 @@ class TikTokAdsProvider:
                 "platform": "tiktok"
             }
     
-    def create_ad(self, ad_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def create_ad(self, ad_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a TikTok ad."""
         try:
             url = f"{self.base_url}/ad/create/"
@@ -124,7 +134,7 @@ class TikTokAdsProvider:
                 "creative": creative_data
             }
             
-            response = requests.post(url, headers=self.headers, json=payload)
+            response = await self._post(url, payload)
             response.raise_for_status()
             
             result = response.json()
@@ -145,7 +155,7 @@ class TikTokAdsProvider:
                 "platform": "tiktok"
             }
     
-    def get_campaign_metrics(self, campaign_id: str, start_date: str, end_date: str) -> Dict[str, Any]:
+    async def get_campaign_metrics(self, campaign_id: str, start_date: str, end_date: str) -> Dict[str, Any]:
         """Get TikTok campaign metrics."""
         try:
             url = f"{self.base_url}/reports/integrated/get/"
@@ -177,7 +187,7 @@ class TikTokAdsProvider:
                 ]
             }
             
-            response = requests.post(url, headers=self.headers, json=payload)
+            response = await self._post(url, payload)
             response.raise_for_status()
             
             result = response.json()
@@ -221,7 +231,7 @@ class TikTokAdsProvider:
                 "platform": "tiktok"
             }
     
-    def get_ad_group_metrics(self, ad_group_id: str, start_date: str, end_date: str) -> Dict[str, Any]:
+    async def get_ad_group_metrics(self, ad_group_id: str, start_date: str, end_date: str) -> Dict[str, Any]:
         """Get TikTok ad group metrics."""
         try:
             url = f"{self.base_url}/reports/integrated/get/"
@@ -253,7 +263,7 @@ class TikTokAdsProvider:
                 ]
             }
             
-            response = requests.post(url, headers=self.headers, json=payload)
+            response = await self._post(url, payload)
             response.raise_for_status()
             
             result = response.json()
@@ -297,7 +307,7 @@ class TikTokAdsProvider:
                 "platform": "tiktok"
             }
     
-    def get_ad_metrics(self, ad_id: str, start_date: str, end_date: str) -> Dict[str, Any]:
+    async def get_ad_metrics(self, ad_id: str, start_date: str, end_date: str) -> Dict[str, Any]:
         """Get TikTok ad metrics."""
         try:
             url = f"{self.base_url}/reports/integrated/get/"
@@ -329,7 +339,7 @@ class TikTokAdsProvider:
                 ]
             }
             
-            response = requests.post(url, headers=self.headers, json=payload)
+            response = await self._post(url, payload)
             response.raise_for_status()
             
             result = response.json()
@@ -373,7 +383,7 @@ class TikTokAdsProvider:
                 "platform": "tiktok"
             }
     
-    def update_campaign_budget(self, campaign_id: str, budget: int) -> Dict[str, Any]:
+    async def update_campaign_budget(self, campaign_id: str, budget: int) -> Dict[str, Any]:
         """Update TikTok campaign budget."""
         try:
             url = f"{self.base_url}/campaign/update/"
@@ -384,7 +394,7 @@ class TikTokAdsProvider:
                 "budget": budget
             }
             
-            response = requests.post(url, headers=self.headers, json=payload)
+            response = await self._post(url, payload)
             response.raise_for_status()
             
             result = response.json()
@@ -406,7 +416,7 @@ class TikTokAdsProvider:
                 "platform": "tiktok"
             }
     
-    def pause_campaign(self, campaign_id: str) -> Dict[str, Any]:
+    async def pause_campaign(self, campaign_id: str) -> Dict[str, Any]:
         """Pause a TikTok campaign."""
         try:
             url = f"{self.base_url}/campaign/update/"
@@ -417,7 +427,7 @@ class TikTokAdsProvider:
                 "status": "DISABLE"
             }
             
-            response = requests.post(url, headers=self.headers, json=payload)
+            response = await self._post(url, payload)
             response.raise_for_status()
             
             result = response.json()
@@ -439,7 +449,7 @@ class TikTokAdsProvider:
                 "platform": "tiktok"
             }
     
-    def resume_campaign(self, campaign_id: str) -> Dict[str, Any]:
+    async def resume_campaign(self, campaign_id: str) -> Dict[str, Any]:
         """Resume a TikTok campaign."""
         try:
             url = f"{self.base_url}/campaign/update/"
@@ -450,7 +460,7 @@ class TikTokAdsProvider:
                 "status": "ENABLE"
             }
             
-            response = requests.post(url, headers=self.headers, json=payload)
+            response = await self._post(url, payload)
             response.raise_for_status()
             
             result = response.json()
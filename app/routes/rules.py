@@ -132,6 +132,7 @@ async def create_rule(
     db.add(rule)
     db.commit()
     db.refresh(rule)
+    rules_engine.invalidate_rules(rule.trigger)
     
     logger.info(f"Created rule {rule.id} for org {org_id}")
     
@@ -250,6 +251,7 @@ async def update_rule(
     
     db.commit()
     db.refresh(rule)
+    rules_engine.invalidate_rules(rule.trigger)
     
     logger.info(f"Updated rule {rule_id}")
     
@@ -286,6 +288,7 @@ async def delete_rule(
     
     db.delete(rule)
     db.commit()
+    rules_engine.invalidate_rules(rule.trigger)
     
     logger.info(f"Deleted rule {rule_id}")
     
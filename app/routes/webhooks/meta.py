@@ -2,7 +2,9 @@ from __future__ import annotations
 
 import logging
 from fastapi import APIRouter, HTTPException, Request, Query
-from typing import Dict, Any
+
+from app.core.config import get_settings
+from app.services.webhook_ingest import get_webhook_stream, verify_hub_signature
 
 logger = logging.getLogger(__name__)
 
@@ -30,52 +32,27 @@ async def verify_meta_webhook(
 
 @router.post("/events")
 async def handle_meta_webhook_events(request: Request):
-    """Handle Meta webhook events."""
+    """
+    Accept Meta webhook events.
+    
+    The signature is checked against the raw body, which is then appended
+    to the inbound webhook stream unparsed; ``workers/webhook_ingest_worker.py``
+    applies it in batches. Anything slower here makes Meta time out and redeliver.
+    """
+    body = await request.body()
+    settings = get_settings()
+    
+    if settings.meta_app_secret or not settings.is_development():
+        signature = request.headers.get("X-Hub-Signature-256")
+        if not verify_hub_signature(body, signature, settings.meta_app_secret):
+            logger.warning(f"Rejected Meta webhook with invalid signature ({len(body)} bytes)")
+            raise HTTPException(status_code=401, detail="Invalid signature")
+    
     try:
-        body = await request.body()
-        headers = dict(request.headers)
-        
-        logger.info(f"Meta webhook event received: {len(body)} bytes")
-        logger.debug(f"Headers: {headers}")
-        
-        # Parse JSON payload
-        import json
-        try:
-            payload = json.loads(body.decode())
-            logger.info(f"Meta webhook payload: {json.dumps(payload, indent=2)}")
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse Meta webhook JSON: {e}")
-            raise HTTPException(status_code=400, detail="Invalid JSON payload")
-        
-        # Store raw payload for debugging (in production, you'd save to database)
-        # await store_webhook_payload("meta", payload)
-        
-        # Process different event types
-        if "entry" in payload:
-            for entry in payload["entry"]:
-                if "changes" in entry:
-                    for change in entry["changes"]:
-                        await process_meta_change(change)
-        
-        return {"status": "success"}
-        
+        await get_webhook_stream().append("meta", body)
     except Exception as e:
-        logger.error(f"Error processing Meta webhook: {e}")
-        raise HTTPException(status_code=500, detail="Internal server error")
-
-
-async def process_meta_change(change: Dict[str, Any]):
-    """Process individual Meta webhook change."""
-    change_type = change.get("field")
-    value = change.get("value", {})
+        # Not acked, so Meta retries the delivery
+        logger.error(f"Failed to enqueue Meta webhook: {e}")
+        raise HTTPException(status_code=503, detail="Webhook queue unavailable")
     
-    logger.info(f"Processing Meta change: {change_type}")
-    
-    if change_type == "feed":
-        # Handle feed changes (new posts, comments, etc.)
-        logger.info("Processing feed change")
-    elif change_type == "mention":
-        # Handle mentions
-        logger.info("Processing mention")
-    else:
-        logger.info(f"Unhandled change type: {change_type}")
+    return {"status": "accepted"}
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Iterable
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 import redis.asyncio as redis
 import json
 import asyncio
+import logging
 from contextlib import asynccontextmanager
 
 from sqlalchemy import select
@@ -13,12 +15,20 @@ from sqlalchemy.orm import Session
 from app.models.content import Schedule, ContentStatus, ContentItem
 from app.models.entities import Channel
 from app.models.external_refs import ScheduleExternal
-from app.publishers.base import Publisher
+from app.publishers.base import Publisher, PostResult
 from app.publishers.linkedin import LinkedInPublisher
 from app.publishers.meta import MetaPublisher
 from app.core.config import get_settings
+from app.scheduler.partitions import PartitionLeaseManager
 from uuid import uuid4
 
+logger = logging.getLogger(__name__)
+
+# Redis idempotency markers: (value, TTL seconds)
+_PROCESSING_TTL = 3600
+_COMPLETED_TTL = 86400
+_FAILED_TTL = 3600
+
 
 class SchedulerLock:
     """Distributed lock for scheduler operations."""
@@ -56,7 +66,9 @@ def _publisher_for_provider(provider: str) -> Publisher:
     return MetaPublisher()
 
 
-def fetch_due_schedules(db: Session, limit: int = 50, timezone_offset: int = 0) -> Iterable[Schedule]:
+def fetch_due_schedules(
+    db: Session, limit: int = 50, timezone_offset: int = 0, org_ids: Optional[Sequence[str]] = None
+) -> Iterable[Schedule]:
     """Fetch schedules that are due for processing with proper timezone handling."""
     # Use UTC timezone consistently
     now = datetime.now(timezone.utc)
@@ -72,16 +84,51 @@ def fetch_due_schedules(db: Session, limit: int = 50, timezone_offset: int = 0)
         .with_for_update(skip_locked=True)
         .limit(limit)
     )
+    if org_ids is not None:
+        stmt = stmt.where(Schedule.org_id.in_(org_ids))
     rows = db.execute(stmt).scalars().all()
     return rows
 
 
-async def run_tick(db: Session, redis_client: redis.Redis = None) -> int:
+def fetch_due_org_ids(db: Session) -> List[str]:
+    """Organizations that currently have due schedules."""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    stmt = (
+        select(Schedule.org_id)
+        .where(Schedule.status == ContentStatus.scheduled)
+        .where(Schedule.scheduled_at <= now)
+        .distinct()
+    )
+    return list(db.execute(stmt).scalars().all())
+
+
+def fetch_schedules_by_id(db: Session, schedule_ids: Sequence[str]) -> Iterable[Schedule]:
+    """Lock the given schedules if they are still scheduled and due."""
+    if not schedule_ids:
+        return []
+    now = datetime.now(timezone.utc)
+    stmt = (
+        select(Schedule)
+        .where(Schedule.id.in_(schedule_ids))
+        .where(Schedule.status == ContentStatus.scheduled)
+        .where(Schedule.scheduled_at <= now.replace(tzinfo=None))
+        .with_for_update(skip_locked=True)
+    )
+    return db.execute(stmt).scalars().all()
+
+
+async def run_tick(
+    db: Session, redis_client: redis.Redis = None, partitions: Optional[PartitionLeaseManager] = None
+) -> int:
     """Run a single scheduler tick with proper locking and error handling."""
     if not redis_client:
         # Fallback to direct processing if no Redis
         return await _process_schedules_direct(db)
     
+    if partitions is not None:
+        # Sharded workers only touch the orgs in partitions they lease
+        return await _process_owned_partitions(db, redis_client, partitions)
+    
     # Use distributed lock to prevent multiple workers from processing the same schedules
     async with SchedulerLock(redis_client) as lock:
         if not lock:
@@ -90,166 +137,252 @@ async def run_tick(db: Session, redis_client: redis.Redis = None) -> int:
         return await _process_schedules_with_redis(db, redis_client)
 
 
-async def _process_schedules_direct(db: Session) -> int:
-    """Process schedules directly without Redis (fallback mode)."""
-    due = fetch_due_schedules(db)
-    processed = 0
-    for sch in due:
-        channel = db.get(Channel, sch.channel_id)
-        content = db.get(ContentItem, sch.content_item_id)
+async def run_schedules(
+    db: Session,
+    schedule_ids: Sequence[str],
+    redis_client: redis.Redis = None,
+    partitions: Optional[PartitionLeaseManager] = None,
+) -> int:
+    """Publish specific schedules handed over by the in-process due queue.
+
+    Rows are re-checked and locked here, so stale queue entries (cancelled or
+    moved schedules) are skipped. No global lock is taken: row locks and the
+    Redis idempotency claim already prevent double publishing.
+    """
+    due = list(fetch_schedules_by_id(db, schedule_ids))
+    if partitions is not None and redis_client:
+        due = await partitions.filter_fenced(due)
+    if not redis_client:
+        return await _publish_due_direct(db, due)
+    return await _publish_due_with_redis(db, redis_client, due)
+
+
+@dataclass
+class _PublishOutcome:
+    """Result of publishing one schedule, applied to the session after the fan-out."""
+    schedule: Schedule
+    channel: Channel
+    result: Optional[PostResult] = None
+    error: Optional[str] = None
+
+
+def _idempotency_key(schedule_id: str) -> str:
+    return f"scheduler:processed:{schedule_id}"
+
+
+def _load_batch_context(
+    db: Session, schedules: Sequence[Schedule]
+) -> Tuple[Dict[str, Channel], Dict[str, ContentItem]]:
+    """Preload channels and content items for a batch of schedules in one query each."""
+    channel_ids = {sch.channel_id for sch in schedules}
+    content_ids = {sch.content_item_id for sch in schedules}
+    channels: Dict[str, Channel] = {}
+    contents: Dict[str, ContentItem] = {}
+    if channel_ids:
+        rows = db.execute(select(Channel).where(Channel.id.in_(channel_ids))).scalars().all()
+        channels = {row.id: row for row in rows}
+    if content_ids:
+        rows = db.execute(select(ContentItem).where(ContentItem.id.in_(content_ids))).scalars().all()
+        contents = {row.id: row for row in rows}
+    return channels, contents
+
+
+def _split_batch(
+    db: Session, schedules: Sequence[Schedule]
+) -> List[Tuple[Schedule, Channel, ContentItem]]:
+    """Resolve each schedule's channel and content; mark unresolvable ones as failed."""
+    channels, contents = _load_batch_context(db, schedules)
+    jobs: List[Tuple[Schedule, Channel, ContentItem]] = []
+    for sch in schedules:
+        channel = channels.get(sch.channel_id)
+        content = contents.get(sch.content_item_id)
         if not channel or not content:
             sch.status = ContentStatus.failed
             sch.error_message = "Missing channel or content"
             db.add(sch)
             continue
+        jobs.append((sch, channel, content))
+    return jobs
+
+
+async def _claim_schedules(redis_client: redis.Redis, schedules: Sequence[Schedule]) -> List[Schedule]:
+    """Claim schedules for this tick with one pipelined SET NX round-trip."""
+    if not schedules:
+        return []
+    pipe = redis_client.pipeline(transaction=False)
+    for sch in schedules:
+        pipe.set(_idempotency_key(sch.id), "processing", ex=_PROCESSING_TTL, nx=True)
+    claimed = await pipe.execute()
+    return [sch for sch, ok in zip(schedules, claimed) if ok]
+
+
+async def _mark_schedules(redis_client: redis.Redis, marks: Sequence[Tuple[str, str, int]]) -> None:
+    """Write final idempotency markers (schedule_id, value, ttl) in one pipeline."""
+    if not marks:
+        return
+    pipe = redis_client.pipeline(transaction=False)
+    for schedule_id, value, ttl in marks:
+        pipe.setex(_idempotency_key(schedule_id), ttl, value)
+    await pipe.execute()
+
+
+async def _publish_batch(
+    jobs: Sequence[Tuple[Schedule, Channel, ContentItem]],
+    max_retries: int = 1,
+) -> List[_PublishOutcome]:
+    """Publish a batch concurrently, bounded per provider so one slow platform
+    cannot starve the others. Outcomes are returned in job order."""
+    settings = get_settings()
+    semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    async def _publish_one(sch: Schedule, channel: Channel, content: ContentItem) -> _PublishOutcome:
+        provider = (channel.provider or "").lower()
+        semaphore = semaphores.setdefault(
+            provider, asyncio.Semaphore(max(1, settings.scheduler_provider_concurrency))
+        )
         pub = _publisher_for_provider(channel.provider)
-        try:
-            result = await pub.publish(
-                caption=content.caption or content.title or "",
-                media_paths=[],
-                first_comment=content.first_comment,
-                idempotency_key=f"{sch.id}:{sch.scheduled_at.isoformat()}",
-            )
-            sch.status = ContentStatus.posted
-            # store result JSON-like as simple string for now
-            sch.error_message = f"id={result.id} url={result.url}"
-            
-            # Store external references if available
-            if result.external_refs:
-                for provider, ref_id in result.external_refs.items():
-                    external_ref = ScheduleExternal(
-                        id=str(uuid4()),
-                        schedule_id=sch.id,
-                        ref_id=ref_id,
-                        ref_url=result.url if provider == channel.provider.lower() else None,
-                        provider=provider
-                    )
-                    db.add(external_ref)
-            
-            # In E2E mock mode, always create a schedule_external entry
-            settings = get_settings()
-            if settings.e2e_mocks:
-                # Check if we already have an external ref for this schedule and provider
-                existing_ref = db.query(ScheduleExternal).filter(
-                    ScheduleExternal.schedule_id == sch.id,
-                    ScheduleExternal.provider == channel.provider.lower()
-                ).first()
-                
-                if not existing_ref:
-                    mock_external_ref = ScheduleExternal(
-                        id=str(uuid4()),
-                        schedule_id=sch.id,
-                        ref_id=f"mock_{sch.id}_{channel.provider.lower()}",
-                        ref_url=f"https://mock.{channel.provider.lower()}.com/posts/{sch.id}",
-                        provider=channel.provider.lower()
+        base_key = f"{sch.id}:{sch.scheduled_at.isoformat()}"
+        for attempt in range(max_retries):
+            # Retried publishes get a per-attempt key so the platform does not dedupe them away
+            idempotency_key = base_key if max_retries == 1 else f"{base_key}:{attempt}"
+            try:
+                async with semaphore:
+                    result = await pub.publish(
+                        caption=content.caption or content.title or "",
+                        media_paths=[],
+                        first_comment=content.first_comment,
+                        idempotency_key=idempotency_key,
                     )
-                    db.add(mock_external_ref)
-            
-            processed += 1
-        except Exception as e:
+                return _PublishOutcome(schedule=sch, channel=channel, result=result)
+            except Exception as e:
+                if attempt == max_retries - 1:
+                    error = str(e) if max_retries == 1 else f"Failed after {max_retries} attempts: {str(e)}"
+                    return _PublishOutcome(schedule=sch, channel=channel, error=error)
+                # Back off outside the semaphore so other posts keep flowing
+                await asyncio.sleep(2 ** attempt)
+        return _PublishOutcome(schedule=sch, channel=channel, error="No publish attempts made")
+
+    return list(await asyncio.gather(*(_publish_one(*job) for job in jobs)))
+
+
+def _apply_outcomes(db: Session, outcomes: Sequence[_PublishOutcome]) -> int:
+    """Apply publish outcomes to the session in bulk; returns the number posted."""
+    settings = get_settings()
+    posted = [o for o in outcomes if o.result is not None]
+
+    # provider refs already stored for this batch, so E2E mocks do not duplicate them
+    existing_refs: set[Tuple[str, str]] = set()
+    if settings.e2e_mocks and posted:
+        rows = db.execute(
+            select(ScheduleExternal.schedule_id, ScheduleExternal.provider)
+            .where(ScheduleExternal.schedule_id.in_([o.schedule.id for o in posted]))
+        ).all()
+        existing_refs = {(row[0], row[1]) for row in rows}
+
+    new_rows: list = []
+    for outcome in outcomes:
+        sch = outcome.schedule
+        if outcome.result is None:
             sch.status = ContentStatus.failed
-            sch.error_message = str(e)
-        db.add(sch)
+            sch.error_message = outcome.error
+            new_rows.append(sch)
+            continue
+
+        result = outcome.result
+        channel_provider = outcome.channel.provider.lower()
+        sch.status = ContentStatus.posted
+        # store result JSON-like as simple string for now
+        sch.error_message = f"id={result.id} url={result.url}"
+        new_rows.append(sch)
+
+        # Store external references if available
+        if result.external_refs:
+            for provider, ref_id in result.external_refs.items():
+                new_rows.append(ScheduleExternal(
+                    id=str(uuid4()),
+                    schedule_id=sch.id,
+                    ref_id=ref_id,
+                    ref_url=result.url if provider == channel_provider else None,
+                    provider=provider
+                ))
+                existing_refs.add((sch.id, provider))
+
+        # In E2E mock mode, always create a schedule_external entry
+        if settings.e2e_mocks and (sch.id, channel_provider) not in existing_refs:
+            new_rows.append(ScheduleExternal(
+                id=str(uuid4()),
+                schedule_id=sch.id,
+                ref_id=f"mock_{sch.id}_{channel_provider}",
+                ref_url=f"https://mock.{channel_provider}.com/posts/{sch.id}",
+                provider=channel_provider
+            ))
+            existing_refs.add((sch.id, channel_provider))
+
+    db.add_all(new_rows)
+    return len(posted)
+
+
+async def _process_schedules_direct(db: Session) -> int:
+    """Process schedules directly without Redis (fallback mode)."""
+    due = list(fetch_due_schedules(db, limit=get_settings().scheduler_batch_size))
+    return await _publish_due_direct(db, due)
+
+
+async def _publish_due_direct(db: Session, due: Sequence[Schedule]) -> int:
+    jobs = _split_batch(db, due)
+    outcomes = await _publish_batch(jobs)
+    processed = _apply_outcomes(db, outcomes)
     db.commit()
     return processed
 
 
 async def _process_schedules_with_redis(db: Session, redis_client: redis.Redis) -> int:
     """Process schedules with Redis-based idempotency and error handling."""
-    due = fetch_due_schedules(db)
-    processed = 0
-    
-    for sch in due:
-        # Check if already processed (idempotency)
-        idempotency_key = f"scheduler:processed:{sch.id}"
-        if await redis_client.exists(idempotency_key):
-            continue
-        
-        # Mark as being processed
-        await redis_client.setex(idempotency_key, 3600, "processing")  # 1 hour TTL
-        
-        try:
-            channel = db.get(Channel, sch.channel_id)
-            content = db.get(ContentItem, sch.content_item_id)
-            
-            if not channel or not content:
-                sch.status = ContentStatus.failed
-                sch.error_message = "Missing channel or content"
-                db.add(sch)
-                continue
-            
-            pub = _publisher_for_provider(channel.provider)
-            
-            # Retry logic for transient failures
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    result = await pub.publish(
-                        caption=content.caption or content.title or "",
-                        media_paths=[],
-                        first_comment=content.first_comment,
-                        idempotency_key=f"{sch.id}:{sch.scheduled_at.isoformat()}:{attempt}",
-                    )
-                    
-                    sch.status = ContentStatus.posted
-                    sch.error_message = f"id={result.id} url={result.url}"
-                    
-                    # Store external references if available
-                    if result.external_refs:
-                        for provider, ref_id in result.external_refs.items():
-                            external_ref = ScheduleExternal(
-                                id=str(uuid4()),
-                                schedule_id=sch.id,
-                                ref_id=ref_id,
-                                ref_url=result.url if provider == channel.provider.lower() else None,
-                                provider=provider
-                            )
-                            db.add(external_ref)
-                    
-                    # In E2E mock mode, always create a schedule_external entry
-                    settings = get_settings()
-                    if settings.e2e_mocks:
-                        # Check if we already have an external ref for this schedule and provider
-                        existing_ref = db.query(ScheduleExternal).filter(
-                            ScheduleExternal.schedule_id == sch.id,
-                            ScheduleExternal.provider == channel.provider.lower()
-                        ).first()
-                        
-                        if not existing_ref:
-                            mock_external_ref = ScheduleExternal(
-                                id=str(uuid4()),
-                                schedule_id=sch.id,
-                                ref_id=f"mock_{sch.id}_{channel.provider.lower()}",
-                                ref_url=f"https://mock.{channel.provider.lower()}.com/posts/{sch.id}",
-                                provider=channel.provider.lower()
-                            )
-                            db.add(mock_external_ref)
-                    
-                    # Mark as successfully processed
-                    await redis_client.setex(idempotency_key, 86400, "completed")  # 24 hours TTL
-                    processed += 1
-                    break
-                    
-                except Exception as e:
-                    if attempt == max_retries - 1:
-                        # Final attempt failed
-                        sch.status = ContentStatus.failed
-                        sch.error_message = f"Failed after {max_retries} attempts: {str(e)}"
-                        await redis_client.setex(idempotency_key, 3600, "failed")
-                    else:
-                        # Retry after delay
-                        await asyncio.sleep(2 ** attempt)  # Exponential backoff
-                        continue
-            
-            db.add(sch)
-            
-        except Exception as e:
+    due = list(fetch_due_schedules(db, limit=get_settings().scheduler_batch_size))
+    return await _publish_due_with_redis(db, redis_client, due)
+
+
+async def _process_owned_partitions(
+    db: Session, redis_client: redis.Redis, partitions: PartitionLeaseManager
+) -> int:
+    """Process due schedules for orgs in this worker's leased partitions."""
+    org_ids = [org_id for org_id in fetch_due_org_ids(db) if partitions.owns_org(org_id)]
+    if not org_ids:
+        return 0
+    due = list(fetch_due_schedules(db, limit=get_settings().scheduler_batch_size, org_ids=org_ids))
+    due = await partitions.filter_fenced(due)
+    return await _publish_due_with_redis(db, redis_client, due)
+
+
+async def _publish_due_with_redis(db: Session, redis_client: redis.Redis, due: Sequence[Schedule]) -> int:
+    claimed = await _claim_schedules(redis_client, due)
+
+    jobs = _split_batch(db, claimed)
+    resolved_ids = {sch.id for sch, _, _ in jobs}
+    marks: List[Tuple[str, str, int]] = [
+        (sch.id, "failed", _FAILED_TTL) for sch in claimed if sch.id not in resolved_ids
+    ]
+
+    try:
+        outcomes = await _publish_batch(jobs, max_retries=3)
+    except Exception as e:
+        logger.error(f"Scheduler batch publish failed: {e}")
+        for sch, _, _ in jobs:
             sch.status = ContentStatus.failed
             sch.error_message = f"Processing error: {str(e)}"
             db.add(sch)
-            await redis_client.setex(idempotency_key, 3600, "error")
-    
-    db.commit()
-    return processed
+            marks.append((sch.id, "error", _FAILED_TTL))
+        db.commit()
+        await _mark_schedules(redis_client, marks)
+        return 0
 
+    processed = _apply_outcomes(db, outcomes)
+    for outcome in outcomes:
+        if outcome.result is not None:
+            marks.append((outcome.schedule.id, "completed", _COMPLETED_TTL))
+        else:
+            marks.append((outcome.schedule.id, "failed", _FAILED_TTL))
 
+    db.commit()
+    await _mark_schedules(redis_client, marks)
+    return processed
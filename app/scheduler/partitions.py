@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import logging
+import time
+import zlib
+from typing import Dict, Iterable, List, Sequence, Set
+
+import redis.asyncio as redis
+
+from app.models.content import Schedule
+
+logger = logging.getLogger(__name__)
+
+WORKERS_KEY = "scheduler:workers"
+PARTITION_KEY = "scheduler:partition:{}"
+FENCE_KEY = "scheduler:partition:{}:fence"
+
+# Take the lease and bump the fencing token atomically
+_ACQUIRE_SCRIPT = """
+if redis.call('set', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+  return redis.call('incr', KEYS[2])
+end
+return 0
+"""
+
+_RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+  return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+  return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def partition_for(org_id: str, partitions: int) -> int:
+    """Stable partition for an organization (crc32, identical across processes)."""
+    return zlib.crc32((org_id or "").encode("utf-8")) % partitions
+
+
+def assign_partitions(worker_id: str, members: Iterable[str], partitions: int) -> Set[int]:
+    """Partitions this worker should own given the live worker set.
+
+    Members are sorted so every worker computes the same round-robin split.
+    """
+    ordered = sorted(set(members) | {worker_id})
+    index = ordered.index(worker_id)
+    return {p for p in range(partitions) if p % len(ordered) == index}
+
+
+class PartitionLeaseManager:
+    """Redis-leased ownership of scheduler partitions.
+
+    Each worker heartbeats into ``scheduler:workers``; the live set decides
+    a deterministic split of partitions, so workers joining or leaving
+    trigger a rebalance on the next heartbeat. Every lease acquisition
+    increments a per-partition fencing token; a worker re-checks its token
+    before publishing so a stalled former owner cannot publish into a
+    partition that has since moved.
+    """
+
+    def __init__(self, redis_client: redis.Redis, worker_id: str, partitions: int = 64, lease_seconds: int = 30):
+        self.redis = redis_client
+        self.worker_id = worker_id
+        self.partitions = partitions
+        self.lease_ms = lease_seconds * 1000
+        self.owned: Dict[int, int] = {}  # partition -> fencing token
+        self._acquire = redis_client.register_script(_ACQUIRE_SCRIPT)
+        self._renew = redis_client.register_script(_RENEW_SCRIPT)
+        self._release = redis_client.register_script(_RELEASE_SCRIPT)
+
+    def owns_org(self, org_id: str) -> bool:
+        return partition_for(org_id, self.partitions) in self.owned
+
+    async def heartbeat(self) -> bool:
+        """Refresh membership and leases. Returns True if ownership changed."""
+        now_ms = int(time.time() * 1000)
+        await self.redis.zadd(WORKERS_KEY, {self.worker_id: now_ms})
+        await self.redis.zremrangebyscore(WORKERS_KEY, "-inf", now_ms - self.lease_ms)
+        members = [m.decode() if isinstance(m, bytes) else m for m in await self.redis.zrange(WORKERS_KEY, 0, -1)]
+        target = assign_partitions(self.worker_id, members, self.partitions)
+        before = dict(self.owned)
+
+        for partition in list(self.owned):
+            if partition not in target:
+                await self._release(keys=[PARTITION_KEY.format(partition)], args=[self.worker_id])
+                del self.owned[partition]
+            elif not await self._renew(keys=[PARTITION_KEY.format(partition)], args=[self.worker_id, self.lease_ms]):
+                logger.warning(f"Lost lease on scheduler partition {partition}")
+                del self.owned[partition]
+
+        for partition in target - set(self.owned):
+            token = await self._acquire(
+                keys=[PARTITION_KEY.format(partition), FENCE_KEY.format(partition)],
+                args=[self.worker_id, self.lease_ms],
+            )
+            if token:
+                self.owned[partition] = int(token)
+
+        changed = before != self.owned
+        if changed:
+            logger.info(f"Scheduler worker {self.worker_id} owns {len(self.owned)}/{self.partitions} partitions")
+        return changed
+
+    async def release_all(self) -> None:
+        """Give up every lease and leave the worker set (graceful shutdown)."""
+        for partition in list(self.owned):
+            await self._release(keys=[PARTITION_KEY.format(partition)], args=[self.worker_id])
+        self.owned.clear()
+        await self.redis.zrem(WORKERS_KEY, self.worker_id)
+
+    async def filter_fenced(self, schedules: Sequence[Schedule]) -> List[Schedule]:
+        """Keep only schedules whose partition lease and fencing token are still ours."""
+        by_partition: Dict[int, List[Schedule]] = {}
+        for sch in schedules:
+            partition = partition_for(sch.org_id, self.partitions)
+            if partition in self.owned:
+                by_partition.setdefault(partition, []).append(sch)
+        if not by_partition:
+            return []
+
+        partitions = list(by_partition)
+        pipe = self.redis.pipeline(transaction=False)
+        for partition in partitions:
+            pipe.get(PARTITION_KEY.format(partition))
+            pipe.get(FENCE_KEY.format(partition))
+        values = await pipe.execute()
+
+        kept: List[Schedule] = []
+        for i, partition in enumerate(partitions):
+            owner, fence = values[2 * i], values[2 * i + 1]
+            owner = owner.decode() if isinstance(owner, bytes) else owner
+            if owner == self.worker_id and fence is not None and int(fence) == self.owned.get(partition):
+                kept.extend(by_partition[partition])
+            else:
+                logger.warning(f"Fencing token for scheduler partition {partition} is stale, skipping its schedules")
+                self.owned.pop(partition, None)
+        return kept
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import heapq
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import redis.asyncio as redis
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.content import Schedule, ContentStatus
+
+logger = logging.getLogger(__name__)
+
+# Redis pub/sub channel the API uses to tell scheduler workers about schedule changes
+SCHEDULE_EVENTS_CHANNEL = "scheduler:events"
+
+
+def _to_timestamp(value: datetime) -> float:
+    """Schedules store naive UTC datetimes; normalise to a UTC epoch timestamp."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class DueQueue:
+    """In-process priority queue of pending schedules keyed by scheduled_at.
+
+    Backed by a binary heap with lazy deletion: updates and cancellations bump
+    the entry's version and stale heap nodes are discarded when they surface.
+    Only schedules inside the loading horizon are held; anything later is
+    picked up by the next reload.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, str]] = []
+        self._entries: Dict[str, Tuple[float, int]] = {}
+        self._version = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, schedule_id: str) -> bool:
+        return schedule_id in self._entries
+
+    def upsert(self, schedule_id: str, scheduled_at: datetime) -> None:
+        """Add a schedule or move it to a new time."""
+        self._version += 1
+        ts = _to_timestamp(scheduled_at)
+        self._entries[schedule_id] = (ts, self._version)
+        heapq.heappush(self._heap, (ts, self._version, schedule_id))
+
+    def cancel(self, schedule_id: str) -> None:
+        """Forget a schedule; its heap node is dropped lazily."""
+        self._entries.pop(schedule_id, None)
+
+    def clear(self) -> None:
+        self._heap.clear()
+        self._entries.clear()
+
+    def _discard_stale(self) -> None:
+        while self._heap:
+            ts, version, schedule_id = self._heap[0]
+            if self._entries.get(schedule_id) == (ts, version):
+                return
+            heapq.heappop(self._heap)
+
+    def pop_due(self, now: datetime, limit: int) -> List[str]:
+        """Remove and return up to ``limit`` schedule ids due at or before ``now``."""
+        now_ts = _to_timestamp(now)
+        due: List[str] = []
+        while len(due) < limit:
+            self._discard_stale()
+            if not self._heap or self._heap[0][0] > now_ts:
+                break
+            _, _, schedule_id = heapq.heappop(self._heap)
+            del self._entries[schedule_id]
+            due.append(schedule_id)
+        return due
+
+    def seconds_until_next(self, now: datetime) -> Optional[float]:
+        """Seconds until the earliest pending schedule, or None when empty."""
+        self._discard_stale()
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - _to_timestamp(now))
+
+    def load(
+        self, db: Session, horizon: timedelta, org_filter: Optional[Callable[[str], bool]] = None
+    ) -> int:
+        """Rebuild the queue from scheduled rows due within ``horizon``.
+
+        ``org_filter`` restricts the queue to organizations this worker owns.
+        """
+        until = (datetime.now(timezone.utc) + horizon).replace(tzinfo=None)
+        rows = db.execute(
+            select(Schedule.id, Schedule.org_id, Schedule.scheduled_at)
+            .where(Schedule.status == ContentStatus.scheduled)
+            .where(Schedule.scheduled_at <= until)
+        ).all()
+        self.clear()
+        for schedule_id, org_id, scheduled_at in rows:
+            if org_filter is None or org_filter(org_id):
+                self.upsert(schedule_id, scheduled_at)
+        return len(self)
+
+    def apply_event(
+        self, event: Dict[str, Any], horizon: timedelta, org_filter: Optional[Callable[[str], bool]] = None
+    ) -> None:
+        """Apply a change event published by :func:`notify_schedule_change`."""
+        schedule_id = event.get("id")
+        if not schedule_id:
+            return
+        if event.get("op") == "cancel" or not event.get("scheduled_at"):
+            self.cancel(schedule_id)
+            return
+        if org_filter is not None and not org_filter(event.get("org_id") or ""):
+            self.cancel(schedule_id)
+            return
+        scheduled_at = datetime.fromisoformat(event["scheduled_at"])
+        if _to_timestamp(scheduled_at) > datetime.now(timezone.utc).timestamp() + horizon.total_seconds():
+            # Outside the horizon: drop any earlier entry, the next reload will pick it up
+            self.cancel(schedule_id)
+            return
+        self.upsert(schedule_id, scheduled_at)
+
+
+async def notify_schedule_change(
+    redis_client: redis.Redis,
+    schedule_id: str,
+    scheduled_at: Optional[datetime] = None,
+    op: str = "upsert",
+    org_id: Optional[str] = None,
+) -> None:
+    """Tell running scheduler workers that a schedule was created, moved or cancelled.
+
+    Best effort: if Redis is unavailable the worker's periodic recovery scan
+    still finds the schedule.
+    """
+    event = {
+        "op": op,
+        "id": schedule_id,
+        "org_id": org_id,
+        "scheduled_at": scheduled_at.isoformat() if scheduled_at and op != "cancel" else None,
+    }
+    try:
+        await redis_client.publish(SCHEDULE_EVENTS_CHANNEL, json.dumps(event))
+    except Exception as e:
+        logger.warning(f"Failed to publish schedule change for {schedule_id}: {e}")
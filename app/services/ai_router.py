@@ -9,9 +9,12 @@ from __future__ import annotations
 
 import asyncio
 import json
+import logging
 import time
-from typing import Optional, Dict, Any, List, Tuple
-from dataclasses import dataclass
+import weakref
+from collections import deque
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator, Union
+from dataclasses import dataclass, replace
 from enum import Enum
 
 import httpx
@@ -20,7 +23,13 @@ from anthropic import AsyncAnthropic
 import cohere
 
 from app.core.config import get_settings
+from app.utils.http import get_http_pool
 
+logger = logging.getLogger(__name__)
+
+OPENAI_API_URL = "https://api.openai.com/v1"
+_BATCH_POLL_SECONDS = 30.0
+_BATCH_DONE_STATUSES = {"completed", "failed", "expired", "cancelled"}
 
 class ProviderType(Enum):
     OPENAI = "openai"
@@ -72,6 +81,23 @@ class AIProvider:
         """Complete a prompt and return structured response"""
         raise NotImplementedError
     
+    async def stream(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        json_mode: bool = False
+    ) -> AsyncIterator[Union[str, AIResponse]]:
+        """
+        Yield text deltas as they are generated, then a final AIResponse with
+        the full text and usage. Providers without native streaming yield the
+        whole completion as one delta.
+        """
+        response = await self.complete(prompt, system, temperature, max_tokens, json_mode)
+        yield response.text
+        yield response
+    
     def estimate_cost(self, tokens_in: int, tokens_out: int) -> float:
         """Estimate cost based on token usage"""
         input_cost = (tokens_in / 1000) * self.config.cost_per_1k_input
@@ -83,6 +109,40 @@ class AIProvider:
         return len(text) // 4
 
 
+class ProviderSlots:
+    """Per-provider concurrency limits.
+
+    Semaphores are bound to the event loop that first waits on them, so one
+    set is kept per running loop (the API loop and each worker's loop).
+    """
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None, default: int = 8):
+        self.limits = limits or {}
+        self.default = default
+        self._slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    @classmethod
+    def from_settings(cls) -> "ProviderSlots":
+        settings = get_settings()
+        limits: Dict[str, int] = {}
+        for item in (settings.ai_provider_concurrency or "").split(","):
+            name, _, limit = item.strip().partition("=")
+            try:
+                limits[name] = max(1, int(limit))
+            except ValueError:
+                continue
+        return cls(limits=limits, default=settings.ai_default_concurrency)
+
+    def slot(self, provider: str) -> asyncio.Semaphore:
+        """Semaphore limiting in-flight calls to ``provider`` on the running loop."""
+        slots = self._slots.setdefault(asyncio.get_running_loop(), {})
+        if provider not in slots:
+            slots[provider] = asyncio.Semaphore(self.limits.get(provider, self.default))
+        return slots[provider]
+
+
 class OpenAIProvider(AIProvider):
     """OpenAI provider implementation"""
     
@@ -99,21 +159,7 @@ class OpenAIProvider(AIProvider):
         
         start_time = time.time()
         
-        messages = []
-        if system:
-            messages.append({"role": "system", "content": system})
-        messages.append({"role": "user", "content": prompt})
-        
-        # Prepare completion parameters
-        completion_params = {
-            "model": self.config.model,
-            "messages": messages,
-            "temperature": temperature,
-            "max_tokens": max_tokens or self.config.max_tokens,
-        }
-        
-        if json_mode:
-            completion_params["response_format"] = {"type": "json_object"}
+        completion_params = self._completion_params(prompt, system, temperature, max_tokens, json_mode)
         
         try:
             response = await self.client.chat.completions.create(**completion_params)
@@ -136,6 +182,174 @@ class OpenAIProvider(AIProvider):
             )
         except Exception as e:
             raise Exception(f"OpenAI API error: {str(e)}")
+    
+    async def stream(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        json_mode: bool = False
+    ) -> AsyncIterator[Union[str, AIResponse]]:
+        if not self.client:
+            self.client = AsyncOpenAI(api_key=self.config.api_key)
+        
+        start_time = time.time()
+        params = self._completion_params(prompt, system, temperature, max_tokens, json_mode)
+        parts: List[str] = []
+        usage = None
+        try:
+            chunks = await self.client.chat.completions.create(
+                **params,
+                stream=True,
+                extra_body={"stream_options": {"include_usage": True}}
+            )
+            async for chunk in chunks:
+                if getattr(chunk, "usage", None):
+                    usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            raise Exception(f"OpenAI API error: {str(e)}")
+        
+        text = "".join(parts)
+        if usage:
+            tokens_in, tokens_out = usage.prompt_tokens, usage.completion_tokens
+        else:
+            tokens_in = self.estimate_tokens(f"{system or ''}{prompt}")
+            tokens_out = self.estimate_tokens(text)
+        yield AIResponse(
+            text=text,
+            provider=f"openai:{self.config.model}",
+            tokens_in=tokens_in,
+            tokens_out=tokens_out,
+            ms_elapsed=int((time.time() - start_time) * 1000),
+            cost_usd_estimate=self.estimate_cost(tokens_in, tokens_out),
+            json_mode=json_mode
+        )
+    
+    def _completion_params(
+        self,
+        prompt: str,
+        system: Optional[str],
+        temperature: float,
+        max_tokens: Optional[int],
+        json_mode: bool
+    ) -> Dict[str, Any]:
+        messages = []
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": prompt})
+        
+        params: Dict[str, Any] = {
+            "model": self.config.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens or self.config.max_tokens,
+        }
+        if json_mode:
+            params["response_format"] = {"type": "json_object"}
+        return params
+    
+    async def complete_batch(
+        self,
+        requests: List[Dict[str, Any]],
+        timeout: float = 86400
+    ) -> List[Optional[AIResponse]]:
+        """
+        Run requests through the OpenAI Batch API.
+        
+        Batch jobs are billed at half price and finish within 24h, so this is
+        only meant for offline work. Returns one entry per request in order;
+        entries the batch did not produce are None so callers can retry them.
+        """
+        pool = get_http_pool()
+        headers = {"Authorization": f"Bearer {self.config.api_key}"}
+        start_time = time.time()
+        
+        lines = [
+            json.dumps({
+                "custom_id": str(i),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._completion_params(
+                    request["prompt"],
+                    request.get("system"),
+                    request.get("temperature", 0.7),
+                    request.get("max_tokens"),
+                    request.get("json_mode", False)
+                ),
+            })
+            for i, request in enumerate(requests)
+        ]
+        upload = await pool.request(
+            "POST", f"{OPENAI_API_URL}/files",
+            headers=headers,
+            data={"purpose": "batch"},
+            files={"file": ("batch.jsonl", "\n".join(lines).encode("utf-8"), "application/jsonl")},
+            timeout=self.config.timeout,
+        )
+        upload.raise_for_status()
+        
+        created = await pool.request(
+            "POST", f"{OPENAI_API_URL}/batches",
+            headers=headers,
+            json={
+                "input_file_id": upload.json()["id"],
+                "endpoint": "/v1/chat/completions",
+                "completion_window": "24h",
+            },
+        )
+        created.raise_for_status()
+        batch = created.json()
+        logger.info(f"Submitted OpenAI batch {batch['id']} with {len(requests)} requests")
+        
+        deadline = time.monotonic() + timeout
+        while batch.get("status") not in _BATCH_DONE_STATUSES:
+            if time.monotonic() >= deadline:
+                await pool.request("POST", f"{OPENAI_API_URL}/batches/{batch['id']}/cancel", headers=headers)
+                raise TimeoutError(f"OpenAI batch {batch['id']} did not finish within {timeout:.0f}s")
+            await asyncio.sleep(_BATCH_POLL_SECONDS)
+            polled = await pool.request("GET", f"{OPENAI_API_URL}/batches/{batch['id']}", headers=headers)
+            polled.raise_for_status()
+            batch = polled.json()
+        
+        results: List[Optional[AIResponse]] = [None] * len(requests)
+        if not batch.get("output_file_id"):
+            logger.warning(f"OpenAI batch {batch['id']} ended as {batch.get('status')} without output")
+            return results
+        
+        output = await pool.request(
+            "GET", f"{OPENAI_API_URL}/files/{batch['output_file_id']}/content",
+            headers=headers,
+            timeout=self.config.timeout,
+        )
+        output.raise_for_status()
+        
+        ms_elapsed = int((time.time() - start_time) * 1000)
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            response = item.get("response") or {}
+            if response.get("status_code") != 200:
+                continue
+            body = response.get("body") or {}
+            usage = body.get("usage") or {}
+            tokens_in = usage.get("prompt_tokens", 0)
+            tokens_out = usage.get("completion_tokens", 0)
+            index = int(item["custom_id"])
+            results[index] = AIResponse(
+                text=body["choices"][0]["message"].get("content") or "",
+                provider=f"openai:{self.config.model}",
+                tokens_in=tokens_in,
+                tokens_out=tokens_out,
+                ms_elapsed=ms_elapsed,
+                cost_usd_estimate=self.estimate_cost(tokens_in, tokens_out) / 2,  # Batch API discount
+                json_mode=requests[index].get("json_mode", False)
+            )
+        return results
 
 
 class AnthropicProvider(AIProvider):
@@ -185,6 +399,45 @@ class AnthropicProvider(AIProvider):
             )
         except Exception as e:
             raise Exception(f"Anthropic API error: {str(e)}")
+    
+    async def stream(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        json_mode: bool = False
+    ) -> AsyncIterator[Union[str, AIResponse]]:
+        if not self.client:
+            self.client = AsyncAnthropic(api_key=self.config.api_key)
+        
+        start_time = time.time()
+        full_prompt = f"{system}\n\n{prompt}" if system else prompt
+        try:
+            async with self.client.messages.stream(
+                model=self.config.model,
+                max_tokens=max_tokens or self.config.max_tokens,
+                temperature=temperature,
+                messages=[{"role": "user", "content": full_prompt}]
+            ) as stream:
+                async for text in stream.text_stream:
+                    yield text
+                message = await stream.get_final_message()
+        except Exception as e:
+            raise Exception(f"Anthropic API error: {str(e)}")
+        
+        text = "".join(block.text for block in message.content if hasattr(block, "text"))
+        tokens_in = message.usage.input_tokens
+        tokens_out = message.usage.output_tokens
+        yield AIResponse(
+            text=text,
+            provider=f"anthropic:{self.config.model}",
+            tokens_in=tokens_in,
+            tokens_out=tokens_out,
+            ms_elapsed=int((time.time() - start_time) * 1000),
+            cost_usd_estimate=self.estimate_cost(tokens_in, tokens_out),
+            json_mode=json_mode
+        )
 
 
 class CohereProvider(AIProvider):
@@ -295,6 +548,185 @@ class OllamaProvider(AIProvider):
                 )
         except Exception as e:
             raise Exception(f"Ollama API error: {str(e)}")
+    
+    async def stream(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        json_mode: bool = False
+    ) -> AsyncIterator[Union[str, AIResponse]]:
+        start_time = time.time()
+        full_prompt = f"{system}\n\n{prompt}" if system else prompt
+        payload = {
+            "model": self.config.model,
+            "prompt": full_prompt,
+            "stream": True,
+            "options": {
+                "temperature": temperature,
+                "num_predict": max_tokens or self.config.max_tokens
+            }
+        }
+        if json_mode:
+            payload["format"] = "json"
+        
+        parts: List[str] = []
+        final: Dict[str, Any] = {}
+        try:
+            async with httpx.AsyncClient(timeout=self.config.timeout) as client:
+                async with client.stream("POST", f"{self.config.base_url}/api/generate", json=payload) as response:
+                    response.raise_for_status()
+                    # Newline-delimited JSON, one object per token batch
+                    async for line in response.aiter_lines():
+                        if not line:
+                            continue
+                        data = json.loads(line)
+                        if data.get("response"):
+                            parts.append(data["response"])
+                            yield data["response"]
+                        if data.get("done"):
+                            final = data
+        except Exception as e:
+            raise Exception(f"Ollama API error: {str(e)}")
+        
+        text = "".join(parts)
+        tokens_in = final.get("prompt_eval_count") or self.estimate_tokens(full_prompt)
+        tokens_out = final.get("eval_count") or self.estimate_tokens(text)
+        yield AIResponse(
+            text=text,
+            provider=f"ollama:{self.config.model}",
+            tokens_in=tokens_in,
+            tokens_out=tokens_out,
+            ms_elapsed=int((time.time() - start_time) * 1000),
+            cost_usd_estimate=self.estimate_cost(tokens_in, tokens_out),
+            json_mode=json_mode
+        )
+
+
+class AIStream:
+    """
+    Async iterator over the text deltas of a streamed completion.
+    
+    ``response`` holds the final AIResponse (full text, token usage and cost)
+    once iteration has finished, so callers can do their accounting at the
+    end of the stream. ``usage()`` also covers streams cut short.
+    """
+    
+    def __init__(self, prompt: str, system: Optional[str] = None):
+        self.prompt = prompt
+        self.system = system
+        self.response: Optional[AIResponse] = None
+        self.provider: Optional[AIProvider] = None
+        self.provider_name: Optional[str] = None
+        self._parts: List[str] = []
+        self._events: Optional[AsyncIterator[Union[str, AIResponse]]] = None
+        self._started_at = time.time()
+    
+    def __aiter__(self) -> "AIStream":
+        return self
+    
+    async def __anext__(self) -> str:
+        async for event in self._events:
+            if isinstance(event, AIResponse):
+                self.response = event
+                continue
+            self._parts.append(event)
+            return event
+        raise StopAsyncIteration
+    
+    async def aclose(self) -> None:
+        await self._events.aclose()
+    
+    def usage(self) -> Optional[AIResponse]:
+        """Final response, or an estimate from the text sent so far if the stream stopped early"""
+        if self.response is not None or self.provider is None or not self._parts:
+            return self.response
+        text = "".join(self._parts)
+        tokens_in = self.provider.estimate_tokens(f"{self.system or ''}{self.prompt}")
+        tokens_out = self.provider.estimate_tokens(text)
+        return AIResponse(
+            text=text,
+            provider=f"{self.provider_name}:{self.provider.config.model}",
+            tokens_in=tokens_in,
+            tokens_out=tokens_out,
+            ms_elapsed=int((time.time() - self._started_at) * 1000),
+            cost_usd_estimate=self.provider.estimate_cost(tokens_in, tokens_out)
+        )
+
+
+class ProviderHealth:
+    """Rolling latency and error window with a circuit breaker for one provider.
+    
+    The circuit opens once the error rate over the window reaches
+    ``failure_rate`` (after ``min_samples`` calls). After ``cooldown`` seconds
+    a single probe call is let through: success closes the circuit, failure
+    keeps it open for another cooldown.
+    """
+    
+    def __init__(
+        self,
+        window: int = 50,
+        failure_rate: float = 0.5,
+        min_samples: int = 5,
+        cooldown: float = 30.0
+    ):
+        self.samples: deque = deque(maxlen=window)  # (latency seconds, ok)
+        self.failure_rate = failure_rate
+        self.min_samples = min_samples
+        self.cooldown = cooldown
+        self.opened_at: Optional[float] = None
+        self.probing = False
+    
+    @property
+    def error_rate(self) -> float:
+        if not self.samples:
+            return 0.0
+        return sum(1 for _, ok in self.samples if not ok) / len(self.samples)
+    
+    def p95(self) -> Optional[float]:
+        """95th percentile latency of recent successful calls, in seconds"""
+        latencies = sorted(latency for latency, ok in self.samples if ok)
+        if len(latencies) < self.min_samples:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    
+    def is_open(self) -> bool:
+        return self.opened_at is not None and time.monotonic() < self.opened_at + self.cooldown
+    
+    def allow(self) -> bool:
+        """Whether a call may go to this provider now (claims the probe when half-open)"""
+        if self.opened_at is None:
+            return True
+        if self.is_open() or self.probing:
+            return False
+        self.probing = True
+        return True
+    
+    def record(self, latency: float, ok: bool) -> None:
+        if self.opened_at is not None:
+            # Outcome of the half-open probe
+            self.probing = False
+            if ok:
+                self.opened_at = None
+                self.samples.clear()
+                self.samples.append((latency, ok))
+            else:
+                self.opened_at = time.monotonic()
+            return
+        
+        self.samples.append((latency, ok))
+        if len(self.samples) >= self.min_samples and self.error_rate >= self.failure_rate:
+            self.opened_at = time.monotonic()
+    
+    def snapshot(self) -> Dict[str, Any]:
+        p95 = self.p95()
+        return {
+            "circuit": "open" if self.is_open() else ("half_open" if self.opened_at else "closed"),
+            "error_rate": round(self.error_rate, 3),
+            "p95_ms": int(p95 * 1000) if p95 is not None else None,
+            "samples": len(self.samples),
+        }
 
 
 class AIRouter:
@@ -303,6 +735,8 @@ class AIRouter:
     def __init__(self):
         self.settings = get_settings()
         self.providers: Dict[ProviderType, AIProvider] = {}
+        self.slots = ProviderSlots.from_settings()
+        self.health: Dict[ProviderType, ProviderHealth] = {}
         self._initialize_providers()
     
     def _initialize_providers(self):
@@ -386,6 +820,61 @@ class AIRouter:
         
         return priority
     
+    def _resolve_priority(self, preferred_provider: Optional[str] = None) -> List[ProviderType]:
+        """Provider order for a request, with the preferred provider (if available) first"""
+        provider_priority = self._get_provider_priority()
+        if preferred_provider:
+            try:
+                preferred_type = ProviderType(preferred_provider.lower())
+            except ValueError:
+                preferred_type = None
+            if preferred_type and preferred_type in self.providers:
+                provider_priority = [preferred_type] + [p for p in provider_priority if p != preferred_type]
+        return provider_priority
+    
+    def _health(self, provider_type: ProviderType) -> ProviderHealth:
+        if provider_type not in self.health:
+            self.health[provider_type] = ProviderHealth(
+                failure_rate=self.settings.ai_circuit_failure_rate,
+                min_samples=self.settings.ai_circuit_min_samples,
+                cooldown=self.settings.ai_circuit_cooldown_seconds
+            )
+        return self.health[provider_type]
+    
+    def _rank_by_health(self, provider_priority: List[ProviderType]) -> List[ProviderType]:
+        """Keep configured order but move providers with open circuits to the back"""
+        return sorted(provider_priority, key=lambda p: self._health(p).is_open())
+    
+    def _hedge_delay(self, provider_type: ProviderType) -> float:
+        """Seconds to wait on a provider before hedging to the next one"""
+        p95 = self._health(provider_type).p95()
+        if p95 is None:
+            return self.settings.ai_hedge_delay_ms / 1000
+        return max(self.settings.ai_hedge_min_delay_ms / 1000, p95)
+    
+    async def _call_provider(self, provider_type: ProviderType, **kwargs: Any) -> AIResponse:
+        provider = self.providers[provider_type]
+        health = self._health(provider_type)
+        started = time.monotonic()
+        ok: Optional[bool] = None
+        try:
+            async with self.slots.slot(provider_type.value):
+                started = time.monotonic()
+                try:
+                    response = await provider.complete(**kwargs)
+                except Exception:
+                    ok = False
+                    raise
+            ok = True
+            return response
+        finally:
+            if ok is None:
+                # Cancelled (lost a hedge race, or while waiting for a slot):
+                # not a health signal, but free the probe slot
+                health.probing = False
+            else:
+                health.record(time.monotonic() - started, ok=ok)
+    
     async def complete(
         self,
         prompt: str,
@@ -393,11 +882,17 @@ class AIRouter:
         temperature: float = 0.7,
         max_tokens: Optional[int] = None,
         json_mode: bool = False,
-        preferred_provider: Optional[str] = None
+        preferred_provider: Optional[str] = None,
+        hedge: bool = False
     ) -> AIResponse:
         """
         Complete a prompt using the best available provider with fallback logic.
         
+        Providers whose circuit is open are skipped. With ``hedge`` set, the
+        next provider is also started once the current one runs past its p95
+        latency, and the first successful answer wins; use it for interactive
+        requests where tail latency matters more than duplicate spend.
+        
         Args:
             prompt: The input prompt
             system: Optional system message
@@ -405,6 +900,7 @@ class AIRouter:
             max_tokens: Maximum tokens to generate
             json_mode: Whether to force JSON output format
             preferred_provider: Preferred provider name (e.g., 'openai', 'anthropic')
+            hedge: Race the next provider when the current one is slow
         
         Returns:
             AIResponse with structured output including provider used, costs, etc.
@@ -412,84 +908,249 @@ class AIRouter:
         if not self.providers:
             raise Exception("No AI providers configured")
         
-        # Get provider priority
-        provider_priority = self._get_provider_priority()
+        provider_priority = self._rank_by_health(self._resolve_priority(preferred_provider))
+        remaining = list(provider_priority)
+        tasks: Dict[asyncio.Task, ProviderType] = {}
+        last_error: Optional[Exception] = None
         
-        # If preferred provider specified, try it first
-        if preferred_provider:
-            preferred_type = None
-            if preferred_provider.lower() == 'openai':
-                preferred_type = ProviderType.OPENAI
-            elif preferred_provider.lower() == 'anthropic':
-                preferred_type = ProviderType.ANTHROPIC
-            elif preferred_provider.lower() == 'cohere':
-                preferred_type = ProviderType.COHERE
-            elif preferred_provider.lower() == 'ollama':
-                preferred_type = ProviderType.OLLAMA
-            
-            if preferred_type and preferred_type in self.providers:
-                provider_priority = [preferred_type] + [p for p in provider_priority if p != preferred_type]
-        
-        # Try providers in order
-        last_error = None
-        for provider_type in provider_priority:
-            try:
-                provider = self.providers[provider_type]
-                response = await provider.complete(
+        def launch() -> Optional[ProviderType]:
+            """Start the next provider whose circuit lets the call through"""
+            nonlocal last_error
+            while remaining:
+                provider_type = remaining.pop(0)
+                if not self._health(provider_type).allow():
+                    last_error = last_error or Exception(f"circuit open for {provider_type.value}")
+                    continue
+                task = asyncio.ensure_future(self._call_provider(
+                    provider_type,
                     prompt=prompt,
                     system=system,
                     temperature=temperature,
                     max_tokens=max_tokens,
                     json_mode=json_mode
-                )
-                return response
-            except Exception as e:
-                last_error = e
-                # Log the error but continue to next provider
-                print(f"Provider {provider_type.value} failed: {str(e)}")
-                continue
+                ))
+                tasks[task] = provider_type
+                return provider_type
+            return None
+        
+        current = launch()
+        try:
+            while tasks:
+                timeout = self._hedge_delay(current) if hedge and remaining else None
+                done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Current provider is past its p95: hedge with the next one
+                    current = launch() or current
+                    continue
+                
+                failed = False
+                for task in done:
+                    provider_type = tasks.pop(task)
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+                    failed = True
+                    # Log the error but continue to next provider
+                    logger.warning(f"Provider {provider_type.value} failed: {str(last_error)}")
+                if failed and (hedge or not tasks):
+                    current = launch() or current
+        finally:
+            for task in tasks:
+                task.cancel()
         
         # If all providers failed, raise the last error
         raise Exception(f"All AI providers failed. Last error: {str(last_error)}")
     
+    def stream(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        json_mode: bool = False,
+        preferred_provider: Optional[str] = None
+    ) -> AIStream:
+        """
+        Stream a completion token by token.
+        
+        Providers are tried in the same health-ranked order as ``complete``.
+        A provider that fails before producing any text falls back to the
+        next one; once text has been sent, errors propagate to the caller.
+        Read ``AIStream.response`` after iterating for usage and cost.
+        """
+        stream = AIStream(prompt, system)
+        stream._events = self._stream_events(stream, prompt, system, temperature, max_tokens, json_mode, preferred_provider)
+        return stream
+    
+    async def _stream_events(
+        self,
+        stream: AIStream,
+        prompt: str,
+        system: Optional[str],
+        temperature: float,
+        max_tokens: Optional[int],
+        json_mode: bool,
+        preferred_provider: Optional[str]
+    ) -> AsyncIterator[Union[str, AIResponse]]:
+        if not self.providers:
+            raise Exception("No AI providers configured")
+        
+        last_error: Optional[Exception] = None
+        for provider_type in self._rank_by_health(self._resolve_priority(preferred_provider)):
+            health = self._health(provider_type)
+            if not health.allow():
+                last_error = last_error or Exception(f"circuit open for {provider_type.value}")
+                continue
+            started_output = False
+            started = time.monotonic()
+            ok: Optional[bool] = None
+            try:
+                async with self.slots.slot(provider_type.value):
+                    started = time.monotonic()
+                    stream.provider = self.providers[provider_type]
+                    stream.provider_name = provider_type.value
+                    events = stream.provider.stream(
+                        prompt=prompt,
+                        system=system,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        json_mode=json_mode
+                    )
+                    try:
+                        async for event in events:
+                            started_output = True
+                            yield event
+                    except Exception as e:
+                        ok = False
+                        if started_output:
+                            raise
+                        last_error = e
+                        logger.warning(f"Provider {provider_type.value} failed: {str(e)}")
+                        continue
+                    finally:
+                        await events.aclose()
+                ok = True
+            finally:
+                if ok is None:
+                    # Caller went away (mid-stream or while waiting for a slot):
+                    # not a health signal, but free the probe slot
+                    health.probing = False
+                else:
+                    health.record(time.monotonic() - started, ok=ok)
+            return
+        
+        raise Exception(f"All AI providers failed. Last error: {str(last_error)}")
+    
     async def batch_complete(
         self,
-        requests: List[Dict[str, Any]]
+        requests: List[Dict[str, Any]],
+        offline: bool = False
     ) -> List[AIResponse]:
         """
-        Complete multiple prompts in batch.
-        Currently processes sequentially, but can be optimized per provider.
+        Complete multiple prompts concurrently.
+        
+        Identical requests are sent once; every copy gets the response, with
+        the cost charged to the first. Calls run in parallel, bounded per
+        provider by ``ai_provider_concurrency``. Results come back in request
+        order, and a failed item becomes an error response without failing
+        the rest of the batch.
+        
+        Set ``offline`` for jobs that can wait: groups of at least
+        ``ai_native_batch_min_size`` requests for a provider with a native
+        batch API go through it, and anything it does not return falls back
+        to live calls.
         """
+        keys = [self._batch_key(request) for request in requests]
+        unique: Dict[Tuple, Dict[str, Any]] = {}
+        for key, request in zip(keys, requests):
+            unique.setdefault(key, request)
+        
+        outcomes: Dict[Tuple, AIResponse] = {}
+        if offline:
+            outcomes.update(await self._native_batch(unique))
+        
+        pending = [key for key in unique if key not in outcomes]
+        responses = await asyncio.gather(*(self._complete_item(unique[key]) for key in pending))
+        outcomes.update(zip(pending, responses))
+        
         results = []
-        for request in requests:
+        seen = set()
+        for key in keys:
+            response = outcomes[key]
+            if key in seen:
+                response = replace(response, cost_usd_estimate=0.0)
+            seen.add(key)
+            results.append(response)
+        return results
+    
+    @staticmethod
+    def _batch_key(request: Dict[str, Any]) -> Tuple:
+        return (
+            request["prompt"],
+            request.get("system"),
+            request.get("temperature", 0.7),
+            request.get("max_tokens"),
+            request.get("json_mode", False),
+            request.get("preferred_provider"),
+        )
+    
+    async def _complete_item(self, request: Dict[str, Any]) -> AIResponse:
+        try:
+            return await self.complete(
+                prompt=request["prompt"],
+                system=request.get("system"),
+                temperature=request.get("temperature", 0.7),
+                max_tokens=request.get("max_tokens"),
+                json_mode=request.get("json_mode", False),
+                preferred_provider=request.get("preferred_provider"),
+                hedge=request.get("hedge", False)
+            )
+        except Exception as e:
+            return AIResponse(
+                text=f"Error: {str(e)}",
+                provider="error",
+                tokens_in=0,
+                tokens_out=0,
+                ms_elapsed=0,
+                cost_usd_estimate=0.0
+            )
+    
+    async def _native_batch(self, unique: Dict[Tuple, Dict[str, Any]]) -> Dict[Tuple, AIResponse]:
+        """Send large per-provider groups through provider batch APIs where supported"""
+        groups: Dict[ProviderType, List[Tuple]] = {}
+        for key, request in unique.items():
+            priority = self._resolve_priority(request.get("preferred_provider"))
+            if priority and hasattr(self.providers[priority[0]], "complete_batch"):
+                groups.setdefault(priority[0], []).append(key)
+        
+        outcomes: Dict[Tuple, AIResponse] = {}
+        for provider_type, keys in groups.items():
+            if len(keys) < self.settings.ai_native_batch_min_size:
+                continue
             try:
-                response = await self.complete(
-                    prompt=request["prompt"],
-                    system=request.get("system"),
-                    temperature=request.get("temperature", 0.7),
-                    max_tokens=request.get("max_tokens"),
-                    json_mode=request.get("json_mode", False),
-                    preferred_provider=request.get("preferred_provider")
+                responses = await self.providers[provider_type].complete_batch(
+                    [unique[key] for key in keys],
+                    timeout=self.settings.ai_native_batch_timeout_seconds
                 )
-                results.append(response)
             except Exception as e:
-                # Create error response
-                error_response = AIResponse(
-                    text=f"Error: {str(e)}",
-                    provider="error",
-                    tokens_in=0,
-                    tokens_out=0,
-                    ms_elapsed=0,
-                    cost_usd_estimate=0.0
-                )
-                results.append(error_response)
-        
-        return results
+                logger.warning(f"Native batch for {provider_type.value} failed, falling back to live calls: {e}")
+                continue
+            for key, response in zip(keys, responses):
+                if response is not None:
+                    outcomes[key] = response
+        return outcomes
     
     def get_available_providers(self) -> List[str]:
         """Get list of available provider names"""
         return [provider_type.value for provider_type in self.providers.keys()]
     
+    def get_provider_health(self) -> Dict[str, Dict[str, Any]]:
+        """Rolling health and circuit state per provider"""
+        return {
+            provider_type.value: self._health(provider_type).snapshot()
+            for provider_type in self.providers.keys()
+        }
+    
     def get_provider_costs(self) -> Dict[str, Dict[str, float]]:
         """Get cost information for all providers"""
         costs = {}
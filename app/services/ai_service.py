@@ -466,10 +466,14 @@ class AIService:
         platform: str,
         org_id: int,
         scheduled_at: Optional[datetime] = None,
-        brand_guide_id: Optional[int] = None
+        brand_guide_id: Optional[int] = None,
+        explain: bool = False
     ) -> Dict[str, Any]:
         """
         Predict content performance using AI and historical data.
+        
+        ``explain`` asks the LLM for recommendations when a local model made
+        the prediction; otherwise they are rule-based.
         """
         try:
             if not self.db_session:
@@ -483,7 +487,8 @@ class AIService:
                 platform=platform,
                 org_id=org_id,
                 scheduled_at=scheduled_at,
-                brand_guide_id=brand_guide_id
+                brand_guide_id=brand_guide_id,
+                explain=explain
             )
             
             return {
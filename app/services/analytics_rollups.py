@@ -0,0 +1,274 @@
+"""
+Analytics Rollups
+Maintains hourly and daily per-org aggregates by platform and campaign so
+dashboard queries read a handful of rollup rows instead of raw post history
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.analytics import AnalyticsRollup, PostMetrics
+from app.models.publishing import ExternalReference, PublishingStatus
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_GRANULARITIES = ("hour", "day")
+
+KEY_COLUMNS = ("organization_id", "granularity", "bucket_start", "platform", "campaign_id")
+
+POST_COUNT_COLUMNS = (
+    "posts_total", "posts_published", "posts_failed", "posts_pending", "post_clicks", "post_impressions"
+)
+
+METRIC_COLUMNS = ("impressions", "reach", "clicks", "engagements", "conversions")
+
+# PostMetrics rate column -> rollup column holding its sum
+RATE_COLUMNS = {
+    "ctr": "ctr_sum",
+    "engagement_rate": "engagement_rate_sum",
+    "conversion_rate": "conversion_rate_sum",
+}
+
+METRIC_ROLLUP_COLUMNS = ("metric_rows",) + METRIC_COLUMNS + tuple(RATE_COLUMNS.values())
+
+
+def _utc(ts: datetime) -> datetime:
+    """Naive UTC datetime, matching the ``datetime.utcnow()`` values used elsewhere."""
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def bucket_start(ts: datetime, granularity: str) -> datetime:
+    """Start of the hour or day bucket containing ``ts``."""
+    ts = _utc(ts).replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        ts = ts.replace(hour=0)
+    return ts
+
+
+def campaign_key(platform_data: Optional[Dict[str, Any]]) -> str:
+    """Rollup campaign key of a post; "" when it has no campaign."""
+    return str((platform_data or {}).get("campaign_id") or "")
+
+
+def _platform_key(platform: Any) -> str:
+    return getattr(platform, "value", platform)
+
+
+def _as_int(value: Any) -> int:
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def metrics_values(metrics: Any) -> Dict[str, float]:
+    """A PostMetrics row's contribution to its rollup buckets."""
+    values = {column: getattr(metrics, column) or 0 for column in METRIC_COLUMNS}
+    values.update({total: getattr(metrics, rate) or 0.0 for rate, total in RATE_COLUMNS.items()})
+    values["metric_rows"] = 1
+    return values
+
+
+class AnalyticsRollupService:
+    """Reads and writes ``analytics_rollups``.
+
+    Metric sums are maintained incrementally: every post metrics upsert
+    adds the difference between the row's new and old values to its hourly
+    and daily buckets, in the caller's transaction. Publishing counts change
+    with post status, which happens outside any single write path, so they
+    are rebuilt for a recent window by ``refresh_post_counts`` on a schedule.
+    History from before the rollups existed is filled in once by ``backfill``.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.table = AnalyticsRollup.__table__
+
+    def apply_metrics_delta(
+        self,
+        org_id: int,
+        platform: str,
+        campaign_id: str,
+        metric_date: datetime,
+        delta: Dict[str, float]
+    ) -> None:
+        """Add ``delta`` to the hourly and daily buckets of ``metric_date``."""
+        delta = {column: value for column, value in delta.items() if value}
+        if not delta:
+            return
+        for granularity in ROLLUP_GRANULARITIES:
+            key = {
+                "organization_id": org_id,
+                "granularity": granularity,
+                "bucket_start": bucket_start(metric_date, granularity),
+                "platform": _platform_key(platform),
+                "campaign_id": campaign_id or "",
+            }
+            self._upsert(key, delta, increment=True)
+
+    def refresh_post_counts(self, start: datetime, end: datetime, org_id: Optional[int] = None) -> int:
+        """
+        Rebuild publishing counts for buckets in [start, end) from external references
+
+        ``start`` is floored to the day so whole daily buckets are rebuilt.
+        Returns the number of buckets written.
+        """
+        start = bucket_start(start, "day")
+        refs = ExternalReference.__table__.c
+        stmt = select(
+            refs.organization_id, refs.platform, refs.status, refs.created_at, refs.platform_data
+        ).where(refs.created_at >= start, refs.created_at < end)
+        if org_id is not None:
+            stmt = stmt.where(refs.organization_id == org_id)
+
+        counts: Dict[Tuple, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(POST_COUNT_COLUMNS, 0))
+        for row in self.db.execute(stmt.execution_options(yield_per=1000)):
+            platform_data = row.platform_data or {}
+            status = PublishingStatus(row.status) if row.status is not None else None
+            for granularity in ROLLUP_GRANULARITIES:
+                bucket = counts[(
+                    row.organization_id, granularity, bucket_start(row.created_at, granularity),
+                    _platform_key(row.platform), campaign_key(platform_data)
+                )]
+                bucket["posts_total"] += 1
+                if status == PublishingStatus.PUBLISHED:
+                    bucket["posts_published"] += 1
+                    bucket["post_clicks"] += _as_int(platform_data.get("clicks"))
+                    bucket["post_impressions"] += _as_int(platform_data.get("impressions"))
+                elif status == PublishingStatus.FAILED:
+                    bucket["posts_failed"] += 1
+                elif status == PublishingStatus.PENDING:
+                    bucket["posts_pending"] += 1
+
+        # Zero the window first so buckets whose posts were deleted or moved do not keep stale counts
+        self._reset(POST_COUNT_COLUMNS, start, end, org_id)
+        for key, values in counts.items():
+            self._upsert(dict(zip(KEY_COLUMNS, key)), values, increment=False)
+
+        logger.info(f"Refreshed post counts for {len(counts)} rollup buckets since {start.isoformat()}")
+        return len(counts)
+
+    def rebuild_metrics(self, start: datetime, end: datetime, org_id: Optional[int] = None) -> int:
+        """
+        Rebuild metric sums for buckets in [start, end) from post metrics
+
+        Used to backfill history; live updates go through ``apply_metrics_delta``.
+        """
+        start = bucket_start(start, "day")
+        metrics = PostMetrics.__table__.c
+        refs = ExternalReference.__table__.c
+        stmt = select(
+            metrics.organization_id, metrics.platform, metrics.metric_date, refs.platform_data,
+            *[metrics[column] for column in METRIC_COLUMNS + tuple(RATE_COLUMNS)]
+        ).select_from(
+            PostMetrics.__table__.outerjoin(ExternalReference.__table__, metrics.external_reference_id == refs.id)
+        ).where(metrics.metric_date >= start, metrics.metric_date < end)
+        if org_id is not None:
+            stmt = stmt.where(metrics.organization_id == org_id)
+
+        sums: Dict[Tuple, Dict[str, float]] = defaultdict(lambda: dict.fromkeys(METRIC_ROLLUP_COLUMNS, 0))
+        for row in self.db.execute(stmt.execution_options(yield_per=1000)):
+            values = metrics_values(row)
+            for granularity in ROLLUP_GRANULARITIES:
+                bucket = sums[(
+                    row.organization_id, granularity, bucket_start(row.metric_date, granularity),
+                    row.platform, campaign_key(row.platform_data)
+                )]
+                for column, value in values.items():
+                    bucket[column] += value
+
+        self._reset(METRIC_ROLLUP_COLUMNS, start, end, org_id)
+        for key, values in sums.items():
+            self._upsert(dict(zip(KEY_COLUMNS, key)), values, increment=False)
+
+        logger.info(f"Rebuilt metric sums for {len(sums)} rollup buckets since {start.isoformat()}")
+        return len(sums)
+
+    def history_start(self) -> Optional[datetime]:
+        """Day of the oldest post or metric row, or None when there is nothing to roll up."""
+        first_metric = self.db.execute(select(func.min(PostMetrics.__table__.c.metric_date))).scalar()
+        first_post = self.db.execute(select(func.min(ExternalReference.__table__.c.created_at))).scalar()
+        starts = [_utc(ts) for ts in (first_metric, first_post) if ts is not None]
+        return bucket_start(min(starts), "day") if starts else None
+
+    def backfill(self, start: datetime, end: datetime, chunk_days: int = 30) -> Iterator[datetime]:
+        """
+        Rebuild post counts and metric sums for [start, end) in chunks of ``chunk_days``
+
+        Yields the end of each rebuilt chunk so the caller can commit and
+        record progress; a backfill cut short resumes from the last chunk end.
+        """
+        start = bucket_start(start, "day")
+        while start < end:
+            chunk_end = min(start + timedelta(days=chunk_days), end)
+            self.refresh_post_counts(start, chunk_end)
+            self.rebuild_metrics(start, chunk_end)
+            yield chunk_end
+            start = chunk_end
+
+    def query(
+        self,
+        org_id: int,
+        granularity: str,
+        start: datetime,
+        end: datetime,
+        *columns,
+        platform: Optional[Any] = None,
+        campaign_id: Optional[str] = None
+    ):
+        """Select ``columns`` from one org's buckets overlapping [start, end]."""
+        table = self.table
+        stmt = select(*columns).where(
+            table.c.organization_id == org_id,
+            table.c.granularity == granularity,
+            table.c.bucket_start >= bucket_start(start, granularity),
+            table.c.bucket_start <= _utc(end)
+        )
+        if platform:
+            stmt = stmt.where(table.c.platform == _platform_key(platform))
+        if campaign_id:
+            stmt = stmt.where(table.c.campaign_id == campaign_id)
+        return stmt
+
+    def _reset(self, columns, start: datetime, end: datetime, org_id: Optional[int]) -> None:
+        table = self.table
+        stmt = table.update().where(table.c.bucket_start >= start, table.c.bucket_start < end)
+        if org_id is not None:
+            stmt = stmt.where(table.c.organization_id == org_id)
+        self.db.execute(stmt.values(dict.fromkeys(columns, 0)))
+
+    def _upsert(self, key: Dict[str, Any], values: Dict[str, Any], increment: bool) -> None:
+        table = self.table
+        if self.db.get_bind().dialect.name == "postgresql":
+            stmt = pg_insert(table).values(**key, **values)
+            stmt = stmt.on_conflict_do_update(
+                constraint="uq_analytics_rollups_key",
+                set_={
+                    **{
+                        column: (table.c[column] + stmt.excluded[column]) if increment else stmt.excluded[column]
+                        for column in values
+                    },
+                    "updated_at": func.now(),
+                }
+            )
+            self.db.execute(stmt)
+            return
+
+        match = and_(*(table.c[column] == value for column, value in key.items()))
+        updated = self.db.execute(
+            table.update().where(match).values({
+                column: (table.c[column] + value) if increment else value for column, value in values.items()
+            })
+        ).rowcount
+        if not updated:
+            self.db.execute(table.insert().values(**key, **values))
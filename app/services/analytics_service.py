@@ -3,18 +3,32 @@ Analytics Service
 Handles analytics queries, data aggregation, and reporting
 """
 
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, Iterator, List, Optional, Any, Tuple
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_, desc, asc
+from sqlalchemy import func, and_, or_, desc, asc, select
 from sqlalchemy.sql import text
-import csv
-import io
 from fastapi.responses import StreamingResponse
 
 from app.models.publishing import ExternalReference, PublishingStatus, PlatformType
-from app.models.analytics import PostMetrics, AnalyticsSummary, AnalyticsExport
+from app.models.analytics import AnalyticsRollup, PostMetrics, AnalyticsSummary, AnalyticsExport
 from app.models.entities import Organization
+from app.services.analytics_rollups import AnalyticsRollupService, campaign_key, metrics_values
+from app.services.metrics_aggregation import MetricsAggregator
+from app.utils.export_streams import (
+    EXPORT_ENCODERS,
+    PYARROW_AVAILABLE,
+    export_filename,
+    export_media_type,
+    gzip_chunks,
+)
+
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = (
+    'Date', 'Platform', 'Post ID', 'Status', 'URL', 'Created At',
+    'Published At', 'Clicks', 'Impressions', 'CTR', 'Campaign ID'
+)
 
 
 class AnalyticsService:
@@ -22,6 +36,7 @@ class AnalyticsService:
     
     def __init__(self, db: Session):
         self.db = db
+        self.rollups = AnalyticsRollupService(db)
     
     def get_analytics_summary(
         self,
@@ -151,68 +166,56 @@ class AnalyticsService:
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
         
-        # Determine date truncation based on group_by
-        if group_by == "day":
-            date_trunc = func.date_trunc('day', ExternalReference.created_at)
-        elif group_by == "week":
-            date_trunc = func.date_trunc('week', ExternalReference.created_at)
-        elif group_by == "month":
-            date_trunc = func.date_trunc('month', ExternalReference.created_at)
-        else:
-            date_trunc = func.date_trunc('day', ExternalReference.created_at)
-        
-        # Base query
-        base_query = self.db.query(
-            date_trunc.label('date'),
-            ExternalReference.platform,
-            func.count(ExternalReference.id).label('total_count'),
-            func.count(
-                func.case(
-                    (ExternalReference.status == PublishingStatus.PUBLISHED, 1),
-                    else_=None
-                )
-            ).label('published_count'),
-            func.count(
-                func.case(
-                    (ExternalReference.status == PublishingStatus.FAILED, 1),
-                    else_=None
-                )
-            ).label('failed_count')
-        ).filter(
-            ExternalReference.organization_id == org_id,
-            ExternalReference.created_at >= start_date,
-            ExternalReference.created_at <= end_date
-        )
-        
-        if platform:
-            base_query = base_query.filter(ExternalReference.platform == platform)
+        # Served from daily rollups; weeks and months are summed from their days
+        rollup = AnalyticsRollup.__table__.c
+        results = self.db.execute(
+            self.rollups.query(
+                org_id, "day", start_date, end_date,
+                rollup.bucket_start,
+                rollup.platform,
+                func.sum(rollup.posts_total).label('total_count'),
+                func.sum(rollup.posts_published).label('published_count'),
+                func.sum(rollup.posts_failed).label('failed_count'),
+                platform=platform,
+                campaign_id=campaign_id
+            ).group_by(rollup.bucket_start, rollup.platform)
+            .having(func.sum(rollup.posts_total) > 0)
+            .order_by(rollup.bucket_start)
+        ).all()
         
-        if campaign_id:
-            base_query = base_query.filter(
-                ExternalReference.platform_data['campaign_id'].astext == campaign_id
+        periods: Dict[Tuple[datetime, str], Dict[str, int]] = {}
+        for result in results:
+            period = self._period_start(result.bucket_start, group_by)
+            totals = periods.setdefault(
+                (period, result.platform), {"total_count": 0, "published_count": 0, "failed_count": 0}
             )
-        
-        # Group by date and platform
-        results = base_query.group_by(
-            date_trunc, ExternalReference.platform
-        ).order_by(date_trunc).all()
+            totals["total_count"] += result.total_count
+            totals["published_count"] += result.published_count
+            totals["failed_count"] += result.failed_count
         
         # Format results
         timeseries_data = []
-        for result in results:
+        for (period, platform_name), totals in periods.items():
             timeseries_data.append({
-                "date": result.date.isoformat(),
-                "platform": result.platform.value,
-                "total_count": result.total_count,
-                "published_count": result.published_count,
-                "failed_count": result.failed_count,
+                "date": period.isoformat(),
+                "platform": platform_name,
+                **totals,
                 "success_rate": round(
-                    (result.published_count / result.total_count * 100) if result.total_count > 0 else 0, 2
+                    (totals["published_count"] / totals["total_count"] * 100) if totals["total_count"] > 0 else 0, 2
                 )
             })
         
         return timeseries_data
     
+    @staticmethod
+    def _period_start(day: datetime, group_by: str) -> datetime:
+        """Start of the week (Monday) or month containing a daily bucket, like ``date_trunc``."""
+        if group_by == "week":
+            return day - timedelta(days=day.weekday())
+        if group_by == "month":
+            return day.replace(day=1)
+        return day
+    
     def get_platform_comparison(
         self,
         org_id: int,
@@ -233,50 +236,28 @@ class AnalyticsService:
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
         
-        # Query for platform metrics
-        results = self.db.query(
-            ExternalReference.platform,
-            func.count(ExternalReference.id).label('total_posts'),
-            func.count(
-                func.case(
-                    (ExternalReference.status == PublishingStatus.PUBLISHED, 1),
-                    else_=None
-                )
-            ).label('published_posts'),
-            func.count(
-                func.case(
-                    (ExternalReference.status == PublishingStatus.FAILED, 1),
-                    else_=None
-                )
-            ).label('failed_posts'),
-            func.avg(
-                func.case(
-                    (ExternalReference.status == PublishingStatus.PUBLISHED, 1),
-                    else_=0
-                )
-            ).label('success_rate')
-        ).filter(
-            ExternalReference.organization_id == org_id,
-            ExternalReference.created_at >= start_date,
-            ExternalReference.created_at <= end_date
-        )
-        
-        if campaign_id:
-            results = results.filter(
-                ExternalReference.platform_data['campaign_id'].astext == campaign_id
-            )
-        
-        results = results.group_by(ExternalReference.platform).all()
+        rollup = AnalyticsRollup.__table__.c
+        results = self.db.execute(
+            self.rollups.query(
+                org_id, "day", start_date, end_date,
+                rollup.platform,
+                func.sum(rollup.posts_total).label('total_posts'),
+                func.sum(rollup.posts_published).label('published_posts'),
+                func.sum(rollup.posts_failed).label('failed_posts'),
+                campaign_id=campaign_id
+            ).group_by(rollup.platform)
+            .having(func.sum(rollup.posts_total) > 0)
+        ).all()
         
         # Format results
         platform_data = []
         for result in results:
             platform_data.append({
-                "platform": result.platform.value,
+                "platform": result.platform,
                 "total_posts": result.total_posts,
                 "published_posts": result.published_posts,
                 "failed_posts": result.failed_posts,
-                "success_rate": round(result.success_rate * 100, 2) if result.success_rate else 0
+                "success_rate": round(result.published_posts / result.total_posts * 100, 2)
             })
         
         return platform_data
@@ -301,49 +282,32 @@ class AnalyticsService:
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
         
-        # Query for CTR data (this would typically come from analytics events)
-        # For now, we'll simulate CTR data based on post performance
-        base_query = self.db.query(
-            func.date_trunc('day', ExternalReference.created_at).label('date'),
-            ExternalReference.platform,
-            func.count(ExternalReference.id).label('total_posts'),
-            func.avg(
-                func.cast(
-                    ExternalReference.platform_data['clicks'].astext, 
-                    func.Integer
-                )
-            ).label('avg_clicks'),
-            func.avg(
-                func.cast(
-                    ExternalReference.platform_data['impressions'].astext, 
-                    func.Integer
-                )
-            ).label('avg_impressions')
-        ).filter(
-            ExternalReference.organization_id == org_id,
-            ExternalReference.created_at >= start_date,
-            ExternalReference.created_at <= end_date,
-            ExternalReference.status == PublishingStatus.PUBLISHED
-        )
-        
-        if platform:
-            base_query = base_query.filter(ExternalReference.platform == platform)
-        
-        results = base_query.group_by(
-            func.date_trunc('day', ExternalReference.created_at),
-            ExternalReference.platform
-        ).order_by(func.date_trunc('day', ExternalReference.created_at)).all()
+        # Clicks and impressions of published posts, summed per day in the rollups
+        rollup = AnalyticsRollup.__table__.c
+        results = self.db.execute(
+            self.rollups.query(
+                org_id, "day", start_date, end_date,
+                rollup.bucket_start,
+                rollup.platform,
+                func.sum(rollup.posts_published).label('total_posts'),
+                func.sum(rollup.post_clicks).label('clicks'),
+                func.sum(rollup.post_impressions).label('impressions'),
+                platform=platform
+            ).group_by(rollup.bucket_start, rollup.platform)
+            .having(func.sum(rollup.posts_published) > 0)
+            .order_by(rollup.bucket_start)
+        ).all()
         
         # Format results and calculate CTR
         ctr_data = []
         for result in results:
-            avg_clicks = result.avg_clicks or 0
-            avg_impressions = result.avg_impressions or 0
+            avg_clicks = result.clicks / result.total_posts
+            avg_impressions = result.impressions / result.total_posts
             ctr = (avg_clicks / avg_impressions * 100) if avg_impressions > 0 else 0
             
             ctr_data.append({
-                "date": result.date.isoformat(),
-                "platform": result.platform.value,
+                "date": result.bucket_start.isoformat(),
+                "platform": result.platform,
                 "total_posts": result.total_posts,
                 "avg_clicks": round(avg_clicks, 2),
                 "avg_impressions": round(avg_impressions, 2),
@@ -373,91 +337,142 @@ class AnalyticsService:
         Returns:
             StreamingResponse with CSV data
         """
-        def generate_csv():
-            # Create CSV in memory
-            output = io.StringIO()
-            writer = csv.writer(output)
-            
-            # Write headers
-            if include_metrics:
-                writer.writerow([
-                    'Date', 'Platform', 'Post ID', 'Status', 'URL', 'Created At', 
-                    'Published At', 'Clicks', 'Impressions', 'CTR', 'Campaign ID'
-                ])
-            else:
-                writer.writerow([
-                    'Date', 'Platform', 'Post ID', 'Status', 'URL', 'Created At', 'Published At'
-                ])
-            
-            yield output.getvalue()
-            output.seek(0)
-            output.truncate(0)
-            
-            # Query data in batches
-            end_date = datetime.utcnow()
-            start_date = end_date - timedelta(days=days)
-            
-            query = self.db.query(ExternalReference).filter(
-                ExternalReference.organization_id == org_id,
-                ExternalReference.created_at >= start_date,
-                ExternalReference.created_at <= end_date
-            )
-            
-            if platform:
-                query = query.filter(ExternalReference.platform == platform)
-            
-            if campaign_id:
-                query = query.filter(
-                    ExternalReference.platform_data['campaign_id'].astext == campaign_id
-                )
-            
-            # Process in batches
-            batch_size = 1000
-            offset = 0
+        return self.export_analytics(org_id, days, platform, campaign_id, include_metrics, format_type="csv")
+    
+    def export_analytics(
+        self,
+        org_id: int,
+        days: int = 30,
+        platform: Optional[PlatformType] = None,
+        campaign_id: Optional[str] = None,
+        include_metrics: bool = True,
+        format_type: str = "csv",
+        compress: bool = False
+    ) -> StreamingResponse:
+        """
+        Export analytics data as a streaming CSV, NDJSON or Parquet download
+        
+        Rows are read in keyset-paginated batches ordered by (created_at, id),
+        so each page is an index range scan and the export runs in linear time.
+        
+        Args:
+            org_id: Organization ID
+            days: Number of days to analyze
+            platform: Optional platform filter
+            campaign_id: Optional campaign filter
+            include_metrics: Whether to include detailed metrics
+            format_type: csv, ndjson or parquet
+            compress: Gzip the stream on the fly
             
-            while True:
-                batch = query.offset(offset).limit(batch_size).all()
-                if not batch:
-                    break
-                
-                for ref in batch:
-                    row = [
-                        ref.created_at.strftime('%Y-%m-%d'),
-                        ref.platform.value,
-                        ref.external_id,
-                        ref.status.value,
-                        ref.url or '',
-                        ref.created_at.isoformat(),
-                        ref.published_at.isoformat() if ref.published_at else ''
-                    ]
-                    
-                    if include_metrics:
-                        platform_data = ref.platform_data or {}
-                        clicks = platform_data.get('clicks', 0)
-                        impressions = platform_data.get('impressions', 0)
-                        ctr = (clicks / impressions * 100) if impressions > 0 else 0
-                        campaign_id_val = platform_data.get('campaign_id', '')
-                        
-                        row.extend([
-                            clicks,
-                            impressions,
-                            round(ctr, 2),
-                            campaign_id_val
-                        ])
-                    
-                    writer.writerow(row)
-                
-                yield output.getvalue()
-                output.seek(0)
-                output.truncate(0)
-                offset += batch_size
+        Returns:
+            StreamingResponse with the encoded export
+        """
+        if format_type not in EXPORT_ENCODERS:
+            raise ValueError(f"Unsupported export format: {format_type}")
+        if format_type == "parquet" and not PYARROW_AVAILABLE:
+            raise ValueError("Parquet export requires pyarrow")
+        
+        columns = list(EXPORT_COLUMNS if include_metrics else EXPORT_COLUMNS[:7])
+        chunks = EXPORT_ENCODERS[format_type](
+            columns, self._iter_export_batches(org_id, days, platform, campaign_id, include_metrics)
+        )
+        if compress:
+            chunks = gzip_chunks(chunks)
         
+        filename = export_filename("analytics_export", format_type, compress)
         return StreamingResponse(
-            generate_csv(),
-            media_type="text/csv",
-            headers={"Content-Disposition": "attachment; filename=analytics_export.csv"}
+            chunks,
+            media_type=export_media_type(format_type, compress),
+            headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
     
+    def _iter_export_batches(
+        self,
+        org_id: int,
+        days: int,
+        platform: Optional[PlatformType],
+        campaign_id: Optional[str],
+        include_metrics: bool,
+        batch_size: int = EXPORT_BATCH_SIZE
+    ) -> Iterator[List[List[Any]]]:
+        """
+        Yield export rows in batches using keyset pagination on (created_at, id).
+        
+        The generator runs in Starlette's threadpool after the endpoint has
+        returned, so it uses its own session on the same engine rather than
+        the request-scoped one; the session closes when the stream ends or
+        the client disconnects.
+        """
+        end_date = datetime.utcnow()
+        start_date = end_date - timedelta(days=days)
+        
+        # Core columns: rows come back as plain tuples, never as tracked ORM objects
+        refs = ExternalReference.__table__.c
+        filters = [
+            refs.organization_id == org_id,
+            refs.created_at >= start_date,
+            refs.created_at <= end_date
+        ]
+        if platform:
+            filters.append(refs.platform == platform)
+        if campaign_id:
+            filters.append(refs.platform_data['campaign_id'].astext == campaign_id)
+        
+        stmt = select(
+            refs.id,
+            refs.created_at,
+            refs.platform,
+            refs.external_id,
+            refs.status,
+            refs.external_url,
+            refs.published_at,
+            refs.platform_data
+        ).where(*filters).order_by(refs.created_at, refs.id).limit(batch_size)
+        
+        with Session(bind=self.db.get_bind()) as db:
+            last: Optional[Tuple[datetime, int]] = None
+            while True:
+                page = stmt
+                if last is not None:
+                    page = page.where(or_(
+                        refs.created_at > last[0],
+                        and_(refs.created_at == last[0], refs.id > last[1])
+                    ))
+                rows = db.execute(page).all()
+                if not rows:
+                    return
+                yield [self._export_row(row, include_metrics) for row in rows]
+                if len(rows) < batch_size:
+                    return
+                last = (rows[-1].created_at, rows[-1].id)
+    
+    @staticmethod
+    def _export_row(ref: Any, include_metrics: bool) -> List[Any]:
+        row = [
+            ref.created_at.strftime('%Y-%m-%d'),
+            ref.platform.value,
+            ref.external_id,
+            ref.status.value,
+            ref.external_url or '',
+            ref.created_at.isoformat(),
+            ref.published_at.isoformat() if ref.published_at else ''
+        ]
+        
+        if include_metrics:
+            platform_data = ref.platform_data or {}
+            clicks = platform_data.get('clicks', 0)
+            impressions = platform_data.get('impressions', 0)
+            ctr = (clicks / impressions * 100) if impressions > 0 else 0
+            
+            row.extend([
+                clicks,
+                impressions,
+                round(ctr, 2),
+                platform_data.get('campaign_id', '')
+            ])
+        
+        return row
+    
     def get_campaign_analytics(
         self,
         org_id: int,
@@ -562,6 +577,8 @@ class AnalyticsService:
         ).first()
         
         if existing_metrics:
+            previous = metrics_values(existing_metrics)
+            
             # Update existing metrics
             existing_metrics.impressions = metrics_data.get('impressions', existing_metrics.impressions)
             existing_metrics.reach = metrics_data.get('reach', existing_metrics.reach)
@@ -579,6 +596,15 @@ class AnalyticsService:
             # Recalculate derived metrics
             self._calculate_derived_metrics(existing_metrics)
             
+            current = metrics_values(existing_metrics)
+            self.rollups.apply_metrics_delta(
+                existing_metrics.organization_id,
+                platform,
+                self._campaign_for_reference(external_reference_id),
+                metric_date,
+                {column: current[column] - previous[column] for column in current}
+            )
+            
             self.db.commit()
             self.db.refresh(existing_metrics)
             return existing_metrics
@@ -608,11 +634,29 @@ class AnalyticsService:
             self._calculate_derived_metrics(new_metrics)
             
             self.db.add(new_metrics)
+            self.rollups.apply_metrics_delta(
+                new_metrics.organization_id,
+                platform,
+                self._campaign_for_reference(external_reference_id),
+                metric_date,
+                metrics_values(new_metrics)
+            )
             self.db.commit()
             self.db.refresh(new_metrics)
             return new_metrics
     
-    def _calculate_derived_metrics(self, metrics: PostMetrics) -> None:
+    def _campaign_for_reference(self, external_reference_id: Optional[int]) -> str:
+        """Rollup campaign key of the post behind an external reference."""
+        if external_reference_id is None:
+            return ""
+        refs = ExternalReference.__table__.c
+        platform_data = self.db.execute(
+            select(refs.platform_data).where(refs.id == external_reference_id)
+        ).scalar()
+        return campaign_key(platform_data)
+    
+    @staticmethod
+    def _calculate_derived_metrics(metrics: PostMetrics) -> None:
         """Calculate derived metrics like CTR, engagement rate, etc."""
         # Calculate CTR
         if metrics.impressions > 0:
@@ -656,14 +700,12 @@ class AnalyticsService:
         end_time = datetime.utcnow()
         start_time = end_time - timedelta(hours=hours)
         
-        # Get recent post metrics
-        recent_metrics = self.db.query(PostMetrics).filter(
-            PostMetrics.organization_id == org_id,
-            PostMetrics.collected_at >= start_time,
-            PostMetrics.collected_at <= end_time
-        ).all()
+        # Metrics collected in the window, aggregated per platform in SQL. Rollups
+        # bucket by metric_date, so this window is read from the raw table.
+        aggregator = MetricsAggregator(self.db, org_id, start_time, end_time, date_column="collected_at")
+        platform_summaries = aggregator.summaries(group_by="platform")
         
-        if not recent_metrics:
+        if not platform_summaries:
             return {
                 "period_hours": hours,
                 "total_posts": 0,
@@ -675,51 +717,33 @@ class AnalyticsService:
             }
         
         # Calculate totals
-        total_posts = len(recent_metrics)
-        total_impressions = sum(m.impressions for m in recent_metrics)
-        total_engagements = sum(m.engagements for m in recent_metrics)
-        total_clicks = sum(m.clicks for m in recent_metrics)
-        total_conversions = sum(m.conversions for m in recent_metrics)
-        
-        # Calculate averages
-        avg_engagement_rate = sum(m.engagement_rate for m in recent_metrics) / total_posts if total_posts > 0 else 0
-        avg_ctr = sum(m.ctr for m in recent_metrics) / total_posts if total_posts > 0 else 0
-        avg_conversion_rate = sum(m.conversion_rate for m in recent_metrics) / total_posts if total_posts > 0 else 0
+        summaries = platform_summaries.values()
+        total_posts = sum(summary["total_posts"] for summary in summaries)
+        total_impressions = sum(summary["total_impressions"] for summary in summaries)
+        total_engagements = sum(summary["total_engagements"] for summary in summaries)
+        total_clicks = sum(summary["total_clicks"] for summary in summaries)
+        total_conversions = sum(summary["total_conversions"] for summary in summaries)
+        
+        # Calculate averages (per-platform averages weighted back to per-post)
+        avg_engagement_rate = sum(summary["avg_engagement_rate"] * summary["total_posts"] for summary in summaries) / total_posts
+        avg_ctr = sum(summary["avg_ctr"] * summary["total_posts"] for summary in summaries) / total_posts
+        avg_conversion_rate = sum(summary["avg_conversion_rate"] * summary["total_posts"] for summary in summaries) / total_posts
         
         # Platform breakdown
-        platform_breakdown = {}
-        for metric in recent_metrics:
-            platform = metric.platform
-            if platform not in platform_breakdown:
-                platform_breakdown[platform] = {
-                    "posts": 0,
-                    "impressions": 0,
-                    "engagements": 0,
-                    "clicks": 0,
-                    "conversions": 0,
-                    "avg_engagement_rate": 0.0
-                }
-            
-            platform_breakdown[platform]["posts"] += 1
-            platform_breakdown[platform]["impressions"] += metric.impressions
-            platform_breakdown[platform]["engagements"] += metric.engagements
-            platform_breakdown[platform]["clicks"] += metric.clicks
-            platform_breakdown[platform]["conversions"] += metric.conversions
-        
-        # Calculate platform averages
-        for platform_data in platform_breakdown.values():
-            if platform_data["posts"] > 0:
-                platform_data["avg_engagement_rate"] = (
-                    platform_data["engagements"] / 
-                    (platform_data["impressions"] or 1) * 100
-                )
+        platform_breakdown = {
+            platform: {
+                "posts": summary["total_posts"],
+                "impressions": summary["total_impressions"],
+                "engagements": summary["total_engagements"],
+                "clicks": summary["total_clicks"],
+                "conversions": summary["total_conversions"],
+                "avg_engagement_rate": summary["total_engagements"] / (summary["total_impressions"] or 1) * 100
+            }
+            for platform, summary in platform_summaries.items()
+        }
         
-        # Top performing posts (by engagement rate)
-        top_posts = sorted(
-            recent_metrics,
-            key=lambda x: x.engagement_rate,
-            reverse=True
-        )[:5]
+        # Top performing posts (by engagement rate), limited in SQL
+        top_posts = aggregator.top_posts(5)
         
         top_performing_posts = [
             {
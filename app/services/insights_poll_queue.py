@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import heapq
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import redis.asyncio as redis
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Redis pub/sub channel used to tell the insights poller a post has renewed activity
+INSIGHTS_ACTIVITY_CHANNEL = "insights:activity"
+
+
+def _to_timestamp(value: datetime) -> float:
+    """Post times are naive UTC datetimes; normalise to a UTC epoch timestamp."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+@dataclass
+class PollPolicy:
+    """Age-aware poll intervals.
+
+    A post is polled every ``backoff`` times the time since its metrics last
+    moved, clamped to ``[min_interval, max_interval]`` seconds. Successive
+    polls of a quiet post therefore land at geometrically growing ages (for
+    ``backoff=0.5``: 30m, 45m, 68m, ...), while a post that keeps gaining
+    engagement stays at ``min_interval``.
+    """
+
+    min_interval: float = 900.0
+    max_interval: float = 21600.0
+    backoff: float = 0.5
+    activity_threshold: float = 0.05
+
+    @classmethod
+    def from_settings(cls) -> "PollPolicy":
+        settings = get_settings()
+        return cls(
+            min_interval=settings.insights_poll_min_interval_minutes * 60.0,
+            max_interval=settings.insights_poll_interval_hours * 3600.0,
+            backoff=settings.insights_poll_backoff_factor,
+            activity_threshold=settings.insights_poll_activity_threshold,
+        )
+
+    def interval(self, quiet_for: float) -> float:
+        """Seconds until the next poll of a post whose metrics last moved ``quiet_for`` seconds ago."""
+        return min(self.max_interval, max(self.min_interval, quiet_for * self.backoff))
+
+    def is_active(self, previous: Optional[int], current: int) -> bool:
+        """Whether engagement grew enough between two polls to count as renewed activity."""
+        if previous is None:
+            return False
+        return current - previous > self.activity_threshold * max(previous, 1)
+
+
+@dataclass
+class _PostState:
+    due: float
+    version: int
+    active_since: float  # When the post was posted or last showed renewed activity
+    engagement: Optional[int] = None
+    in_flight: bool = False
+
+
+class InsightsPollQueue:
+    """Per-post priority queue of insights polls, ordered by next due time.
+
+    Same lazy-deletion heap as the scheduler's ``DueQueue``: rescheduling
+    bumps an entry's version and stale heap nodes are dropped as they
+    surface. Post state survives ``sync`` calls, so engagement deltas and
+    activity bumps carry across cycles; the DB only seeds new posts. The
+    poller persists ``due_at`` so that after a restart only due posts need
+    to be loaded back.
+    """
+
+    def __init__(self, policy: Optional[PollPolicy] = None):
+        self.policy = policy or PollPolicy()
+        self._heap: List[Tuple[float, int, str]] = []
+        self._posts: Dict[str, _PostState] = {}
+        self._version = 0
+
+    def __len__(self) -> int:
+        return len(self._posts)
+
+    def __contains__(self, schedule_id: str) -> bool:
+        return schedule_id in self._posts
+
+    def _push(self, schedule_id: str, state: _PostState, due: float) -> None:
+        self._version += 1
+        state.due = due
+        state.version = self._version
+        state.in_flight = False
+        heapq.heappush(self._heap, (due, self._version, schedule_id))
+
+    def track(
+        self,
+        schedule_id: str,
+        posted_at: datetime,
+        last_polled_at: Optional[datetime] = None,
+        next_poll_at: Optional[datetime] = None
+    ) -> None:
+        """Start tracking a post; posts already in the queue are left alone."""
+        if schedule_id in self._posts:
+            return
+        active_since = _to_timestamp(posted_at)
+        if next_poll_at is not None:
+            due = _to_timestamp(next_poll_at)
+        elif last_polled_at is None:
+            due = active_since
+        else:
+            polled = _to_timestamp(last_polled_at)
+            due = polled + self.policy.interval(polled - active_since)
+        state = _PostState(due=due, version=0, active_since=active_since)
+        self._posts[schedule_id] = state
+        self._push(schedule_id, state, due)
+
+    def sync(self, posts: Iterable[Tuple[str, datetime, Optional[datetime]]]) -> None:
+        """Track ``(schedule_id, posted_at, last_polled_at)`` rows and forget posts no longer listed."""
+        seen = set()
+        for schedule_id, posted_at, last_polled_at in posts:
+            seen.add(schedule_id)
+            self.track(schedule_id, posted_at, last_polled_at)
+        for schedule_id in [s for s in self._posts if s not in seen]:
+            del self._posts[schedule_id]
+
+    def forget(self, schedule_id: str) -> None:
+        """Stop tracking a post (no longer posted, or too old to poll)."""
+        self._posts.pop(schedule_id, None)
+
+    def due_ids(self, now: datetime) -> List[str]:
+        """Tracked posts due by ``now`` and not already being polled."""
+        now_ts = _to_timestamp(now)
+        return [s for s, state in self._posts.items() if not state.in_flight and state.due <= now_ts]
+
+    def due_at(self, schedule_id: str) -> Optional[datetime]:
+        """When a tracked post is next due, as a naive UTC datetime."""
+        state = self._posts.get(schedule_id)
+        if state is None:
+            return None
+        return datetime.fromtimestamp(state.due, timezone.utc).replace(tzinfo=None)
+
+    def _discard_stale(self) -> None:
+        while self._heap:
+            due, version, schedule_id = self._heap[0]
+            state = self._posts.get(schedule_id)
+            if state is not None and not state.in_flight and state.version == version:
+                return
+            heapq.heappop(self._heap)
+
+    def pop_due(self, now: datetime, limit: int) -> List[str]:
+        """Take up to ``limit`` most overdue posts; each must be reported back via ``record_poll``."""
+        now_ts = _to_timestamp(now)
+        due: List[str] = []
+        while len(due) < limit:
+            self._discard_stale()
+            if not self._heap or self._heap[0][0] > now_ts:
+                break
+            _, _, schedule_id = heapq.heappop(self._heap)
+            self._posts[schedule_id].in_flight = True
+            due.append(schedule_id)
+        return due
+
+    def record_poll(self, schedule_id: str, now: datetime, engagement: Optional[int] = None) -> None:
+        """Reschedule a polled post; ``engagement`` is None when the fetch returned nothing."""
+        state = self._posts.get(schedule_id)
+        if state is None:
+            return
+        now_ts = _to_timestamp(now)
+        if engagement is not None:
+            if self.policy.is_active(state.engagement, engagement):
+                state.active_since = now_ts
+            state.engagement = engagement
+        self._push(schedule_id, state, now_ts + self.policy.interval(now_ts - state.active_since))
+
+    def bump(self, schedule_id: str, now: datetime) -> bool:
+        """Renewed activity reported from outside (e.g. a platform webhook): poll now and reset back-off."""
+        state = self._posts.get(schedule_id)
+        if state is None:
+            return False
+        now_ts = _to_timestamp(now)
+        state.active_since = now_ts
+        if not state.in_flight:
+            self._push(schedule_id, state, now_ts)
+        return True
+
+    def seconds_until_next(self, now: datetime) -> Optional[float]:
+        """Seconds until the earliest queued poll, or None when empty."""
+        self._discard_stale()
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - _to_timestamp(now))
+
+
+async def notify_post_activity(redis_client: redis.Redis, schedule_id: str) -> None:
+    """Ask running insights pollers to re-poll a post soon.
+
+    Best effort: without Redis the post is still polled on its normal
+    back-off schedule.
+    """
+    try:
+        await redis_client.publish(INSIGHTS_ACTIVITY_CHANNEL, json.dumps({"id": schedule_id}))
+    except Exception as e:
+        logger.warning(f"Failed to publish insights activity for {schedule_id}: {e}")
@@ -0,0 +1,138 @@
+"""
+Metrics Aggregation
+Pushes post metrics aggregation down to the database: sums, averages and
+group-bys run in SQL and top-N lists are limited there, so a summary only
+transfers a handful of rows however many metric rows an org has
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, null, or_, select
+from sqlalchemy.orm import Session
+
+from app.models.analytics import PostMetrics
+
+# Summary key -> PostMetrics column
+SUMMARY_TOTALS = {
+    "total_impressions": "impressions",
+    "total_reach": "reach",
+    "total_clicks": "clicks",
+    "total_engagements": "engagements",
+    "total_conversions": "conversions",
+}
+
+SUMMARY_AVERAGES = {
+    "avg_engagement_rate": "engagement_rate",
+    "avg_ctr": "ctr",
+    "avg_conversion_rate": "conversion_rate",
+}
+
+TOP_POST_COLUMNS = ("platform", "external_id", "engagement_rate", "impressions", "engagements", "ctr", "metric_date")
+
+
+class MetricsAggregator:
+    """Aggregate queries over one org's post metrics in [start, end].
+
+    ``group_by`` is None for a single overall group, ``"platform"``, or
+    ``"day"`` (calendar day of ``metric_date``). Rows are windowed on
+    ``date_column``: ``metric_date`` by default, ``collected_at`` for
+    "collected in the last N hours". Only Core columns are selected, so no
+    ORM objects are built.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        org_id: int,
+        start: datetime,
+        end: datetime,
+        platforms: Optional[List[str]] = None,
+        date_column: str = "metric_date"
+    ):
+        self.db = db
+        self.columns = PostMetrics.__table__.c
+        self.filters = [
+            self.columns.organization_id == org_id,
+            self.columns[date_column] >= start,
+            self.columns[date_column] <= end,
+        ]
+        if platforms:
+            self.filters.append(self.columns.platform.in_(platforms))
+
+    def summaries(self, group_by: Optional[str] = None) -> Dict[Any, Dict[str, Any]]:
+        """Post count, totals and average rates per group (key None when ungrouped)."""
+        c = self.columns
+        key = self._group_key(group_by)
+        stmt = select(
+            key.label("group_key"),
+            func.count(c.id).label("total_posts"),
+            *[func.coalesce(func.sum(c[column]), 0).label(name) for name, column in SUMMARY_TOTALS.items()],
+            *[func.coalesce(func.avg(c[column]), 0.0).label(name) for name, column in SUMMARY_AVERAGES.items()]
+        ).where(*self.filters)
+        if group_by:
+            stmt = stmt.group_by(key)
+
+        summaries = {}
+        for row in self.db.execute(stmt):
+            values = dict(row._mapping)
+            group = self._normalize_key(values.pop("group_key"), group_by)
+            if values["total_posts"]:
+                summaries[group] = values
+        return summaries
+
+    def extremes(self, group_by: Optional[str] = None) -> Dict[Any, Tuple[str, str]]:
+        """External ids of the highest and lowest engagement-rate posts per group.
+
+        Ties go to the lowest id, so results are stable across calls.
+        """
+        c = self.columns
+        key = self._group_key(group_by)
+        partition = key if group_by else None
+        ranked = select(
+            key.label("group_key"),
+            c.external_id,
+            func.row_number().over(partition_by=partition, order_by=(c.engagement_rate.desc(), c.id)).label("best"),
+            func.row_number().over(partition_by=partition, order_by=(c.engagement_rate.asc(), c.id)).label("worst")
+        ).where(*self.filters).subquery()
+        rows = self.db.execute(
+            select(ranked.c.group_key, ranked.c.external_id, ranked.c.best, ranked.c.worst)
+            .where(or_(ranked.c.best == 1, ranked.c.worst == 1))
+        ).all()
+
+        found: Dict[Any, Dict[str, str]] = {}
+        for row in rows:
+            group = found.setdefault(self._normalize_key(row.group_key, group_by), {})
+            if row.best == 1:
+                group["best"] = row.external_id
+            if row.worst == 1:
+                group["worst"] = row.external_id
+        return {group: (ids["best"], ids["worst"]) for group, ids in found.items()}
+
+    def top_posts(self, limit: int, columns: Tuple[str, ...] = TOP_POST_COLUMNS) -> List[Any]:
+        """The ``limit`` rows with the highest engagement rate, ordered in SQL."""
+        c = self.columns
+        return self.db.execute(
+            select(*[c[column] for column in columns])
+            .where(*self.filters)
+            .order_by(c.engagement_rate.desc(), c.id)
+            .limit(limit)
+        ).all()
+
+    def _group_key(self, group_by: Optional[str]):
+        if group_by == "platform":
+            return self.columns.platform
+        if group_by == "day":
+            return func.date(self.columns.metric_date)
+        if group_by is None:
+            return null()
+        raise ValueError(f"Unsupported group_by: {group_by}")
+
+    @staticmethod
+    def _normalize_key(value: Any, group_by: Optional[str]) -> Any:
+        # SQLite returns DATE() as text, PostgreSQL as a date
+        if group_by == "day" and isinstance(value, str):
+            return date.fromisoformat(value)
+        return value
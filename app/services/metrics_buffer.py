@@ -0,0 +1,256 @@
+"""
+Metrics Write Buffer
+Coalesces webhook metric and engagement updates per post in Redis and writes
+them to the database once per flush window instead of once per webhook
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+import uuid
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import redis
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.services.webhook_ingest import METRIC_FIELDS, WebhookBatchApplier, WebhookEvent, webhook_event
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsWriteBuffer:
+    """Pending webhook updates, one Redis hash per ``(platform, external_id)``.
+
+    Updates merge as they arrive: metric fields and likes keep their latest
+    value, the latest feed payload replaces the previous one, and comments
+    accumulate by comment id. ``flush`` moves every pending post into an
+    in-flight batch atomically and applies them in one transaction; if that
+    fails the snapshot is put back underneath any newer updates, and if the
+    flushing process dies the batch is requeued by the next ``recover``.
+
+    The scheduled ``flush_metric_updates`` task flushes every pending post.
+    Analytics reads flush only the requesting org's posts first (see
+    ``flush_org_metrics``), so a webhook is visible to that org's dashboards
+    as soon as it has been buffered.
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        prefix: str = "metrics:pending",
+        ttl: int = 86400,
+        lease: int = 300
+    ):
+        self.redis = redis_client
+        self.prefix = prefix
+        self.ttl = ttl
+        self.lease = lease
+        self.dirty_key = f"{prefix}:dirty"
+        self.inflight_key = f"{prefix}:inflight"
+
+    @classmethod
+    def from_settings(cls) -> "MetricsWriteBuffer":
+        settings = get_settings()
+        return cls(
+            redis.Redis.from_url(settings.redis_url, decode_responses=True, socket_connect_timeout=1),
+            ttl=settings.metrics_buffer_ttl_seconds,
+            lease=settings.metrics_buffer_flush_lease_seconds,
+        )
+
+    def add(self, events: Sequence[WebhookEvent]) -> int:
+        """Merge events into their posts' pending updates; returns the posts touched."""
+        pipe = self.redis.pipeline(transaction=False)
+        keys = set()
+        for event in events:
+            post_id = event.value.get("post_id")
+            if not post_id:
+                continue
+            key = self._post_key(event.platform, str(post_id))
+            fields = self._fields(event)
+            if not fields:
+                continue
+            pipe.hset(key, mapping=fields)
+            keys.add(key)
+        for key in keys:
+            pipe.expire(key, self.ttl)
+        if keys:
+            pipe.sadd(self.dirty_key, *keys)
+            pipe.execute()
+        return len(keys)
+
+    def flush(self, db: Session, org_id: Optional[int] = None) -> Dict[str, int]:
+        """Apply every pending post, or only ``org_id``'s posts, in one transaction.
+
+        The pending posts are renamed into an in-flight batch first and only
+        deleted once the transaction has committed, so a crash mid-flush
+        leaves them for ``recover`` rather than losing them.
+        """
+        self.recover()
+        taken = self._take_all() if org_id is None else self._take_org(db, org_id)
+        if taken is None:
+            return {"events": 0, "posts": 0, "metric_rows": 0}
+        batch, keys = taken
+        snapshots = self._snapshots(batch, keys)
+
+        events = [event for key, fields in snapshots.items() for event in self._events(key, fields)]
+        try:
+            result = WebhookBatchApplier(db).apply(events)
+        except Exception:
+            db.rollback()
+            self._restore(snapshots)
+            self._release(batch, keys)
+            raise
+        self._release(batch, keys)
+        return result
+
+    def _take_all(self) -> Optional[Tuple[str, List[str]]]:
+        if not self.redis.exists(self.dirty_key):
+            return None
+
+        batch = self._new_batch()
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.zadd(self.inflight_key, {batch: time.time()})
+        pipe.rename(self.dirty_key, batch)
+        try:
+            pipe.execute()
+        except redis.ResponseError:
+            # Another flush took the pending posts first
+            self.redis.zrem(self.inflight_key, batch)
+            return None
+
+        keys = sorted(self.redis.smembers(batch))
+        pipe = self.redis.pipeline(transaction=False)
+        for key in keys:
+            pipe.rename(key, self._inflight_post_key(batch, key))
+        pipe.execute(raise_on_error=False)  # Posts whose hash expired have nothing to move
+        return batch, keys
+
+    def _take_org(self, db: Session, org_id: int) -> Optional[Tuple[str, List[str]]]:
+        pending = {self._post_identity(key): key for key in self.redis.smembers(self.dirty_key)}
+        if not pending:
+            return None
+        keys = sorted(pending[post] for post in WebhookBatchApplier(db).posts_of_org(pending, org_id) if post in pending)
+        if not keys:
+            return None
+
+        # Each post leaves the dirty set and moves its hash in the same
+        # transaction, so a concurrent full flush takes it or this one does
+        batch = self._new_batch()
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.zadd(self.inflight_key, {batch: time.time()})
+        pipe.sadd(batch, *keys)
+        pipe.srem(self.dirty_key, *keys)
+        for key in keys:
+            pipe.rename(key, self._inflight_post_key(batch, key))
+        pipe.execute(raise_on_error=False)  # Posts already flushed or expired have nothing to move
+        return batch, keys
+
+    def _new_batch(self) -> str:
+        return f"{self.prefix}:inflight:{uuid.uuid4().hex}"
+
+    def recover(self) -> int:
+        """Requeue in-flight batches older than the lease, left behind by crashed flushes."""
+        cutoff = time.time() - self.lease
+        batches = self.redis.zrangebyscore(self.inflight_key, "-inf", cutoff)
+        for batch in batches:
+            keys = sorted(self.redis.smembers(batch))
+            snapshots = self._snapshots(batch, keys)
+            logger.warning(f"Requeueing {len(snapshots)} buffered posts from unfinished flush {batch}")
+            self._restore(snapshots)
+            self._release(batch, keys)
+        return len(batches)
+
+    def _snapshots(self, batch: str, keys: List[str]) -> Dict[str, Dict[str, str]]:
+        pipe = self.redis.pipeline(transaction=False)
+        for key in keys:
+            pipe.hgetall(self._inflight_post_key(batch, key))
+        return {key: fields for key, fields in zip(keys, pipe.execute()) if fields}
+
+    def _release(self, batch: str, keys: List[str]) -> None:
+        pipe = self.redis.pipeline(transaction=True)
+        for key in keys:
+            pipe.delete(self._inflight_post_key(batch, key))
+        pipe.delete(batch)
+        pipe.zrem(self.inflight_key, batch)
+        pipe.execute()
+
+    def _restore(self, snapshots: Dict[str, Dict[str, str]]) -> None:
+        pipe = self.redis.pipeline(transaction=False)
+        for key, fields in snapshots.items():
+            for field, value in fields.items():
+                pipe.hsetnx(key, field, value)
+            pipe.expire(key, self.ttl)
+        if snapshots:
+            pipe.sadd(self.dirty_key, *snapshots)
+            pipe.execute()
+
+    def _inflight_post_key(self, batch: str, key: str) -> str:
+        return f"{batch}:{key[len(self.prefix) + 1:]}"
+
+    def _post_key(self, platform: str, external_id: str) -> str:
+        return f"{self.prefix}:post:{platform}:{external_id}"
+
+    def _post_identity(self, key: str) -> Tuple[str, str]:
+        platform, external_id = key[len(self.prefix) + len(":post:"):].split(":", 1)
+        return platform, external_id
+
+    @staticmethod
+    def _fields(event: WebhookEvent) -> Dict[str, str]:
+        value = event.value
+        if event.field == "feed":
+            fields = {"feed": json.dumps(value, default=str)}
+            fields.update({f"metric:{name}": json.dumps(value[name]) for name in METRIC_FIELDS if name in value})
+            if "is_estimated" in value:
+                fields["metric:is_estimated"] = json.dumps(value["is_estimated"])
+            return fields
+        if event.field == "likes":
+            return {"likes": json.dumps(value, default=str)}
+        if event.field == "comments" and value.get("id"):
+            return {f"comment:{value['id']}": json.dumps(value, default=str)}
+        return {}
+
+    def _events(self, key: str, fields: Dict[str, str]) -> List[WebhookEvent]:
+        """The merged updates of one post, as events for ``WebhookBatchApplier``."""
+        platform, external_id = self._post_identity(key)
+        events = []
+        metrics = {name[len("metric:"):]: json.loads(value) for name, value in fields.items() if name.startswith("metric:")}
+        if "feed" in fields or metrics:
+            value = {**json.loads(fields.get("feed", "{}")), **metrics, "post_id": external_id}
+            events.append(webhook_event(platform, "feed", value))
+        if "likes" in fields:
+            events.append(webhook_event(platform, "likes", {**json.loads(fields["likes"]), "post_id": external_id}))
+        comments = [json.loads(value) for name, value in fields.items() if name.startswith("comment:")]
+        for comment in sorted(comments, key=lambda comment: str(comment.get("created_time") or "")):
+            events.append(webhook_event(platform, "comments", {**comment, "post_id": external_id}))
+        return events
+
+
+_buffer: Optional[MetricsWriteBuffer] = None
+
+
+def get_metrics_buffer() -> MetricsWriteBuffer:
+    """Process-wide buffer client."""
+    global _buffer
+    if _buffer is None:
+        _buffer = MetricsWriteBuffer.from_settings()
+    return _buffer
+
+
+def buffer_or_apply(db: Session, events: Sequence[WebhookEvent]) -> None:
+    """Buffer webhook updates, writing them straight through if Redis is unavailable."""
+    try:
+        get_metrics_buffer().add(events)
+    except redis.RedisError as e:
+        logger.warning(f"Metrics buffer unavailable, applying {len(events)} webhook updates directly: {e}")
+        WebhookBatchApplier(db).apply(events)
+
+
+def flush_org_metrics(db: Session, org_id: int) -> None:
+    """Apply one org's buffered webhook updates before its analytics are read."""
+    try:
+        get_metrics_buffer().flush(db, org_id=org_id)
+    except Exception as e:
+        logger.warning(f"Could not flush buffered metrics for org {org_id} before read: {e}")
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import Optional, Any, Callable, Awaitable
+import json
+from typing import Optional, Any, AsyncIterator, Callable, Awaitable
 
 import httpx
 from openai import AsyncOpenAI
@@ -63,6 +64,53 @@ class ModelRouter:
 			pass
 		return ""
 
+	async def _stream_openai(self, prompt: str, system: Optional[str]) -> AsyncIterator[str]:
+		client = AsyncOpenAI(api_key=self.openai_api_key)
+		model = self.primary.split(":", 1)[1] if ":" in self.primary else self.primary
+		messages = []
+		if system:
+			messages.append({"role": "system", "content": system})
+		messages.append({"role": "user", "content": prompt})
+		chunks = await client.chat.completions.create(model=model, messages=messages, temperature=0.4, stream=True)
+		async for chunk in chunks:
+			if chunk.choices and chunk.choices[0].delta.content:
+				yield chunk.choices[0].delta.content
+
+	async def _stream_ollama(self, prompt: str, system: Optional[str]) -> AsyncIterator[str]:
+		model = self.fallback.split(":", 1)[1] if ":" in self.fallback else self.fallback
+		payload = {"model": model, "prompt": (f"{system}\n\n{prompt}" if system else prompt), "stream": True}
+		async with httpx.AsyncClient(timeout=30) as client:
+			async with client.stream("POST", "http://localhost:11434/api/generate", json=payload) as resp:
+				resp.raise_for_status()
+				async for line in resp.aiter_lines():
+					if line:
+						text = json.loads(line).get("response")
+						if text:
+							yield text
+
+	async def stream(self, prompt: str, system: Optional[str] = None) -> AsyncIterator[str]:
+		"""Yield text as it is generated; same primary-then-fallback order as complete().
+
+		Falls back only if the primary fails before producing any text.
+		"""
+		sources = [self._stream_ollama(prompt, system)]
+		if self.openai_api_key:
+			sources.insert(0, self._stream_openai(prompt, system))
+		for source in sources:
+			started = False
+			try:
+				async for text in source:
+					started = True
+					yield text
+			except Exception:
+				if started:
+					raise
+				continue
+			finally:
+				await source.aclose()
+			if started:
+				return
+
 
 class AIRouter:
     def __init__(self) -> None:
@@ -14,6 +14,7 @@ from enum import Enum
 from app.models.analytics import PostMetrics, AnalyticsSummary
 from app.models.publishing import ExternalReference, PublishingStatus
 from app.services.analytics_service import AnalyticsService
+from app.services.metrics_aggregation import MetricsAggregator
 
 logger = logging.getLogger(__name__)
 
@@ -103,35 +104,27 @@ class PerformanceTracker:
             end_date = datetime.utcnow()
             start_date = end_date - timedelta(days=days)
             
-            # Base query
-            query = self.db.query(PostMetrics).filter(
-                PostMetrics.organization_id == org_id,
-                PostMetrics.metric_date >= start_date,
-                PostMetrics.metric_date <= end_date
-            )
-            
-            if platforms:
-                query = query.filter(PostMetrics.platform.in_(platforms))
-            
-            all_metrics = query.all()
+            # Aggregates, rankings and top-N all run in the database
+            aggregator = MetricsAggregator(self.db, org_id, start_date, end_date, platforms)
             
-            if not all_metrics:
+            overall = aggregator.summaries().get(None)
+            if not overall:
                 return self._empty_performance_summary(org_id, start_date, end_date)
             
             # Calculate performance summary
-            summary = self._calculate_performance_summary(all_metrics, metrics)
+            summary = self._calculate_performance_summary(overall, aggregator.extremes().get(None), metrics)
+            
+            # Get performance by time period
+            time_performance = self._get_time_performance(aggregator)
             
             # Calculate trends
-            trends = self._calculate_performance_trends(org_id, start_date, end_date, platforms)
+            trends = self._calculate_performance_trends(start_date, end_date, time_performance)
             
             # Get top performing content
-            top_content = self._get_top_performing_content(all_metrics, limit=10)
+            top_content = self._get_top_performing_content(aggregator, limit=10)
             
             # Get performance by platform
-            platform_performance = self._get_platform_performance(all_metrics)
-            
-            # Get performance by time period
-            time_performance = self._get_time_performance(all_metrics, group_by="day")
+            platform_performance = self._get_platform_performance(aggregator)
             
             return {
                 "organization_id": org_id,
@@ -145,7 +138,7 @@ class PerformanceTracker:
                 "top_content": top_content,
                 "platform_performance": platform_performance,
                 "time_performance": time_performance,
-                "total_posts_analyzed": len(all_metrics)
+                "total_posts_analyzed": overall["total_posts"]
             }
             
         except Exception as e:
@@ -286,25 +279,19 @@ class PerformanceTracker:
     
     def _calculate_performance_summary(
         self,
-        metrics: List[PostMetrics],
+        aggregate: Dict[str, Any],
+        extremes: Optional[Tuple[str, str]] = None,
         requested_metrics: Optional[List[PerformanceMetric]] = None
     ) -> Dict[str, Any]:
-        """Calculate performance summary from metrics"""
-        if not metrics:
+        """Format a summary from one group's SQL aggregates and best/worst post ids"""
+        if not aggregate:
             return {}
         
+        best, worst = extremes or (None, None)
         summary = {
-            "total_posts": len(metrics),
-            "total_impressions": sum(m.impressions for m in metrics),
-            "total_reach": sum(m.reach for m in metrics),
-            "total_clicks": sum(m.clicks for m in metrics),
-            "total_engagements": sum(m.engagements for m in metrics),
-            "total_conversions": sum(m.conversions for m in metrics),
-            "avg_engagement_rate": sum(m.engagement_rate for m in metrics) / len(metrics),
-            "avg_ctr": sum(m.ctr for m in metrics) / len(metrics),
-            "avg_conversion_rate": sum(m.conversion_rate for m in metrics) / len(metrics),
-            "best_performing_post": max(metrics, key=lambda x: x.engagement_rate).external_id if metrics else None,
-            "worst_performing_post": min(metrics, key=lambda x: x.engagement_rate).external_id if metrics else None
+            **aggregate,
+            "best_performing_post": best,
+            "worst_performing_post": worst
         }
         
         # Filter by requested metrics if specified
@@ -320,40 +307,12 @@ class PerformanceTracker:
     
     def _calculate_performance_trends(
         self,
-        org_id: int,
         start_date: datetime,
         end_date: datetime,
-        platforms: Optional[List[str]] = None
+        daily_data: List[Dict[str, Any]]
     ) -> Dict[str, Any]:
-        """Calculate performance trends"""
+        """Calculate performance trends from the daily summaries"""
         try:
-            # Get daily performance data
-            daily_data = []
-            current_date = start_date
-            
-            while current_date <= end_date:
-                day_end = current_date + timedelta(days=1)
-                
-                query = self.db.query(PostMetrics).filter(
-                    PostMetrics.organization_id == org_id,
-                    PostMetrics.metric_date >= current_date,
-                    PostMetrics.metric_date < day_end
-                )
-                
-                if platforms:
-                    query = query.filter(PostMetrics.platform.in_(platforms))
-                
-                day_metrics = query.all()
-                
-                if day_metrics:
-                    day_summary = self._calculate_performance_summary(day_metrics)
-                    daily_data.append({
-                        "date": current_date.isoformat(),
-                        "metrics": day_summary
-                    })
-                
-                current_date += timedelta(days=1)
-            
             # Calculate trends
             if len(daily_data) >= 2:
                 first_half = daily_data[:len(daily_data)//2]
@@ -379,13 +338,8 @@ class PerformanceTracker:
             logger.error(f"Error calculating performance trends: {e}")
             return {"engagement_trend": "stable", "engagement_change_percent": 0, "daily_data": []}
     
-    def _get_top_performing_content(self, metrics: List[PostMetrics], limit: int = 10) -> List[Dict[str, Any]]:
+    def _get_top_performing_content(self, aggregator: MetricsAggregator, limit: int = 10) -> List[Dict[str, Any]]:
         """Get top performing content"""
-        if not metrics:
-            return []
-        
-        top_metrics = sorted(metrics, key=lambda x: x.engagement_rate, reverse=True)[:limit]
-        
         return [
             {
                 "platform": post.platform,
@@ -396,69 +350,36 @@ class PerformanceTracker:
                 "ctr": round(post.ctr, 2),
                 "metric_date": post.metric_date.isoformat()
             }
-            for post in top_metrics
+            for post in aggregator.top_posts(limit)
         ]
     
-    def _get_platform_performance(self, metrics: List[PostMetrics]) -> Dict[str, Any]:
+    def _get_platform_performance(self, aggregator: MetricsAggregator) -> Dict[str, Any]:
         """Get performance breakdown by platform"""
-        if not metrics:
-            return {}
-        
         platform_data = {}
-        for metric in metrics:
-            platform = metric.platform
-            if platform not in platform_data:
-                platform_data[platform] = {
-                    "posts": 0,
-                    "total_impressions": 0,
-                    "total_engagements": 0,
-                    "avg_engagement_rate": 0
-                }
-            
-            platform_data[platform]["posts"] += 1
-            platform_data[platform]["total_impressions"] += metric.impressions
-            platform_data[platform]["total_engagements"] += metric.engagements
-        
-        # Calculate averages
-        for platform, data in platform_data.items():
-            if data["posts"] > 0:
-                data["avg_engagement_rate"] = round(
-                    (data["total_engagements"] / data["total_impressions"] * 100) if data["total_impressions"] > 0 else 0, 2
-                )
+        for platform, aggregate in aggregator.summaries("platform").items():
+            impressions = aggregate["total_impressions"]
+            engagements = aggregate["total_engagements"]
+            platform_data[platform] = {
+                "posts": aggregate["total_posts"],
+                "total_impressions": impressions,
+                "total_engagements": engagements,
+                "avg_engagement_rate": round((engagements / impressions * 100) if impressions > 0 else 0, 2)
+            }
         
         return platform_data
     
-    def _get_time_performance(self, metrics: List[PostMetrics], group_by: str = "day") -> List[Dict[str, Any]]:
-        """Get performance by time period"""
-        if not metrics:
-            return []
-        
-        # Group metrics by time period
-        grouped_data = {}
-        for metric in metrics:
-            if group_by == "day":
-                date_key = metric.metric_date.date()
-            elif group_by == "week":
-                date_key = metric.metric_date.date() - timedelta(days=metric.metric_date.weekday())
-            elif group_by == "month":
-                date_key = metric.metric_date.date().replace(day=1)
-            else:
-                date_key = metric.metric_date.date()
-            
-            if date_key not in grouped_data:
-                grouped_data[date_key] = []
-            grouped_data[date_key].append(metric)
-        
-        # Calculate performance for each period
-        time_performance = []
-        for date_key, period_metrics in grouped_data.items():
-            period_summary = self._calculate_performance_summary(period_metrics)
-            time_performance.append({
-                "date": date_key.isoformat(),
-                "metrics": period_summary
-            })
+    def _get_time_performance(self, aggregator: MetricsAggregator) -> List[Dict[str, Any]]:
+        """Get performance by calendar day"""
+        daily = aggregator.summaries("day")
+        extremes = aggregator.extremes("day")
         
-        return sorted(time_performance, key=lambda x: x["date"])
+        return [
+            {
+                "date": day.isoformat(),
+                "metrics": self._calculate_performance_summary(daily[day], extremes.get(day))
+            }
+            for day in sorted(daily)
+        ]
     
     def _calculate_benchmarks(
         self,
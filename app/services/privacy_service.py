@@ -261,7 +261,8 @@ class PrivacyService:
                 "requested_at": deletion_request.created_at.isoformat(),
                 "scheduled_for": deletion_request.scheduled_for.isoformat(),
                 "completed_at": deletion_request.completed_at.isoformat() if deletion_request.completed_at else None,
-                "error_message": deletion_request.error_message
+                "error_message": deletion_request.error_message,
+                "progress": deletion_request.progress or {}
             }
             
         except HTTPException:
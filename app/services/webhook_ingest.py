@@ -0,0 +1,314 @@
+"""
+Webhook Ingestion
+Inbound platform webhooks are verified and appended, still raw, to a Redis
+Stream so the endpoint can ack immediately; consumers drain the stream in
+batches, drop redelivered events by id and apply each batch in one transaction
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import redis.asyncio as redis
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models.analytics import PostMetrics
+from app.models.publishing import ExternalReference, PlatformType
+from app.services.analytics_rollups import AnalyticsRollupService, campaign_key, metrics_values
+from app.services.analytics_service import AnalyticsService
+
+logger = logging.getLogger(__name__)
+
+# Webhook value keys copied into a PostMetrics row
+METRIC_FIELDS = (
+    "impressions", "reach", "clicks", "engagements", "likes", "comments",
+    "shares", "saves", "conversions", "video_views",
+)
+
+PLATFORM_VALUES = frozenset(platform.value for platform in PlatformType)
+
+
+def verify_hub_signature(body: bytes, signature: Optional[str], secret: Optional[str]) -> bool:
+    """Check an ``X-Hub-Signature-256`` header against the raw request body."""
+    if not signature or not secret:
+        return False
+    if signature.startswith("sha256="):
+        signature = signature[7:]
+    expected = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(signature, expected)
+
+
+@dataclass
+class WebhookEvent:
+    """One platform change, identified stably across redeliveries."""
+
+    event_id: str
+    platform: str
+    field: str
+    value: Dict[str, Any]
+
+
+def webhook_event(platform: str, field: str, value: Dict[str, Any], *identity: Any) -> WebhookEvent:
+    """An event whose id hashes the change with whatever else identifies its delivery."""
+    key = json.dumps([platform, *identity, field, value], sort_keys=True, default=str)
+    return WebhookEvent(hashlib.sha1(key.encode("utf-8")).hexdigest(), platform, field, value)
+
+
+def parse_meta_events(body: str) -> List[WebhookEvent]:
+    """
+    Split a Meta webhook body into one event per ``entry``/``change``
+
+    Meta has no delivery id, so an event's id hashes the entry id and time
+    with the change itself; a redelivered body yields the same ids.
+    """
+    payload = json.loads(body)
+    platform = "instagram" if payload.get("object") == "instagram" else "facebook"
+    events = []
+    for entry in payload.get("entry") or []:
+        for change in entry.get("changes") or []:
+            events.append(webhook_event(
+                platform, change.get("field") or "", change.get("value") or {}, entry.get("id"), entry.get("time")
+            ))
+    return events
+
+
+def unique_events(events: Iterable[WebhookEvent], seen: Iterable[str] = ()) -> List[WebhookEvent]:
+    """Events in order with duplicates and already-applied ids dropped."""
+    skip = set(seen)
+    unique = []
+    for event in events:
+        if event.event_id not in skip:
+            skip.add(event.event_id)
+            unique.append(event)
+    return unique
+
+
+class WebhookStream:
+    """The Redis Stream of raw inbound webhooks and its consumer group.
+
+    Entries hold the platform, the body exactly as received and the receive
+    time. Applied event ids are remembered for ``dedupe_ttl`` seconds so
+    platform retries of work already done are skipped.
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        key: str = "webhooks:inbound",
+        group: str = "webhook-ingest",
+        maxlen: int = 1000000,
+        dedupe_ttl: int = 86400
+    ):
+        self.redis = redis_client
+        self.key = key
+        self.group = group
+        self.maxlen = maxlen
+        self.dedupe_ttl = dedupe_ttl
+
+    @classmethod
+    def from_settings(cls) -> "WebhookStream":
+        settings = get_settings()
+        return cls(
+            redis.from_url(settings.redis_url, decode_responses=True),
+            key=settings.webhook_stream_key,
+            group=settings.webhook_consumer_group,
+            maxlen=settings.webhook_stream_maxlen,
+            dedupe_ttl=settings.webhook_dedupe_ttl_seconds,
+        )
+
+    async def append(self, platform: str, body: bytes) -> str:
+        """Append a verified body; a single ``XADD``, no parsing."""
+        return await self.redis.xadd(
+            self.key,
+            {"platform": platform, "body": body.decode("utf-8"), "received_at": f"{time.time():.3f}"},
+            maxlen=self.maxlen,
+            approximate=True
+        )
+
+    async def ensure_group(self) -> None:
+        try:
+            await self.redis.xgroup_create(self.key, self.group, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def read(self, consumer: str, count: int, block_ms: int) -> List[Tuple[str, Dict[str, str]]]:
+        """New entries for this consumer."""
+        response = await self.redis.xreadgroup(self.group, consumer, {self.key: ">"}, count=count, block=block_ms)
+        return [entry for _, entries in response or [] for entry in entries]
+
+    async def claim_stale(self, consumer: str, min_idle_ms: int, count: int) -> List[Tuple[str, Dict[str, str]]]:
+        """Entries another consumer read but never acked, e.g. because it died."""
+        response = await self.redis.xautoclaim(self.key, self.group, consumer, min_idle_ms, start_id="0-0", count=count)
+        return [entry for entry in response[1] if entry[1]]
+
+    async def ack(self, entry_ids: Sequence[str]) -> None:
+        if entry_ids:
+            await self.redis.xack(self.key, self.group, *entry_ids)
+
+    async def dead_letter(self, entry_id: str, fields: Dict[str, str], error: str) -> None:
+        """Park an entry that fails on its own so it stops blocking the group."""
+        await self.redis.xadd(f"{self.key}:dead", {**fields, "entry_id": entry_id, "error": error[:500]})
+        await self.ack([entry_id])
+
+    async def seen(self, event_ids: Sequence[str]) -> List[str]:
+        """The ids among ``event_ids`` that were already applied."""
+        if not event_ids:
+            return []
+        flags = await self.redis.mget([self._seen_key(event_id) for event_id in event_ids])
+        return [event_id for event_id, flag in zip(event_ids, flags) if flag]
+
+    async def mark_seen(self, event_ids: Sequence[str]) -> None:
+        if not event_ids:
+            return
+        pipe = self.redis.pipeline(transaction=False)
+        for event_id in event_ids:
+            pipe.set(self._seen_key(event_id), 1, ex=self.dedupe_ttl)
+        await pipe.execute()
+
+    def _seen_key(self, event_id: str) -> str:
+        return f"{self.key}:seen:{event_id}"
+
+
+_stream: Optional[WebhookStream] = None
+
+
+def get_webhook_stream() -> WebhookStream:
+    """Process-wide stream client for the webhook endpoints."""
+    global _stream
+    if _stream is None:
+        _stream = WebhookStream.from_settings()
+    return _stream
+
+
+def _apply_change(platform_data: Dict[str, Any], event: WebhookEvent, now: datetime) -> Optional[Dict[str, Any]]:
+    """Fold one change into a post's ``platform_data``; returns its metrics, if any."""
+    value = event.value
+    if event.field == "feed":
+        platform_data.update({"last_webhook_update": now.isoformat(), "webhook_data": value})
+        metrics = {field: value[field] for field in METRIC_FIELDS if field in value}
+        return metrics or None
+
+    if event.field == "comments":
+        comment_id = value.get("id")
+        if not comment_id:
+            logger.warning(f"Incomplete comment data from {event.platform}")
+            return None
+        comments = platform_data.setdefault("comments", [])
+        if all(comment.get("id") != comment_id for comment in comments):
+            comments.append({
+                "id": comment_id,
+                "text": value.get("message", ""),
+                "author": (value.get("from") or {}).get("name", "Unknown"),
+                "created_time": value.get("created_time"),
+                "platform": event.platform,
+            })
+            platform_data["comment_count"] = len(comments)
+            platform_data["last_comment_at"] = value.get("created_time")
+
+    elif event.field == "likes":
+        platform_data.update({
+            "like_count": value.get("like_count", 0),
+            "reactions": value.get("reactions", {}),
+            "last_engagement_update": now.isoformat(),
+        })
+    return None
+
+
+class WebhookBatchApplier:
+    """Applies a batch of webhook events to posts in one transaction.
+
+    References are loaded with one query, each post's ``platform_data`` is
+    written once however many of its events are in the batch, metric
+    updates for a post are merged into a single ``post_metrics`` row, and
+    rollup deltas are summed per bucket before they are upserted.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.rollups = AnalyticsRollupService(db)
+
+    def apply(self, events: Sequence[WebhookEvent]) -> Dict[str, int]:
+        by_post: Dict[Tuple[str, str], List[WebhookEvent]] = defaultdict(list)
+        for event in events:
+            post_id = event.value.get("post_id")
+            if post_id:
+                by_post[(event.platform, str(post_id))].append(event)
+
+        refs = self._load_references(by_post) if by_post else {}
+        now = datetime.utcnow()
+        ref_updates, metric_rows = [], []
+        deltas: Dict[Tuple[int, str, str], Dict[str, float]] = {}
+
+        for key, post_events in by_post.items():
+            ref = refs.get(key)
+            if ref is None:
+                continue
+            platform_data = json.loads(json.dumps(ref.platform_data or {}))
+            metrics: Dict[str, Any] = {}
+            for event in post_events:
+                metrics.update(_apply_change(platform_data, event, now) or {})
+            ref_updates.append({"ref_id": ref.id, "platform_data": platform_data})
+
+            if metrics:
+                row = self._metrics_row(ref, key, metrics, now)
+                metric_rows.append(row)
+                bucket = deltas.setdefault((ref.organization_id, key[0], campaign_key(platform_data)), {})
+                for column, value in metrics_values(SimpleNamespace(**row)).items():
+                    bucket[column] = bucket.get(column, 0) + value
+
+        if ref_updates:
+            refs_table = ExternalReference.__table__
+            self.db.execute(
+                update(refs_table)
+                .where(refs_table.c.id == bindparam("ref_id"))
+                .values(platform_data=bindparam("platform_data")),
+                ref_updates
+            )
+        if metric_rows:
+            self.db.execute(PostMetrics.__table__.insert(), metric_rows)
+        for (org_id, platform, campaign_id), delta in deltas.items():
+            self.rollups.apply_metrics_delta(org_id, platform, campaign_id, now, delta)
+        self.db.commit()
+
+        return {"events": len(events), "posts": len(ref_updates), "metric_rows": len(metric_rows)}
+
+    def posts_of_org(self, keys: Iterable[Tuple[str, str]], org_id: int) -> List[Tuple[str, str]]:
+        """The ``(platform, external_id)`` keys that are posts of ``org_id``."""
+        return [key for key, ref in self._load_references(keys).items() if ref.organization_id == org_id]
+
+    def _load_references(self, keys: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], Any]:
+        refs = ExternalReference.__table__.c
+        platforms = {PlatformType(platform) for platform, _ in keys if platform in PLATFORM_VALUES}
+        external_ids = {external_id for _, external_id in keys}
+        rows = self.db.execute(
+            select(refs.id, refs.organization_id, refs.platform, refs.external_id, refs.platform_data)
+            .where(refs.platform.in_(platforms), refs.external_id.in_(external_ids))
+        )
+        return {(getattr(row.platform, "value", row.platform), row.external_id): row for row in rows}
+
+    @staticmethod
+    def _metrics_row(ref: Any, key: Tuple[str, str], metrics: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+        values = SimpleNamespace(**{field: int(metrics.get(field) or 0) for field in METRIC_FIELDS})
+        AnalyticsService._calculate_derived_metrics(values)
+        return {
+            **vars(values),
+            "organization_id": ref.organization_id,
+            "external_reference_id": ref.id,
+            "platform": key[0],
+            "external_id": key[1],
+            "metric_date": now,
+            "data_source": "webhook",
+            "is_estimated": bool(metrics.get("is_estimated", False)),
+        }
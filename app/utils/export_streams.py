@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import zlib
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    pa = None
+    pq = None
+
+# A batch is a list of rows, each row a sequence of values in column order
+Batch = List[Sequence[Any]]
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def csv_chunks(columns: Sequence[str], batches: Iterable[Batch]) -> Iterator[bytes]:
+    """Encode batches as CSV, one chunk per batch after the header row."""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(columns)
+    yield output.getvalue().encode("utf-8")
+    for batch in batches:
+        output.seek(0)
+        output.truncate(0)
+        writer.writerows(batch)
+        yield output.getvalue().encode("utf-8")
+
+
+def ndjson_chunks(columns: Sequence[str], batches: Iterable[Batch]) -> Iterator[bytes]:
+    """Encode batches as newline-delimited JSON objects keyed by column name."""
+    for batch in batches:
+        yield "".join(
+            json.dumps(dict(zip(columns, row)), default=str, ensure_ascii=False) + "\n" for row in batch
+        ).encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands written bytes back to a generator."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _batch_table(columns: Sequence[str], batch: Batch, schema=None):
+    data = {name: [row[i] for row in batch] for i, name in enumerate(columns)}
+    return pa.Table.from_pydict(data, schema=schema)
+
+
+def parquet_chunks(columns: Sequence[str], batches: Iterable[Batch], schema=None) -> Iterator[bytes]:
+    """Encode batches as a Parquet file, one row group per batch.
+
+    The schema is inferred from the first batch unless given; columns that
+    are all null there are typed as strings.
+    """
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("Parquet export requires pyarrow")
+
+    sink = _ChunkSink()
+    writer = None
+    try:
+        for batch in batches:
+            if not batch:
+                continue
+            if writer is None:
+                if schema is None:
+                    inferred = _batch_table(columns, batch).schema
+                    schema = pa.schema([
+                        pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f for f in inferred
+                    ])
+                writer = pq.ParquetWriter(sink, schema)
+            writer.write_table(_batch_table(columns, batch, schema))
+            yield sink.drain()
+        if writer is None:
+            schema = schema or pa.schema([pa.field(name, pa.string()) for name in columns])
+            writer = pq.ParquetWriter(sink, schema)
+    finally:
+        if writer is not None:
+            writer.close()
+    yield sink.drain()
+
+
+def arrow_schema(types: Dict[str, str]):
+    """Arrow schema for an export table schema of ``{column: "string" | "integer" | ...}``."""
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("Parquet export requires pyarrow")
+    mapping = {
+        "string": pa.string(),
+        "integer": pa.int64(),
+        "float": pa.float64(),
+        "boolean": pa.bool_(),
+        "datetime": pa.timestamp("us"),
+        "date": pa.date32(),
+        "json": pa.string(),
+    }
+    return pa.schema([pa.field(name, mapping.get(dtype, pa.string())) for name, dtype in types.items()])
+
+
+def write_parquet_file(path: str, columns: Sequence[str], batch: Batch, schema=None) -> None:
+    """Write one batch of rows to a standalone Parquet file."""
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("Parquet export requires pyarrow")
+    pq.write_table(_batch_table(columns, batch, schema), path)
+
+
+EXPORT_ENCODERS: Dict[str, Callable[..., Iterator[bytes]]] = {
+    "csv": csv_chunks,
+    "ndjson": ndjson_chunks,
+    "parquet": parquet_chunks,
+}
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Gzip a byte stream on the fly without buffering it."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_filename(base: str, format_type: str, compress: bool = False) -> str:
+    return f"{base}.{format_type}{'.gz' if compress else ''}"
+
+
+def export_media_type(format_type: str, compress: bool = False) -> str:
+    return "application/gzip" if compress else EXPORT_MEDIA_TYPES[format_type]
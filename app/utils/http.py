@@ -1,29 +1,222 @@
 from __future__ import annotations
 
 import asyncio
+import importlib.util
 import logging
 import time
-from typing import Any, Dict, Optional
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
 import httpx
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
+from app.core.config import get_settings
+from app.observability.telemetry import record_http_pool_request, record_http_pool_saturated
+from app.utils.rate_governor import get_rate_governor
+
 logger = logging.getLogger(__name__)
 
+# Platform APIs known to negotiate HTTP/2; everything else stays on HTTP/1.1
+HTTP2_HOSTS = {
+    "graph.facebook.com",
+    "api.linkedin.com",
+    "mybusiness.googleapis.com",
+    "oauth2.googleapis.com",
+    "googleads.googleapis.com",
+    "business-api.tiktok.com",
+    "api.search.brave.com",
+}
+
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Pool key and metrics label for requests to arbitrary hosts (e.g. customer webhook URLs)
+SHARED_HOST = "external"
+
+
+@dataclass
+class HostPoolStats:
+    """Point-in-time pool usage for one upstream host."""
+    host: str
+    in_flight: int
+    max_connections: int
+    peak_in_flight: int
+    saturated_count: int
+    http2: bool
+
+
+class HTTPClientPool:
+    """Process-wide registry of pooled ``httpx.AsyncClient`` instances, one per host.
+
+    Clients keep connections alive between calls, negotiate HTTP/2 for hosts
+    in ``HTTP2_HOSTS`` (when ``h2`` is installed) and cap concurrent
+    connections per host. Requests routed through :meth:`request` are
+    counted so pool saturation shows up in metrics and :meth:`stats`.
+
+    Requests made with ``shared=True`` all go through one client (per event
+    loop) bounded by ``shared_max_connections``, so calls to an open-ended
+    set of hosts neither grow the registry nor the metric label set.
+    """
+    
+    def __init__(
+        self,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        host_limits: Optional[Dict[str, int]] = None,
+        http2: bool = True,
+        shared_max_connections: int = 50,
+    ):
+        self.max_connections = max_connections
+        self.shared_max_connections = shared_max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.host_limits = host_limits or {}
+        self.http2 = http2 and _HTTP2_AVAILABLE
+        # Keyed by event loop too: an AsyncClient cannot be shared across loops
+        # (Celery tasks run each call in a fresh asyncio.run loop)
+        self._clients: Dict[Tuple[int, str, str], httpx.AsyncClient] = {}
+        self._loops: Dict[int, asyncio.AbstractEventLoop] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._peak: Dict[str, int] = {}
+        self._saturated: Dict[str, int] = {}
+    
+    @classmethod
+    def from_settings(cls) -> "HTTPClientPool":
+        settings = get_settings()
+        host_limits: Dict[str, int] = {}
+        for item in (settings.http_pool_host_limits or "").split(","):
+            host, _, limit = item.strip().partition("=")
+            if host and limit.isdigit():
+                host_limits[host] = int(limit)
+        return cls(
+            max_connections=settings.http_pool_max_connections,
+            max_keepalive_connections=settings.http_pool_max_keepalive_connections,
+            keepalive_expiry=settings.http_pool_keepalive_expiry_seconds,
+            host_limits=host_limits,
+            http2=settings.http_pool_http2,
+            shared_max_connections=settings.http_pool_shared_max_connections,
+        )
+    
+    def _limit_for(self, host: str) -> int:
+        if host == SHARED_HOST:
+            return self.shared_max_connections
+        return self.host_limits.get(host, self.max_connections)
+    
+    def client_for(self, url: str, shared: bool = False) -> httpx.AsyncClient:
+        """Shared client for the URL's scheme and host (or the one for arbitrary hosts), created on first use."""
+        parts = urlsplit(url)
+        loop = asyncio.get_running_loop()
+        if shared:
+            key = (id(loop), "*", SHARED_HOST)
+        else:
+            key = (id(loop), parts.scheme or "https", parts.netloc)
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            self._forget_closed_loops()
+            self._loops[id(loop)] = loop
+            host = SHARED_HOST if shared else parts.hostname or parts.netloc
+            max_connections = self._limit_for(host)
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=min(self.max_keepalive_connections, max_connections),
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+                http2=self.http2 and host in HTTP2_HOSTS,
+                timeout=30,
+            )
+            self._clients[key] = client
+        return client
+    
+    def _forget_closed_loops(self) -> None:
+        for loop_id, loop in list(self._loops.items()):
+            if loop.is_closed():
+                del self._loops[loop_id]
+                for key in [k for k in self._clients if k[0] == loop_id]:
+                    del self._clients[key]
+    
+    async def request(self, method: str, url: str, shared: bool = False, **kwargs: Any) -> httpx.Response:
+        """Send a request on the host's pooled client, tracking pool usage.
+        
+        Pass ``shared=True`` for hosts outside the platform set, such as
+        customer-supplied URLs.
+        """
+        host = SHARED_HOST if shared else urlsplit(url).hostname or ""
+        client = self.client_for(url, shared=shared)
+        in_flight = self._in_flight.get(host, 0) + 1
+        self._in_flight[host] = in_flight
+        self._peak[host] = max(self._peak.get(host, 0), in_flight)
+        if in_flight > self._limit_for(host):
+            # Request will queue for a connection
+            self._saturated[host] = self._saturated.get(host, 0) + 1
+            record_http_pool_saturated(host)
+        record_http_pool_request(host, 1)
+        try:
+            return await client.request(method, url, **kwargs)
+        finally:
+            self._in_flight[host] -= 1
+            record_http_pool_request(host, -1)
+    
+    def stats(self) -> Dict[str, HostPoolStats]:
+        """Pool usage per host, for health checks and debugging."""
+        hosts = {netloc for _, _, netloc in self._clients}
+        result = {}
+        for netloc in hosts:
+            host = netloc.split(":")[0]
+            result[host] = HostPoolStats(
+                host=host,
+                in_flight=self._in_flight.get(host, 0),
+                max_connections=self._limit_for(host),
+                peak_in_flight=self._peak.get(host, 0),
+                saturated_count=self._saturated.get(host, 0),
+                http2=self.http2 and host in HTTP2_HOSTS,
+            )
+        return result
+    
+    async def aclose(self) -> None:
+        """Close the clients owned by the current event loop."""
+        loop_id = id(asyncio.get_running_loop())
+        for key in [k for k in self._clients if k[0] == loop_id]:
+            await self._clients.pop(key).aclose()
+
+
+_pool: Optional[HTTPClientPool] = None
+
+
+def get_http_pool() -> HTTPClientPool:
+    """Process-wide HTTP client pool."""
+    global _pool
+    if _pool is None:
+        _pool = HTTPClientPool.from_settings()
+    return _pool
+
+
+async def close_http_pool() -> None:
+    """Close pooled connections (call on application/worker shutdown)."""
+    global _pool
+    if _pool is not None:
+        await _pool.aclose()
+        _pool = None
+
 
 class HTTPClient:
-    """HTTP client with retry logic and rate limiting for social media APIs."""
+    """HTTP client with retry logic and rate limiting for social media APIs.
+    
+    Requests go through the shared :class:`HTTPClientPool`, so connections are
+    reused across calls; the context manager form is kept for compatibility
+    and no longer opens or closes connections.
+    """
     
     def __init__(self, timeout: int = 30):
         self.timeout = timeout
-        self._client: Optional[httpx.AsyncClient] = None
+        self._pool = get_http_pool()
+        self._governor = get_rate_governor()
     
     async def __aenter__(self):
-        self._client = httpx.AsyncClient(timeout=self.timeout)
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self._client:
-            await self._client.aclose()
+        return None
     
     @retry(
         stop=stop_after_attempt(3),
@@ -39,13 +232,11 @@ class HTTPClient:
         data: Optional[Dict[str, Any]] = None,
         files: Optional[Dict[str, Any]] = None,
         idempotency_key: Optional[str] = None,
+        params: Optional[Dict[str, Any]] = None,
     ) -> httpx.Response:
         """Make HTTP request with retry logic and rate limiting."""
-        if not self._client:
-            raise RuntimeError("HTTPClient not initialized. Use async context manager.")
-        
         # Add idempotency header if provided
-        request_headers = headers or {}
+        request_headers = dict(headers or {})
         if idempotency_key:
             request_headers["Idempotency-Key"] = idempotency_key
         
@@ -55,14 +246,19 @@ class HTTPClient:
         
         logger.info(f"Making {method} request to {url} (ID: {request_id})")
         
+        # Pace against the platform's quota before sending
+        await self._governor.acquire(url)
+        
         try:
-            response = await self._client.request(
-                method=method,
-                url=url,
+            response = await self._pool.request(
+                method,
+                url,
                 headers=request_headers,
+                params=params,
                 json=json,
                 data=data,
                 files=files,
+                timeout=self.timeout,
             )
             
             # Log response details
@@ -70,12 +266,12 @@ class HTTPClient:
             if response_id:
                 logger.info(f"Response received (ID: {response_id}) - Status: {response.status_code}")
             
-            # Check for rate limiting
+            # Learn quota usage; on 429 the governor blocks the bucket so the
+            # retry waits in acquire() (or fails fast) instead of sleeping here
+            self._governor.observe(url, response.status_code, response.headers)
             if response.status_code == 429:
-                retry_after = int(response.headers.get("Retry-After", 60))
-                logger.warning(f"Rate limited. Waiting {retry_after} seconds before retry.")
-                await asyncio.sleep(retry_after)
-                raise httpx.HTTPStatusError("Rate limited", request=None, response=response)
+                logger.warning(f"Rate limited by {url}.")
+                raise httpx.HTTPStatusError("Rate limited", request=response.request, response=response)
             
             # Raise for client/server errors
             response.raise_for_status()
@@ -87,6 +283,12 @@ class HTTPClient:
         except httpx.RequestError as e:
             logger.error(f"Request error: {e}")
             raise
+    
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+    
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
 
 
 def mask_token(token: str) -> str:
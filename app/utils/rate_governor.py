@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Upstream host -> platform whose quotas apply
+PLATFORM_HOSTS = {
+    "graph.facebook.com": "meta",
+    "graph.instagram.com": "meta",
+    "api.linkedin.com": "linkedin",
+    "mybusiness.googleapis.com": "google",
+    "googleads.googleapis.com": "google_ads",
+    "business-api.tiktok.com": "tiktok",
+}
+
+# Ad account identifiers embedded in request paths
+_ACCOUNT_PATTERNS = {
+    "meta": re.compile(r"/(act_\d+)"),
+    "google_ads": re.compile(r"/customers/(\d+)"),
+}
+
+# Usage percentage where pacing starts, and where requests stop until the window rolls
+_SLOWDOWN_PCT = 50.0
+_PAUSE_PCT = 95.0
+_MIN_THROTTLE = 0.1
+_USAGE_PAUSE_SECONDS = 60.0
+_DEFAULT_RETRY_AFTER = 60.0
+
+RateKey = Tuple[str, str, Optional[str]]  # (platform, app, ad account)
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a platform quota is exhausted for longer than callers should wait."""
+
+    def __init__(self, key: RateKey, retry_after: float):
+        self.key = key
+        self.retry_after = retry_after
+        super().__init__(f"Rate limit for {key[0]} exhausted, retry in {retry_after:.0f}s")
+
+
+class TokenBucket:
+    """Token bucket with reservation semantics.
+
+    Tokens may go negative: each caller reserves a token up front and is told
+    how long to wait, which keeps callers FIFO without polling. ``throttle``
+    scales the refill rate down as platform usage headers approach their
+    limits, and ``blocked_until`` hard-stops the bucket after a 429 or an
+    explicit regain-access estimate.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.throttle = 1.0
+        self.blocked_until = 0.0
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self.updated)
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate * self.throttle)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token would be available, without reserving it."""
+        self._refill(now)
+        wait = max(0.0, self.blocked_until - now)
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / (self.rate * self.throttle))
+        return wait
+
+    def reserve(self, now: float) -> float:
+        """Take a token and return how long the caller must wait before using it."""
+        wait = self.wait_time(now)
+        self.tokens -= 1
+        return wait
+
+
+class RateGovernor:
+    """Per-platform, per-app and per-ad-account pacing for outbound API calls.
+
+    Callers ``acquire`` before a request and ``observe`` the response. Quota
+    headers (Meta ``X-App-Usage``, ``X-Business-Use-Case-Usage`` and
+    ``X-Ad-Account-Usage``) slow the matching bucket before the platform
+    starts rejecting calls; 429s block it for ``Retry-After`` (LinkedIn daily
+    throttles block until midnight UTC). Waits longer than ``max_wait``
+    raise :class:`RateLimitExceeded` instead of stalling the caller.
+
+    State is per process and thread safe, so both async publishers and the
+    synchronous ads managers share it.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, float]] = None, max_wait: float = 30.0):
+        self.limits = limits or {}
+        self.max_wait = max_wait
+        self._buckets: Dict[RateKey, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> "RateGovernor":
+        settings = get_settings()
+        limits: Dict[str, float] = {}
+        for item in (settings.rate_governor_limits or "").split(","):
+            platform, _, rate = item.strip().partition("=")
+            try:
+                limits[platform] = float(rate)
+            except ValueError:
+                continue
+        return cls(limits=limits, max_wait=settings.rate_governor_max_wait_seconds)
+
+    def keys_for(self, url: str, account: Optional[str] = None) -> Tuple[RateKey, ...]:
+        """App-level and (when known) account-level keys for a request URL."""
+        platform = PLATFORM_HOSTS.get(urlsplit(url).hostname or "")
+        if platform is None or platform not in self.limits:
+            return ()
+        settings = get_settings()
+        app = {
+            "meta": settings.meta_app_id,
+            "linkedin": settings.linkedin_client_id,
+        }.get(platform) or "default"
+        if account is None and platform in _ACCOUNT_PATTERNS:
+            match = _ACCOUNT_PATTERNS[platform].search(url)
+            account = match.group(1) if match else None
+        app_key: RateKey = (platform, app, None)
+        return (app_key, (platform, app, account)) if account else (app_key,)
+
+    def _bucket(self, key: RateKey) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            rate = self.limits[key[0]]
+            bucket = self._buckets[key] = TokenBucket(rate=rate, burst=max(1.0, rate * 2))
+        return bucket
+
+    def _reserve(self, url: str, account: Optional[str]) -> float:
+        keys = self.keys_for(url, account)
+        if not keys:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            buckets = [self._bucket(key) for key in keys]
+            waits = [bucket.wait_time(now) for bucket in buckets]
+            wait = max(waits)
+            if wait > self.max_wait:
+                raise RateLimitExceeded(keys[waits.index(wait)], wait)
+            for bucket in buckets:
+                bucket.reserve(now)
+        return wait
+
+    async def acquire(self, url: str, account: Optional[str] = None) -> None:
+        """Wait for a request slot (async callers)."""
+        wait = self._reserve(url, account)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self, url: str, account: Optional[str] = None) -> None:
+        """Wait for a request slot (synchronous callers)."""
+        wait = self._reserve(url, account)
+        if wait > 0:
+            time.sleep(wait)
+
+    def observe(
+        self, url: str, status_code: int, headers: Mapping[str, str], account: Optional[str] = None
+    ) -> None:
+        """Learn from a response's status and quota headers."""
+        keys = self.keys_for(url, account)
+        if not keys:
+            return
+        app_key, account_key = keys[0], keys[-1]
+        platform = app_key[0]
+        with self._lock:
+            now = time.monotonic()
+            if platform == "meta":
+                app_usage = _parse_json_header(headers.get("X-App-Usage"))
+                if isinstance(app_usage, dict):
+                    self._apply_usage(self._bucket(app_key), _max_pct(app_usage), now)
+                # The account bucket follows its busiest quota across both headers
+                account_pcts: List[float] = []
+                reset = 0.0
+                regain = 0.0
+                account_usage = _parse_json_header(headers.get("X-Ad-Account-Usage"))
+                if isinstance(account_usage, dict):
+                    account_pcts.append(float(account_usage.get("acc_id_util_pct") or 0))
+                    reset = float(account_usage.get("reset_time_duration") or 0)
+                buc_usage = _parse_json_header(headers.get("X-Business-Use-Case-Usage"))
+                if isinstance(buc_usage, dict):
+                    for entries in buc_usage.values():
+                        for entry in entries if isinstance(entries, list) else []:
+                            if isinstance(entry, dict):
+                                account_pcts.append(_max_pct(entry))
+                                regain = max(regain, float(entry.get("estimated_time_to_regain_access") or 0))
+                if account_pcts:
+                    bucket = self._bucket(account_key)
+                    self._apply_usage(bucket, max(account_pcts), now)
+                    if reset and bucket.throttle <= _MIN_THROTTLE:
+                        bucket.blocked_until = max(bucket.blocked_until, now + reset)
+                    if regain:
+                        bucket.blocked_until = max(bucket.blocked_until, now + regain * 60)
+
+            if status_code == 429:
+                retry_after = _retry_after_seconds(headers)
+                if retry_after is None:
+                    retry_after = _seconds_until_utc_midnight() if platform == "linkedin" else _DEFAULT_RETRY_AFTER
+                bucket = self._bucket(account_key)
+                bucket.blocked_until = max(bucket.blocked_until, now + retry_after)
+                logger.warning(f"[RateGovernor] {account_key} throttled by platform for {retry_after:.0f}s")
+
+    @staticmethod
+    def _apply_usage(bucket: TokenBucket, usage_pct: float, now: float) -> None:
+        if usage_pct >= _PAUSE_PCT:
+            bucket.throttle = _MIN_THROTTLE
+            bucket.blocked_until = max(bucket.blocked_until, now + _USAGE_PAUSE_SECONDS)
+        elif usage_pct > _SLOWDOWN_PCT:
+            span = (_PAUSE_PCT - _SLOWDOWN_PCT)
+            bucket.throttle = max(_MIN_THROTTLE, 1.0 - (usage_pct - _SLOWDOWN_PCT) / span)
+        else:
+            bucket.throttle = 1.0
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Current bucket state, for health checks and debugging."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                ":".join(part or "-" for part in key): {
+                    "throttle": bucket.throttle,
+                    "blocked_for": max(0.0, bucket.blocked_until - now),
+                    "wait": bucket.wait_time(now),
+                }
+                for key, bucket in self._buckets.items()
+            }
+
+
+def _parse_json_header(value: Optional[str]) -> Any:
+    if not value:
+        return None
+    try:
+        return json.loads(value)
+    except ValueError:
+        return None
+
+
+def _max_pct(usage: Dict[str, Any]) -> float:
+    values = [
+        float(usage[field])
+        for field in ("call_count", "total_time", "total_cputime")
+        if isinstance(usage.get(field), (int, float))
+    ]
+    return max(values, default=0.0)
+
+
+def _retry_after_seconds(headers: Mapping[str, str]) -> Optional[float]:
+    value = headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _seconds_until_utc_midnight() -> float:
+    now = datetime.now(timezone.utc)
+    midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (midnight - now).total_seconds()
+
+
+_governor: Optional[RateGovernor] = None
+
+
+def get_rate_governor() -> RateGovernor:
+    """Process-wide outbound rate governor."""
+    global _governor
+    if _governor is None:
+        _governor = RateGovernor.from_settings()
+    return _governor
@@ -3,7 +3,6 @@ Social Media API Client
 Robust HTTP client for making API calls to social media platforms with rate limiting and error handling
 """
 
-import asyncio
 import time
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
@@ -12,6 +11,9 @@ import logging
 from dataclasses import dataclass
 from enum import Enum
 
+from app.utils.http import HTTPClientPool, get_http_pool
+from app.utils.rate_governor import RateLimitExceeded, get_rate_governor
+
 logger = logging.getLogger(__name__)
 
 
@@ -46,41 +48,22 @@ class SocialMediaClient:
         self.timeout = timeout
         self.rate_limit = self.RATE_LIMITS.get(platform)
         self.request_times: List[float] = []
-        self._client: Optional[httpx.AsyncClient] = None
+        self._client: Optional[HTTPClientPool] = None
     
     async def __aenter__(self):
-        self._client = httpx.AsyncClient(
-            timeout=self.timeout,
-            headers={
-                "User-Agent": "VantageAI/1.0",
-                "Accept": "application/json"
-            }
-        )
+        # Connections come from the shared per-host pool and outlive this context
+        self._client = get_http_pool()
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self._client:
-            await self._client.aclose()
+        self._client = None
     
-    async def _check_rate_limit(self):
-        """Check and enforce rate limits"""
-        if not self.rate_limit:
-            return
-        
-        now = time.time()
-        window_start = now - self.rate_limit.window_seconds
-        
-        # Remove old requests outside the window
-        self.request_times = [t for t in self.request_times if t > window_start]
-        
-        # Check if we're at the limit
-        if len(self.request_times) >= self.rate_limit.requests:
-            sleep_time = self.rate_limit.window_seconds - (now - self.request_times[0])
-            if sleep_time > 0:
-                logger.warning(f"Rate limit reached for {self.platform}, sleeping for {sleep_time:.2f}s")
-                await asyncio.sleep(sleep_time)
-                # Clean up old requests after sleep
-                self.request_times = [t for t in self.request_times if t > now - self.rate_limit.window_seconds]
+    async def _check_rate_limit(self, url: str):
+        """Wait for a slot from the shared platform rate governor"""
+        try:
+            await get_rate_governor().acquire(url)
+        except RateLimitExceeded as e:
+            raise RateLimitError(self.platform, int(e.retry_after))
     
     async def _make_request(
         self,
@@ -89,18 +72,23 @@ class SocialMediaClient:
         params: Optional[Dict[str, Any]] = None,
         data: Optional[Dict[str, Any]] = None,
         headers: Optional[Dict[str, str]] = None,
-        access_token: Optional[str] = None
+        access_token: Optional[str] = None,
+        _attempt: int = 1
     ) -> Dict[str, Any]:
         """Make an authenticated request to the platform API"""
         if not self._client:
             raise RuntimeError("Client not initialized. Use async context manager.")
         
-        # Check rate limits
-        await self._check_rate_limit()
-        
         # Prepare request
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
-        request_headers = {"Content-Type": "application/json"}
+        
+        # Check rate limits
+        await self._check_rate_limit(url)
+        request_headers = {
+            "User-Agent": "VantageAI/1.0",
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+        }
         
         if headers:
             request_headers.update(headers)
@@ -118,19 +106,23 @@ class SocialMediaClient:
         
         try:
             response = await self._client.request(
-                method=method,
-                url=url,
+                method,
+                url,
                 params=params,
                 json=data if data else None,
-                headers=request_headers
+                headers=request_headers,
+                timeout=self.timeout,
             )
             
-            # Handle rate limit responses
+            get_rate_governor().observe(url, response.status_code, response.headers)
+            
+            # Handle rate limit responses: the governor now holds the bucket
+            # closed, so the retry waits in _check_rate_limit or fails fast
             if response.status_code == 429:
-                retry_after = int(response.headers.get("Retry-After", 60))
-                logger.warning(f"Rate limited by {self.platform}, retrying after {retry_after}s")
-                await asyncio.sleep(retry_after)
-                return await self._make_request(method, endpoint, params, data, headers, access_token)
+                if _attempt >= 3:
+                    raise RateLimitError(self.platform, int(float(response.headers.get("Retry-After", 60))))
+                logger.warning(f"Rate limited by {self.platform}, retrying when quota allows")
+                return await self._make_request(method, endpoint, params, data, headers, access_token, _attempt + 1)
             
             # Handle other HTTP errors
             if response.status_code >= 400:
@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Optional
+
+# Headers that stop proxies (nginx) from buffering an event stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def sse_event(data: Any, event: Optional[str] = None) -> str:
+    """Format one Server-Sent Events message with a JSON payload."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, default=str)}\n\n"
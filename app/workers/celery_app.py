@@ -53,6 +53,21 @@ celery_app.conf.beat_schedule = {
         "task": "app.workers.tasks.analytics_tasks.update_analytics",
         "schedule": crontab(minute=0, hour="*/6"),  # Every 6 hours
     },
+    # Refresh analytics rollup post counts every 15 minutes
+    "refresh-analytics-rollups": {
+        "task": "app.workers.tasks.analytics_tasks.refresh_analytics_rollups",
+        "schedule": crontab(minute="*/15"),
+    },
+    # Backfill analytics rollups over the full history (no-op once complete)
+    "backfill-analytics-rollups": {
+        "task": "app.workers.tasks.analytics_tasks.backfill_analytics_rollups",
+        "schedule": crontab(minute="*/15"),
+    },
+    # Write buffered webhook metric updates every 10 seconds
+    "flush-metric-updates": {
+        "task": "app.workers.tasks.analytics_tasks.flush_metric_updates",
+        "schedule": 10.0,
+    },
     # Process scheduled content every 5 minutes
     "process-scheduled-content": {
         "task": "app.workers.tasks.scheduler_tasks.process_scheduled_content",
@@ -63,6 +78,11 @@ celery_app.conf.beat_schedule = {
         "task": "app.workers.tasks.analytics_tasks.cleanup_old_data",
         "schedule": crontab(minute=0, hour=2),  # Daily at 2 AM
     },
+    # Retrain local performance models nightly
+    "train-performance-models": {
+        "task": "app.workers.tasks.analytics_tasks.train_performance_models",
+        "schedule": crontab(minute=0, hour=3),  # Daily at 3 AM
+    },
     # Send daily reports
     "send-daily-reports": {
         "task": "app.workers.tasks.analytics_tasks.send_daily_reports",
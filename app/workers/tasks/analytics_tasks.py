@@ -11,7 +11,10 @@ import logging
 
 from app.workers.celery_app import celery_app
 from app.db.session import get_db
+from app.core.config import get_settings
 from app.services.analytics_service import AnalyticsService
+from app.services.analytics_rollups import AnalyticsRollupService
+from app.models.analytics import PostMetrics, AnalyticsSummary
 from app.models.publishing import ExternalReference, PublishingStatus
 from app.models.entities import Organization
 # from app.integrations.social_media import get_platform_integration
@@ -37,6 +40,9 @@ def get_platform_integration(platform: str):
 
 logger = logging.getLogger(__name__)
 
+# Redis hash holding the one-off rollup backfill's progress (cursor, completed_at)
+ROLLUP_BACKFILL_KEY = "analytics:rollups:backfill"
+
 
 class AnalyticsTask(Task):
     """Base task for analytics operations"""
@@ -380,6 +386,169 @@ def update_analytics(self) -> Dict[str, Any]:
             db.close()
 
 
+@celery_app.task(bind=True, base=AnalyticsTask, default_retry_delay=300, max_retries=3)
+def refresh_analytics_rollups(self, hours: Optional[int] = None, rebuild_metrics: bool = False) -> Dict[str, Any]:
+    """
+    Rebuild rollup post counts for the recent window (scheduled task).
+    
+    Pass a larger ``hours`` with ``rebuild_metrics=True`` to backfill metric
+    sums from existing post metrics.
+    """
+    try:
+        db = next(get_db())
+        rollups = AnalyticsRollupService(db)
+        
+        end = datetime.utcnow()
+        start = end - timedelta(hours=hours or get_settings().analytics_rollup_refresh_hours)
+        
+        buckets = rollups.refresh_post_counts(start, end)
+        if rebuild_metrics:
+            buckets += rollups.rebuild_metrics(start, end)
+        db.commit()
+        
+        return {
+            "success": True,
+            "buckets": buckets,
+            "since": start.isoformat(),
+            "timestamp": end.isoformat()
+        }
+        
+    except Exception as e:
+        logger.error(f"Error refreshing analytics rollups: {e}")
+        self.retry(exc=e)
+    finally:
+        if 'db' in locals():
+            db.close()
+
+
+@celery_app.task(bind=True, base=AnalyticsTask, max_retries=0)
+def backfill_analytics_rollups(self) -> Dict[str, Any]:
+    """
+    Build rollups over the full post and metrics history, once (scheduled task).
+    
+    Dashboards read only from rollups, which start empty. Chunks are
+    committed one at a time and progress is kept in Redis, so a run stopped
+    by the task time limit resumes where it left off; once the backfill has
+    completed, scheduled runs return immediately.
+    """
+    import redis
+    
+    settings = get_settings()
+    redis_client = redis.Redis.from_url(settings.redis_url, decode_responses=True)
+    lock_key = f"{ROLLUP_BACKFILL_KEY}:lock"
+    locked = False
+    try:
+        state = redis_client.hgetall(ROLLUP_BACKFILL_KEY)
+        if state.get("completed_at"):
+            return {"success": True, "skipped": "completed", "completed_at": state["completed_at"]}
+        if not redis_client.set(lock_key, self.request.id or "1", nx=True, ex=celery_app.conf.task_time_limit):
+            return {"success": True, "skipped": "running"}
+        locked = True
+        
+        db = next(get_db())
+        rollups = AnalyticsRollupService(db)
+        end = datetime.utcnow()
+        start = datetime.fromisoformat(state["cursor"]) if state.get("cursor") else rollups.history_start()
+        
+        chunks = 0
+        if start is not None:
+            for chunk_end in rollups.backfill(start, end, settings.analytics_rollup_backfill_chunk_days):
+                db.commit()
+                redis_client.hset(ROLLUP_BACKFILL_KEY, "cursor", chunk_end.isoformat())
+                chunks += 1
+        
+        redis_client.hset(ROLLUP_BACKFILL_KEY, "completed_at", end.isoformat())
+        logger.info(f"Backfilled analytics rollups in {chunks} chunks since {start.isoformat() if start else 'empty history'}")
+        return {
+            "success": True,
+            "chunks": chunks,
+            "since": start.isoformat() if start else None,
+            "timestamp": end.isoformat()
+        }
+        
+    except Exception as e:
+        logger.error(f"Error backfilling analytics rollups: {e}")
+        return {"success": False, "error": str(e)}
+    finally:
+        if 'db' in locals():
+            db.close()
+        if locked:
+            redis_client.delete(lock_key)
+        redis_client.close()
+
+
+@celery_app.task(bind=True, base=AnalyticsTask, max_retries=0)
+def flush_metric_updates(self) -> Dict[str, Any]:
+    """
+    Write buffered webhook metric updates to the database (scheduled task).
+    
+    Not retried: updates that fail to apply stay buffered for the next run.
+    """
+    try:
+        from app.services.metrics_buffer import get_metrics_buffer
+        
+        db = next(get_db())
+        result = get_metrics_buffer().flush(db)
+        
+        return {
+            "success": True,
+            **result,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        
+    except Exception as e:
+        logger.error(f"Error flushing buffered metric updates: {e}")
+        return {"success": False, "error": str(e)}
+    finally:
+        if 'db' in locals():
+            db.close()
+
+
+@celery_app.task(bind=True, base=AnalyticsTask, default_retry_delay=300, max_retries=3)
+def train_performance_models(self, days_back: int = 365) -> Dict[str, Any]:
+    """
+    Retrain local performance models for every org and platform with recent metrics (scheduled task).
+    """
+    try:
+        from sqlalchemy import select
+        from app.ai.performance_predictor import PerformancePredictor
+        
+        db = next(get_db())
+        predictor = PerformancePredictor(db)
+        if predictor.model_store is None:
+            return {"success": False, "error": "PERFORMANCE_MODEL_PATH not configured"}
+        
+        metrics = PostMetrics.__table__.c
+        pairs = db.execute(
+            select(metrics.organization_id, metrics.platform).where(
+                metrics.metric_date >= datetime.utcnow() - timedelta(days=days_back)
+            ).distinct()
+        ).all()
+        
+        trained = 0
+        for org_id, platform in pairs:
+            try:
+                if predictor.train_local_model(org_id, platform, days_back):
+                    trained += 1
+            except Exception as e:
+                logger.error(f"Error training performance model for org {org_id} on {platform}: {e}")
+        
+        logger.info(f"Trained {trained} performance models across {len(pairs)} org/platform pairs")
+        return {
+            "success": True,
+            "models_trained": trained,
+            "pairs": len(pairs),
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        
+    except Exception as e:
+        logger.error(f"Error training performance models: {e}")
+        self.retry(exc=e)
+    finally:
+        if 'db' in locals():
+            db.close()
+
+
 @celery_app.task(bind=True, base=AnalyticsTask, default_retry_delay=300, max_retries=3)
 def cleanup_old_data(self) -> Dict[str, Any]:
     """
@@ -14,6 +14,8 @@ from app.db.session import SessionLocal
 from app.models.publishing import PlatformIntegration, ExternalReference, PublishingStatus
 from app.models.entities import Organization
 from app.services.analytics_service import AnalyticsService
+from app.services.metrics_buffer import buffer_or_apply
+from app.services.webhook_ingest import webhook_event
 
 logger = logging.getLogger(__name__)
 
@@ -236,55 +238,13 @@ def _process_stripe_webhook(db: Session, payload: Dict[str, Any]) -> Dict[str, A
 
 
 def _update_post_metrics(db: Session, platform: str, post_id: str, data: Dict[str, Any]):
-    """Update post metrics from webhook data"""
+    """Buffer post metrics from webhook data
+    
+    Updates for the same post are merged and written together when the
+    metrics buffer is flushed, rather than with a commit per webhook.
+    """
     try:
-        # Find external reference
-        external_ref = db.query(ExternalReference).filter(
-            ExternalReference.platform == platform,
-            ExternalReference.external_id == post_id
-        ).first()
-        
-        if external_ref:
-            # Update metrics in platform_data
-            platform_data = external_ref.platform_data or {}
-            platform_data.update({
-                'last_webhook_update': datetime.utcnow().isoformat(),
-                'webhook_data': data
-            })
-            external_ref.platform_data = platform_data
-            db.commit()
-            
-            # Update analytics service with new metrics
-            from app.services.analytics_service import AnalyticsService
-            analytics_service = AnalyticsService(db)
-            
-            # Extract metrics from webhook data
-            metrics_data = {
-                'organization_id': external_ref.organization_id,
-                'impressions': data.get('impressions', 0),
-                'reach': data.get('reach', 0),
-                'clicks': data.get('clicks', 0),
-                'engagements': data.get('engagements', 0),
-                'likes': data.get('likes', 0),
-                'comments': data.get('comments', 0),
-                'shares': data.get('shares', 0),
-                'saves': data.get('saves', 0),
-                'conversions': data.get('conversions', 0),
-                'video_views': data.get('video_views', 0),
-                'data_source': 'webhook',
-                'is_estimated': data.get('is_estimated', False)
-            }
-            
-            # Update post metrics
-            analytics_service.update_post_metrics(
-                external_reference_id=external_ref.id,
-                platform=platform,
-                external_id=post_id,
-                metrics_data=metrics_data
-            )
-            
-            logger.info(f"Updated analytics metrics for {platform} post {post_id}")
-            
+        buffer_or_apply(db, [webhook_event(platform, 'feed', {**data, 'post_id': post_id})])
     except Exception as e:
         logger.error(f"Error updating post metrics: {str(e)}")
 
@@ -313,85 +273,26 @@ def _update_campaign_metrics(db: Session, platform: str, campaign_id: str, data:
 
 
 def _process_comment_data(db: Session, platform: str, data: Dict[str, Any]):
-    """Process comment data from webhook"""
+    """Buffer comment data from webhook"""
     try:
-        comment_id = data.get('id')
-        post_id = data.get('post_id')
-        comment_text = data.get('message', '')
-        author_name = data.get('from', {}).get('name', 'Unknown')
-        created_time = data.get('created_time')
-        
-        if not comment_id or not post_id:
+        if not data.get('id') or not data.get('post_id'):
             logger.warning(f"Incomplete comment data from {platform}")
             return
         
-        # Find the external reference for this post
-        external_ref = db.query(ExternalReference).filter(
-            ExternalReference.platform == platform,
-            ExternalReference.external_id == post_id
-        ).first()
-        
-        if external_ref:
-            # Update comment count in platform_data
-            platform_data = external_ref.platform_data or {}
-            comments = platform_data.get('comments', [])
-            
-            # Add new comment
-            comment_data = {
-                'id': comment_id,
-                'text': comment_text,
-                'author': author_name,
-                'created_time': created_time,
-                'platform': platform
-            }
-            
-            # Check if comment already exists
-            existing_comment = next((c for c in comments if c.get('id') == comment_id), None)
-            if not existing_comment:
-                comments.append(comment_data)
-                platform_data['comments'] = comments
-                platform_data['comment_count'] = len(comments)
-                platform_data['last_comment_at'] = created_time
-                
-                external_ref.platform_data = platform_data
-                db.commit()
-                
-                logger.info(f"Added new comment {comment_id} to post {post_id} on {platform}")
+        buffer_or_apply(db, [webhook_event(platform, 'comments', data)])
         
     except Exception as e:
         logger.error(f"Error processing comment data: {str(e)}")
 
 
 def _process_like_data(db: Session, platform: str, data: Dict[str, Any]):
-    """Process like data from webhook"""
+    """Buffer like data from webhook"""
     try:
-        post_id = data.get('post_id')
-        like_count = data.get('like_count', 0)
-        reaction_data = data.get('reactions', {})
-        
-        if not post_id:
+        if not data.get('post_id'):
             logger.warning(f"Incomplete like data from {platform}")
             return
         
-        # Find the external reference for this post
-        external_ref = db.query(ExternalReference).filter(
-            ExternalReference.platform == platform,
-            ExternalReference.external_id == post_id
-        ).first()
-        
-        if external_ref:
-            # Update like count in platform_data
-            platform_data = external_ref.platform_data or {}
-            platform_data.update({
-                'like_count': like_count,
-                'reactions': reaction_data,
-                'last_engagement_update': datetime.utcnow().isoformat()
-            })
-            
-            external_ref.platform_data = platform_data
-            db.commit()
-            
-            logger.info(f"Updated like count for post {post_id} on {platform}: {like_count}")
+        buffer_or_apply(db, [webhook_event(platform, 'likes', data)])
         
     except Exception as e:
         logger.error(f"Error processing like data: {str(e)}")
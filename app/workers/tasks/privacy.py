@@ -5,11 +5,7 @@ Handles data export and deletion operations asynchronously
 
 from celery import Celery
 from sqlalchemy.orm import Session
-from typing import Dict, Any, List
-import json
-import csv
-import zipfile
-import io
+from typing import Dict, Any, List, Optional
 import os
 from datetime import datetime, timedelta
 from app.db.session import SessionLocal
@@ -18,6 +14,8 @@ from app.models.publishing import ExternalReference, PublishingJob
 from app.models.analytics import AnalyticsEvent
 from app.models.billing import Subscription, Invoice, BillingEvent
 from app.models.privacy import DataExport, DeletionRequest, ExportStatus, DeletionStatus
+from app.services.privacy_deletion import ChunkedDeleter, DeletionTable
+from app.services.privacy_export import EXPORT_FORMATS, ExportTable, ProgressCallback, StreamingExportWriter
 from app.core.config import get_settings
 
 settings = get_settings()
@@ -38,7 +36,8 @@ def export_organization_data(self, export_id: str, org_id: str, format_type: str
     Args:
         export_id: Export ID
         org_id: Organization ID
-        format_type: Export format (json, csv, zip)
+        format_type: Export format (json, csv, zip); csv and zip produce a zip
+            with one CSV or NDJSON entry per table
     """
     db = SessionLocal()
     try:
@@ -51,11 +50,13 @@ def export_organization_data(self, export_id: str, org_id: str, format_type: str
         export_record.status = ExportStatus.PROCESSING
         db.commit()
         
-        # Get organization data
-        organization_data = _collect_organization_data(db, org_id)
+        def report_progress(table: str, rows: int, finished: bool) -> None:
+            if finished:
+                print(f"Export {export_id}: wrote {rows} {table}")
+            self.update_state(state="PROGRESS", meta={"export_id": export_id, "table": table, "rows": rows})
         
-        # Generate export file
-        file_path = _generate_export_file(export_id, organization_data, format_type)
+        # Stream organization data table by table into the export file
+        file_path = _generate_export_file(db, export_id, org_id, format_type, report_progress)
         
         # Update export record
         export_record.status = ExportStatus.COMPLETED
@@ -111,8 +112,8 @@ def process_deletion_request(self, deletion_id: str, org_id: str):
             print(f"Waiting {remaining_seconds} seconds for grace period to complete")
             return
         
-        # Perform data deletion
-        _delete_organization_data(db, org_id)
+        # Perform data deletion; resumes from the checkpoints of an earlier attempt
+        _delete_organization_data(db, deletion_request)
         
         # Update deletion request
         deletion_request.status = DeletionStatus.COMPLETED
@@ -140,101 +141,44 @@ def process_deletion_request(self, deletion_id: str, org_id: str):
         db.close()
 
 
-def _collect_organization_data(db: Session, org_id: str) -> Dict[str, Any]:
-    """Collect all organization data for export"""
+EXPORT_TABLES = (
+    ExportTable("users", UserAccount, "org_id", ("id", "email", "role", "created_at")),
+    ExportTable(
+        "channels", Channel, "org_id",
+        ("id", "provider", "account_ref", "created_at", "metadata"),
+        aliases={"metadata": "metadata_json"}
+    ),
+    ExportTable(
+        "posts", ExternalReference, "organization_id",
+        ("id", "platform", "external_id", "url", "status", "created_at", "published_at", "platform_data"),
+        aliases={"url": "external_url"}
+    ),
+    ExportTable(
+        "analytics_events", AnalyticsEvent, "organization_id",
+        ("id", "platform", "event_type", "timestamp", "event_data")
+    ),
+    ExportTable(
+        "subscriptions", Subscription, "organization_id",
+        (
+            "id", "stripe_subscription_id", "status", "amount", "currency", "created_at",
+            "current_period_start", "current_period_end"
+        )
+    ),
+    ExportTable(
+        "invoices", Invoice, "organization_id",
+        ("id", "stripe_invoice_id", "amount_due", "amount_paid", "currency", "status", "created_at", "paid_at")
+    ),
+)
+
+
+def _export_header(db: Session, org_id: str) -> Dict[str, Any]:
+    """Export metadata and the organization record, written ahead of the table data"""
     
-    # Get organization
     org = db.query(Organization).filter(Organization.id == org_id).first()
     if not org:
         raise Exception(f"Organization {org_id} not found")
     
-    # Collect users
-    users = db.query(UserAccount).filter(UserAccount.org_id == org_id).all()
-    users_data = [
-        {
-            "id": user.id,
-            "email": user.email,
-            "role": user.role,
-            "created_at": user.created_at.isoformat()
-        }
-        for user in users
-    ]
-    
-    # Collect channels
-    channels = db.query(Channel).filter(Channel.org_id == org_id).all()
-    channels_data = [
-        {
-            "id": channel.id,
-            "provider": channel.provider,
-            "account_ref": channel.account_ref,
-            "created_at": channel.created_at.isoformat(),
-            "metadata": channel.metadata_json
-        }
-        for channel in channels
-    ]
-    
-    # Collect external references (posts)
-    posts = db.query(ExternalReference).filter(ExternalReference.organization_id == org_id).all()
-    posts_data = [
-        {
-            "id": post.id,
-            "platform": post.platform.value,
-            "external_id": post.external_id,
-            "url": post.url,
-            "status": post.status.value,
-            "created_at": post.created_at.isoformat(),
-            "published_at": post.published_at.isoformat() if post.published_at else None,
-            "platform_data": post.platform_data
-        }
-        for post in posts
-    ]
-    
-    # Collect analytics events
-    analytics_events = db.query(AnalyticsEvent).filter(AnalyticsEvent.organization_id == org_id).all()
-    analytics_data = [
-        {
-            "id": event.id,
-            "platform": event.platform.value,
-            "event_type": event.event_type.value,
-            "timestamp": event.timestamp.isoformat(),
-            "event_data": event.event_data
-        }
-        for event in analytics_events
-    ]
-    
-    # Collect billing data
-    subscriptions = db.query(Subscription).filter(Subscription.organization_id == org_id).all()
-    subscriptions_data = [
-        {
-            "id": sub.id,
-            "stripe_subscription_id": sub.stripe_subscription_id,
-            "status": sub.status.value,
-            "amount": sub.amount,
-            "currency": sub.currency,
-            "created_at": sub.created_at.isoformat(),
-            "current_period_start": sub.current_period_start.isoformat() if sub.current_period_start else None,
-            "current_period_end": sub.current_period_end.isoformat() if sub.current_period_end else None
-        }
-        for sub in subscriptions
-    ]
-    
-    invoices = db.query(Invoice).filter(Invoice.organization_id == org_id).all()
-    invoices_data = [
-        {
-            "id": invoice.id,
-            "stripe_invoice_id": invoice.stripe_invoice_id,
-            "amount_due": invoice.amount_due,
-            "amount_paid": invoice.amount_paid,
-            "currency": invoice.currency,
-            "status": invoice.status,
-            "created_at": invoice.created_at.isoformat(),
-            "paid_at": invoice.paid_at.isoformat() if invoice.paid_at else None
-        }
-        for invoice in invoices
-    ]
-    
-    # Compile organization data
-    organization_data = {
+    return {
         "export_info": {
             "export_id": f"export_{org_id}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}",
             "organization_id": org_id,
@@ -247,110 +191,66 @@ def _collect_organization_data(db: Session, org_id: str) -> Dict[str, Any]:
             "slug": org.slug,
             "created_at": org.created_at.isoformat(),
             "is_active": org.is_active
-        },
-        "users": users_data,
-        "channels": channels_data,
-        "posts": posts_data,
-        "analytics_events": analytics_data,
-        "subscriptions": subscriptions_data,
-        "invoices": invoices_data
+        }
     }
-    
-    return organization_data
 
 
-def _generate_export_file(export_id: str, data: Dict[str, Any], format_type: str) -> str:
-    """Generate export file in specified format"""
+def _generate_export_file(
+    db: Session,
+    export_id: str,
+    org_id: str,
+    format_type: str,
+    progress: Optional[ProgressCallback] = None
+) -> str:
+    """Stream the organization's data into an export file in the specified format"""
+    
+    if format_type not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported format type: {format_type}")
     
     export_dir = settings.data_export_path or "/tmp/exports"
     os.makedirs(export_dir, exist_ok=True)
+    extension = "json" if format_type == "json" else "zip"
+    file_path = os.path.join(export_dir, f"{export_id}.{extension}")
     
-    if format_type == "json":
-        file_path = os.path.join(export_dir, f"{export_id}.json")
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-    
-    elif format_type == "csv":
-        file_path = os.path.join(export_dir, f"{export_id}.zip")
-        with zipfile.ZipFile(file_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            # Create CSV files for each data type
-            for data_type, records in data.items():
-                if isinstance(records, list) and records:
-                    csv_buffer = io.StringIO()
-                    writer = csv.DictWriter(csv_buffer, fieldnames=records[0].keys())
-                    writer.writeheader()
-                    writer.writerows(records)
-                    zipf.writestr(f"{data_type}.csv", csv_buffer.getvalue())
-            
-            # Add organization info as JSON
-            org_info = {k: v for k, v in data.items() if k == "organization" or k == "export_info"}
-            zipf.writestr("organization_info.json", json.dumps(org_info, indent=2))
-    
-    elif format_type == "zip":
-        file_path = os.path.join(export_dir, f"{export_id}.zip")
-        with zipfile.ZipFile(file_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            # Add JSON file
-            zipf.writestr("data_export.json", json.dumps(data, indent=2, ensure_ascii=False))
-            
-            # Add individual CSV files
-            for data_type, records in data.items():
-                if isinstance(records, list) and records:
-                    csv_buffer = io.StringIO()
-                    writer = csv.DictWriter(csv_buffer, fieldnames=records[0].keys())
-                    writer.writeheader()
-                    writer.writerows(records)
-                    zipf.writestr(f"{data_type}.csv", csv_buffer.getvalue())
-    
-    else:
-        raise ValueError(f"Unsupported format type: {format_type}")
-    
-    return file_path
+    writer = StreamingExportWriter(
+        db,
+        org_id,
+        EXPORT_TABLES,
+        batch_size=settings.privacy_export_batch_size,
+        progress=progress
+    )
+    return writer.write(file_path, format_type, _export_header(db, org_id))
+
+
+# Deleted in order, dependents before the rows they reference
+DELETION_TABLES = (
+    DeletionTable("analytics_events", AnalyticsEvent, "organization_id"),
+    DeletionTable("external_references", ExternalReference, "organization_id"),
+    DeletionTable("publishing_jobs", PublishingJob, "organization_id"),
+    DeletionTable("billing_events", BillingEvent, "organization_id"),
+    DeletionTable("invoices", Invoice, "organization_id"),
+    DeletionTable("subscriptions", Subscription, "organization_id"),
+    DeletionTable("channels", Channel, "org_id"),
+    DeletionTable("users", UserAccount, "org_id"),
+)
 
 
-def _delete_organization_data(db: Session, org_id: str):
-    """Delete all organization data (PII scrubbing)"""
+def _delete_organization_data(db: Session, deletion_request: DeletionRequest) -> Dict[str, Any]:
+    """Delete all organization data (PII scrubbing) in resumable batches"""
     
+    org_id = deletion_request.organization_id
     print(f"Starting data deletion for organization {org_id}")
     
-    # Delete analytics events
-    analytics_count = db.query(AnalyticsEvent).filter(AnalyticsEvent.organization_id == org_id).count()
-    db.query(AnalyticsEvent).filter(AnalyticsEvent.organization_id == org_id).delete()
-    print(f"Deleted {analytics_count} analytics events")
-    
-    # Delete external references (posts)
-    posts_count = db.query(ExternalReference).filter(ExternalReference.organization_id == org_id).count()
-    db.query(ExternalReference).filter(ExternalReference.organization_id == org_id).delete()
-    print(f"Deleted {posts_count} external references")
-    
-    # Delete publishing jobs
-    jobs_count = db.query(PublishingJob).filter(PublishingJob.organization_id == org_id).count()
-    db.query(PublishingJob).filter(PublishingJob.organization_id == org_id).delete()
-    print(f"Deleted {jobs_count} publishing jobs")
-    
-    # Delete billing events
-    billing_events_count = db.query(BillingEvent).filter(BillingEvent.organization_id == org_id).count()
-    db.query(BillingEvent).filter(BillingEvent.organization_id == org_id).delete()
-    print(f"Deleted {billing_events_count} billing events")
-    
-    # Delete invoices
-    invoices_count = db.query(Invoice).filter(Invoice.organization_id == org_id).count()
-    db.query(Invoice).filter(Invoice.organization_id == org_id).delete()
-    print(f"Deleted {invoices_count} invoices")
-    
-    # Delete subscriptions
-    subscriptions_count = db.query(Subscription).filter(Subscription.organization_id == org_id).count()
-    db.query(Subscription).filter(Subscription.organization_id == org_id).delete()
-    print(f"Deleted {subscriptions_count} subscriptions")
-    
-    # Delete channels
-    channels_count = db.query(Channel).filter(Channel.org_id == org_id).count()
-    db.query(Channel).filter(Channel.org_id == org_id).delete()
-    print(f"Deleted {channels_count} channels")
-    
-    # Delete users
-    users_count = db.query(UserAccount).filter(UserAccount.org_id == org_id).count()
-    db.query(UserAccount).filter(UserAccount.org_id == org_id).delete()
-    print(f"Deleted {users_count} users")
+    deleter = ChunkedDeleter(
+        db,
+        deletion_request,
+        DELETION_TABLES,
+        batch_size=settings.privacy_deletion_batch_size,
+        max_replication_lag=settings.privacy_deletion_max_replication_lag_seconds
+    )
+    progress = deleter.run()
+    for table_name, state in progress.items():
+        print(f"Deleted {state['deleted']} {table_name.replace('_', ' ')}")
     
     # Deactivate organization (soft delete)
     org = db.query(Organization).filter(Organization.id == org_id).first()
@@ -358,10 +258,10 @@ def _delete_organization_data(db: Session, org_id: str):
         org.is_active = False
         print(f"Deactivated organization {org_id}")
     
-    # Commit all changes
     db.commit()
     
     print(f"Data deletion completed for organization {org_id}")
+    return progress
 
 
 @celery_app.task
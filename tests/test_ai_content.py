@@ -2,10 +2,17 @@
 Unit tests for AI Content API
 """
 
+import json
+
 import pytest
-from unittest.mock import patch, Mock
+from unittest.mock import patch, Mock, AsyncMock
 from fastapi.testclient import TestClient
 
+from app.api.v1 import ai_content
+from app.schemas.ai_content import AICompleteRequest
+from app.services.ai_router import AIRouter, AIResponse, ProviderType
+from app.services.safety import SafetyResult, SafetyViolation, ViolationType, SafetyLevel
+
 
 class TestAIContentAPI:
     """Test AI Content endpoints"""
@@ -184,3 +191,60 @@ class TestAIContentAPI:
         )
         
         assert response.status_code == 401
+
+
+async def _stream_events(chunks, segment_chars=10):
+    router = AIRouter()
+    provider = router.providers[ProviderType.OLLAMA]
+    router.providers = {ProviderType.OLLAMA: provider}
+    
+    async def tokens(**kwargs):
+        for chunk in chunks:
+            yield chunk
+        yield AIResponse(text="".join(chunks), provider="ollama:llama3.1", tokens_in=3,
+                         tokens_out=len(chunks), ms_elapsed=5, cost_usd_estimate=0.0)
+    provider.stream = tokens
+    
+    async def check_content(content, **kwargs):
+        if "BAD" not in content:
+            return SafetyResult(is_safe=True, violations=[], warnings=[], suggestions=[], confidence=1.0)
+        violation = SafetyViolation(type=ViolationType.MODERATION, level=SafetyLevel.BLOCKED,
+                                    message="Blocked term", suggestion="Remove it", confidence=1.0)
+        return SafetyResult(is_safe=False, violations=[violation], warnings=[], suggestions=[], confidence=1.0)
+    
+    save = Mock()
+    budget_guard = Mock(can_make_request=Mock(return_value=(True, None)))
+    user = Mock(organization_id=1, id=2)
+    with patch.object(ai_content, "ai_router", router), \
+         patch.object(ai_content, "BudgetGuard", return_value=budget_guard), \
+         patch.object(ai_content, "_save_ai_request", save), \
+         patch.object(ai_content.safety_service, "check_content", AsyncMock(side_effect=check_content)), \
+         patch.object(ai_content, "get_settings", return_value=Mock(ai_stream_safety_check_chars=segment_chars)):
+        response = await ai_content.stream_ai_content(AICompleteRequest(prompt="Write a post"), Mock(), user)
+        body = [event async for event in response.body_iterator]
+    
+    events = [(event.split("\n")[0][len("event: "):], json.loads(event.split("\n")[1][len("data: "):])) for event in body]
+    return events, save, budget_guard
+
+
+@pytest.mark.asyncio
+async def test_stream_releases_text_only_after_safety_check():
+    """Test that streamed text is sent in checked segments and ends with a done event"""
+    events, save, budget_guard = await _stream_events(["Safe text ", "and more ", "words"])
+    
+    assert [name for name, _ in events] == ["token", "token", "done"]
+    assert "".join(data["text"] for name, data in events if name == "token") == "Safe text and more words"
+    assert save.call_args[0][-1] == "completed"
+    budget_guard.record_usage.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_stream_stops_before_sending_blocked_text():
+    """Test that a failed safety check ends the stream with an error instead of the blocked text"""
+    events, save, budget_guard = await _stream_events(["Safe text ", "then BAD words ", "never sent"])
+    
+    assert [name for name, _ in events] == ["token", "error"]
+    assert events[0][1]["text"] == "Safe text "
+    assert events[1][1]["detail"]["violations"][0]["message"] == "Blocked term"
+    assert save.call_args[0][-1] == "blocked"
+    budget_guard.record_usage.assert_called_once()
@@ -4,10 +4,11 @@ Comprehensive tests for AI services: AI Router, Budget Guard, and Safety Service
 
 import pytest
 import asyncio
+from collections import deque
 from unittest.mock import Mock, patch, AsyncMock
 from datetime import date, datetime
 
-from app.services.ai_router import ai_router, AIResponse, ProviderType
+from app.services.ai_router import ai_router, AIRouter, AIResponse, ProviderSlots, ProviderType
 from app.services.budget_guard import BudgetGuard, BudgetViolation, LimitType
 from app.services.safety import safety_service, SafetyResult, SafetyViolation, ViolationType, SafetyLevel
 
@@ -143,6 +144,184 @@ class TestAIRouter:
                 assert result.text == "Batch response"
                 assert "openai" in result.provider
     
+    @pytest.mark.asyncio
+    async def test_batch_completion_dedupes_and_keeps_order(self):
+        """Test that identical prompts are sent once and failures stay per item"""
+        router = AIRouter()
+        calls = []
+        
+        async def complete(prompt, **kwargs):
+            calls.append(prompt)
+            if prompt == "bad":
+                raise Exception("boom")
+            return AIResponse(text=prompt.upper(), provider="ollama:llama3.1", tokens_in=1,
+                              tokens_out=1, ms_elapsed=1, cost_usd_estimate=0.5)
+        
+        with patch.object(router, 'complete', side_effect=complete):
+            results = await router.batch_complete(
+                [{"prompt": "a"}, {"prompt": "bad"}, {"prompt": "b"}, {"prompt": "a"}]
+            )
+        
+        assert sorted(calls) == ["a", "b", "bad"]
+        assert [r.text for r in results] == ["A", "Error: boom", "B", "A"]
+        assert results[1].provider == "error"
+        assert results[3].cost_usd_estimate == 0.0
+    
+    @pytest.mark.asyncio
+    async def test_batch_completion_bounded_per_provider(self):
+        """Test that batch calls run concurrently up to the provider limit"""
+        router = AIRouter()
+        router.slots = ProviderSlots(limits={"ollama": 3})
+        in_flight = 0
+        peak = 0
+        
+        async def complete(prompt, **kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return AIResponse(text=prompt, provider="ollama:llama3.1", tokens_in=1,
+                              tokens_out=1, ms_elapsed=1, cost_usd_estimate=0.0)
+        
+        router.providers = {ProviderType.OLLAMA: Mock(complete=complete)}
+        results = await router.batch_complete([{"prompt": str(i)} for i in range(10)])
+        
+        assert [r.text for r in results] == [str(i) for i in range(10)]
+        assert peak == 3
+    
+    @pytest.mark.asyncio
+    async def test_offline_batch_uses_native_batch_with_fallback(self):
+        """Test that large offline batches go to the provider batch API"""
+        router = AIRouter()
+        router.settings = Mock(ai_native_batch_min_size=2, ai_native_batch_timeout_seconds=60)
+        native = AIResponse(text="native", provider="openai:gpt-4o-mini", tokens_in=1,
+                            tokens_out=1, ms_elapsed=1, cost_usd_estimate=0.0)
+        provider = Mock(complete_batch=AsyncMock(return_value=[native, None]))
+        router.providers = {ProviderType.OPENAI: provider}
+        router._get_provider_priority = lambda: [ProviderType.OPENAI]
+        live = AIResponse(text="live", provider="openai:gpt-4o-mini", tokens_in=1,
+                          tokens_out=1, ms_elapsed=1, cost_usd_estimate=0.0)
+        
+        with patch.object(router, 'complete', AsyncMock(return_value=live)) as complete:
+            results = await router.batch_complete([{"prompt": "x"}, {"prompt": "y"}], offline=True)
+        
+        assert [r.text for r in results] == ["native", "live"]
+        complete.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_hedged_request_takes_faster_provider(self):
+        """Test that a slow primary is hedged with the next provider"""
+        router = AIRouter()
+        router.settings = Mock(ai_hedge_delay_ms=20, ai_hedge_min_delay_ms=10, ai_circuit_failure_rate=0.5,
+                               ai_circuit_min_samples=5, ai_circuit_cooldown_seconds=30)
+        
+        async def slow(**kwargs):
+            await asyncio.sleep(5)
+        
+        fast = AIResponse(text="fast", provider="ollama:llama3.1", tokens_in=1,
+                          tokens_out=1, ms_elapsed=1, cost_usd_estimate=0.0)
+        router.providers = {
+            ProviderType.OPENAI: Mock(complete=slow),
+            ProviderType.OLLAMA: Mock(complete=AsyncMock(return_value=fast)),
+        }
+        router._get_provider_priority = lambda: [ProviderType.OPENAI, ProviderType.OLLAMA]
+        
+        response = await asyncio.wait_for(router.complete(prompt="Test", hedge=True), timeout=1)
+        
+        assert response.text == "fast"
+        assert router.health[ProviderType.OPENAI].samples == deque()
+    
+    @pytest.mark.asyncio
+    async def test_circuit_opens_after_failures(self):
+        """Test that a failing provider is skipped once its circuit opens"""
+        router = AIRouter()
+        failing = AsyncMock(side_effect=Exception("down"))
+        ok = AIResponse(text="ok", provider="ollama:llama3.1", tokens_in=1,
+                        tokens_out=1, ms_elapsed=1, cost_usd_estimate=0.0)
+        router.providers = {
+            ProviderType.OPENAI: Mock(complete=failing),
+            ProviderType.OLLAMA: Mock(complete=AsyncMock(return_value=ok)),
+        }
+        router._get_provider_priority = lambda: [ProviderType.OPENAI, ProviderType.OLLAMA]
+        
+        for _ in range(8):
+            assert (await router.complete(prompt="Test")).text == "ok"
+        
+        assert failing.await_count == router.settings.ai_circuit_min_samples
+        assert router.get_provider_health()["openai"]["circuit"] == "open"
+    
+    @pytest.mark.asyncio
+    async def test_probe_released_when_cancelled_waiting_for_slot(self):
+        """Test that a half-open probe cancelled before getting a slot does not block the provider"""
+        router = AIRouter()
+        router.slots = ProviderSlots(default=1)
+        ok = AIResponse(text="ok", provider="openai:gpt-4o-mini", tokens_in=1,
+                        tokens_out=1, ms_elapsed=1, cost_usd_estimate=0.0)
+        router.providers = {ProviderType.OPENAI: Mock(complete=AsyncMock(return_value=ok))}
+        health = router._health(ProviderType.OPENAI)
+        health.opened_at = 0.0  # Cooldown long over: the next call is the probe
+        
+        async with router.slots.slot("openai"):
+            assert health.allow()
+            probe = asyncio.create_task(router._call_provider(ProviderType.OPENAI, prompt="Test"))
+            await asyncio.sleep(0)
+            probe.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await probe
+        
+        assert health.allow()
+    
+    @pytest.mark.asyncio
+    async def test_stream_falls_back_before_first_token(self):
+        """Test that streaming yields deltas and keeps the final usage"""
+        router = AIRouter()
+        
+        async def broken(**kwargs):
+            raise Exception("down")
+            yield
+        
+        async def tokens(**kwargs):
+            yield "Hel"
+            yield "lo"
+            yield AIResponse(text="Hello", provider="ollama:llama3.1", tokens_in=3,
+                             tokens_out=2, ms_elapsed=5, cost_usd_estimate=0.0)
+        
+        router.providers = {
+            ProviderType.OPENAI: Mock(stream=broken),
+            ProviderType.OLLAMA: Mock(stream=tokens),
+        }
+        router._get_provider_priority = lambda: [ProviderType.OPENAI, ProviderType.OLLAMA]
+        
+        stream = router.stream(prompt="Say hello")
+        deltas = [text async for text in stream]
+        
+        assert deltas == ["Hel", "lo"]
+        assert stream.response.tokens_out == 2
+    
+    @pytest.mark.asyncio
+    async def test_stream_usage_estimated_when_stopped_early(self):
+        """Test that an abandoned stream still reports usage for text sent"""
+        router = AIRouter()
+        provider = router.providers[ProviderType.OLLAMA]
+        
+        async def tokens(**kwargs):
+            yield "abcd" * 5
+            await asyncio.sleep(10)
+            yield "never"
+        
+        router.providers = {ProviderType.OLLAMA: provider}
+        provider.stream = tokens
+        
+        stream = router.stream(prompt="x" * 40)
+        async for _ in stream:
+            break
+        await stream.aclose()
+        
+        usage = stream.usage()
+        assert usage.text == "abcd" * 5
+        assert (usage.tokens_in, usage.tokens_out) == (10, 5)
+    
     def test_get_available_providers(self):
         """Test getting available providers"""
         router = ai_router
@@ -0,0 +1,82 @@
+"""Tests for keyset-paginated streaming analytics exports."""
+
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.models.publishing import ExternalReference, PlatformType, PublishingStatus
+from app.services.analytics_service import AnalyticsService
+from app.utils.export_streams import csv_chunks
+
+
+@pytest.fixture
+def db():
+    # StaticPool: the export opens its own session, which must see the same in-memory database
+    engine = create_engine("sqlite:///:memory:", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    table = ExternalReference.__table__
+    table.create(engine)
+    created = datetime.utcnow() - timedelta(days=1)
+    with engine.begin() as conn:
+        # Several rows share a created_at so pages must break ties on id
+        conn.execute(table.insert(), [
+            {
+                "id": i, "organization_id": 1, "platform": PlatformType.FACEBOOK, "external_id": f"post-{i}",
+                "status": PublishingStatus.PUBLISHED, "created_at": created + timedelta(seconds=i // 3),
+                "platform_data": {"clicks": i, "impressions": 100},
+            }
+            for i in range(1, 11)
+        ])
+        conn.execute(table.insert(), [{
+            "id": 99, "organization_id": 2, "platform": PlatformType.FACEBOOK, "external_id": "other",
+            "status": PublishingStatus.PUBLISHED, "created_at": created,
+        }])
+    with Session(engine) as session:
+        yield session
+
+
+async def _read(response):
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+
+def test_keyset_pages_cover_every_row_once(db):
+    """Test that keyset pagination returns each row exactly once across pages with tied timestamps."""
+    service = AnalyticsService(db)
+
+    batches = list(service._iter_export_batches(1, 30, None, None, include_metrics=True, batch_size=4))
+
+    assert [len(batch) for batch in batches] == [4, 4, 2]
+    assert [row[2] for batch in batches for row in batch] == [f"post-{i}" for i in range(1, 11)]
+
+
+@pytest.mark.asyncio
+async def test_gzip_ndjson_export_streams_all_rows(db):
+    """Test that the gzip NDJSON export decodes to one object per row."""
+    response = AnalyticsService(db).export_analytics(1, format_type="ndjson", compress=True)
+
+    assert response.media_type == "application/gzip"
+    assert "analytics_export.ndjson.gz" in response.headers["Content-Disposition"]
+    lines = gzip.decompress(await _read(response)).decode().splitlines()
+    assert len(lines) == 10
+    assert json.loads(lines[0])["Post ID"] == "post-1"
+    assert json.loads(lines[0])["CTR"] == 1.0
+
+
+def test_csv_chunks_write_header_then_one_chunk_per_batch():
+    """Test the CSV encoder's chunking."""
+    chunks = list(csv_chunks(["a", "b"], [[(1, "x")], [(2, "y"), (3, "z")]]))
+
+    assert len(chunks) == 3
+    assert list(csv.reader(io.StringIO(b"".join(chunks).decode()))) == [["a", "b"], ["1", "x"], ["2", "y"], ["3", "z"]]
+
+
+def test_unknown_format_is_rejected(db):
+    """Test that unsupported formats raise before streaming starts."""
+    with pytest.raises(ValueError):
+        AnalyticsService(db).export_analytics(1, format_type="xlsx")
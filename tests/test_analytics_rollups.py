@@ -0,0 +1,140 @@
+"""Tests for hourly and daily analytics rollups."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.models.analytics import AnalyticsRollup, PostMetrics
+from app.models.publishing import ExternalReference, PlatformType, PublishingStatus
+from app.services.analytics_rollups import AnalyticsRollupService, bucket_start
+from app.services.analytics_service import AnalyticsService
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    for model in (ExternalReference, PostMetrics, AnalyticsRollup):
+        model.__table__.create(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def _rollups(db, granularity):
+    table = AnalyticsRollup.__table__
+    return db.execute(select(table).where(table.c.granularity == granularity)).all()
+
+
+def test_metric_deltas_accumulate_into_hour_and_day_buckets(db):
+    """Test that upsert deltas add to both granularities and corrections net out."""
+    rollups = AnalyticsRollupService(db)
+    at = datetime(2026, 3, 4, 10, 42)
+
+    rollups.apply_metrics_delta(1, "facebook", "spring", at, {"metric_rows": 1, "impressions": 100, "clicks": 5})
+    rollups.apply_metrics_delta(1, "facebook", "spring", at + timedelta(hours=2), {"metric_rows": 1, "impressions": 50})
+    # A later upsert of the first row raises its impressions by 20
+    rollups.apply_metrics_delta(1, "facebook", "spring", at, {"metric_rows": 0, "impressions": 20})
+
+    hours = sorted(_rollups(db, "hour"), key=lambda row: row.bucket_start)
+    assert [(row.bucket_start.hour, row.impressions) for row in hours] == [(10, 120), (12, 50)]
+    (day,) = _rollups(db, "day")
+    assert (day.bucket_start, day.metric_rows, day.impressions, day.clicks) == (datetime(2026, 3, 4), 2, 170, 5)
+
+
+def test_refresh_post_counts_rebuilds_window(db):
+    """Test that post counts are rebuilt from external references and stale counts are cleared."""
+    now = datetime.utcnow()
+    refs = ExternalReference.__table__
+    db.execute(refs.insert(), [
+        {"id": 1, "organization_id": 1, "platform": PlatformType.LINKEDIN, "external_id": "a",
+         "status": PublishingStatus.PUBLISHED, "created_at": now - timedelta(hours=1),
+         "platform_data": {"campaign_id": "spring", "clicks": 3, "impressions": 60}},
+        {"id": 2, "organization_id": 1, "platform": PlatformType.LINKEDIN, "external_id": "b",
+         "status": PublishingStatus.FAILED, "created_at": now - timedelta(hours=1),
+         "platform_data": {"campaign_id": "spring"}},
+    ])
+    rollups = AnalyticsRollupService(db)
+    rollups.refresh_post_counts(now - timedelta(hours=2), now)
+
+    db.execute(refs.update().where(refs.c.id == 2).values(status=PublishingStatus.PUBLISHED))
+    rollups.refresh_post_counts(now - timedelta(hours=2), now)
+
+    (day,) = _rollups(db, "day")
+    assert (day.campaign_id, day.posts_total, day.posts_published, day.posts_failed) == ("spring", 2, 2, 0)
+    assert (day.post_clicks, day.post_impressions) == (3, 60)
+
+
+def test_dashboard_queries_read_from_rollups(db):
+    """Test that timeseries and platform comparison are served from rollups."""
+    now = datetime.utcnow()
+    rollups = AnalyticsRollupService(db)
+    for hours_ago, platform, published in ((1, "facebook", True), (2, "facebook", False), (3, "linkedin", True)):
+        for granularity in ("hour", "day"):
+            rollups._upsert({
+                "organization_id": 1, "granularity": granularity,
+                "bucket_start": bucket_start(now - timedelta(hours=hours_ago), granularity),
+                "platform": platform, "campaign_id": "",
+            }, {
+                "posts_total": 1, "posts_published": int(published), "posts_failed": int(not published),
+                "metric_rows": 1, "impressions": 100, "engagements": 10, "engagement_rate_sum": 10.0,
+            }, increment=True)
+    service = AnalyticsService(db)
+
+    comparison = {row["platform"]: row for row in service.get_platform_comparison(1, days=7)}
+    assert comparison["facebook"]["total_posts"] == 2
+    assert comparison["facebook"]["success_rate"] == 50.0
+    assert sum(row["total_count"] for row in service.get_timeseries_data(1, days=7, platform=PlatformType.LINKEDIN)) == 1
+
+    assert service.get_timeseries_data(2, days=7) == []
+
+
+def _metric_rows(rows):
+    return [
+        {"id": i, "organization_id": 1, "platform": platform, "external_id": f"p{i}", "impressions": impressions,
+         "engagements": impressions // 10, "clicks": 0, "reach": 0, "conversions": 0, "ctr": 0.0, "conversion_rate": 0.0,
+         "engagement_rate": 10.0, "metric_date": metric_date, "collected_at": collected_at}
+        for i, (platform, impressions, metric_date, collected_at) in enumerate(rows, start=1)
+    ]
+
+
+def test_real_time_metrics_cover_metrics_collected_in_window(db):
+    """Test that the real-time window filters on collected_at, whatever day the metrics are for."""
+    now = datetime.utcnow()
+    db.execute(PostMetrics.__table__.insert(), _metric_rows([
+        ("facebook", 100, now - timedelta(days=3), now - timedelta(hours=1)),  # Old post, fresh metrics
+        ("linkedin", 200, now - timedelta(hours=2), now - timedelta(hours=2)),
+        ("linkedin", 400, now - timedelta(hours=2), now - timedelta(hours=30)),  # Collected before the window
+    ]))
+    service = AnalyticsService(db)
+
+    realtime = service.get_real_time_metrics(1, hours=24)
+    assert realtime["total_posts"] == 2
+    assert realtime["total_impressions"] == 300
+    assert realtime["avg_engagement_rate"] == 10.0
+    assert realtime["platform_breakdown"]["facebook"]["posts"] == 1
+    assert [post["external_id"] for post in realtime["top_performing_posts"]] == ["p1", "p2"]
+    assert service.get_real_time_metrics(2, hours=24)["total_posts"] == 0
+
+
+def test_backfill_rebuilds_full_history_in_chunks(db):
+    """Test that the backfill covers history older than the refresh window and can resume mid-way."""
+    now = datetime.utcnow()
+    db.execute(PostMetrics.__table__.insert(), _metric_rows([
+        ("facebook", 100, now - timedelta(days=200), now - timedelta(days=200)),
+        ("facebook", 50, now - timedelta(days=200), now - timedelta(days=200)),
+        ("linkedin", 20, now - timedelta(days=3), now - timedelta(days=3)),
+    ]))
+    rollups = AnalyticsRollupService(db)
+    start = rollups.history_start()
+    assert start == bucket_start(now - timedelta(days=200), "day")
+
+    chunks = rollups.backfill(start, now, chunk_days=30)
+    first_chunk_end = next(chunks)
+    assert first_chunk_end == start + timedelta(days=30)
+    # Resume from the recorded cursor as a new run would
+    assert list(rollups.backfill(first_chunk_end, now, chunk_days=30))[-1] == now
+
+    days = {row.platform: row for row in _rollups(db, "day")}
+    assert (days["facebook"].metric_rows, days["facebook"].impressions) == (2, 150)
+    assert days["linkedin"].impressions == 20
@@ -1,8 +1,13 @@
 from __future__ import annotations
 
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event, select
 from sqlalchemy.orm import Session
 
-from app.optimiser.bandit import update_state, thompson_sample
+from app.optimiser import bandit
+from app.optimiser.bandit import ArmCache, OrgArms, apply_rewards, suggest_timeslots, timeslot_bucket, update_state, thompson_sample
 from app.models.optimiser import OptimiserState
 
 
@@ -28,3 +33,66 @@ def test_thompson_sampling_prefers_higher_reward(db_session: Session):
 	assert picks_A > picks_B, (picks_A, picks_B)
 
 
+
+
+@pytest.fixture
+def arms_db(monkeypatch):
+	engine = create_engine("sqlite:///:memory:")
+	OptimiserState.__table__.create(engine)
+	monkeypatch.setattr(bandit, "_arm_cache", ArmCache(ttl_seconds=300))
+	with Session(engine) as session:
+		yield session
+
+
+def test_sample_takes_top_k_of_one_draw():
+	"""Test that suggestions are k distinct arms of the requested channel, best first."""
+	keys = [f"{channel}:post:{day}:{hour:02d}:{i}" for i in range(50) for channel in ("meta", "linkedin") for day in ("Mon", "Tue") for hour in range(24)]
+	strong = {"meta:post:Mon:00:0", "meta:post:Tue:13:7", "linkedin:post:Mon:05:3"}
+	arms = OrgArms(keys, [100] * len(keys), [90.0 if key in strong else 10.0 for key in keys])
+
+	picked = arms.sample(3, arms.channels["meta"])
+	assert set(picked[:2]) == {"meta:post:Mon:00:0", "meta:post:Tue:13:7"}
+	assert len(set(picked)) == 3 and all(key.startswith("meta:") for key in picked)
+	assert arms.sample(10, arms.channels["linkedin"])[0] == "linkedin:post:Mon:05:3"
+	assert len(arms.sample(len(keys) + 5)) == len(keys)
+
+
+def test_rewards_applied_in_one_upsert(arms_db):
+	"""Test that a tick's rewards are summed per arm and written with a single statement."""
+	apply_rewards(arms_db, [("org-1", "meta:post:Mon:10", 0.5)])
+	statements = []
+	event.listen(arms_db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+	rewards = [("org-1", "meta:post:Mon:10", 0.25)] * 300 + [("org-1", "meta:post:Tue:09", 2.0)] * 200 + [("org-2", "meta:post:Mon:10", -1.0)]
+	assert apply_rewards(arms_db, rewards) == 3
+	arms_db.commit()
+
+	assert len(statements) == 1
+	state = OptimiserState.__table__.c
+	rows = arms_db.execute(select(state.org_id, state.key, state.pulls, state.rewards).order_by(state.org_id, state.key)).all()
+	assert [tuple(row) for row in rows] == [
+		("org-1", "meta:post:Mon:10", 301, 75.5),
+		("org-1", "meta:post:Tue:09", 200, 200.0),  # Rewards clamped to [0, 1]
+		("org-2", "meta:post:Mon:10", 1, 0.0),
+	]
+
+
+def test_suggestions_use_cached_arms(arms_db):
+	"""Test that suggestions come from cached arms, refreshed once new rewards are applied."""
+	apply_rewards(arms_db, [("org-1", f"linkedin:post:Wed:{hour:02d}", 0.1) for hour in range(24)] + [("org-1", "meta:post:Fri:18", 0.9)])
+	arms_db.commit()
+	assert [s["key"] for s in suggest_timeslots(arms_db, "org-1", "meta", 3)] == ["meta:post:Fri:18"]
+
+	statements = []
+	event.listen(arms_db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+	suggestions = suggest_timeslots(arms_db, "org-1", "linkedin", 5)
+	assert statements == []
+	assert len({s["key"] for s in suggestions}) == 5
+	for suggestion in suggestions:
+		when = datetime.fromisoformat(suggestion["when"])
+		assert timeslot_bucket(when) == suggestion["key"].split(":", 2)[2]
+		assert timedelta(0) < when - datetime.utcnow() <= timedelta(days=7)
+
+	apply_rewards(arms_db, [("org-1", "meta:post:Sat:08", 1.0)])
+	arms_db.commit()
+	assert len(suggest_timeslots(arms_db, "org-1", "meta", 3)) == 2
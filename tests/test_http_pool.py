@@ -0,0 +1,77 @@
+"""Tests for the shared outbound HTTP client pool."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.utils.http import HTTPClient, HTTPClientPool
+
+
+@pytest.mark.asyncio
+async def test_client_reused_per_host():
+    """Test that one pooled client serves every request to a host."""
+    pool = HTTPClientPool(host_limits={"api.linkedin.com": 5})
+
+    fb_a = pool.client_for("https://graph.facebook.com/v20.0/me")
+    fb_b = pool.client_for("https://graph.facebook.com/v20.0/123/feed")
+    li = pool.client_for("https://api.linkedin.com/v2/ugcPosts")
+
+    assert fb_a is fb_b
+    assert li is not fb_a
+    assert pool.stats()["api.linkedin.com"].max_connections == 5
+    await pool.aclose()
+
+
+@pytest.mark.asyncio
+async def test_saturation_tracked_when_host_limit_exceeded():
+    """Test that requests beyond the host limit are counted as saturated."""
+    pool = HTTPClientPool(host_limits={"graph.facebook.com": 2})
+    release = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await release.wait()
+        return httpx.Response(200, json={"ok": True})
+
+    client = pool.client_for("https://graph.facebook.com/")
+    client._transport = httpx.MockTransport(handler)
+
+    tasks = [asyncio.create_task(pool.request("GET", "https://graph.facebook.com/me")) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    responses = await asyncio.gather(*tasks)
+
+    stats = pool.stats()["graph.facebook.com"]
+    assert all(r.status_code == 200 for r in responses)
+    assert stats.peak_in_flight == 3
+    assert stats.saturated_count == 1
+    assert stats.in_flight == 0
+    await pool.aclose()
+
+
+@pytest.mark.asyncio
+async def test_http_client_works_without_context_manager():
+    """Test that HTTPClient.get routes through the pool without async with."""
+    pool = HTTPClientPool()
+    client = pool.client_for("https://api.linkedin.com/")
+    client._transport = httpx.MockTransport(lambda request: httpx.Response(200, json={"q": request.url.params["q"]}))
+
+    http_client = HTTPClient()
+    http_client._pool = pool
+    response = await http_client.get("https://api.linkedin.com/v2/search", params={"q": "x"})
+
+    assert response.json() == {"q": "x"}
+    await pool.aclose()
+
+
+@pytest.mark.asyncio
+async def test_arbitrary_hosts_share_one_bounded_client():
+    """Test that customer URLs reuse a single client instead of adding one per host."""
+    pool = HTTPClientPool(shared_max_connections=7)
+
+    clients = {id(pool.client_for(f"https://hooks{i}.example.com/in", shared=True)) for i in range(100)}
+
+    assert len(clients) == 1
+    assert list(pool.stats()) == ["external"]
+    assert pool.stats()["external"].max_connections == 7
+    await pool.aclose()
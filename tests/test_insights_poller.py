@@ -0,0 +1,204 @@
+"""Tests for batched, age-aware insights polling."""
+
+import asyncio
+import json
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from sqlalchemy import Column, MetaData, Table, create_engine, select
+from sqlalchemy.orm import Session
+
+from app.integrations.meta_insights import MetaInsightsFetcher
+from app.models.content import ContentStatus, Schedule
+from app.models.entities import Channel
+from app.models.external_refs import ScheduleExternal
+from app.models.post_metrics import PostMetrics
+from app.services.insights_poll_queue import InsightsPollQueue, PollPolicy
+from workers.insights_poller import InsightsPoller
+
+
+def _post(schedule_id, ref_id, provider="facebook", token="tok-a", account_ref=None):
+    return SimpleNamespace(
+        schedule_id=schedule_id, ref_id=ref_id, provider=provider, access_token=token, account_ref=account_ref
+    )
+
+
+@pytest.mark.asyncio
+async def test_posts_grouped_by_provider_and_token():
+    """Test that stale posts are fetched in one batch call per provider and token."""
+    poller = InsightsPoller()
+    poller.settings = Mock(insights_poll_batch_size=2, insights_poll_concurrency=2)
+    poller.meta_fetcher.get_multiple_posts_insights = AsyncMock(
+        side_effect=lambda ids, provider, token: {ref_id: {"likes": 1} for ref_id in ids}
+    )
+    poller.linkedin_fetcher.get_multiple_posts_insights = AsyncMock(return_value={"urn:1": {}})
+    posts = [
+        _post("s1", "p1"),
+        _post("s2", "p2"),
+        _post("s3", "p3"),
+        _post("s4", "p4", token="tok-b"),
+        _post("s5", "urn:1", provider="linkedin", account_ref="42"),
+    ]
+
+    metrics = await poller._fetch_insights(posts)
+
+    meta_calls = [call.args for call in poller.meta_fetcher.get_multiple_posts_insights.await_args_list]
+    assert sorted(meta_calls) == [
+        (["p1", "p2"], "facebook", "tok-a"),
+        (["p3"], "facebook", "tok-a"),
+        (["p4"], "facebook", "tok-b"),
+    ]
+    poller.linkedin_fetcher.get_multiple_posts_insights.assert_awaited_once_with(
+        ["urn:1"], "tok-a", "urn:li:organization:42"
+    )
+    assert sorted(m.schedule_id for m in metrics) == ["s1", "s2", "s3", "s4"]
+
+
+@pytest.mark.asyncio
+async def test_meta_insights_use_graph_batch_request():
+    """Test that Meta insights for many posts go out as one Graph batch request."""
+    fetcher = MetaInsightsFetcher()
+    fetcher.oauth.get_page_access_token = AsyncMock(return_value="page-token")
+    body = json.dumps({"data": [{"name": "likes", "values": [{"value": 7}]}]})
+    response = Mock(json=Mock(return_value=[{"code": 200, "body": body}, {"code": 400, "body": "{}"}]))
+    fetcher.http_client.post = AsyncMock(return_value=response)
+
+    results = await fetcher.get_multiple_posts_insights(["p1", "p2"], "facebook", "user-token")
+
+    assert results == {"p1": {"likes": 7}, "p2": {}}
+    fetcher.oauth.get_page_access_token.assert_awaited_once()
+    batch = json.loads(fetcher.http_client.post.await_args.kwargs["data"]["batch"])
+    assert [item["relative_url"].split("/")[0] for item in batch] == ["p1", "p2"]
+
+
+POSTED = datetime(2026, 1, 1, 12, 0)
+
+
+def _queue():
+    return InsightsPollQueue(PollPolicy(min_interval=900, max_interval=6 * 3600, backoff=0.5, activity_threshold=0.05))
+
+
+def test_quiet_posts_back_off_geometrically():
+    """Test that a post whose metrics stop moving is polled at growing intervals, up to the cap."""
+    queue = _queue()
+    queue.track("s1", POSTED)
+    now = POSTED
+    gaps = []
+    for _ in range(8):
+        assert queue.pop_due(now, 10) == ["s1"]
+        queue.record_poll("s1", now, engagement=100)
+        gap = queue.seconds_until_next(now)
+        gaps.append(gap)
+        now += timedelta(seconds=gap)
+
+    assert gaps[:3] == [900, 900, 900]
+    assert all(later >= earlier for earlier, later in zip(gaps, gaps[1:]))
+    assert gaps[-2] < gaps[-1] <= 6 * 3600
+
+
+def test_renewed_activity_resets_back_off():
+    """Test that engagement growth or an activity bump brings a post back to the short interval."""
+    queue = _queue()
+    queue.track("s1", POSTED - timedelta(days=3), last_polled_at=POSTED - timedelta(hours=7))
+    assert queue.pop_due(POSTED, 10) == ["s1"]
+    queue.record_poll("s1", POSTED, engagement=100)
+    assert queue.seconds_until_next(POSTED) == 6 * 3600
+
+    later = POSTED + timedelta(hours=6)
+    queue.pop_due(later, 10)
+    queue.record_poll("s1", later, engagement=150)
+    assert queue.seconds_until_next(later) == 900
+
+    queue = _queue()
+    queue.track("s2", POSTED - timedelta(days=3), last_polled_at=POSTED)
+    assert queue.pop_due(POSTED, 10) == []
+    assert queue.bump("s2", POSTED)
+    assert queue.pop_due(POSTED, 10) == ["s2"]
+
+
+def test_budget_caps_polls_and_prefers_most_overdue():
+    """Test that each cycle takes at most the budget, most overdue posts first."""
+    queue = _queue()
+    queue.sync([
+        ("young", POSTED, None),
+        ("old", POSTED - timedelta(days=2), None),
+        ("future", POSTED + timedelta(hours=1), None),
+    ])
+
+    assert queue.pop_due(POSTED, 1) == ["old"]
+    assert queue.pop_due(POSTED, 5) == ["young"]
+    assert queue.pop_due(POSTED, 5) == []
+
+    queue.sync([("young", POSTED, None)])
+    assert "old" not in queue and len(queue) == 1
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    for model in (Channel, Schedule):
+        model.__table__.create(engine)
+    # These models declare their indexes twice, which SQLite rejects; the columns are enough here
+    for table in (ScheduleExternal.__table__, PostMetrics.__table__):
+        Table(table.name, MetaData(), *[Column(c.name, c.type, primary_key=c.primary_key) for c in table.columns]).create(engine)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(Channel.__table__.insert(), [{"id": "ch1", "org_id": "org-1", "provider": "facebook", "access_token": "tok"}])
+        conn.execute(Schedule.__table__.insert(), [
+            {"id": s, "org_id": "org-1", "content_item_id": "c1", "channel_id": "ch1",
+             "scheduled_at": now - timedelta(days=1), "status": ContentStatus.posted}
+            for s in ("never", "due", "later")
+        ])
+        conn.execute(ScheduleExternal.__table__.insert(), [
+            {"id": f"x-{s}", "schedule_id": s, "ref_id": f"p-{s}", "provider": "facebook", "next_poll_at": next_poll_at}
+            for s, next_poll_at in (("never", None), ("due", now - timedelta(minutes=1)), ("later", now + timedelta(hours=1)))
+        ])
+    with Session(engine) as session:
+        yield session
+
+
+def test_only_due_posts_are_selected_and_next_poll_is_stored(db):
+    """Test that each cycle selects due posts in SQL and records when they are next due."""
+    poller = InsightsPoller()
+    now = datetime.utcnow()
+
+    rows = db.execute(poller._tracked_posts_query(due_before=now)).all()
+    assert sorted(row.schedule_id for row in rows) == ["due", "never"]
+    rows = db.execute(poller._tracked_posts_query(due_before=now, include=["later"])).all()
+    assert len(rows) == 3
+
+    poller.queue.track("never", now - timedelta(days=1))
+    poller.queue.pop_due(now, 10)
+    poller.queue.record_poll("never", now, engagement=10)
+    poller._save_next_polls(db, ["never"])
+
+    next_poll_at = db.execute(
+        select(ScheduleExternal.next_poll_at).where(ScheduleExternal.schedule_id == "never")
+    ).scalar_one()
+    assert next_poll_at == poller.queue.due_at("never") and next_poll_at > now
+
+
+@pytest.mark.asyncio
+async def test_activity_listener_is_restarted_after_failure(monkeypatch):
+    """Test that the supervised activity listener comes back after it dies."""
+    poller = InsightsPoller()
+    calls = []
+
+    async def listen(redis_client):
+        calls.append(1)
+        if len(calls) == 1:
+            raise ConnectionError("pubsub dropped")
+        await asyncio.Event().wait()
+
+    poller.listen_for_activity = listen
+    yield_to_loop = asyncio.sleep
+    monkeypatch.setattr("workers.insights_poller.asyncio.sleep", AsyncMock())
+    task = asyncio.create_task(poller.supervise_activity_listener(None))
+    for _ in range(5):
+        await yield_to_loop(0)
+    task.cancel()
+    monkeypatch.undo()
+
+    assert len(calls) == 2
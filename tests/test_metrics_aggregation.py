@@ -0,0 +1,75 @@
+"""Tests for SQL push-down aggregation of post metrics."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.models.analytics import PostMetrics
+from app.services.metrics_aggregation import MetricsAggregator
+from app.services.performance_tracking import PerformanceTracker
+
+NOW = datetime.utcnow()
+
+ROWS = [
+    # id, platform, external_id, impressions, engagements, engagement_rate, days ago
+    (1, "facebook", "fb-1", 1000, 50, 5.0, 1),
+    (2, "facebook", "fb-2", 400, 40, 10.0, 1),
+    (3, "linkedin", "li-1", 200, 4, 2.0, 2),
+    (4, "linkedin", "li-2", 300, 30, 10.0, 2),  # ties fb-2 on rate; the lower id wins
+    (5, "facebook", "fb-old", 999, 999, 99.0, 60),  # outside the window
+]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    PostMetrics.__table__.create(engine)
+    with Session(engine) as session:
+        session.execute(PostMetrics.__table__.insert(), [
+            {
+                "id": row_id, "organization_id": 1, "platform": platform, "external_id": external_id,
+                "impressions": impressions, "reach": impressions, "clicks": 1, "engagements": engagements,
+                "conversions": 0, "engagement_rate": rate, "ctr": 1.0, "conversion_rate": 0.0,
+                "metric_date": NOW - timedelta(days=days_ago),
+            }
+            for row_id, platform, external_id, impressions, engagements, rate, days_ago in ROWS
+        ])
+        session.commit()
+        yield session
+
+
+def _aggregator(db, **kwargs):
+    return MetricsAggregator(db, 1, NOW - timedelta(days=30), NOW, **kwargs)
+
+
+def test_summaries_group_in_sql(db):
+    """Test overall and per-platform totals and averages."""
+    overall = _aggregator(db).summaries()[None]
+    assert (overall["total_posts"], overall["total_impressions"], overall["avg_engagement_rate"]) == (4, 1900, 6.75)
+
+    by_platform = _aggregator(db).summaries("platform")
+    assert by_platform["linkedin"]["total_engagements"] == 34
+    assert len(_aggregator(db).summaries("day")) == 2
+    assert _aggregator(db, platforms=["tiktok"]).summaries() == {}
+
+
+def test_extremes_and_top_posts_rank_in_sql(db):
+    """Test best/worst per group and the limited top-N with a stable tie-break."""
+    assert _aggregator(db).extremes()[None] == ("fb-2", "li-1")
+    assert _aggregator(db).extremes("platform")["linkedin"] == ("li-2", "li-1")
+    assert [post.external_id for post in _aggregator(db).top_posts(3)] == ["fb-2", "li-2", "fb-1"]
+
+
+def test_performance_summary_uses_aggregates(db):
+    """Test that the performance summary is assembled from the pushed-down queries."""
+    result = PerformanceTracker(db).get_performance_summary(1, days=30)
+
+    assert result["total_posts_analyzed"] == 4
+    assert result["summary"]["best_performing_post"] == "fb-2"
+    assert result["platform_performance"]["facebook"] == {
+        "posts": 2, "total_impressions": 1400, "total_engagements": 90, "avg_engagement_rate": 6.43
+    }
+    assert [day["metrics"]["total_posts"] for day in result["time_performance"]] == [2, 2]
+    assert result["top_content"][0]["external_id"] == "fb-2"
@@ -0,0 +1,187 @@
+"""Tests for the coalescing write-behind buffer of webhook metric updates."""
+
+from datetime import datetime
+
+import pytest
+import redis
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker
+
+import app.models.entities  # noqa: F401  (registers the tables referenced by foreign keys)
+from app.models.analytics import AnalyticsRollup, PostMetrics
+from app.models.publishing import ExternalReference, PlatformType, PublishingStatus
+from app.services import metrics_buffer
+from app.services.metrics_buffer import MetricsWriteBuffer, flush_org_metrics
+from app.workers.tasks.platform_webhooks import _process_comment_data, _process_like_data, _update_post_metrics
+
+
+class MemoryRedis:
+    """Just the hash, set, sorted set and pipeline commands the buffer uses."""
+
+    def __init__(self):
+        self.data = {}
+
+    def pipeline(self, transaction=True):
+        return MemoryPipeline(self)
+
+    def hset(self, key, mapping):
+        self.data.setdefault(key, {}).update(mapping)
+
+    def hsetnx(self, key, field, value):
+        self.data.setdefault(key, {}).setdefault(field, value)
+
+    def hgetall(self, key):
+        return dict(self.data.get(key, {}))
+
+    def sadd(self, key, *members):
+        self.data.setdefault(key, set()).update(members)
+
+    def smembers(self, key):
+        return set(self.data.get(key, set()))
+
+    def srem(self, key, *members):
+        self.data.get(key, set()).difference_update(members)
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def expire(self, key, ttl):
+        pass
+
+    def exists(self, key):
+        return int(key in self.data)
+
+    def rename(self, key, new_key):
+        if key not in self.data:
+            raise redis.ResponseError("no such key")
+        self.data[new_key] = self.data.pop(key)
+
+    def zadd(self, key, mapping):
+        self.data.setdefault(key, {}).update(mapping)
+
+    def zrangebyscore(self, key, low, high):
+        return [member for member, score in self.data.get(key, {}).items() if score <= high]
+
+    def zrem(self, key, *members):
+        for member in members:
+            self.data.get(key, {}).pop(member, None)
+
+
+class MemoryPipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    def execute(self, raise_on_error=True):
+        results = []
+        for name, args, kwargs in self.calls:
+            try:
+                results.append(getattr(self.client, name)(*args, **kwargs))
+            except redis.ResponseError as e:
+                if raise_on_error:
+                    raise
+                results.append(e)
+        return results
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    for model in (ExternalReference, PostMetrics, AnalyticsRollup):
+        model.__table__.create(engine)
+    with engine.begin() as conn:
+        conn.execute(ExternalReference.__table__.insert(), [{
+            "id": 1, "organization_id": 1, "platform": PlatformType.LINKEDIN, "external_id": "li-1",
+            "status": PublishingStatus.PUBLISHED, "platform_data": {}, "created_at": datetime.utcnow(),
+        }])
+    with sessionmaker(bind=engine)() as session:
+        yield session
+
+
+@pytest.fixture
+def buffer(monkeypatch):
+    buffer = MetricsWriteBuffer(MemoryRedis())
+    monkeypatch.setattr(metrics_buffer, "_buffer", buffer)
+    return buffer
+
+
+def _metric_rows(db):
+    return db.execute(select(PostMetrics.__table__.c.impressions, PostMetrics.__table__.c.likes)).all()
+
+
+def test_webhook_updates_coalesce_into_one_write(db, buffer):
+    """Test that a burst of updates for one post is written once, merged."""
+    commits = []
+    event.listen(db, "after_commit", lambda session: commits.append(1))
+
+    for count in range(1, 501):
+        _update_post_metrics(db, "linkedin", "li-1", {"impressions": count * 10, "likes": count})
+        _process_like_data(db, "linkedin", {"post_id": "li-1", "like_count": count})
+    _process_comment_data(db, "linkedin", {"id": "c-1", "post_id": "li-1", "message": "first"})
+    _process_comment_data(db, "linkedin", {"id": "c-1", "post_id": "li-1", "message": "first"})
+
+    assert _metric_rows(db) == [] and commits == []
+    assert buffer.flush(db) == {"events": 3, "posts": 1, "metric_rows": 1}
+    assert len(commits) == 1
+    assert _metric_rows(db) == [(5000, 500)]
+    platform_data = db.execute(select(ExternalReference.__table__.c.platform_data)).scalar()
+    assert (platform_data["like_count"], platform_data["comment_count"]) == (500, 1)
+
+
+def test_failed_flush_keeps_updates_under_newer_ones(db, buffer, monkeypatch):
+    """Test that a failed flush puts its snapshot back without overwriting later updates."""
+    _update_post_metrics(db, "linkedin", "li-1", {"impressions": 10, "clicks": 1})
+
+    def fail(self, events):
+        _update_post_metrics(db, "linkedin", "li-1", {"impressions": 20})  # Lands mid-flush
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(metrics_buffer.WebhookBatchApplier, "apply", fail)
+    with pytest.raises(RuntimeError):
+        buffer.flush(db)
+    monkeypatch.undo()
+
+    buffer.flush(db)
+    assert db.execute(select(PostMetrics.__table__.c.impressions, PostMetrics.__table__.c.clicks)).all() == [(20, 1)]
+
+
+
+def test_crashed_flush_is_requeued(db, buffer, monkeypatch):
+    """Test that updates taken by a flush that died before committing are applied later."""
+    _update_post_metrics(db, "linkedin", "li-1", {"impressions": 10})
+
+    def crash(self, events):
+        raise SystemExit  # The worker dies mid-flush; no cleanup runs
+
+    monkeypatch.setattr(metrics_buffer.WebhookBatchApplier, "apply", crash)
+    with pytest.raises(SystemExit):
+        buffer.flush(db)
+    monkeypatch.undo()
+
+    assert buffer.flush(db)["posts"] == 0  # Still inside the lease of the crashed flush
+    buffer.lease = 0
+    assert buffer.flush(db)["posts"] == 1
+    assert _metric_rows(db) == [(10, 0)]
+    assert buffer.redis.data == {buffer.inflight_key: {}}
+
+
+def test_reads_flush_only_the_requesting_orgs_updates(db, buffer):
+    """Test read-your-writes: an org's analytics read applies its own buffered updates and no other org's."""
+    db.execute(ExternalReference.__table__.insert().values(
+        id=2, organization_id=2, platform=PlatformType.LINKEDIN, external_id="li-2",
+        status=PublishingStatus.PUBLISHED, platform_data={}, created_at=datetime.utcnow()
+    ))
+    db.commit()
+    _update_post_metrics(db, "linkedin", "li-1", {"impressions": 42})
+    _update_post_metrics(db, "linkedin", "li-2", {"impressions": 7})
+
+    flush_org_metrics(db, 1)
+
+    assert _metric_rows(db) == [(42, 0)]
+    assert buffer.redis.smembers(buffer.dirty_key) == {buffer._post_key("linkedin", "li-2")}
+    assert buffer.flush(db)["posts"] == 1
+    assert sorted(_metric_rows(db)) == [(7, 0), (42, 0)]
+    assert buffer.redis.zrangebyscore(buffer.inflight_key, "-inf", float("inf")) == []
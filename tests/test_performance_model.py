@@ -0,0 +1,102 @@
+"""Tests for the local, versioned performance model."""
+
+import asyncio
+import math
+import random
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.ai.performance_model import (
+    FEATURE_NAMES,
+    PerformanceModel,
+    PerformanceModelStore,
+    TARGETS,
+)
+from app.ai.performance_predictor import PerformancePredictor
+
+
+def _training_set(n=200, seed=7):
+    rng = random.Random(seed)
+    features, targets = [], []
+    for _ in range(n):
+        row = [rng.random() for _ in FEATURE_NAMES]
+        # Engagement rate rises with hashtags; impressions with content length
+        targets.append([math.log1p(1000 * (1 + row[0])), math.log1p(800), math.log1p(50), 0.02, 0.05 + 0.1 * row[1]])
+        features.append(row)
+    return features, targets
+
+
+def test_fit_recovers_linear_signal():
+    """Test that the ridge fit predicts the targets it was trained on."""
+    features, targets = _training_set()
+    model = PerformanceModel.fit(1, "facebook", features, targets, l2=0.01)
+
+    low, high = model.predict_batch([[0.5] * len(FEATURE_NAMES), [0.5, 1.0] + [0.5] * (len(FEATURE_NAMES) - 2)])
+
+    assert low["engagement_rate"] == pytest.approx(0.10, abs=0.01)
+    assert high["engagement_rate"] == pytest.approx(0.15, abs=0.01)
+    assert low["impressions"] == pytest.approx(1500, rel=0.05)
+    drivers = model.contributions([0.5, 1.0] + [0.5] * (len(FEATURE_NAMES) - 2))
+    assert max(drivers, key=lambda name: abs(drivers[name])) == "hashtag_count"
+
+
+def test_store_versions_models_on_disk(tmp_path):
+    """Test that each save adds a version and loads return the latest by default."""
+    store = PerformanceModelStore(str(tmp_path))
+    features, targets = _training_set(n=40)
+
+    assert store.load(1, "facebook") is None
+    store.save(PerformanceModel.fit(1, "facebook", features, targets))
+    store.save(PerformanceModel.fit(1, "facebook", features, targets, l2=5.0))
+
+    assert store.latest_version(1, "facebook") == 2
+    assert store.load(1, "facebook").l2 == 5.0
+    assert store.load(1, "facebook", version=1).targets == TARGETS
+
+
+def test_score_drafts_uses_local_model_without_llm(tmp_path):
+    """Test batch scoring through the predictor and the fallback when no model exists."""
+    predictor = PerformancePredictor(None)
+    predictor.model_store = PerformanceModelStore(str(tmp_path))
+    features, targets = _training_set(n=60)
+    predictor.model_store.save(PerformanceModel.fit(1, "linkedin", features, targets))
+
+    drafts = [(f"New launch #{i} tips", datetime(2026, 5, 4, 9)) for i in range(1000)]
+    predictions = predictor.score_drafts(1, "linkedin", drafts)
+
+    assert len(predictions) == 1000
+    assert predictions[0].factors["model_version"] == 1
+    assert 0 < predictions[0].confidence_score < 1
+    assert predictor.score_drafts(2, "linkedin", drafts) is None
+
+
+def test_local_models_disabled_without_configured_store():
+    """Test that no worker-local default store is used when the model path is unset."""
+    with patch("app.ai.performance_model.get_settings", return_value=SimpleNamespace(performance_model_path=None)):
+        predictor = PerformancePredictor(None)
+
+    assert predictor.model_store is None
+    assert predictor.score_drafts(1, "linkedin", [("New launch", None)]) is None
+    assert predictor.train_local_model(1, "linkedin") is None
+
+
+def test_local_predictions_carry_recommendations(tmp_path):
+    """Test rule-based recommendations from the model's drivers, and LLM ones when asked to explain."""
+    predictor = PerformancePredictor(None)
+    predictor.model_store = PerformanceModelStore(str(tmp_path))
+    features, targets = _training_set(n=60)
+    predictor.model_store.save(PerformanceModel.fit(1, "linkedin", features, targets))
+
+    (prediction,) = predictor.score_drafts(1, "linkedin", [("New launch tips", datetime(2026, 5, 4, 9))])
+    assert prediction.recommendations[0] == "Add a few relevant hashtags"  # Engagement rises with hashtags
+    assert len(prediction.recommendations) <= 3
+
+    predictor.tracer = MagicMock()
+    with patch.object(predictor, "_explain_prediction", AsyncMock(return_value=["Ask a question"])):
+        explained = asyncio.run(predictor.predict_performance("New launch tips", "linkedin", 1, explain=True))
+        plain = asyncio.run(predictor.predict_performance("New launch tips", "linkedin", 1))
+    assert explained.recommendations == ["Ask a question"]
+    assert plain.recommendations == prediction.recommendations
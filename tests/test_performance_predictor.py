@@ -0,0 +1,82 @@
+"""Tests for the historical feature loader behind performance predictions."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from app.ai.performance_predictor import HistoricalFeatureLoader
+from app.models.analytics import PostMetrics
+from app.models.cms import ContentItem
+from app.models.content import Schedule
+from app.models.publishing import ExternalReference, PlatformType, PublishingStatus
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite:///:memory:")
+    for model in (ContentItem, Schedule, ExternalReference, PostMetrics):
+        model.__table__.create(engine)
+    with engine.begin() as conn:
+        conn.execute(ContentItem.__table__.insert(), [
+            {"id": i, "organization_id": 1, "created_by_id": 1, "title": f"post {i}", "content": "x" * (50 * i),
+             "hashtags": ["#a"] * i}
+            for i in range(1, 4)
+        ])
+        conn.execute(Schedule.__table__.insert(), [
+            {"id": str(i), "org_id": "1", "content_item_id": str(i), "channel_id": "c", "scheduled_at": datetime.utcnow(),
+             "status": "posted", "created_at": datetime.utcnow()}
+            for i in range(1, 4)
+        ])
+        conn.execute(ExternalReference.__table__.insert(), [
+            {"id": i, "organization_id": 1, "platform": PlatformType.FACEBOOK, "external_id": f"fb-{i}",
+             "status": PublishingStatus.PUBLISHED, "schedule_id": i, "created_at": datetime.utcnow()}
+            for i in range(1, 4)
+        ])
+    HistoricalFeatureLoader.invalidate()
+    return engine
+
+
+def _add_metrics(engine, ids):
+    with engine.begin() as conn:
+        conn.execute(PostMetrics.__table__.insert(), [
+            {"id": i, "organization_id": 1, "external_reference_id": i, "platform": "facebook", "external_id": f"fb-{i}",
+             "impressions": 100 * i, "reach": 80 * i, "engagements": 5 * i, "ctr": 0.01, "engagement_rate": 0.05,
+             "metric_date": datetime.now() - timedelta(days=i), "collected_at": datetime.utcnow() + timedelta(seconds=i)}
+            for i in ids
+        ])
+
+
+def _count_queries(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+def test_history_joins_schedule_and_content_in_one_query(engine):
+    """Test that history is loaded with content features without per-row lookups."""
+    _add_metrics(engine, [1, 2, 3])
+    statements = _count_queries(engine)
+
+    with Session(engine) as db:
+        history = HistoricalFeatureLoader(db).load(1, "facebook")
+
+    assert len(statements) == 2  # freshness probe + joined history query
+    assert [(d["content_length"], d["hashtag_count"]) for d in history.data] == [(50, 1), (100, 2), (150, 3)]
+    assert history.baseline["avg_impressions"] == 200
+
+
+def test_cached_until_new_metrics_land(engine):
+    """Test that repeat loads reuse the cache and new metrics invalidate it."""
+    _add_metrics(engine, [1, 2])
+    with Session(engine) as db:
+        loader = HistoricalFeatureLoader(db)
+        first = loader.load(1, "facebook")
+        assert loader.load(1, "facebook") is first
+
+        _add_metrics(engine, [3])
+        refreshed = loader.load(1, "facebook")
+
+    assert refreshed is not first
+    assert len(refreshed.data) == 3
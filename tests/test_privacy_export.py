@@ -0,0 +1,89 @@
+"""Tests for the streaming privacy export writer."""
+
+import csv
+import io
+import json
+import zipfile
+from datetime import datetime
+
+import pytest
+from sqlalchemy import JSON, Column, DateTime, String, create_engine
+from sqlalchemy.orm import Session, declarative_base
+
+from app.services.privacy_export import ExportTable, StreamingExportWriter
+
+Base = declarative_base()
+
+
+class ExportRow(Base):
+    __tablename__ = "export_rows"
+
+    id = Column(String(36), primary_key=True)
+    org_id = Column(String(36), nullable=False)
+    email = Column(String(255))
+    created_at = Column(DateTime)
+    metadata_json = Column(JSON)
+
+
+TABLES = (
+    ExportTable("users", ExportRow, "org_id", ("id", "email", "created_at", "metadata"), aliases={"metadata": "metadata_json"}),
+)
+HEADER = {"organization": {"id": "org-1", "name": "Acme"}}
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all([
+            ExportRow(id=f"u{i:02d}", org_id="org-1", email=f"u{i}@acme.test",
+                      created_at=datetime(2026, 1, 1), metadata_json={"n": i})
+            for i in range(5)
+        ])
+        session.add(ExportRow(id="other", org_id="org-2", email="x@other.test", created_at=datetime(2026, 1, 1)))
+        session.commit()
+        yield session
+
+
+def test_json_export_is_one_document_with_progress_per_batch(db, tmp_path):
+    """Test that the JSON export streams every org row and reports progress per batch and per table."""
+    progress = []
+    writer = StreamingExportWriter(db, "org-1", TABLES, batch_size=2, progress=lambda *args: progress.append(args))
+
+    path = writer.write(str(tmp_path / "export.json"), "json", HEADER)
+
+    data = json.loads(open(path, encoding="utf-8").read())
+    assert data["organization"] == HEADER["organization"]
+    assert [row["id"] for row in data["users"]] == ["u00", "u01", "u02", "u03", "u04"]
+    assert data["users"][0] == {"id": "u00", "email": "u0@acme.test", "created_at": "2026-01-01T00:00:00", "metadata": {"n": 0}}
+    assert progress == [("users", 2, False), ("users", 4, False), ("users", 5, True)]
+    assert not (tmp_path / "export.json.part").exists()
+
+
+def test_zip_exports_write_one_entry_per_table(db, tmp_path):
+    """Test that zip exports hold NDJSON entries and csv exports hold CSV entries."""
+    writer = StreamingExportWriter(db, "org-1", TABLES, batch_size=2)
+
+    with zipfile.ZipFile(writer.write(str(tmp_path / "export.zip"), "zip", HEADER)) as zipf:
+        assert sorted(zipf.namelist()) == ["organization_info.json", "users.ndjson"]
+        lines = zipf.read("users.ndjson").decode().splitlines()
+    assert [json.loads(line)["id"] for line in lines] == ["u00", "u01", "u02", "u03", "u04"]
+
+    with zipfile.ZipFile(writer.write(str(tmp_path / "export.csv.zip"), "csv", HEADER)) as zipf:
+        rows = list(csv.reader(io.StringIO(zipf.read("users.csv").decode())))
+    assert rows[0] == ["id", "email", "created_at", "metadata"]
+    assert rows[1] == ["u00", "u0@acme.test", "2026-01-01T00:00:00", '{"n": 0}']
+    assert len(rows) == 6
+
+
+def test_failed_export_leaves_no_partial_file(db, tmp_path):
+    """Test that an export failing midway removes its partial file."""
+    def fail(table, rows, finished):
+        raise RuntimeError("boom")
+
+    writer = StreamingExportWriter(db, "org-1", TABLES, batch_size=2, progress=fail)
+
+    with pytest.raises(RuntimeError):
+        writer.write(str(tmp_path / "export.json"), "json", HEADER)
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,83 @@
+"""Tests for the outbound platform rate governor."""
+
+import json
+import time
+
+import pytest
+
+from app.utils.rate_governor import RateGovernor, RateLimitExceeded, TokenBucket
+
+META_URL = "https://graph.facebook.com/v20.0/act_123/campaigns"
+
+
+def test_token_bucket_reserves_in_order():
+    """Test that callers beyond the burst are told to wait in FIFO order."""
+    bucket = TokenBucket(rate=10, burst=2)
+    now = bucket.updated
+
+    assert bucket.reserve(now) == 0
+    assert bucket.reserve(now) == 0
+    assert bucket.reserve(now) == pytest.approx(0.1)
+    assert bucket.reserve(now) == pytest.approx(0.2)
+
+
+def test_meta_account_key_extracted_from_path():
+    """Test that Meta ad account ids split quota buckets."""
+    governor = RateGovernor(limits={"meta": 10})
+
+    keys = governor.keys_for(META_URL)
+
+    assert len(keys) == 2
+    assert keys[1][2] == "act_123"
+    assert governor.keys_for("https://example.com/hook") == ()
+
+
+def test_app_usage_header_slows_bucket():
+    """Test that X-App-Usage near the limit throttles the app bucket."""
+    governor = RateGovernor(limits={"meta": 10})
+    usage = json.dumps({"call_count": 80, "total_time": 20, "total_cputime": 10})
+
+    governor.observe(META_URL, 200, {"X-App-Usage": usage})
+
+    app_bucket = governor._buckets[governor.keys_for(META_URL)[0]]
+    assert 0.1 <= app_bucket.throttle < 0.5
+
+
+def test_business_use_case_regain_access_blocks_account():
+    """Test that estimated_time_to_regain_access pauses the account bucket."""
+    governor = RateGovernor(limits={"meta": 10}, max_wait=5)
+    usage = json.dumps({"123": [{"type": "ads_management", "call_count": 100, "estimated_time_to_regain_access": 3}]})
+
+    governor.observe(META_URL, 200, {"X-Business-Use-Case-Usage": usage})
+
+    with pytest.raises(RateLimitExceeded) as exc:
+        governor.acquire_sync(META_URL)
+    assert exc.value.retry_after > 170
+
+
+def test_account_bucket_follows_busiest_usage_entry():
+    """Test that a low BUC entry or account usage does not undo a high one."""
+    governor = RateGovernor(limits={"meta": 10})
+    buc = json.dumps({"123": [
+        {"type": "ads_management", "call_count": 90},
+        {"type": "ads_insights", "call_count": 10},
+    ]})
+
+    governor.observe(META_URL, 200, {
+        "X-Business-Use-Case-Usage": buc,
+        "X-Ad-Account-Usage": json.dumps({"acc_id_util_pct": 5}),
+    })
+
+    account_bucket = governor._buckets[governor.keys_for(META_URL)[1]]
+    assert account_bucket.throttle < 0.5
+
+def test_retry_after_blocks_instead_of_sleeping():
+    """Test that a 429 closes the bucket for Retry-After seconds."""
+    governor = RateGovernor(limits={"linkedin": 5}, max_wait=30)
+    url = "https://api.linkedin.com/v2/ugcPosts"
+
+    governor.observe(url, 429, {"Retry-After": "0.05"})
+    started = time.monotonic()
+    governor.acquire_sync(url)
+
+    assert time.monotonic() - started >= 0.04
@@ -0,0 +1,121 @@
+"""Tests for compiled, indexed rule evaluation."""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import JSON, Column, MetaData, Table, create_engine, event
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session
+
+from app.automation.rules_engine import RulesEngine, TriggerType
+from app.automation.rules_runtime import CompiledRule, RuleIndex, compile_condition, index_guard
+from app.models.rules import Rule, RuleRun
+
+
+def test_compiled_conditions():
+    """Test operator semantics, dotted paths and the choice of index guard."""
+    condition = {"operator": "and", "conditions": [
+        {"operator": "gt", "field": "metrics.ctr", "value": 0.02},
+        {"operator": "in", "field": "platform", "value": ["facebook", "instagram"]},
+        {"operator": "eq", "field": "org_id", "value": "org-1"},
+    ]}
+    matches = compile_condition(condition)
+
+    assert matches({"org_id": "org-1", "platform": "facebook", "metrics": {"ctr": 0.05}})
+    assert not matches({"org_id": "org-1", "platform": "linkedin", "metrics": {"ctr": 0.05}})
+    assert not matches({"org_id": "org-1", "platform": "facebook"})  # gt on a missing field is false
+    assert compile_condition({"operator": "or", "conditions": [
+        {"operator": "lt", "field": "missing", "value": 1}, {"operator": "eq", "field": "a.b", "value": 2}
+    ]})({"a": {"b": 2}})
+    assert not compile_condition({"operator": "regex"})({})
+    assert index_guard(condition) == ("org_id", ("org-1",))
+    assert index_guard({"operator": "or", "conditions": [condition]}) is None
+
+
+def test_index_returns_only_rules_that_can_match():
+    """Test that candidates are found by org and guard value, not by scanning every rule."""
+    platforms = ["facebook", "instagram", "linkedin", "tiktok"]
+    rules = [
+        CompiledRule(
+            id=f"r{i}", org_id=f"org-{i % 50}", trigger="post_performance", version=None,
+            matches=compile_condition(condition), action_json={}, guard=index_guard(condition)
+        )
+        for i in range(10000)
+        for condition in [{"operator": "eq", "field": "platform", "value": platforms[i % 4]}]
+    ] + [CompiledRule("catch-all", "org-2", "post_performance", None, lambda payload: True, {}, None)]
+    index = RuleIndex(rules)
+
+    candidates = index.candidates({"org_id": "org-2", "platform": "linkedin"})
+    assert len(candidates) == 101  # 100 linkedin rules of org-2 plus its unguarded rule
+    assert all(rule.matches({"platform": "linkedin"}) for rule in candidates if rule.guard)
+    assert len(index.candidates({"platform": "linkedin"})) == 2501  # No org: every org's rules
+    assert index.candidates({"org_id": "org-999", "platform": "linkedin"}) == []
+
+
+@pytest.fixture
+def engine():
+    """In-memory rules tables (JSONB stored as JSON)."""
+    engine = create_engine("sqlite:///:memory:")
+    metadata = MetaData()
+    for table in (Rule.__table__, RuleRun.__table__):
+        Table(table.name, metadata, *[
+            Column(column.name, JSON() if isinstance(column.type, JSONB) else column.type, primary_key=column.primary_key)
+            for column in table.columns
+        ])
+    metadata.create_all(engine)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(Rule.__table__.insert(), [
+            {"id": "fast", "org_id": "org-1", "name": "fast", "trigger": "post_performance", "enabled": True,
+             "condition_json": {"operator": "eq", "field": "platform", "value": "facebook"},
+             "action_json": {"type": "send_notification"}, "created_at": now, "updated_at": now},
+            {"id": "cooling", "org_id": "org-1", "name": "cooling", "trigger": "post_performance", "enabled": True,
+             "condition_json": {"operator": "gt", "field": "impressions", "value": 10},
+             "action_json": {"type": "send_notification"}, "created_at": now, "updated_at": now},
+        ])
+        conn.execute(RuleRun.__table__.insert(), [
+            {"id": "run-1", "rule_id": "cooling", "status": "success", "last_run_at": now - timedelta(minutes=5), "created_at": now},
+        ])
+    return engine
+
+
+def test_process_trigger_caches_rules_and_cooldowns(engine):
+    """Test rule execution, cooldowns seeded from past runs and no rule queries on warm events."""
+    rules_engine = RulesEngine()
+    runs = []
+
+    async def record(rule, status, meta, db):
+        runs.append((rule.id, status))
+    rules_engine._record_rule_run = record
+    payload = {"org_id": "org-1", "platform": "facebook", "impressions": 100}
+
+    with Session(engine) as db:
+        assert asyncio.run(rules_engine.process_trigger(TriggerType.POST_PERFORMANCE, payload, db)) == 1
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        assert asyncio.run(rules_engine.process_trigger(TriggerType.POST_PERFORMANCE, payload, db)) == 0
+
+    assert [rule_id for rule_id, _ in runs] == ["fast"]  # "cooling" ran 5 minutes ago
+    assert statements == []
+
+
+def test_cooldown_shared_through_rule_runs_without_redis(engine):
+    """Test that a rule run by another process is not re-run while its index is still cached."""
+    first, second = RulesEngine(), RulesEngine()
+    runs = []
+
+    async def record(rule, status, meta, db):
+        runs.append(rule.id)
+        db.execute(RuleRun.__table__.insert().values(
+            id=f"{rule.id}-run-{len(runs)}", rule_id=rule.id, status=status.value, last_run_at=datetime.utcnow(), created_at=datetime.utcnow()
+        ))
+    first._record_rule_run = second._record_rule_run = record
+    payload = {"org_id": "org-1", "platform": "facebook", "impressions": 0}
+
+    with Session(engine) as db:
+        assert asyncio.run(second.process_trigger(TriggerType.POST_PERFORMANCE, {"org_id": "org-1"}, db)) == 0  # Warm index
+        assert asyncio.run(first.process_trigger(TriggerType.POST_PERFORMANCE, payload, db)) == 1
+        assert asyncio.run(second.process_trigger(TriggerType.POST_PERFORMANCE, payload, db)) == 0
+
+    assert runs == ["fast"]
@@ -0,0 +1,110 @@
+"""Tests for the rules worker's consumer-group processing of trigger events."""
+
+import asyncio
+import json
+
+import pytest
+
+from workers import rules_worker
+from workers.rules_worker import RulesWorker
+
+
+class StreamRedis:
+    """Just the stream commands the rules worker uses."""
+
+    def __init__(self, pending=(), claimed=()):
+        self.pending = list(pending)
+        self.claimed = list(claimed)
+        self.added = []
+        self.acked = []
+        self.reads = 0
+
+    async def xpending_range(self, key, group, min, max, count, idle=None):
+        return self.pending
+
+    async def xclaim(self, key, group, consumer, min_idle_time, message_ids):
+        return [entry for entry in self.claimed if entry[0] in message_ids]
+
+    async def xreadgroup(self, group, consumer, streams, count=None, block=None):
+        self.reads += 1
+        return []
+
+    async def xack(self, key, group, *ids):
+        self.acked.extend(ids)
+
+    async def xadd(self, key, fields, maxlen=None, approximate=True):
+        self.added.append((key, fields))
+
+
+class FakeSession:
+    closed = 0
+
+    def close(self):
+        FakeSession.closed += 1
+
+
+@pytest.fixture
+def processed(monkeypatch):
+    calls = []
+
+    async def process_trigger(trigger_type, payload, db):
+        calls.append((trigger_type.value, payload, db))
+        return 1
+
+    FakeSession.closed = 0
+    monkeypatch.setattr(rules_worker, "SessionLocal", FakeSession)
+    monkeypatch.setattr(rules_worker.rules_engine, "process_trigger", process_trigger)
+    return calls
+
+
+def _entry(entry_id, trigger_type, payload):
+    return entry_id, {"trigger_type": trigger_type, "payload": json.dumps(payload)}
+
+
+def test_batch_shares_one_session_and_acks_every_entry(processed):
+    """Test that a batch uses one session, skips malformed entries and acks them all."""
+    worker = RulesWorker(consumer="test")
+    worker.redis = StreamRedis()
+    entries = [
+        _entry("1-0", "post_performance", {"org_id": "org-1"}),
+        ("2-0", {"trigger_type": "unknown", "payload": "{}"}),
+        _entry("3-0", "campaign_created", {"org_id": "org-2"}),
+    ]
+
+    assert asyncio.run(worker.process_batch(entries)) == 2
+    assert [(trigger, payload["org_id"]) for trigger, payload, _ in processed] == [
+        ("post_performance", "org-1"), ("campaign_created", "org-2")
+    ]
+    assert processed[0][2] is processed[1][2] and FakeSession.closed == 1
+    assert worker.redis.acked == ["1-0", "2-0", "3-0"]
+
+
+def test_failed_batch_is_left_pending(monkeypatch):
+    """Test that a batch is not acked when processing fails, so it is redelivered."""
+    async def fail(trigger_type, payload, db):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(rules_worker, "SessionLocal", FakeSession)
+    monkeypatch.setattr(rules_worker.rules_engine, "process_trigger", fail)
+    worker = RulesWorker(consumer="test")
+    worker.redis = StreamRedis()
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(worker.process_batch([_entry("1-0", "post_performance", {})]))
+    assert worker.redis.acked == []
+
+
+def test_stale_entries_are_reclaimed_or_dead_lettered(processed):
+    """Test that idle entries are taken over and ones past the delivery limit are dead-lettered."""
+    worker = RulesWorker(consumer="test")
+    limit = worker.settings.rules_max_deliveries
+    worker.redis = StreamRedis(
+        pending=[{"message_id": "1-0", "times_delivered": 1}, {"message_id": "2-0", "times_delivered": limit}],
+        claimed=[_entry("1-0", "post_performance", {"org_id": "org-1"}), _entry("2-0", "post_performance", {"org_id": "org-1"})],
+    )
+
+    assert asyncio.run(worker.poll_redis_events()) == 1
+    assert worker.redis.reads == 0  # Reclaimed entries are processed before new ones are read
+    assert [key for key, _ in worker.redis.added] == [f"{worker.stream_key}:dead"]
+    assert worker.redis.added[0][1]["entry_id"] == "2-0"
+    assert sorted(worker.redis.acked) == ["1-0", "2-0"]
@@ -15,6 +15,8 @@ from app.scheduler.engine import (
     _process_schedules_direct,
     _process_schedules_with_redis
 )
+from app.scheduler.partitions import PartitionLeaseManager, assign_partitions, partition_for
+from app.scheduler.queue import DueQueue
 from app.models.content import Schedule, ContentStatus, ContentItem
 from app.models.entities import Channel
 
@@ -27,9 +29,19 @@ async def mock_redis():
     redis_client.exists = AsyncMock(return_value=False)
     redis_client.setex = AsyncMock()
     redis_client.ping = AsyncMock()
+    pipe = Mock()
+    pipe.execute = AsyncMock(return_value=[True])
+    redis_client.pipeline = Mock(return_value=pipe)
     return redis_client
 
 
+def _rows(*rows):
+    """Build a db.execute() result whose scalars().all() yields rows."""
+    result = Mock()
+    result.scalars.return_value.all.return_value = list(rows)
+    return result
+
+
 @pytest.fixture
 def mock_db():
     """Mock database session for testing."""
@@ -137,11 +149,8 @@ class TestProcessSchedules:
     @pytest.mark.asyncio
     async def test_process_schedules_direct_success(self, mock_db, sample_schedule, sample_channel, sample_content):
         """Test direct processing with successful publish."""
-        # Mock database responses
-        mock_db.get.side_effect = lambda model, id: {
-            Channel: sample_channel,
-            ContentItem: sample_content
-        }.get(model, None)
+        # Mock batch preload: one query for channels, one for content items
+        mock_db.execute.side_effect = [_rows(sample_channel), _rows(sample_content)]
         
         # Mock publisher
         mock_publisher = AsyncMock()
@@ -158,8 +167,7 @@ class TestProcessSchedules:
     @pytest.mark.asyncio
     async def test_process_schedules_direct_missing_data(self, mock_db, sample_schedule):
         """Test direct processing with missing channel or content."""
-        mock_db.get.return_value = None  # Missing channel/content
-        mock_db.get.side_effect = lambda model, id: None
+        mock_db.execute.side_effect = [_rows(), _rows()]  # Missing channel/content
         
         with patch('app.scheduler.engine.fetch_due_schedules', return_value=[sample_schedule]):
             result = await _process_schedules_direct(mock_db)
@@ -171,23 +179,19 @@ class TestProcessSchedules:
     @pytest.mark.asyncio
     async def test_process_schedules_with_redis_idempotency(self, mock_db, mock_redis, sample_schedule):
         """Test Redis-based processing with idempotency."""
-        # Mock Redis to return that schedule is already processed
-        mock_redis.exists.return_value = True
+        # Mock Redis SET NX to report that schedule is already claimed
+        mock_redis.pipeline.return_value.execute.return_value = [None]
         
         with patch('app.scheduler.engine.fetch_due_schedules', return_value=[sample_schedule]):
             result = await _process_schedules_with_redis(mock_db, mock_redis)
         
         assert result == 0  # Should skip already processed
-        mock_redis.exists.assert_called_once()
+        mock_redis.pipeline.return_value.set.assert_called_once()
     
     @pytest.mark.asyncio
     async def test_process_schedules_with_redis_retry_logic(self, mock_db, mock_redis, sample_schedule, sample_channel, sample_content):
         """Test Redis-based processing with retry logic."""
-        # Mock database responses
-        mock_db.get.side_effect = lambda model, id: {
-            Channel: sample_channel,
-            ContentItem: sample_content
-        }.get(model, None)
+        mock_db.execute.side_effect = [_rows(sample_channel), _rows(sample_content)]
         
         # Mock publisher to fail first two times, succeed on third
         mock_publisher = AsyncMock()
@@ -204,7 +208,48 @@ class TestProcessSchedules:
         assert result == 1
         assert sample_schedule.status == ContentStatus.posted
         assert mock_publisher.publish.call_count == 3  # Should retry 3 times
-        mock_redis.setex.assert_called()  # Should mark as completed
+        mock_redis.pipeline.return_value.setex.assert_called()  # Should mark as completed
+    
+    @pytest.mark.asyncio
+    async def test_process_schedules_direct_bounds_provider_concurrency(self, mock_db, sample_channel, sample_content):
+        """Test that a batch publishes concurrently, capped per provider."""
+        schedules = [
+            Schedule(
+                id=f"test-schedule-{i}",
+                org_id="test-org",
+                content_item_id="test-content-1",
+                channel_id="test-channel-1",
+                scheduled_at=datetime.now(timezone.utc) - timedelta(minutes=5),
+                status=ContentStatus.scheduled
+            )
+            for i in range(6)
+        ]
+        mock_db.execute.side_effect = [_rows(sample_channel), _rows(sample_content)]
+        
+        in_flight = 0
+        peak = 0
+        
+        async def slow_publish(**kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return Mock(id="post-123", url="https://example.com/post", external_refs={})
+        
+        mock_publisher = Mock()
+        mock_publisher.publish = slow_publish
+        settings = Mock(scheduler_batch_size=500, scheduler_provider_concurrency=2, e2e_mocks=False)
+        
+        with patch('app.scheduler.engine.get_settings', return_value=settings), \
+             patch('app.scheduler.engine._publisher_for_provider', return_value=mock_publisher), \
+             patch('app.scheduler.engine.fetch_due_schedules', return_value=schedules):
+            result = await _process_schedules_direct(mock_db)
+        
+        assert result == 6
+        assert peak == 2
+        assert mock_db.execute.call_count == 2  # batch preload, no per-schedule lookups
+        mock_db.commit.assert_called_once()
 
 
 class TestRunTick:
@@ -239,3 +284,156 @@ async def test_timezone_consistency():
     assert now_utc.hour == now_naive.hour
     assert now_utc.minute == now_naive.minute
     assert now_utc.second == now_naive.second
+
+
+class TestDueQueue:
+    """Test the in-process due queue used by the scheduler worker."""
+    
+    def test_pop_due_in_time_order(self):
+        queue = DueQueue()
+        now = datetime.now(timezone.utc)
+        queue.upsert("late", now + timedelta(minutes=5))
+        queue.upsert("b", now - timedelta(seconds=10))
+        queue.upsert("a", now - timedelta(seconds=20))
+        
+        assert queue.pop_due(now, limit=10) == ["a", "b"]
+        assert len(queue) == 1
+        assert 299 <= queue.seconds_until_next(now) <= 300
+    
+    def test_reschedule_and_cancel_skip_stale_entries(self):
+        queue = DueQueue()
+        now = datetime.now(timezone.utc)
+        queue.upsert("moved", now - timedelta(seconds=5))
+        queue.upsert("moved", now + timedelta(hours=1))
+        queue.upsert("cancelled", now - timedelta(seconds=5))
+        queue.cancel("cancelled")
+        
+        assert queue.pop_due(now, limit=10) == []
+        assert "moved" in queue
+    
+    def test_apply_event_respects_horizon(self):
+        queue = DueQueue()
+        now = datetime.now(timezone.utc)
+        horizon = timedelta(minutes=15)
+        queue.apply_event({"op": "upsert", "id": "soon", "scheduled_at": (now + timedelta(minutes=1)).isoformat()}, horizon)
+        queue.apply_event({"op": "upsert", "id": "far", "scheduled_at": (now + timedelta(days=1)).isoformat()}, horizon)
+        
+        assert "soon" in queue
+        assert "far" not in queue
+        
+        queue.apply_event({"op": "cancel", "id": "soon", "scheduled_at": None}, horizon)
+        assert len(queue) == 0
+
+
+class TestPartitions:
+    """Test org partitioning across scheduler workers."""
+    
+    def test_partition_for_is_stable(self):
+        assert partition_for("org-1", 64) == partition_for("org-1", 64)
+        assert 0 <= partition_for("org-1", 64) < 64
+    
+    def test_assign_partitions_covers_every_partition_once(self):
+        members = ["worker-b", "worker-a", "worker-c"]
+        owned = [assign_partitions(w, members, 64) for w in members]
+        
+        assert set().union(*owned) == set(range(64))
+        assert sum(len(o) for o in owned) == 64
+        # A lone worker owns everything
+        assert assign_partitions("worker-a", [], 8) == set(range(8))
+    
+    @pytest.mark.asyncio
+    async def test_filter_fenced_drops_stale_partitions(self, sample_schedule):
+        redis_client = Mock()
+        redis_client.register_script = Mock(return_value=AsyncMock())
+        manager = PartitionLeaseManager(redis_client, "worker-a", partitions=4)
+        partition = partition_for(sample_schedule.org_id, 4)
+        manager.owned = {partition: 7}
+        
+        pipe = Mock()
+        pipe.execute = AsyncMock(return_value=[b"worker-a", b"7"])
+        redis_client.pipeline = Mock(return_value=pipe)
+        assert await manager.filter_fenced([sample_schedule]) == [sample_schedule]
+        
+        # Another worker took the partition over and bumped the fencing token
+        pipe.execute = AsyncMock(return_value=[b"worker-b", b"8"])
+        assert await manager.filter_fenced([sample_schedule]) == []
+        assert partition not in manager.owned
+
+
+class TestDueQueueScheduler:
+    """Test the scheduler worker's change-event listener."""
+    
+    @pytest.mark.asyncio
+    async def test_listener_restarts_and_forces_reload(self):
+        from workers.scheduler_worker import DueQueueScheduler
+        
+        scheduler = DueQueueScheduler()
+        scheduler._last_recovery = 123.0
+        calls = []
+        
+        async def listen():
+            calls.append(1)
+            if len(calls) == 1:
+                raise ConnectionError("redis went away")
+            await asyncio.Event().wait()
+        
+        scheduler._listen = listen
+        yield_to_loop = asyncio.sleep
+        with patch('workers.scheduler_worker.asyncio.sleep', AsyncMock()):
+            task = asyncio.create_task(scheduler._supervise_listener())
+            for _ in range(5):
+                await yield_to_loop(0)
+            task.cancel()
+        
+        assert len(calls) == 2
+        assert scheduler._last_recovery == 0.0
+
+
+class TestScheduleEndpoints:
+    """Test that rescheduling and cancelling are scoped to the caller's org."""
+    
+    @pytest.fixture
+    def schedule_db(self):
+        from sqlalchemy import create_engine
+        
+        engine = create_engine("sqlite:///:memory:")
+        Schedule.__table__.create(engine)
+        with Session(engine) as db:
+            db.add_all([
+                Schedule(id="own", org_id="1", content_item_id="c-1", channel_id="ch-1",
+                         scheduled_at=datetime(2026, 5, 1, 9), status=ContentStatus.scheduled),
+                Schedule(id="other", org_id="2", content_item_id="c-2", channel_id="ch-2",
+                         scheduled_at=datetime(2026, 5, 1, 9), status=ContentStatus.scheduled),
+            ])
+            db.commit()
+            yield db
+    
+    @pytest.mark.asyncio
+    async def test_only_own_org_schedules_can_be_changed(self, schedule_db):
+        from fastapi import HTTPException
+        from app.api.v1 import schedule as schedule_api
+        
+        user = Mock(organization_id=1)
+        with patch.object(schedule_api, '_notify_workers', AsyncMock()) as notify:
+            moved = await schedule_api.reschedule(
+                "own", schedule_api.RescheduleIn(scheduled_for=datetime(2026, 5, 2, 9)), schedule_db, user
+            )
+            for call in (
+                schedule_api.reschedule("other", schedule_api.RescheduleIn(scheduled_for=datetime(2026, 5, 2, 9)), schedule_db, user),
+                schedule_api.cancel("other", schedule_db, user),
+            ):
+                with pytest.raises(HTTPException) as exc:
+                    await call
+                assert exc.value.status_code == 404
+            cancelled = await schedule_api.cancel("own", schedule_db, user)
+        
+        assert moved["scheduled_at"] == "2026-05-02T09:00:00" and cancelled["cancelled"]
+        assert schedule_db.get(Schedule, "other").status == ContentStatus.scheduled
+        assert notify.await_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_redis_client_is_shared_across_requests(self):
+        from app.api.v1 import schedule as schedule_api
+        
+        with patch.object(schedule_api, '_redis_client', None):
+            assert await schedule_api.get_redis_client() is await schedule_api.get_redis_client()
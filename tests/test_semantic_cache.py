@@ -0,0 +1,66 @@
+"""Tests for the semantic (embedding similarity) AI cache."""
+
+import pytest
+
+from app.cache.semantic import SemanticCache, VectorIndex
+
+VECTORS = {
+    "Write hashtags for our summer sale": [1.0, 0.0, 0.1],
+    "Write some hashtags for the summer sale": [1.0, 0.0, 0.15],
+    "Write a CTA for our webinar": [0.0, 1.0, 0.0],
+}
+
+
+async def _embed(text):
+    return VECTORS[text]
+
+
+@pytest.mark.asyncio
+async def test_reworded_prompt_matches_above_threshold():
+    """Test that a near-duplicate prompt resolves to the earlier cache key."""
+    cache = SemanticCache(_embed, thresholds={"hashtags": 0.9})
+    scope = ("org-1", "sys")
+
+    key, vector = await cache.lookup("hashtags", scope, "Write hashtags for our summer sale")
+    assert key is None
+    cache.remember("hashtags", scope, vector, "ai:hashtags:abc")
+
+    key, _ = await cache.lookup("hashtags", scope, "Write some hashtags for the summer sale")
+    assert key == "ai:hashtags:abc"
+
+    key, _ = await cache.lookup("hashtags", scope, "Write a CTA for our webinar")
+    assert key is None
+
+
+@pytest.mark.asyncio
+async def test_matches_do_not_cross_org_scope():
+    """Test that one organization's prompts never match another's."""
+    cache = SemanticCache(_embed, default_threshold=0.9)
+    _, vector = await cache.lookup("hashtags", ("org-1", "sys"), "Write hashtags for our summer sale")
+    cache.remember("hashtags", ("org-1", "sys"), vector, "ai:hashtags:abc")
+
+    key, _ = await cache.lookup("hashtags", ("org-2", "sys"), "Write hashtags for our summer sale")
+
+    assert key is None
+
+
+def test_index_drops_oldest_entry_when_full():
+    """Test that the vector index stays bounded."""
+    index = VectorIndex(max_entries=2)
+    index.add([1.0, 0.0], "a")
+    index.add([0.0, 1.0], "b")
+    index.add([1.0, 1.0], "c")
+
+    assert len(index) == 2
+    assert index.search([1.0, 0.0])[0] == "c"
+
+
+def test_least_recently_used_scope_is_dropped():
+    """Test that the number of per-scope indexes stays bounded."""
+    cache = SemanticCache(embed=None, max_scopes=2)
+    cache.remember("hashtags", ("org-1", "sys"), [1.0, 0.0], "a")
+    cache.remember("hashtags", ("org-2", "sys"), [1.0, 0.0], "b")
+    cache.remember("hashtags", ("org-1", "sys"), [0.0, 1.0], "c")
+    cache.remember("hashtags", ("org-3", "sys"), [1.0, 0.0], "d")
+
+    assert list(cache._indexes) == [("hashtags", ("org-1", "sys")), ("hashtags", ("org-3", "sys"))]
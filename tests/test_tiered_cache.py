@@ -0,0 +1,61 @@
+"""Tests for the two-tier AI generation cache."""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from app.cache.tiered import LRUCache, TieredCache
+
+
+def _shared(raw=None):
+    return Mock(get_raw=AsyncMock(return_value=raw), set_raw=AsyncMock(return_value=True))
+
+
+def test_lru_evicts_least_recently_used():
+    """Test that the LRU keeps recently read entries and drops the oldest."""
+    lru = LRUCache(max_entries=2)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    lru.get("a")
+    lru.set("c", 3)
+
+    assert lru.get("a") == 1
+    assert lru.get("b") is None
+    assert lru.get("c") == 3
+
+
+@pytest.mark.asyncio
+async def test_redis_hit_is_served_locally_afterwards():
+    """Test that a Redis hit populates the LRU and is counted per task."""
+    shared = _shared(json.dumps({"text": "#tags"}))
+    tiered = TieredCache(shared)
+
+    assert await tiered.get("ai_generation", "k", task="hashtags") == {"text": "#tags"}
+    assert await tiered.get("ai_generation", "k", task="hashtags") == {"text": "#tags"}
+
+    stats = tiered.stats["hashtags"]
+    assert shared.get_raw.await_count == 1
+    assert (stats.redis_hits, stats.local_hits, stats.misses) == (1, 1, 0)
+    assert stats.bytes_read == len(json.dumps({"text": "#tags"}))
+
+
+@pytest.mark.asyncio
+async def test_single_flight_coalesces_concurrent_calls():
+    """Test that concurrent identical computations run once."""
+    tiered = TieredCache(_shared())
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "cta"
+
+    results = await asyncio.gather(*(tiered.single_flight("k", compute, task="cta") for _ in range(5)))
+
+    assert calls == 1
+    assert [value for value, _ in results] == ["cta"] * 5
+    assert sum(shared for _, shared in results) == 4
+    assert tiered.stats["cta"].coalesced == 4
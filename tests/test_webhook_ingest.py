@@ -0,0 +1,110 @@
+"""Tests for the inbound webhook stream consumer and batch applier."""
+
+import asyncio
+import hashlib
+import hmac
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker
+
+import app.models.entities  # noqa: F401  (registers the tables referenced by foreign keys)
+from app.models.analytics import AnalyticsRollup, PostMetrics
+from app.models.publishing import ExternalReference, PlatformType, PublishingStatus
+from app.services.webhook_ingest import WebhookBatchApplier, parse_meta_events, unique_events, verify_hub_signature
+from workers import webhook_ingest_worker
+from workers.webhook_ingest_worker import WebhookIngestWorker
+
+
+def _body(*changes, entry_time=1700000000):
+    return json.dumps({"object": "page", "entry": [{"id": "page-1", "time": entry_time, "changes": list(changes)}]})
+
+
+FEED = {"field": "feed", "value": {"post_id": "fb-1", "impressions": 100, "reach": 80, "engagements": 8}}
+FEED_LATER = {"field": "feed", "value": {"post_id": "fb-1", "impressions": 250, "reach": 200, "engagements": 20}}
+COMMENT = {"field": "comments", "value": {"post_id": "fb-1", "id": "c-1", "message": "nice", "from": {"name": "Ana"}}}
+LIKES = {"field": "likes", "value": {"post_id": "fb-1", "like_count": 12}}
+UNKNOWN_POST = {"field": "feed", "value": {"post_id": "fb-404", "impressions": 5}}
+
+
+class FakeStream:
+    """The parts of ``WebhookStream`` the worker uses, held in memory."""
+
+    def __init__(self):
+        self.applied = set()
+        self.acked = []
+
+    async def seen(self, event_ids):
+        return [event_id for event_id in event_ids if event_id in self.applied]
+
+    async def mark_seen(self, event_ids):
+        self.applied.update(event_ids)
+
+    async def ack(self, entry_ids):
+        self.acked.extend(entry_ids)
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite:///:memory:")
+    for model in (ExternalReference, PostMetrics, AnalyticsRollup):
+        model.__table__.create(engine)
+    with engine.begin() as conn:
+        conn.execute(ExternalReference.__table__.insert(), [{
+            "id": 1, "organization_id": 1, "platform": PlatformType.FACEBOOK, "external_id": "fb-1",
+            "status": PublishingStatus.PUBLISHED, "platform_data": {"campaign_id": "spring"},
+            "created_at": datetime.utcnow(),
+        }])
+    return sessionmaker(bind=engine)
+
+
+def test_signature_and_stable_event_ids():
+    """Test raw-body signatures and that redelivered bodies dedupe to the same events."""
+    body = _body(FEED, COMMENT).encode()
+    signature = "sha256=" + hmac.new(b"secret", body, hashlib.sha256).hexdigest()
+    assert verify_hub_signature(body, signature, "secret")
+    assert not verify_hub_signature(body + b" ", signature, "secret")
+    assert not verify_hub_signature(body, signature, None)
+
+    first, redelivered = parse_meta_events(body.decode()), parse_meta_events(body.decode())
+    assert [e.event_id for e in first] == [e.event_id for e in redelivered]
+    assert len({e.event_id for e in first}) == 2
+    assert unique_events(first + redelivered) == first
+    assert unique_events(first, seen=[first[0].event_id]) == first[1:]
+
+
+def test_batch_applies_in_one_transaction(session_factory):
+    """Test that a batch writes each post once, merges its metrics and commits once."""
+    events = parse_meta_events(_body(FEED, COMMENT, LIKES, UNKNOWN_POST)) + parse_meta_events(_body(FEED_LATER, COMMENT, entry_time=1700000060))
+    db = session_factory()
+    commits = []
+    event.listen(db, "after_commit", lambda session: commits.append(1))
+
+    result = WebhookBatchApplier(db).apply(events)
+
+    assert result == {"events": 6, "posts": 1, "metric_rows": 1}
+    assert len(commits) == 1
+    platform_data = db.execute(select(ExternalReference.__table__.c.platform_data)).scalar()
+    assert (platform_data["comment_count"], platform_data["like_count"]) == (1, 12)
+    metrics = db.execute(select(PostMetrics.__table__)).one()
+    assert (metrics.impressions, metrics.engagements, metrics.engagement_rate, metrics.data_source) == (250, 20, 10.0, "webhook")
+    rollups = db.execute(select(AnalyticsRollup.__table__.c.campaign_id, AnalyticsRollup.__table__.c.impressions)).all()
+    assert rollups == [("spring", 250), ("spring", 250)]
+
+
+def test_worker_acks_and_skips_redeliveries(session_factory, monkeypatch):
+    """Test that a redelivered body is acked without being applied twice."""
+    monkeypatch.setattr(webhook_ingest_worker, "SessionLocal", session_factory)
+    stream = FakeStream()
+    worker = WebhookIngestWorker(stream, consumer="test")
+    entry = {"platform": "meta", "body": _body(FEED, LIKES)}
+
+    applied = asyncio.run(worker.process_batch([("1-0", entry), ("2-0", entry)]))
+    redelivered = asyncio.run(worker.process_batch([("3-0", entry)]))
+
+    assert (applied, redelivered) == (2, 0)
+    assert stream.acked == ["1-0", "2-0", "3-0"]
+    with session_factory() as db:
+        assert db.execute(select(PostMetrics.__table__.c.id)).all() == [(1,)]
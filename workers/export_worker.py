@@ -1,20 +1,35 @@
 """
 Export worker for processing data warehouse exports.
+
+Exports are incremental: each table is read in keyset order on its watermark
+column (``updated_at``, so changed rows are exported again) and id, starting after the high-watermark stored for the org, target
+and destination, and shipped in Parquet chunks. Warehouse targets stage the
+chunks with load jobs (BigQuery) or PUT/COPY INTO (Snowflake) and then MERGE
+the staging table into the target on its primary key, so re-exported rows
+are upserted rather than duplicated. The watermark only advances once a
+table has been merged.
 """
 
 import logging
-import json
-from datetime import datetime
-from typing import Dict, Any, List
+import csv
+from abc import ABC, abstractmethod
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from uuid import uuid4
 import asyncio
 
+from sqlalchemy import select, and_, or_
 from sqlalchemy.orm import Session
+from app.core.config import get_settings
 from app.db.session import get_db
-from app.models.exports import ExportJob, ExportStatus, ExportTarget, EXPORT_TABLES
+from app.models.exports import ExportJob, ExportStatus, ExportTarget, ExportWatermark, EXPORT_TABLES
 from app.models.content import Schedule
 from app.models.post_metrics import PostMetrics
-from app.models.conversations import Conversation
-from app.models.entities import Organization
+from app.utils.export_streams import arrow_schema, write_parquet_file
 
 logger = logging.getLogger(__name__)
 
@@ -22,326 +37,389 @@ logger = logging.getLogger(__name__)
 async def process_export_job(job_id: str):
     """Process an export job."""
     db = next(get_db())
-    
+    settings = get_settings()
+
     try:
         # Get the export job
         export_job = db.query(ExportJob).filter(ExportJob.id == job_id).first()
         if not export_job:
             logger.error(f"Export job {job_id} not found")
             return
-        
+
         # Update status to running
         export_job.status = ExportStatus.running
         export_job.started_at = datetime.utcnow()
         db.commit()
-        
+
         logger.info(f"Starting export job {job_id} for target {export_job.target}")
-        
+
         # Get target configuration
         target_config = export_job.get_target_config()
         tables = export_job.get_tables()
-        
+        full_refresh = bool(target_config.get("full_refresh"))
+
         # Process each table
-        total_records = 0
         exported_records = 0
-        
-        for i, table_name in enumerate(tables):
-            try:
-                export_job.current_table = table_name
-                export_job.progress_percent = int((i / len(tables)) * 100)
-                db.commit()
-                
-                logger.info(f"Exporting table {table_name}")
-                
-                # Get table data
-                table_data = await get_table_data(table_name, export_job.org_id, db)
-                total_records += len(table_data)
-                
-                if not table_data:
-                    logger.warning(f"No data found for table {table_name}")
-                    continue
-                
-                # Export to target
-                success = await export_to_target(
-                    export_job.target,
-                    target_config,
-                    table_name,
-                    table_data,
-                    EXPORT_TABLES[table_name]["schema"]
-                )
-                
-                if success:
-                    exported_records += len(table_data)
-                    logger.info(f"Successfully exported {len(table_data)} records from {table_name}")
-                else:
-                    logger.error(f"Failed to export table {table_name}")
+
+        sink = create_export_sink(export_job.target, target_config)
+        try:
+            for i, table_name in enumerate(tables):
+                try:
+                    export_job.current_table = table_name
+                    export_job.progress_percent = int((i / len(tables)) * 100)
+                    db.commit()
+
+                    logger.info(f"Exporting table {table_name}")
+
+                    exported = export_table_incremental(
+                        db,
+                        export_job,
+                        sink,
+                        table_name,
+                        full_refresh=full_refresh,
+                        chunk_rows=settings.export_chunk_rows,
+                        lag_seconds=settings.export_watermark_lag_seconds
+                    )
+                    exported_records += exported
+                    export_job.records_exported = exported_records
+                    export_job.total_records = exported_records
+                    db.commit()
+
+                    logger.info(f"Exported {exported} new records from {table_name}")
+
+                except Exception as e:
+                    logger.error(f"Error exporting table {table_name}: {e}")
+                    db.rollback()
                     export_job.status = ExportStatus.failed
-                    export_job.error_message = f"Failed to export table {table_name}"
+                    export_job.error_message = f"Error exporting table {table_name}: {str(e)}"
                     break
-                
-            except Exception as e:
-                logger.error(f"Error exporting table {table_name}: {e}")
-                export_job.status = ExportStatus.failed
-                export_job.error_message = f"Error exporting table {table_name}: {str(e)}"
-                break
-        
+        finally:
+            sink.close()
+
         # Update final status
         if export_job.status == ExportStatus.running:
             export_job.status = ExportStatus.completed
             export_job.progress_percent = 100
-            export_job.records_exported = exported_records
-            export_job.total_records = total_records
             export_job.finished_at = datetime.utcnow()
-            
-            logger.info(f"Export job {job_id} completed successfully. Exported {exported_records}/{total_records} records")
-        
+
+            logger.info(f"Export job {job_id} completed successfully. Exported {exported_records} records")
+
         db.commit()
-        
+
     except Exception as e:
         logger.error(f"Error processing export job {job_id}: {e}")
-        
+
         # Update job status to failed
         export_job.status = ExportStatus.failed
         export_job.error_message = str(e)
         export_job.finished_at = datetime.utcnow()
         db.commit()
-        
+
     finally:
         db.close()
 
 
-async def get_table_data(table_name: str, org_id: str, db: Session) -> List[Dict[str, Any]]:
-    """Get data for a specific table."""
-    try:
-        if table_name == "schedules":
-            return await get_schedules_data(org_id, db)
-        elif table_name == "post_metrics":
-            return await get_post_metrics_data(org_id, db)
-        elif table_name == "conversations":
-            return await get_conversations_data(org_id, db)
-        elif table_name == "ad_metrics":
-            return await get_ad_metrics_data(org_id, db)
-        else:
-            logger.error(f"Unknown table: {table_name}")
-            return []
-    
-    except Exception as e:
-        logger.error(f"Error getting data for table {table_name}: {e}")
-        return []
-
-
-async def get_schedules_data(org_id: str, db: Session) -> List[Dict[str, Any]]:
-    """Get schedules data for export."""
-    schedules = db.query(Schedule).filter(Schedule.org_id == org_id).all()
-    
-    data = []
-    for schedule in schedules:
-        data.append({
-            "id": schedule.id,
-            "org_id": schedule.org_id,
-            "content_item_id": schedule.content_item_id,
-            "channel_id": schedule.channel_id,
-            "scheduled_at": schedule.scheduled_at.isoformat() if schedule.scheduled_at else None,
-            "status": schedule.status.value if schedule.status else None,
-            "error_message": schedule.error_message,
-            "created_at": schedule.created_at.isoformat() if schedule.created_at else None
-        })
-    
-    return data
-
-
-async def get_post_metrics_data(org_id: str, db: Session) -> List[Dict[str, Any]]:
-    """Get post metrics data for export."""
-    # Get metrics for schedules belonging to the org
-    metrics = db.query(PostMetrics).join(Schedule).filter(Schedule.org_id == org_id).all()
-    
-    data = []
-    for metric in metrics:
-        data.append({
-            "id": metric.id,
-            "schedule_id": metric.schedule_id,
-            "impressions": metric.impressions,
-            "reach": metric.reach,
-            "likes": metric.likes,
-            "comments": metric.comments,
-            "shares": metric.shares,
-            "clicks": metric.clicks,
-            "video_views": metric.video_views,
-            "saves": metric.saves,
-            "cost_cents": metric.cost_cents,
-            "fetched_at": metric.fetched_at.isoformat() if metric.fetched_at else None,
-            "created_at": metric.created_at.isoformat() if metric.created_at else None
-        })
-    
-    return data
-
-
-async def get_conversations_data(org_id: str, db: Session) -> List[Dict[str, Any]]:
-    """Get conversations data for export."""
-    # This would need to be implemented based on your conversations model
-    # For now, return empty list
-    return []
-
-
-async def get_ad_metrics_data(org_id: str, db: Session) -> List[Dict[str, Any]]:
-    """Get ad metrics data for export."""
-    # This would need to be implemented based on your ad metrics model
-    # For now, return empty list
-    return []
-
-
-async def export_to_target(
-    target: ExportTarget,
-    target_config: Dict[str, Any],
-    table_name: str,
-    data: List[Dict[str, Any]],
-    schema: Dict[str, str]
-) -> bool:
-    """Export data to the specified target."""
-    try:
-        if target == ExportTarget.bigquery:
-            return await export_to_bigquery(target_config, table_name, data, schema)
-        elif target == ExportTarget.snowflake:
-            return await export_to_snowflake(target_config, table_name, data, schema)
-        elif target == ExportTarget.s3:
-            return await export_to_s3(target_config, table_name, data, schema)
-        elif target == ExportTarget.csv:
-            return await export_to_csv(target_config, table_name, data, schema)
-        else:
-            logger.error(f"Unknown export target: {target}")
-            return False
-    
-    except Exception as e:
-        logger.error(f"Error exporting to {target}: {e}")
-        return False
+def table_source(table_name: str, org_id: str):
+    """
+    Select an org's rows for an export table, with columns in schema order
+    followed by the table's watermark column.
+
+    Returns ``(statement, watermark column, id column)``, or None for tables
+    that have no backing model yet. Core columns are used so rows come back
+    as plain tuples rather than tracked ORM objects.
+    """
+    spec = EXPORT_TABLES[table_name]
+    columns = list(spec["schema"])
+    schedules = Schedule.__table__
+
+    if table_name == "schedules":
+        watermark = schedules.c[spec["watermark_column"]]
+        stmt = select(*[schedules.c[name] for name in columns], watermark).where(schedules.c.org_id == org_id)
+        return stmt, watermark, schedules.c.id
+
+    if table_name == "post_metrics":
+        metrics = PostMetrics.__table__
+        watermark = metrics.c[spec["watermark_column"]]
+        stmt = (
+            select(*[metrics.c[name] for name in columns], watermark)
+            .select_from(metrics.join(schedules, metrics.c.schedule_id == schedules.c.id))
+            .where(schedules.c.org_id == org_id)
+        )
+        return stmt, watermark, metrics.c.id
+
+    # conversations and ad_metrics are not backed by a model yet
+    return None
 
 
-async def export_to_bigquery(
-    target_config: Dict[str, Any],
+def iter_table_chunks(
+    db: Session,
+    stmt,
+    watermark_column,
+    id_column,
+    after: Optional[Tuple[datetime, str]],
+    chunk_rows: int
+) -> Iterator[List[Tuple[Any, ...]]]:
+    """Yield rows in keyset order on (watermark column, id), starting after ``after``."""
+    stmt = stmt.order_by(watermark_column, id_column).limit(chunk_rows)
+    while True:
+        page = stmt
+        if after is not None:
+            page = page.where(or_(
+                watermark_column > after[0],
+                and_(watermark_column == after[0], id_column > after[1])
+            ))
+        rows = db.execute(page).all()
+        if not rows:
+            return
+        yield [tuple(value.value if isinstance(value, Enum) else value for value in row) for row in rows]
+        if len(rows) < chunk_rows:
+            return
+        last = rows[-1]._mapping
+        after = (last[watermark_column.name], last[id_column.name])
+
+
+def export_table_incremental(
+    db: Session,
+    export_job: ExportJob,
+    sink: "ExportSink",
     table_name: str,
-    data: List[Dict[str, Any]],
-    schema: Dict[str, str]
-) -> bool:
-    """Export data to BigQuery."""
-    try:
+    full_refresh: bool = False,
+    chunk_rows: int = 50000,
+    lag_seconds: int = 300
+) -> int:
+    """Export rows added or changed since the table's watermark and advance it. Returns rows exported."""
+    spec = EXPORT_TABLES[table_name]
+    source = table_source(table_name, export_job.org_id)
+    if source is None:
+        logger.warning(f"No data source for table {table_name}")
+        return 0
+    stmt, watermark_column, id_column = source
+
+    watermarks = ExportWatermark.__table__
+    key = and_(
+        watermarks.c.org_id == export_job.org_id,
+        watermarks.c.target == export_job.target,
+        watermarks.c.destination == sink.destination,
+        watermarks.c.table_name == table_name
+    )
+    watermark = db.execute(
+        select(watermarks.c.id, watermarks.c.watermark_value, watermarks.c.watermark_id).where(key)
+    ).first()
+    after = None
+    if watermark and not full_refresh:
+        after = (watermark.watermark_value, watermark.watermark_id)
+
+    # Rows newer than the lag may still have concurrent transactions committing behind them
+    stmt = stmt.where(watermark_column <= datetime.utcnow() - timedelta(seconds=lag_seconds))
+
+    columns = list(spec["schema"])
+    id_index = columns.index(spec["primary_key"])
+
+    exported = 0
+    last_row = None
+    for chunk_index, rows in enumerate(
+        iter_table_chunks(db, stmt, watermark_column, id_column, after, chunk_rows)
+    ):
+        # The trailing watermark column is only read here, not exported
+        sink.write_chunk(table_name, columns, [row[:-1] for row in rows], spec["schema"], first=chunk_index == 0)
+        exported += len(rows)
+        last_row = rows[-1]
+
+    if last_row is None:
+        logger.info(f"No new rows for table {table_name}")
+        return 0
+
+    sink.finish(table_name, spec["schema"], spec["primary_key"])
+
+    values = {
+        "watermark_value": last_row[-1],
+        "watermark_id": str(last_row[id_index]),
+        "last_job_id": export_job.id,
+        "updated_at": datetime.utcnow()
+    }
+    if watermark is None:
+        db.execute(watermarks.insert().values(
+            id=str(uuid4()),
+            org_id=export_job.org_id,
+            target=export_job.target,
+            destination=sink.destination,
+            table_name=table_name,
+            **values
+        ))
+    else:
+        db.execute(watermarks.update().where(watermarks.c.id == watermark.id).values(**values))
+    db.commit()
+
+    return exported
+
+
+class ExportSink(ABC):
+    """Receives a table's rows chunk by chunk and commits them to an export target."""
+
+    destination = ""
+
+    @abstractmethod
+    def write_chunk(
+        self,
+        table_name: str,
+        columns: List[str],
+        rows: List[Tuple[Any, ...]],
+        schema: Dict[str, str],
+        first: bool
+    ) -> None:
+        """Write one chunk of rows; ``first`` starts the table afresh."""
+
+    def finish(self, table_name: str, schema: Dict[str, str], primary_key: str) -> None:
+        """Called once all of a table's chunks have been written."""
+
+    def close(self) -> None:
+        pass
+
+
+class ParquetChunkSink(ExportSink):
+    """Base for sinks that ship each chunk as a temporary Parquet file."""
+
+    def __init__(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="export_")
+
+    def _write_parquet(self, table_name: str, columns: List[str], rows: List[Tuple[Any, ...]], schema: Dict[str, str]) -> str:
+        file_path = os.path.join(self.temp_dir, f"{table_name}_{uuid4().hex}.parquet")
+        write_parquet_file(file_path, columns, rows, arrow_schema(schema))
+        return file_path
+
+    def close(self) -> None:
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+class BigQuerySink(ParquetChunkSink):
+    """Load jobs into a staging table, then MERGE into the target table."""
+
+    def __init__(self, target_config: Dict[str, Any]):
+        super().__init__()
         from app.integrations.bigquery import create_bigquery_exporter
-        
-        exporter = create_bigquery_exporter(target_config)
-        
-        dataset_id = target_config.get("dataset_id", "vantage_ai")
-        success = exporter.export_table(dataset_id, table_name, data, schema)
-        
-        return success
-    
-    except Exception as e:
-        logger.error(f"Error exporting to BigQuery: {e}")
-        return False
 
+        self.exporter = create_bigquery_exporter(target_config)
+        self.dataset_id = target_config.get("dataset_id", "vantage_ai")
+        self.destination = self.dataset_id
+        if not self.exporter.create_dataset(self.dataset_id):
+            raise RuntimeError(f"Could not create BigQuery dataset {self.dataset_id}")
 
-async def export_to_snowflake(
-    target_config: Dict[str, Any],
-    table_name: str,
-    data: List[Dict[str, Any]],
-    schema: Dict[str, str]
-) -> bool:
-    """Export data to Snowflake."""
-    try:
+    def write_chunk(self, table_name, columns, rows, schema, first):
+        file_path = self._write_parquet(table_name, columns, rows, schema)
+        try:
+            self.exporter.load_parquet_chunk(
+                self.dataset_id, f"{table_name}__staging", file_path, schema, truncate=first
+            )
+        finally:
+            os.remove(file_path)
+
+    def finish(self, table_name, schema, primary_key):
+        self.exporter.merge_table(self.dataset_id, table_name, f"{table_name}__staging", schema, primary_key)
+
+
+class SnowflakeSink(ParquetChunkSink):
+    """PUT/COPY INTO a staging table, then MERGE into the target table."""
+
+    def __init__(self, target_config: Dict[str, Any]):
+        super().__init__()
         from app.integrations.snowflake import create_snowflake_exporter
-        
-        exporter = create_snowflake_exporter(target_config)
-        
-        database_name = target_config.get("database", "VANTAGE_AI")
-        schema_name = target_config.get("schema", "PUBLIC")
-        
-        success = exporter.export_table(database_name, schema_name, table_name, data, schema)
-        exporter.close()
-        
-        return success
-    
-    except Exception as e:
-        logger.error(f"Error exporting to Snowflake: {e}")
-        return False
 
+        self.exporter = create_snowflake_exporter(target_config)
+        self.database_name = target_config.get("database", "VANTAGE_AI")
+        self.schema_name = target_config.get("schema", "PUBLIC")
+        self.destination = f"{self.database_name}.{self.schema_name}"
+        if not (
+            self.exporter.create_database(self.database_name)
+            and self.exporter.create_schema(self.database_name, self.schema_name)
+        ):
+            raise RuntimeError(f"Could not create Snowflake schema {self.destination}")
 
-async def export_to_s3(
-    target_config: Dict[str, Any],
-    table_name: str,
-    data: List[Dict[str, Any]],
-    schema: Dict[str, str]
-) -> bool:
-    """Export data to S3."""
-    try:
+    def write_chunk(self, table_name, columns, rows, schema, first):
+        file_path = self._write_parquet(table_name, columns, rows, schema)
+        try:
+            self.exporter.load_parquet_chunk(
+                self.database_name, self.schema_name, f"{table_name}__staging", file_path, schema, truncate=first
+            )
+        finally:
+            os.remove(file_path)
+
+    def finish(self, table_name, schema, primary_key):
+        self.exporter.merge_table(
+            self.database_name, self.schema_name, table_name, f"{table_name}__staging", schema, primary_key
+        )
+
+    def close(self) -> None:
+        self.exporter.close()
+        super().close()
+
+
+class S3Sink(ParquetChunkSink):
+    """Upload each chunk as a Parquet object under a dated prefix."""
+
+    def __init__(self, target_config: Dict[str, Any]):
+        super().__init__()
         import boto3
-        import pandas as pd
-        import io
-        
-        # Create S3 client
-        s3_client = boto3.client(
+
+        self.s3_client = boto3.client(
             's3',
             aws_access_key_id=target_config["access_key_id"],
             aws_secret_access_key=target_config["secret_access_key"],
             region_name=target_config["region"]
         )
-        
-        # Convert data to CSV
-        df = pd.DataFrame(data)
-        csv_buffer = io.StringIO()
-        df.to_csv(csv_buffer, index=False)
-        
-        # Upload to S3
-        bucket = target_config["bucket"]
-        key = f"exports/{table_name}/{datetime.utcnow().strftime('%Y/%m/%d')}/{table_name}.csv"
-        
-        s3_client.put_object(
-            Bucket=bucket,
-            Key=key,
-            Body=csv_buffer.getvalue(),
-            ContentType='text/csv'
-        )
-        
-        logger.info(f"Successfully uploaded {table_name} to S3: s3://{bucket}/{key}")
-        return True
-    
-    except Exception as e:
-        logger.error(f"Error exporting to S3: {e}")
-        return False
+        self.bucket = target_config["bucket"]
+        self.destination = self.bucket
+        self.run_id = datetime.utcnow().strftime('%Y%m%dT%H%M%S')
+        self.parts: Dict[str, int] = {}
 
+    def write_chunk(self, table_name, columns, rows, schema, first):
+        part = self.parts[table_name] = self.parts.get(table_name, 0) + 1
+        key = f"exports/{table_name}/{datetime.utcnow().strftime('%Y/%m/%d')}/{self.run_id}-{part:05d}.parquet"
+        file_path = self._write_parquet(table_name, columns, rows, schema)
+        try:
+            self.s3_client.upload_file(file_path, self.bucket, key)
+        finally:
+            os.remove(file_path)
+        logger.info(f"Uploaded {len(rows)} {table_name} rows to s3://{self.bucket}/{key}")
 
-async def export_to_csv(
-    target_config: Dict[str, Any],
-    table_name: str,
-    data: List[Dict[str, Any]],
-    schema: Dict[str, str]
-) -> bool:
-    """Export data to CSV file."""
-    try:
-        import pandas as pd
-        import os
-        
-        # Create output directory
-        output_dir = target_config.get("output_dir", "/tmp/exports")
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # Convert data to CSV
-        df = pd.DataFrame(data)
-        file_path = os.path.join(output_dir, f"{table_name}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.csv")
-        df.to_csv(file_path, index=False)
-        
-        logger.info(f"Successfully exported {table_name} to CSV: {file_path}")
-        return True
-    
-    except Exception as e:
-        logger.error(f"Error exporting to CSV: {e}")
-        return False
+
+class CSVSink(ExportSink):
+    """Append each chunk to one CSV file per table per run."""
+
+    def __init__(self, target_config: Dict[str, Any]):
+        self.output_dir = target_config.get("output_dir", "/tmp/exports")
+        self.destination = self.output_dir
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.run_id = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+
+    def write_chunk(self, table_name, columns, rows, schema, first):
+        file_path = os.path.join(self.output_dir, f"{table_name}_{self.run_id}.csv")
+        with open(file_path, "w" if first else "a", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            if first:
+                writer.writerow(columns)
+            writer.writerows(rows)
+
+
+def create_export_sink(target: ExportTarget, target_config: Dict[str, Any]) -> ExportSink:
+    """Create the chunk sink for an export target."""
+    if target == ExportTarget.bigquery:
+        return BigQuerySink(target_config)
+    elif target == ExportTarget.snowflake:
+        return SnowflakeSink(target_config)
+    elif target == ExportTarget.s3:
+        return S3Sink(target_config)
+    elif target == ExportTarget.csv:
+        return CSVSink(target_config)
+    raise ValueError(f"Unknown export target: {target}")
 
 
 if __name__ == "__main__":
     # This can be run as a standalone worker
     import sys
-    
+
     if len(sys.argv) != 2:
         print("Usage: python export_worker.py <job_id>")
         sys.exit(1)
-    
+
     job_id = sys.argv[1]
     asyncio.run(process_export_job(job_id))
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 import asyncio
+import json
 import logging
+import time
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 
-from sqlalchemy import select, and_, func
+import redis.asyncio as redis
+from sqlalchemy import select, and_, or_, func, update, bindparam
 from sqlalchemy.orm import Session
 from sqlalchemy.dialects.postgresql import insert
 
@@ -15,6 +18,7 @@ from app.models.entities import Channel
 from app.models.external_refs import ScheduleExternal
 from app.models.post_metrics import PostMetrics
 from app.services.insights_mapper import InsightsMapper
+from app.services.insights_poll_queue import INSIGHTS_ACTIVITY_CHANNEL, InsightsPollQueue, PollPolicy
 from app.integrations.meta_insights import MetaInsightsFetcher
 from app.integrations.linkedin_insights import LinkedInInsightsFetcher
 from app.core.config import get_settings
@@ -31,10 +35,63 @@ class InsightsPoller:
         self.insights_mapper = InsightsMapper()
         self.meta_fetcher = MetaInsightsFetcher()
         self.linkedin_fetcher = LinkedInInsightsFetcher()
+        self.queue = InsightsPollQueue(PollPolicy.from_settings())
+        self._wakeup = asyncio.Event()
+        self._activity: set = set()  # Bumped posts not yet in the queue, loaded on the next cycle
+    
+    def _tracked_posts_query(
+        self,
+        schedule_id: Optional[str] = None,
+        due_before: Optional[datetime] = None,
+        include: Sequence[str] = ()
+    ):
+        """
+        Posted schedules young enough to poll, with their external refs,
+        channel credentials, stored next poll time and when metrics were
+        last fetched.
+        
+        With ``due_before`` only posts never polled or due by then are
+        selected (plus ``include``, posts the queue has made due early),
+        using the ``next_poll_at`` index. Which of them are actually fetched
+        is decided by the poll queue.
+        """
+        last_polled = (
+            select(func.max(PostMetrics.fetched_at))
+            .where(PostMetrics.schedule_id == Schedule.id)
+            .scalar_subquery()
+        )
+        stmt = (
+            select(
+                Schedule.id.label("schedule_id"),
+                Schedule.scheduled_at.label("posted_at"),
+                last_polled.label("last_polled_at"),
+                ScheduleExternal.next_poll_at,
+                ScheduleExternal.ref_id,
+                ScheduleExternal.provider,
+                Channel.access_token,
+                Channel.account_ref,
+            )
+            .join(ScheduleExternal, ScheduleExternal.schedule_id == Schedule.id)
+            .join(Channel, Channel.id == Schedule.channel_id)
+            .where(
+                and_(
+                    Schedule.status == ContentStatus.posted,
+                    Schedule.scheduled_at >= datetime.utcnow() - timedelta(days=self.settings.insights_poll_max_age_days)
+                )
+            )
+        )
+        if schedule_id:
+            stmt = stmt.where(Schedule.id == schedule_id)
+        if due_before is not None:
+            due = [ScheduleExternal.next_poll_at.is_(None), ScheduleExternal.next_poll_at <= due_before]
+            if include:
+                due.append(Schedule.id.in_(include))
+            stmt = stmt.where(or_(*due))
+        return stmt
     
     async def poll_insights_once(self, db: Session) -> int:
         """
-        Poll insights for all eligible schedules once.
+        Poll insights for the posts that are due, within the per-cycle API budget.
         
         Args:
             db: Database session
@@ -44,143 +101,145 @@ class InsightsPoller:
         """
         logger.info("[Insights Poller] Starting insights polling cycle")
         
-        # Find posted schedules with external references that need insights
-        cutoff_time = datetime.utcnow() - timedelta(hours=self.settings.insights_poll_interval_hours)
-        
-        # Query for schedules that:
-        # 1. Are posted
-        # 2. Have external references
-        # 3. Either have no recent metrics or metrics are older than poll interval
-        stmt = select(Schedule).join(ScheduleExternal).where(
-            and_(
-                Schedule.status == ContentStatus.posted,
-                Schedule.created_at >= datetime.utcnow() - timedelta(days=30)  # Only recent posts
-            )
-        )
+        now = datetime.utcnow()
+        activity, self._activity = self._activity, set()
+        include = self.queue.due_ids(now) + sorted(activity)
+        rows = db.execute(self._tracked_posts_query(due_before=now, include=include)).all()
+        for row in rows:
+            self.queue.track(row.schedule_id, row.posted_at, row.last_polled_at, row.next_poll_at)
+        for schedule_id in activity:
+            self.queue.bump(schedule_id, now)
+        due = set(self.queue.pop_due(now, self.settings.insights_poll_budget_per_cycle))
         
-        schedules = db.execute(stmt).scalars().all()
-        processed = 0
+        # Due in the queue but no longer selectable: aged out, unposted or deleted
+        for schedule_id in due - {row.schedule_id for row in rows}:
+            self.queue.forget(schedule_id)
         
-        for schedule in schedules:
-            try:
-                await self._process_schedule_insights(schedule, db)
-                processed += 1
-            except Exception as e:
-                logger.error(f"[Insights Poller] Failed to process schedule {schedule.id}: {e}")
-                continue
+        processed = await self._poll_posts([row for row in rows if row.schedule_id in due], db)
         
         db.commit()
-        logger.info(f"[Insights Poller] Processed {processed} schedules")
+        logger.info(f"[Insights Poller] Processed {processed}/{len(due)} due schedules ({len(self.queue)} tracked)")
         return processed
     
-    async def _process_schedule_insights(self, schedule: Schedule, db: Session) -> None:
-        """Process insights for a single schedule."""
-        logger.info(f"[Insights Poller] Processing insights for schedule {schedule.id}")
-        
-        # Get external references for this schedule
-        external_refs = db.query(ScheduleExternal).filter(
-            ScheduleExternal.schedule_id == schedule.id
-        ).all()
+    async def _poll_posts(self, rows: List[Any], db: Session) -> int:
+        """Fetch metrics for due posts in platform batches, upsert them and reschedule each post."""
+        # One metrics row per poll, so keep a single external ref per schedule
+        posts = list({row.schedule_id: row for row in reversed(rows)}.values())
+        if not posts:
+            return 0
         
-        if not external_refs:
-            logger.warning(f"[Insights Poller] No external references found for schedule {schedule.id}")
-            return
-        
-        # Get channel to determine provider
-        channel = db.get(Channel, schedule.channel_id)
-        if not channel:
-            logger.warning(f"[Insights Poller] Channel not found for schedule {schedule.id}")
-            return
-        
-        provider = channel.provider.lower()
-        
-        # Check if we should use fake insights
         if not self.insights_mapper.should_fetch_real_insights():
-            logger.info(f"[Insights Poller] Using fake insights for {provider} schedule {schedule.id}")
-            await self._generate_fake_insights(schedule, provider, db)
-            return
+            logger.info(f"[Insights Poller] Using fake insights for {len(posts)} schedules")
+            metrics = [
+                self.insights_mapper.generate_fake_metrics(post.schedule_id, post.provider.lower())
+                for post in posts
+            ]
+        else:
+            metrics = await self._fetch_insights(posts)
         
-        # Check if we already have recent metrics for today
-        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        recent_metrics = db.query(PostMetrics).filter(
-            and_(
-                PostMetrics.schedule_id == schedule.id,
-                func.date(PostMetrics.fetched_at) == today.date()
-            )
-        ).first()
+        batch_size = self.settings.insights_poll_batch_size
+        for i in range(0, len(metrics), batch_size):
+            await self._upsert_post_metrics_batch(metrics[i:i + batch_size], db)
         
-        if recent_metrics:
-            logger.info(f"[Insights Poller] Recent metrics already exist for schedule {schedule.id} on {today.date()}")
-            return
+        now = datetime.utcnow()
+        engagement = {post_metrics.schedule_id: _engagement(post_metrics) for post_metrics in metrics}
+        for post in posts:
+            self.queue.record_poll(post.schedule_id, now, engagement.get(post.schedule_id))
+        self._save_next_polls(db, [post.schedule_id for post in posts])
         
-        # Fetch real insights
-        try:
-            await self._fetch_and_store_insights(schedule, external_refs, provider, db)
-        except Exception as e:
-            logger.error(f"[Insights Poller] Failed to fetch insights for schedule {schedule.id}: {e}")
-            # Fall back to fake insights if real fetching fails
-            await self._generate_fake_insights(schedule, provider, db)
-    
-    async def _fetch_and_store_insights(
-        self, 
-        schedule: Schedule, 
-        external_refs: List[ScheduleExternal], 
-        provider: str,
-        db: Session
-    ) -> None:
-        """Fetch and store real insights from platform APIs."""
-        logger.info(f"[Insights Poller] Fetching real insights for schedule {schedule.id}")
+        for post_metrics in metrics:
+            await self._trigger_post_performance_rules(post_metrics.schedule_id, post_metrics, db)
         
-        # For now, this is a placeholder - would need access tokens
-        # In practice, you'd get access tokens from your token storage system
+        return len(metrics)
+    
+    def _save_next_polls(self, db: Session, schedule_ids: List[str]) -> None:
+        """Store each post's next due time so later cycles only select due posts."""
+        refs = ScheduleExternal.__table__
+        db.execute(
+            update(refs)
+            .where(refs.c.schedule_id == bindparam("sid"))
+            .values(next_poll_at=bindparam("next_poll_at")),
+            [{"sid": schedule_id, "next_poll_at": self.queue.due_at(schedule_id)} for schedule_id in schedule_ids]
+        )
+    
+    async def _fetch_insights(self, posts: List[Any]) -> List[PostMetrics]:
+        """
+        Fetch real insights grouped by provider and access token.
         
-        if provider in ["facebook", "instagram"]:
-            logger.warning(f"[Insights Poller] Meta insights fetching not fully implemented for {schedule.id}")
-            # Would implement: await self.meta_fetcher.get_post_insights(...)
-        elif provider == "linkedin":
-            logger.warning(f"[Insights Poller] LinkedIn insights fetching not fully implemented for {schedule.id}")
-            # Would implement: await self.linkedin_fetcher.get_post_insights(...)
+        Each group is split into platform batch requests, fetched with bounded
+        concurrency. Posts whose fetch fails get no metrics this cycle and are
+        retried on their normal poll interval.
+        """
+        groups: Dict[Tuple[str, str, Optional[str]], List[Any]] = {}
+        for post in posts:
+            if not post.access_token:
+                logger.warning(f"[Insights Poller] No access token for schedule {post.schedule_id}")
+                continue
+            groups.setdefault((post.provider.lower(), post.access_token, post.account_ref), []).append(post)
         
-        # For now, generate fake insights as fallback
-        await self._generate_fake_insights(schedule, provider, db)
-    
-    async def _generate_fake_insights(
-        self, 
-        schedule: Schedule, 
-        provider: str, 
-        db: Session
-    ) -> None:
-        """Generate fake insights for testing/development."""
-        logger.info(f"[Insights Poller] Generating fake insights for {provider} schedule {schedule.id}")
+        semaphore = asyncio.Semaphore(self.settings.insights_poll_concurrency)
+        batch_size = self.settings.insights_poll_batch_size
         
-        post_metrics = self.insights_mapper.generate_fake_metrics(schedule.id, provider)
-        await self._upsert_post_metrics(post_metrics, db)
+        async def fetch(provider: str, access_token: str, account_ref: Optional[str], batch: List[Any]) -> List[PostMetrics]:
+            ref_ids = [post.ref_id for post in batch]
+            async with semaphore:
+                try:
+                    if provider in ["facebook", "instagram"]:
+                        insights = await self.meta_fetcher.get_multiple_posts_insights(ref_ids, provider, access_token)
+                    elif provider == "linkedin":
+                        insights = await self.linkedin_fetcher.get_multiple_posts_insights(
+                            ref_ids, access_token, _linkedin_organization_urn(account_ref)
+                        )
+                    else:
+                        logger.warning(f"[Insights Poller] Insights not supported for provider {provider}")
+                        return []
+                except Exception as e:
+                    logger.error(f"[Insights Poller] Failed to fetch {provider} insights for {len(batch)} posts: {e}")
+                    return []
+            return [
+                self.insights_mapper.map_platform_to_post_metrics(insights[post.ref_id], post.schedule_id, provider)
+                for post in batch
+                if insights.get(post.ref_id)
+            ]
         
-        # Trigger rules for post performance
-        await self._trigger_post_performance_rules(schedule.id, post_metrics, db)
+        results = await asyncio.gather(*(
+            fetch(provider, access_token, account_ref, group[i:i + batch_size])
+            for (provider, access_token, account_ref), group in groups.items()
+            for i in range(0, len(group), batch_size)
+        ))
+        return [post_metrics for batch in results for post_metrics in batch]
     
     async def _upsert_post_metrics(self, post_metrics: PostMetrics, db: Session) -> None:
         """
         Upsert PostMetrics to prevent duplicates by schedule_id + fetched_at::date.
         Uses PostgreSQL's ON CONFLICT for atomic upsert.
         """
+        await self._upsert_post_metrics_batch([post_metrics], db)
+    
+    async def _upsert_post_metrics_batch(self, metrics: List[PostMetrics], db: Session) -> None:
+        """Upsert many PostMetrics rows with a single multi-row ON CONFLICT statement."""
+        if not metrics:
+            return
         try:
-            # Create upsert statement using PostgreSQL's ON CONFLICT
-            stmt = insert(PostMetrics).values(
-                id=post_metrics.id,
-                schedule_id=post_metrics.schedule_id,
-                impressions=post_metrics.impressions,
-                reach=post_metrics.reach,
-                likes=post_metrics.likes,
-                comments=post_metrics.comments,
-                shares=post_metrics.shares,
-                clicks=post_metrics.clicks,
-                video_views=post_metrics.video_views,
-                saves=post_metrics.saves,
-                cost_cents=post_metrics.cost_cents,
-                fetched_at=post_metrics.fetched_at,
-                created_at=post_metrics.created_at
-            )
+            stmt = insert(PostMetrics).values([
+                {
+                    "id": post_metrics.id,
+                    "schedule_id": post_metrics.schedule_id,
+                    "impressions": post_metrics.impressions,
+                    "reach": post_metrics.reach,
+                    "likes": post_metrics.likes,
+                    "comments": post_metrics.comments,
+                    "shares": post_metrics.shares,
+                    "clicks": post_metrics.clicks,
+                    "video_views": post_metrics.video_views,
+                    "saves": post_metrics.saves,
+                    "cost_cents": post_metrics.cost_cents,
+                    "fetched_at": post_metrics.fetched_at,
+                    "created_at": post_metrics.created_at or datetime.utcnow(),
+                    "updated_at": datetime.utcnow()
+                }
+                for post_metrics in metrics
+            ])
             
             # On conflict with unique constraint (schedule_id, fetched_at), update the metrics
             stmt = stmt.on_conflict_do_update(
@@ -195,17 +254,18 @@ class InsightsPoller:
                     "video_views": stmt.excluded.video_views,
                     "saves": stmt.excluded.saves,
                     "cost_cents": stmt.excluded.cost_cents,
-                    "created_at": stmt.excluded.created_at
+                    "created_at": stmt.excluded.created_at,
+                    "updated_at": stmt.excluded.updated_at
                 }
             )
             
             db.execute(stmt)
-            logger.info(f"[Insights Poller] Upserted PostMetrics for schedule {post_metrics.schedule_id}")
+            logger.info(f"[Insights Poller] Upserted PostMetrics for {len(metrics)} schedules")
             
         except Exception as e:
             logger.error(f"[Insights Poller] Failed to upsert PostMetrics: {e}")
             # Fallback to regular insert
-            db.add(post_metrics)
+            db.add_all(metrics)
     
     async def poll_insights_for_schedule(self, schedule_id: str, db: Session) -> bool:
         """
@@ -224,7 +284,10 @@ class InsightsPoller:
                 logger.error(f"[Insights Poller] Schedule {schedule_id} not found")
                 return False
             
-            await self._process_schedule_insights(schedule, db)
+            rows = db.execute(self._tracked_posts_query(schedule_id)).all()
+            for row in rows:
+                self.queue.track(row.schedule_id, row.posted_at, row.last_polled_at, row.next_poll_at)
+            await self._poll_posts(rows, db)
             db.commit()
             return True
             
@@ -262,9 +325,51 @@ class InsightsPoller:
             "schedules_with_external_refs": schedules_with_refs,
             "schedules_with_recent_metrics": schedules_with_metrics,
             "poll_interval_hours": self.settings.insights_poll_interval_hours,
+            "poll_budget_per_cycle": self.settings.insights_poll_budget_per_cycle,
+            "queued_posts": len(self.queue),
             "using_fake_insights": self.settings.feature_fake_insights
         }
     
+    async def listen_for_activity(self, redis_client: redis.Redis) -> None:
+        """Re-poll posts soon when a webhook reports renewed activity on them."""
+        pubsub = redis_client.pubsub()
+        await pubsub.subscribe(INSIGHTS_ACTIVITY_CHANNEL)
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                try:
+                    schedule_id = json.loads(message["data"])["id"]
+                except (ValueError, TypeError, KeyError) as e:
+                    logger.warning(f"[Insights Poller] Ignoring malformed activity event: {e}")
+                    continue
+                if not self.queue.bump(schedule_id, datetime.utcnow()):
+                    self._activity.add(schedule_id)
+                self._wakeup.set()
+        finally:
+            await pubsub.unsubscribe(INSIGHTS_ACTIVITY_CHANNEL)
+    
+    async def supervise_activity_listener(self, redis_client: redis.Redis) -> None:
+        """Keep ``listen_for_activity`` running, restarting it with backoff if it dies.
+        
+        Activity published while the listener is down is lost; those posts
+        are still polled on their normal back-off schedule.
+        """
+        backoff = 1.0
+        while True:
+            started = time.monotonic()
+            try:
+                await self.listen_for_activity(redis_client)
+                logger.warning("[Insights Poller] Activity listener stopped, restarting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[Insights Poller] Activity listener failed, restarting in {backoff}s: {e}")
+            if time.monotonic() - started > 60:
+                backoff = 1.0
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60.0)
+    
     async def _trigger_post_performance_rules(
         self, 
         schedule_id: str, 
@@ -303,6 +408,21 @@ class InsightsPoller:
             logger.error(f"[Insights Poller] Failed to trigger post performance rules: {e}")
 
 
+def _engagement(post_metrics: PostMetrics) -> int:
+    """Interactions used to tell whether a post's metrics are still moving."""
+    return sum(
+        value or 0
+        for value in (post_metrics.likes, post_metrics.comments, post_metrics.shares, post_metrics.clicks, post_metrics.saves)
+    )
+
+
+def _linkedin_organization_urn(account_ref: Optional[str]) -> Optional[str]:
+    """Channel account refs hold either the organization URN or its numeric id."""
+    if not account_ref:
+        return None
+    return account_ref if account_ref.startswith("urn:") else f"urn:li:organization:{account_ref}"
+
+
 async def main() -> None:
     """Main function for running the insights poller."""
     from app.db.session import SessionLocal
@@ -311,26 +431,41 @@ async def main() -> None:
     
     poller = InsightsPoller()
     
-    while True:
-        try:
-            db = SessionLocal()
+    listener = None
+    try:
+        redis_client = redis.from_url(poller.settings.redis_url)
+        await redis_client.ping()
+        # Share rule cooldowns with the rules workers
+        rules_engine.cooldowns.redis = redis_client
+        listener = asyncio.create_task(poller.supervise_activity_listener(redis_client))
+    except Exception as e:
+        logger.warning(f"[Insights Poller] Redis unavailable, running without activity events: {e}")
+    
+    try:
+        while True:
             try:
-                processed = await poller.poll_insights_once(db)
-                logger.info(f"[Insights Poller] Processed {processed} schedules")
-            finally:
-                db.close()
-            
-            # Wait for next poll interval
-            poll_interval = poller.settings.insights_poll_interval_hours * 3600  # Convert to seconds
-            logger.info(f"[Insights Poller] Waiting {poller.settings.insights_poll_interval_hours} hours before next poll")
-            await asyncio.sleep(poll_interval)
-            
-        except KeyboardInterrupt:
-            logger.info("[Insights Poller] Shutting down insights poller")
-            break
-        except Exception as e:
-            logger.error(f"[Insights Poller] Unexpected error: {e}")
-            await asyncio.sleep(60)  # Wait 1 minute before retrying
+                db = SessionLocal()
+                try:
+                    await poller.poll_insights_once(db)
+                finally:
+                    db.close()
+                
+                # Wake at the next tick, or earlier when an activity event bumps a post
+                poller._wakeup.clear()
+                try:
+                    await asyncio.wait_for(poller._wakeup.wait(), timeout=poller.settings.insights_poll_tick_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                
+            except KeyboardInterrupt:
+                logger.info("[Insights Poller] Shutting down insights poller")
+                break
+            except Exception as e:
+                logger.error(f"[Insights Poller] Unexpected error: {e}")
+                await asyncio.sleep(60)  # Wait 1 minute before retrying
+    finally:
+        if listener:
+            listener.cancel()
 
 
 if __name__ == "__main__":
@@ -6,44 +6,48 @@ import os
 import logging
 
 import httpx
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 
 from app.db.session import get_db
-from app.analytics.reward import compute_reward
+from app.analytics.reward import reward_from_metrics
 from app.models.content import Schedule, ContentStatus
 from app.models.entities import Channel
 from app.models.optimiser import ScheduleMetrics
-from app.optimiser.bandit import derive_key
+from app.optimiser.bandit import apply_rewards, derive_key
 
 logger = logging.getLogger(__name__)
 
 
 async def tick_once(db: Session) -> int:
 	cutoff = datetime.utcnow() - timedelta(hours=72)
-	# Find posted schedules with metrics present but not applied
+	# Posted schedules with metrics present but not applied, with their channel, in one query
 	rows = db.execute(
-		select(Schedule).where(Schedule.status == ContentStatus.posted, Schedule.created_at >= cutoff)
-	).scalars().all()
-	updated = 0
-	for sch in rows:
-		met = db.get(ScheduleMetrics, sch.id)
-		if not met or met.applied:
-			continue
-		rew = compute_reward(sch.id, db)
+		select(
+			Schedule.id, Schedule.org_id, Schedule.scheduled_at, Channel.provider,
+			ScheduleMetrics.ctr, ScheduleMetrics.engagement_rate, ScheduleMetrics.reach_norm, ScheduleMetrics.conv_rate,
+		)
+		.join(ScheduleMetrics, ScheduleMetrics.schedule_id == Schedule.id)
+		.join(Channel, Channel.id == Schedule.channel_id)
+		.where(
+			Schedule.status == ContentStatus.posted,
+			Schedule.created_at >= cutoff,
+			ScheduleMetrics.applied == False,  # noqa: E712
+		)
+	).all()
+	rewards = []
+	applied_ids = []
+	for row in rows:
+		rew = reward_from_metrics(row)
 		if rew is None:
 			continue
-		ch = db.get(Channel, sch.channel_id)
-		if not ch:
-			continue
-		key = derive_key(ch, "post", sch.scheduled_at)
-		from app.optimiser.bandit import update_state
-		update_state(db, sch.org_id, key, rew)
-		met.applied = True
-		db.add(met)
-		updated += 1
+		rewards.append((row.org_id, derive_key(row, "post", row.scheduled_at), rew))
+		applied_ids.append(row.id)
+	if applied_ids:
+		apply_rewards(db, rewards)
+		db.execute(update(ScheduleMetrics).where(ScheduleMetrics.schedule_id.in_(applied_ids)).values(applied=True))
 	db.commit()
-	return updated
+	return len(applied_ids)
 
 
 async def main() -> None:
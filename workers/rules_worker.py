@@ -4,8 +4,10 @@ import asyncio
 import json
 import logging
 import os
+import socket
+import time
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
 import httpx
 import redis.asyncio as redis
@@ -28,77 +30,115 @@ async def get_redis_client() -> redis.Redis:
     global redis_client
     if redis_client is None:
         settings = get_settings()
-        redis_client = redis.from_url(settings.redis_url)
+        redis_client = redis.from_url(settings.redis_url, decode_responses=True)
     return redis_client
 
 
 class RulesWorker:
-    """Background worker for processing automation rules."""
+    """Background worker for processing automation rules.
     
-    def __init__(self):
+    Trigger events arrive on a Redis Stream read through a consumer group,
+    so any number of workers can share the load. Each batch is processed
+    with one DB session and acked afterwards; entries a dead worker never
+    acked are reclaimed once idle for ``rules_claim_idle_ms``. Delivery is
+    at-least-once; rule cooldowns keep a redelivered event from re-running
+    actions.
+    """
+    
+    def __init__(self, consumer: Optional[str] = None):
         self.settings = get_settings()
         self.redis = None
+        self.stream_key = self.settings.rules_stream_key
+        self.group = self.settings.rules_consumer_group
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self._last_scheduled_check = 0.0
     
     async def initialize(self):
         """Initialize the worker."""
         self.redis = await get_redis_client()
-        logger.info("Rules worker initialized")
-    
-    async def process_trigger_event(self, trigger_type: str, payload: Dict[str, Any]) -> int:
-        """Process a trigger event."""
+        # Share rule cooldowns with the other rules workers
+        rules_engine.cooldowns.redis = self.redis
         try:
-            db = SessionLocal()
-            try:
-                # Convert string to enum
-                trigger_enum = TriggerType(trigger_type)
-                
-                # Process the trigger
-                executed_count = await rules_engine.process_trigger(trigger_enum, payload, db)
-                
-                logger.info(f"Processed trigger {trigger_type}, executed {executed_count} rules")
-                return executed_count
-                
-            finally:
-                db.close()
-                
-        except Exception as e:
-            logger.error(f"Error processing trigger {trigger_type}: {e}")
-            return 0
+            await self.redis.xgroup_create(self.stream_key, self.group, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        logger.info(f"Rules worker {self.consumer} initialized")
     
     async def poll_redis_events(self) -> int:
-        """Poll Redis for trigger events."""
+        """Process one batch of trigger events: reclaimed ones first, else new ones."""
         if not self.redis:
             await self.initialize()
         
-        processed_count = 0
+        entries = await self._claim_stale_events()
+        if not entries:
+            response = await self.redis.xreadgroup(
+                self.group,
+                self.consumer,
+                {self.stream_key: ">"},
+                count=self.settings.rules_batch_size,
+                block=self.settings.rules_batch_block_ms
+            )
+            entries = [entry for _, stream_entries in response or [] for entry in stream_entries]
         
+        if not entries:
+            return 0
+        return await self.process_batch(entries)
+    
+    async def process_batch(self, entries: List[Tuple[str, Dict[str, str]]]) -> int:
+        """Run a batch of stream entries through the rules engine on one session, then ack them."""
+        executed_count = 0
+        db = SessionLocal()
         try:
-            # Check for events in Redis streams or pub/sub
-            # For now, we'll use a simple list-based approach
-            while True:
-                # Pop event from Redis list
-                event_data = await self.redis.lpop("rules:events")
-                if not event_data:
-                    break
-                
+            for entry_id, fields in entries:
                 try:
-                    event = json.loads(event_data)
-                    trigger_type = event.get("trigger_type")
-                    payload = event.get("payload", {})
-                    
-                    if trigger_type:
-                        count = await self.process_trigger_event(trigger_type, payload)
-                        processed_count += count
-                    
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse event data: {e}")
-                except Exception as e:
-                    logger.error(f"Error processing event: {e}")
-            
-        except Exception as e:
-            logger.error(f"Error polling Redis events: {e}")
+                    trigger_type = TriggerType(fields.get("trigger_type"))
+                    payload = json.loads(fields.get("payload") or "{}")
+                except (ValueError, TypeError) as e:
+                    logger.error(f"Dropping malformed rules event {entry_id}: {e}")
+                    continue
+                
+                executed_count += await rules_engine.process_trigger(trigger_type, payload, db)
+        finally:
+            db.close()
         
-        return processed_count
+        # Unacked entries (e.g. the DB went away mid-batch) are redelivered via the pending list
+        await self.redis.xack(self.stream_key, self.group, *[entry_id for entry_id, _ in entries])
+        logger.info(f"Processed {len(entries)} trigger events, executed {executed_count} rules")
+        return executed_count
+    
+    async def _claim_stale_events(self) -> List[Tuple[str, Dict[str, str]]]:
+        """Take over entries other consumers read but never acked, dead-lettering repeat failures."""
+        pending = await self.redis.xpending_range(
+            self.stream_key,
+            self.group,
+            min="-",
+            max="+",
+            count=self.settings.rules_batch_size,
+            idle=self.settings.rules_claim_idle_ms
+        )
+        if not pending:
+            return []
+        
+        deliveries = {item["message_id"]: item["times_delivered"] for item in pending}
+        claimed = await self.redis.xclaim(
+            self.stream_key, self.group, self.consumer, self.settings.rules_claim_idle_ms, list(deliveries)
+        )
+        
+        entries = []
+        for entry_id, fields in claimed:
+            if not fields:
+                continue
+            if deliveries.get(entry_id, 0) >= self.settings.rules_max_deliveries:
+                logger.error(f"Rules event {entry_id} failed {deliveries[entry_id]} deliveries, dead-lettering")
+                await self.redis.xadd(f"{self.stream_key}:dead", {**fields, "entry_id": entry_id})
+                await self.redis.xack(self.stream_key, self.group, entry_id)
+                continue
+            entries.append((entry_id, fields))
+        
+        if entries:
+            logger.info(f"Reclaimed {len(entries)} stale trigger events")
+        return entries
     
     async def check_scheduled_rules(self) -> int:
         """Check for rules that should be triggered based on time or data conditions."""
@@ -130,29 +170,33 @@ class RulesWorker:
         
         processed_count = 0
         
-        # Process Redis events
+        # Process stream events; blocks up to rules_batch_block_ms when idle
         redis_count = await self.poll_redis_events()
         processed_count += redis_count
         
-        # Check scheduled rules
-        scheduled_count = await self.check_scheduled_rules()
-        processed_count += scheduled_count
+        # Check scheduled rules once per interval
+        now = time.monotonic()
+        if now - self._last_scheduled_check >= self.settings.rules_worker_interval_minutes * 60:
+            self._last_scheduled_check = now
+            scheduled_count = await self.check_scheduled_rules()
+            processed_count += scheduled_count
         
         return processed_count
 
 
 async def publish_trigger_event(trigger_type: str, payload: Dict[str, Any]):
-    """Publish a trigger event to Redis."""
+    """Publish a trigger event to the rules stream."""
     try:
         redis_client = await get_redis_client()
+        settings = get_settings()
         
         event = {
             "trigger_type": trigger_type,
-            "payload": payload,
+            "payload": json.dumps(payload, default=str),
             "timestamp": datetime.utcnow().isoformat()
         }
         
-        await redis_client.lpush("rules:events", json.dumps(event))
+        await redis_client.xadd(settings.rules_stream_key, event, maxlen=settings.rules_stream_maxlen, approximate=True)
         logger.info(f"Published trigger event: {trigger_type}")
         
     except Exception as e:
@@ -175,12 +219,13 @@ async def main() -> None:
             processed = await worker.run_once()
             if processed > 0:
                 logger.info(f"Rules worker processed {processed} events")
-                backoff = 1.0  # Reset backoff on success
             else:
                 logger.debug("Rules worker found no events to process")
+            backoff = 1.0  # Reset backoff on success
             
-            # Wait for next poll interval
-            await asyncio.sleep(settings.rules_worker_interval_minutes * 60)
+            # Reads block on the stream; only idle-wait while automations are off
+            if not settings.automations_enabled:
+                await asyncio.sleep(settings.rules_worker_interval_minutes * 60)
             
         except KeyboardInterrupt:
             logger.info("Rules worker shutting down")
@@ -1,13 +1,25 @@
 from __future__ import annotations
 
 import asyncio
+import json
 import os
 import time
 import logging
 import signal
+import socket
 import sys
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Set
+from uuid import uuid4
 
 import httpx
+import redis.asyncio as redis
+
+from app.core.config import get_settings
+from app.db.session import SessionLocal
+from app.scheduler.engine import run_schedules, run_tick
+from app.scheduler.partitions import PartitionLeaseManager
+from app.scheduler.queue import DueQueue, SCHEDULE_EVENTS_CHANNEL
 
 logger = logging.getLogger(__name__)
 
@@ -50,6 +62,173 @@ async def save_post_results(post_results: list[dict]) -> None:
             logger.error(f"Failed to save post result {result}: {e}")
 
 
+class DueQueueScheduler:
+    """In-process scheduler that fires posts at their scheduled_at.
+
+    Pending schedules inside the horizon live in a :class:`DueQueue`; the
+    worker sleeps until the earliest one is due (or a change event arrives
+    on ``scheduler:events``) instead of polling the database. A periodic
+    recovery pass runs the classic ``run_tick`` DB scan and reloads the queue,
+    covering missed events and schedules that entered the horizon.
+    
+    With Redis available, workers shard the org space through leased
+    partitions: each replica only queues and publishes schedules for the
+    orgs it owns, and ownership is rebalanced as replicas come and go.
+    """
+    
+    def __init__(self, redis_client: Optional[redis.Redis] = None):
+        self.settings = get_settings()
+        self.redis = redis_client
+        self.queue = DueQueue()
+        self.partitions: Optional[PartitionLeaseManager] = None
+        if redis_client is not None:
+            self.partitions = PartitionLeaseManager(
+                redis_client,
+                worker_id=f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}",
+                partitions=self.settings.scheduler_partitions,
+                lease_seconds=self.settings.scheduler_partition_lease_seconds,
+            )
+        self.horizon = timedelta(seconds=max(
+            self.settings.scheduler_queue_horizon_seconds,
+            self.settings.scheduler_recovery_interval_seconds * 2,
+        ))
+        self._wakeup = asyncio.Event()
+        self._inflight: Set[asyncio.Task] = set()
+        self._last_recovery = 0.0
+    
+    @property
+    def _org_filter(self):
+        return self.partitions.owns_org if self.partitions else None
+    
+    def _recover(self) -> None:
+        """Reload the due queue from the database."""
+        db = SessionLocal()
+        try:
+            loaded = self.queue.load(db, self.horizon, self._org_filter)
+        finally:
+            db.close()
+        logger.info(f"Scheduler queue loaded {loaded} schedules within {self.horizon}")
+    
+    async def _recovery_tick(self) -> None:
+        db = SessionLocal()
+        try:
+            processed = await run_tick(db, self.redis, self.partitions)
+            if processed:
+                logger.warning(f"Recovery scan published {processed} schedules missed by the queue")
+        finally:
+            db.close()
+        self._recover()
+        self._last_recovery = time.monotonic()
+    
+    async def _dispatch(self, schedule_ids: list[str]) -> None:
+        db = SessionLocal()
+        try:
+            processed = await run_schedules(db, schedule_ids, self.redis, self.partitions)
+            logger.info(f"Scheduler dispatched {processed}/{len(schedule_ids)} due schedules")
+        except Exception as e:
+            logger.error(f"Dispatch of {len(schedule_ids)} schedules failed: {e}")
+        finally:
+            db.close()
+    
+    async def _listen(self) -> None:
+        """Apply schedule change events to the queue as they arrive."""
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(SCHEDULE_EVENTS_CHANNEL)
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                try:
+                    self.queue.apply_event(json.loads(message["data"]), self.horizon, self._org_filter)
+                    self._wakeup.set()
+                except (ValueError, TypeError) as e:
+                    logger.warning(f"Ignoring malformed schedule event: {e}")
+        finally:
+            try:
+                await pubsub.unsubscribe(SCHEDULE_EVENTS_CHANNEL)
+            except Exception:
+                pass  # Connection already gone
+    
+    async def _supervise_listener(self) -> None:
+        """Keep ``_listen`` running, restarting it with backoff if it dies.
+        
+        Events published while the listener was down are lost, so every
+        restart forces a queue reload from the database.
+        """
+        backoff = 1.0
+        while True:
+            started = time.monotonic()
+            try:
+                await self._listen()
+                logger.warning("Schedule event listener stopped, restarting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Schedule event listener failed, restarting in {backoff}s: {e}")
+            if time.monotonic() - started > 60:
+                backoff = 1.0
+            self._last_recovery = 0.0
+            self._wakeup.set()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60.0)
+    
+    async def _heartbeat(self) -> None:
+        """Renew partition leases; a rebalance forces an immediate queue reload."""
+        interval = max(1.0, self.settings.scheduler_partition_lease_seconds / 3)
+        while True:
+            try:
+                if await self.partitions.heartbeat():
+                    self._last_recovery = 0.0
+                    self._wakeup.set()
+            except Exception as e:
+                logger.error(f"Partition heartbeat failed: {e}")
+            await asyncio.sleep(interval)
+    
+    async def run(self) -> None:
+        background = []
+        if self.redis:
+            background.append(asyncio.create_task(self._supervise_listener()))
+        if self.partitions:
+            await self.partitions.heartbeat()
+            background.append(asyncio.create_task(self._heartbeat()))
+        recovery_interval = self.settings.scheduler_recovery_interval_seconds
+        try:
+            while True:
+                if time.monotonic() - self._last_recovery >= recovery_interval:
+                    try:
+                        await self._recovery_tick()
+                    except Exception as e:
+                        logger.error(f"Scheduler recovery failed: {e}")
+                        self._last_recovery = time.monotonic()
+                
+                now = datetime.now(timezone.utc)
+                while True:
+                    due = self.queue.pop_due(now, self.settings.scheduler_batch_size)
+                    if not due:
+                        break
+                    task = asyncio.create_task(self._dispatch(due))
+                    self._inflight.add(task)
+                    task.add_done_callback(self._inflight.discard)
+                
+                timeout = recovery_interval - (time.monotonic() - self._last_recovery)
+                next_due = self.queue.seconds_until_next(now)
+                if next_due is not None:
+                    timeout = min(timeout, next_due)
+                
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=max(timeout, 0.0))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for task in background:
+                task.cancel()
+            if self._inflight:
+                await asyncio.gather(*self._inflight, return_exceptions=True)
+            if self.partitions:
+                await self.partitions.release_all()
+
+
 async def main() -> None:
     """Main scheduler worker loop with improved error handling."""
     backoff = 1.0
@@ -63,17 +242,34 @@ async def main() -> None:
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
     
-    async with httpx.AsyncClient(timeout=30) as client:
-        logger.info("Scheduler worker started")
-        while True:
-            try:
-                await tick_once(client)
-                backoff = 1.0  # Reset backoff on success
-            except Exception as e:
-                logger.error(f"Tick failed: {e}, backing off for {backoff}s")
-                backoff = min(backoff * 2, max_backoff)  # Exponential backoff with cap
-            
+    if os.getenv("SCHEDULER_MODE", "queue") == "http":
+        # Legacy mode: poll the API's /schedule/run endpoint
+        async with httpx.AsyncClient(timeout=30) as client:
+            logger.info("Scheduler worker started (http polling)")
+            while True:
+                try:
+                    await tick_once(client)
+                    backoff = 1.0  # Reset backoff on success
+                except Exception as e:
+                    logger.error(f"Tick failed: {e}, backing off for {backoff}s")
+                    backoff = min(backoff * 2, max_backoff)  # Exponential backoff with cap
+                
+                await asyncio.sleep(backoff)
+    
+    logger.info("Scheduler worker started (in-process due queue)")
+    while True:
+        try:
+            redis_client = redis.from_url(get_settings().redis_url)
+            await redis_client.ping()
+        except Exception as e:
+            logger.warning(f"Redis unavailable, running without change events: {e}")
+            redis_client = None
+        try:
+            await DueQueueScheduler(redis_client).run()
+        except Exception as e:
+            logger.error(f"Scheduler loop failed: {e}, restarting in {backoff}s")
             await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, max_backoff)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.db.session import SessionLocal
+from app.services.metrics_buffer import MetricsWriteBuffer
+from app.services.webhook_ingest import WebhookBatchApplier, WebhookStream, parse_meta_events, unique_events
+
+logger = logging.getLogger(__name__)
+
+PARSERS = {
+    "meta": parse_meta_events,
+}
+
+
+class WebhookIngestWorker:
+    """Drains the inbound webhook stream in batches.
+
+    Each batch is parsed, stripped of events already applied, handed to the
+    metrics buffer (or, without one, written in one transaction) and then
+    acked, so delivery is at-least-once and a crashed worker's entries are
+    reclaimed by the others after ``claim_idle_ms``.
+    """
+
+    def __init__(
+        self,
+        stream: WebhookStream,
+        consumer: str,
+        batch_size: int = 500,
+        block_ms: int = 1000,
+        claim_idle_ms: int = 60000,
+        buffer: Optional[MetricsWriteBuffer] = None
+    ):
+        self.stream = stream
+        self.buffer = buffer
+        self.consumer = consumer
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.claim_idle_ms = claim_idle_ms
+
+    @classmethod
+    def from_settings(cls) -> "WebhookIngestWorker":
+        settings = get_settings()
+        return cls(
+            WebhookStream.from_settings(),
+            consumer=f"{socket.gethostname()}-{os.getpid()}",
+            batch_size=settings.webhook_batch_size,
+            block_ms=settings.webhook_batch_block_ms,
+            claim_idle_ms=settings.webhook_claim_idle_ms,
+            buffer=MetricsWriteBuffer.from_settings(),
+        )
+
+    async def run_once(self) -> int:
+        """Process reclaimed entries, or else the next batch of new ones."""
+        entries = await self.stream.claim_stale(self.consumer, self.claim_idle_ms, self.batch_size)
+        if not entries:
+            entries = await self.stream.read(self.consumer, self.batch_size, self.block_ms)
+        if not entries:
+            return 0
+        try:
+            return await self.process_batch(entries)
+        except Exception as e:
+            # Retry entries one by one so a single bad payload cannot hold back the batch
+            logger.error(f"[Webhook Ingest] Batch of {len(entries)} failed, retrying individually: {e}")
+            applied = 0
+            for entry in entries:
+                try:
+                    applied += await self.process_batch([entry])
+                except Exception as entry_error:
+                    logger.error(f"[Webhook Ingest] Dead-lettering entry {entry[0]}: {entry_error}")
+                    await self.stream.dead_letter(entry[0], entry[1], str(entry_error))
+            return applied
+
+    async def process_batch(self, entries: List[Tuple[str, Dict[str, str]]]) -> int:
+        """Apply a batch of stream entries; returns the number of events applied."""
+        events = []
+        for entry_id, fields in entries:
+            parser = PARSERS.get(fields.get("platform"))
+            if parser is None:
+                logger.warning(f"[Webhook Ingest] No parser for platform {fields.get('platform')} (entry {entry_id})")
+                continue
+            events.extend(parser(fields.get("body") or "{}"))
+
+        events = unique_events(events)
+        events = unique_events(events, await self.stream.seen([event.event_id for event in events]))
+        if events and self.buffer is not None:
+            posts = self.buffer.add(events)
+            logger.info(f"[Webhook Ingest] Buffered {len(events)} events for {posts} posts")
+        elif events:
+            db = SessionLocal()
+            try:
+                result = WebhookBatchApplier(db).apply(events)
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+            logger.info(f"[Webhook Ingest] Applied {result['events']} events to {result['posts']} posts")
+
+        await self.stream.mark_seen([event.event_id for event in events])
+        await self.stream.ack([entry_id for entry_id, _ in entries])
+        return len(events)
+
+
+async def main() -> None:
+    """Main function for running the webhook ingest worker."""
+    logger.info("[Webhook Ingest] Starting webhook ingest worker")
+
+    worker = WebhookIngestWorker.from_settings()
+    await worker.stream.ensure_group()
+
+    while True:
+        try:
+            await worker.run_once()
+        except KeyboardInterrupt:
+            logger.info("[Webhook Ingest] Shutting down webhook ingest worker")
+            break
+        except Exception as e:
+            logger.error(f"[Webhook Ingest] Unexpected error: {e}")
+            await asyncio.sleep(5)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
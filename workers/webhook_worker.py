@@ -5,7 +5,7 @@ Webhook worker for sending webhook notifications.
 import logging
 import json
 import asyncio
-import aiohttp
+import httpx
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 import hmac
@@ -14,6 +14,7 @@ import hashlib
 from sqlalchemy.orm import Session
 from app.db.session import get_db
 from app.models.webhooks import Webhook, WebhookDelivery
+from app.utils.http import get_http_pool
 
 logger = logging.getLogger(__name__)
 
@@ -123,29 +124,29 @@ async def _send_http_request(
 ) -> Dict[str, Any]:
     """Send HTTP request to webhook URL."""
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                url,
-                data=payload,
-                headers=headers,
-                timeout=aiohttp.ClientTimeout(total=timeout)
-            ) as response:
-                response_body = await response.text()
-                response_headers = dict(response.headers)
-                
-                return {
-                    "success": True,
-                    "status_code": response.status,
-                    "response_body": response_body,
-                    "response_headers": response_headers
-                }
+        # Customer URLs are open-ended, so they share one bounded client
+        response = await get_http_pool().request(
+            "POST",
+            url,
+            shared=True,
+            content=payload,
+            headers=headers,
+            timeout=timeout
+        )
+        
+        return {
+            "success": True,
+            "status_code": response.status_code,
+            "response_body": response.text,
+            "response_headers": dict(response.headers)
+        }
                 
-    except asyncio.TimeoutError:
+    except (asyncio.TimeoutError, httpx.TimeoutException):
         return {
             "success": False,
             "error": f"Request timeout after {timeout} seconds"
         }
-    except aiohttp.ClientError as e:
+    except httpx.HTTPError as e:
         return {
             "success": False,
             "error": f"HTTP client error: {str(e)}"